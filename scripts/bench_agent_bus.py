@@ -0,0 +1,166 @@
+"""
+AgentBus 线路编码基准
+
+目的：
+- 负载为合成的会话历史（TaskPayload.context["session_messages"] 形态），按消息条数控制大小
+- 对比各线路格式的编码 / 解码耗时与线上字节数：
+  旧格式 JSON、JSON+zlib、msgpack、msgpack+zstd（后两者视依赖是否安装）
+- 安装了 pyzmq 时，另测本机 tcp://127.0.0.1 上 Master -> Worker -> Master 的往返延迟
+  （AgentBus + WorkerBus，Worker 原样回显负载）
+
+运行：
+    PYTHONPATH=src python scripts/bench_agent_bus.py
+    PYTHONPATH=src python scripts/bench_agent_bus.py --sizes 10,100,1000,5000 --rounds 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from openakita.orchestration import codec
+from openakita.orchestration.codec import WireFormat
+from openakita.orchestration.messages import AgentMessage, CommandType
+
+_TEXT = "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工"
+_WORDS = ["python", "deploy", "config", "memory", "agent", "schedule", "report", "token"]
+
+
+def _history(n: int, rng: random.Random) -> list[dict]:
+    messages = []
+    for i in range(n):
+        text = "".join(rng.choice(_TEXT) for _ in range(rng.randint(40, 160)))
+        words = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(3, 12)))
+        messages.append({
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": f"{text} {words}",
+            "timestamp": "2026-01-01T12:00:00",
+        })
+    return messages
+
+
+def _formats() -> list[tuple[str, WireFormat | None]]:
+    formats: list[tuple[str, WireFormat | None]] = [
+        ("legacy json", None),
+        ("json+zlib", WireFormat(codec.CODEC_JSON, codec.COMPRESS_ZLIB)),
+    ]
+    if codec.HAS_MSGPACK:
+        formats.append(("msgpack", WireFormat(codec.CODEC_MSGPACK, codec.COMPRESS_NONE)))
+        formats.append(("msgpack+zlib", WireFormat(codec.CODEC_MSGPACK, codec.COMPRESS_ZLIB)))
+    if codec.HAS_ZSTD:
+        best = codec.CODEC_MSGPACK if codec.HAS_MSGPACK else codec.CODEC_JSON
+        formats.append((f"{best}+zstd", WireFormat(best, codec.COMPRESS_ZSTD)))
+    return formats
+
+
+def _task_message(history: list[dict]) -> AgentMessage:
+    return AgentMessage.command(
+        sender_id="master", target_id="bench-worker", command_type=CommandType.GET_STATUS,
+        payload={"task_id": "t", "content": "hi", "context": {"session_messages": history}},
+    )
+
+
+def _bench_codec(message: AgentMessage, wire: WireFormat | None, rounds: int) -> tuple:
+    enc, dec = [], []
+    data = b""
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        data = message.to_bytes(wire)
+        t1 = time.perf_counter()
+        AgentMessage.from_bytes(data)
+        t2 = time.perf_counter()
+        enc.append((t1 - t0) * 1000)
+        dec.append((t2 - t1) * 1000)
+    return len(data), statistics.median(enc), statistics.median(dec)
+
+
+async def _bench_roundtrip(
+    messages: dict[int, AgentMessage], formats: list, rounds: int, port: int
+) -> dict[tuple[int, str], float]:
+    from openakita.orchestration.bus import AgentBus, BusConfig, WorkerBus
+
+    config = BusConfig(
+        router_address=f"tcp://127.0.0.1:{port}", pub_address=f"tcp://127.0.0.1:{port + 1}"
+    )
+    master = AgentBus(config=config, is_master=True)
+    worker = WorkerBus(worker_id="bench-worker", config=config)
+
+    async def echo(message: AgentMessage) -> AgentMessage:
+        return AgentMessage.response(
+            sender_id="bench-worker", target_id="master",
+            correlation_id=message.msg_id, payload=message.payload,
+        )
+
+    worker.register_command_handler(CommandType.GET_STATUS, echo)
+    await master.start()
+    await worker.start()
+    # 让 DEALER 完成连接，ROUTER 才能按 identity 路由
+    await worker._send_to_master(AgentMessage.heartbeat("bench-worker", _dummy_info()))
+    await asyncio.sleep(0.3)
+
+    results = {}
+    try:
+        for size, message in messages.items():
+            for name, wire in formats:
+                master._peer_formats.pop("bench-worker", None)
+                if wire is not None:
+                    master._peer_formats["bench-worker"] = wire
+                worker.set_wire_format(wire)
+                lat = []
+                for _ in range(rounds):
+                    t0 = time.perf_counter()
+                    response = await master.send_command(
+                        "bench-worker", CommandType.GET_STATUS, message.payload, timeout=10
+                    )
+                    if response is None:
+                        raise RuntimeError("round-trip timeout")
+                    lat.append((time.perf_counter() - t0) * 1000)
+                results[(size, name)] = statistics.median(lat)
+    finally:
+        await worker.stop()
+        await master.stop()
+    return results
+
+
+def _dummy_info():
+    from openakita.orchestration.messages import AgentInfo
+
+    return AgentInfo(agent_id="bench-worker", agent_type="worker", process_id=0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--sizes", default="5,50,500,5000", help="会话历史消息条数，逗号分隔")
+    parser.add_argument("--rounds", type=int, default=30)
+    parser.add_argument("--port", type=int, default=15555)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    sizes = [int(s) for s in args.sizes.split(",")]
+    messages = {n: _task_message(_history(n, rng)) for n in sizes}
+    formats = _formats()
+
+    print(f"msgpack={codec.HAS_MSGPACK} zstd={codec.HAS_ZSTD} rounds={args.rounds}\n")
+    print(f"{'msgs':>6}  {'format':<16}{'bytes':>12}{'enc ms':>10}{'dec ms':>10}")
+    for n, message in messages.items():
+        for name, wire in formats:
+            size, enc, dec = _bench_codec(message, wire, args.rounds)
+            print(f"{n:>6}  {name:<16}{size:>12,}{enc:>10.3f}{dec:>10.3f}")
+
+    try:
+        import zmq  # noqa: F401
+    except ImportError:
+        print("\npyzmq 未安装，跳过总线往返测试")
+        return
+
+    rtt = asyncio.run(_bench_roundtrip(messages, formats, args.rounds, args.port))
+    print(f"\n{'msgs':>6}  {'format':<16}{'RTT p50 ms':>12}")
+    for (n, name), ms in rtt.items():
+        print(f"{n:>6}  {name:<16}{ms:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+CJK 全文检索基准（二元组 FTS5 索引 vs LIKE 回退）
+
+目的：
+- n 条合成中英文混合记忆，查询词取自记忆原文中的 1~4 个汉字片段及英文单词
+- 对比三种路径：
+  - 旧版 FTS5（unicode61 直接索引原文）：中文几乎无法命中
+  - LIKE 回退（旧版命中为空时执行的 content LIKE '%kw%' 全表扫描）
+  - 新版 search_fts（content_seg 影子列 + 二元组短语查询，走 BM25 索引）
+- 召回以子串匹配（LIKE 全量结果）为基准，延迟为 limit=10 的单次查询
+
+运行：
+    python scripts/bench_fts_cjk.py
+    python scripts/bench_fts_cjk.py --memories 50000 --queries 300
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from openakita.memory.storage import MemoryStorage
+
+_CJK = "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所民得经十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制机当使点从业本去把性好应开它合还因由其些然前外天政四日那社义事平形相全表间样与关各重新线内数正心反你明看原又么利比或但质气第向道命此变条只没结解问意建月公无系军很情者最立代想已通并提直题党程展五果料象员革位入常文总次品式活设及管特件长求老头基资边流路级少图山统接知较将组见计别她手角期根论运农指几九区强放决西被干做必战先回则任取据处队南给色光门即保治北造百规热领七海口东导器压志世金增争济阶油思术极交受联什认六共权收证改清己美再采转更单风切打白教速花带安场身车例真务具万每目至达走积示议声报斗完类八离华名确才科张信马节话米整空元况今集温传土许步群广石记需段研界拉林律叫且究观越织装影算低持音众书布复容儿须际商非验连断深难近矿千周委素技备半办青省列习响约支般史感劳便团往酸历市克何除消构府称太准精值号率族维划选标写存候毛亲快效斯院查江型眼王按格养易置派层片始却专状育厂京识适属圆包火住调满县局照参红细引听该铁价严龙飞"
+_WORDS = [
+    "python", "docker", "server", "deploy", "config", "memory", "agent", "schedule",
+    "database", "report", "email", "weekly", "backup", "model", "prompt", "token",
+]
+
+
+def _sentence(rng: random.Random) -> str:
+    cjk = "".join(rng.choice(_CJK) for _ in range(rng.randint(12, 30)))
+    words = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(1, 3)))
+    return f"{cjk}，{words}"
+
+
+def _queries(contents: list[str], n: int, rng: random.Random) -> list[str]:
+    queries = []
+    for _ in range(n):
+        text = rng.choice(contents)
+        if rng.random() < 0.2:
+            queries.append(rng.choice(_WORDS))
+            continue
+        length = rng.choice((1, 2, 2, 3, 4))
+        start = rng.randrange(0, text.index("，") - length + 1)
+        queries.append(text[start : start + length])
+    return queries
+
+
+def _timed(fn, queries: list[str]) -> tuple[list, float]:
+    results, lat = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        results.append(fn(q))
+        lat.append((time.perf_counter() - t0) * 1000)
+    return results, statistics.median(lat)
+
+
+def _recall(found: list[set[str]], truth: list[set[str]]) -> float:
+    hit = sum(len(f & t) for f, t in zip(found, truth, strict=True))
+    total = sum(len(t) for t in truth)
+    return hit / total if total else 1.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--memories", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    contents = [_sentence(rng) for _ in range(args.memories)]
+    queries = _queries(contents, args.queries, rng)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = MemoryStorage(Path(tmp) / "bench.db", read_pool_size=0)
+        now = datetime.now().isoformat()
+        t0 = time.perf_counter()
+        storage.save_memories_batch([
+            {"id": f"m{i}", "content": c, "created_at": now} for i, c in enumerate(contents)
+        ])
+        insert = time.perf_counter() - t0
+
+        # 旧版索引: unicode61 直接索引原文
+        conn = storage._conn
+        conn.execute(
+            "CREATE VIRTUAL TABLE legacy_fts USING fts5("
+            "content, content=memories, content_rowid=rowid, tokenize='unicode61')"
+        )
+        conn.execute("INSERT INTO legacy_fts(legacy_fts) VALUES('rebuild')")
+        conn.commit()
+
+        def legacy_fts(q: str, limit: int) -> list[str]:
+            rows = conn.execute(
+                "SELECT m.id FROM legacy_fts f JOIN memories m ON m.rowid = f.rowid "
+                "WHERE legacy_fts MATCH ? ORDER BY bm25(legacy_fts) LIMIT ?",
+                (storage._sanitize_fts_query(q), limit),
+            ).fetchall()
+            return [r[0] for r in rows]
+
+        def like(q: str, limit: int) -> list[str]:
+            return [r["id"] for r in storage._search_like(conn, q, limit)]
+
+        def fts(q: str, limit: int) -> list[str]:
+            return [r["id"] for r in storage.search_fts(q, limit=limit)]
+
+        big = args.memories
+        truth = [set(ids) for ids in _timed(lambda q: like(q, big), queries)[0]]
+        legacy_all = [set(ids) for ids in _timed(lambda q: legacy_fts(q, big), queries)[0]]
+        fts_all = [set(ids) for ids in _timed(lambda q: fts(q, big), queries)[0]]
+
+        legacy_hits, legacy_ms = _timed(lambda q: legacy_fts(q, 10), queries)
+        _, like_ms = _timed(lambda q: like(q, 10), queries)
+        _, fts_ms = _timed(lambda q: fts(q, 10), queries)
+        fallback_rate = sum(1 for h in legacy_hits if not h) / len(queries)
+
+        t0 = time.perf_counter()
+        storage.rebuild_fts_index()
+        rebuild = time.perf_counter() - t0
+        storage.close()
+
+    print(f"memories={args.memories} queries={len(queries)}\n")
+    print(f"batch insert           {insert:8.2f} s   (含 content_seg 分词)")
+    print(f"FTS rebuild            {rebuild:8.2f} s")
+    print(f"\n{'path':<26}{'recall':>8}{'p50 ms':>10}")
+    print(f"{'legacy FTS (raw)':<26}{_recall(legacy_all, truth):>8.3f}{legacy_ms:>10.3f}"
+          f"   ({fallback_rate:.0%} 查询为空 -> 走 LIKE)")
+    print(f"{'LIKE fallback':<26}{1.0:>8.3f}{like_ms:>10.3f}")
+    print(f"{'segmented FTS (new)':<26}{_recall(fts_all, truth):>8.3f}{fts_ms:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+记忆去重基准（MinHash/LSH vs 逐对扫描）
+
+目的：
+- 对比旧版 _cluster_by_content（O(n²) 单词重叠扫描）与 MinHash/LSH 候选 + 精确比较
+- 数据：n 条合成记忆（中英文混合），其中一部分是改写了少量字词的近重复
+
+运行：
+    python scripts/bench_memory_dedup.py
+    python scripts/bench_memory_dedup.py --memories 20000 --legacy-limit 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from openakita.memory.minhash_index import MinHashIndex, cluster_candidates
+from openakita.memory.types import MemoryType, SemanticMemory
+
+_CJK = "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所民得经十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制机当使点从业本去把性好应开它合还因由其些然前外天政四日那社义事平形相全表间样与关各重新线内数正心反你明看原又么利比或但质气第向道命此变条只没结解问意建月公无系军很情者最立代想已通并提直题党程展五果料象员革位入常文总次品式活设及管特件长求老头基资边流路级少图山统接知较将组见计别她手角期根论运农指几九区强放决西被干做必战先回则任取据处队南给色光门即保治北造百规热领七海口东导器压志世金增争济阶油思术极交受联什认六共权收证改清己美再采转更单风切打白教速花带安场身车例真务具万每目至达走积示议声报斗完类八离华名确才科张信马节话米整空元况今集温传土许步群广石记需段研界拉林律叫且究观越织装影算低持音众书布复容儿须际商非验连断深难近矿千周委素技备半办青省列习响约支般史感劳便团往酸历市克何除消构府称太准精值号率族维划选标写存候毛亲快效斯院查江型眼王按格养易置派层片始却专状育厂京识适属圆包火住调满县局照参红细引听该铁价严龙飞"
+_WORDS = [
+    "python", "docker", "server", "deploy", "config", "memory", "agent", "schedule",
+    "database", "report", "email", "weekly", "backup", "model", "prompt", "token",
+]
+
+
+def _sentence(rng: random.Random) -> str:
+    cjk = "".join(rng.choice(_CJK) for _ in range(rng.randint(12, 30)))
+    words = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(2, 6)))
+    return f"{cjk} {words}"
+
+
+def _mutate(text: str, rng: random.Random) -> str:
+    chars = list(text)
+    for _ in range(max(1, len(chars) // 20)):
+        chars[rng.randrange(len(chars))] = rng.choice(_CJK)
+    return "".join(chars)
+
+
+def _make(n: int, dup_ratio: float, seed: int = 7) -> list[SemanticMemory]:
+    rng = random.Random(seed)
+    mems: list[SemanticMemory] = []
+    for _ in range(n):
+        if mems and rng.random() < dup_ratio:
+            content = _mutate(rng.choice(mems).content, rng)
+        else:
+            content = _sentence(rng)
+        mems.append(SemanticMemory(content=content, type=MemoryType.FACT))
+    return mems
+
+
+def _legacy_cluster(memories: list[SemanticMemory], threshold: float) -> list[list[SemanticMemory]]:
+    """旧版 LifecycleManager._cluster_by_content"""
+    clusters = []
+    assigned: set[str] = set()
+    for i, mem_a in enumerate(memories):
+        if mem_a.id in assigned:
+            continue
+        cluster = [mem_a]
+        assigned.add(mem_a.id)
+        words_a = set(mem_a.content.lower().split())
+        for j in range(i + 1, len(memories)):
+            mem_b = memories[j]
+            if mem_b.id in assigned:
+                continue
+            words_b = set(mem_b.content.lower().split())
+            if not words_a or not words_b:
+                continue
+            if len(words_a & words_b) / min(len(words_a), len(words_b)) >= threshold:
+                cluster.append(mem_b)
+                assigned.add(mem_b.id)
+        if len(cluster) >= 2:
+            clusters.append(cluster)
+    return clusters
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--memories", type=int, default=20000)
+    parser.add_argument("--dup-ratio", type=float, default=0.1)
+    parser.add_argument("--legacy-limit", type=int, default=4000, help="旧版扫描只跑前 N 条（O(n²)）")
+    args = parser.parse_args()
+
+    mems = _make(args.memories, args.dup_ratio)
+
+    t0 = time.perf_counter()
+    index = MinHashIndex()
+    for m in mems:
+        index.add(m.id, m.content, m.type.value)
+    build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    clusters = cluster_candidates(index, mems, threshold=0.7)
+    cluster_time = time.perf_counter() - t0
+
+    probe = mems[: min(1000, len(mems))]
+    t0 = time.perf_counter()
+    for m in probe:
+        index.query(m.content)
+    query_ms = (time.perf_counter() - t0) / len(probe) * 1000
+
+    n_legacy = min(args.legacy_limit, len(mems))
+    t0 = time.perf_counter()
+    _legacy_cluster(mems[:n_legacy], 0.7)
+    legacy = time.perf_counter() - t0
+    legacy_full = legacy * (len(mems) / n_legacy) ** 2
+
+    removable = sum(len(c) - 1 for c in clusters)
+    print(f"memories={len(mems)} dup_ratio={args.dup_ratio}\n")
+    print(f"index build            {build:8.2f} s")
+    print(f"LSH cluster            {cluster_time:8.2f} s   ({len(clusters)} clusters, {removable} removable)")
+    print(f"single query           {query_ms:8.3f} ms")
+    print(f"legacy scan ({n_legacy:>5})    {legacy:8.2f} s   (extrapolated to {len(mems)}: {legacy_full:.0f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+MemoryStorage 并发读写基准
+
+目的：
+- 模拟多个会话并发：若干线程持续写入记忆/对话轮次，另外若干线程做 FTS 检索和按 id 读取
+- 对比 read_pool_size=0（所有读写共用一把锁，等同旧实现）与只读连接池 + group commit
+- 输出读延迟分位数、写吞吐以及 get_contention_stats() 的争用指标
+
+运行：
+    python scripts/bench_memory_storage.py
+    python scripts/bench_memory_storage.py --writers 4 --readers 8 --seconds 5
+    python scripts/bench_memory_storage.py --write-interval-ms 0   # 写入吞吐
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from openakita.memory.storage import MemoryStorage
+
+
+def _run(db_path: Path, args, read_pool_size: int) -> dict:
+    storage = MemoryStorage(db_path, read_pool_size=read_pool_size)
+    storage.save_memories_batch([
+        {
+            "id": f"seed-{i}",
+            "content": f"seed memory {i} about python deployment and weekly report",
+            "created_at": datetime.now().isoformat(),
+        }
+        for i in range(args.seed_rows)
+    ])
+
+    stop = threading.Event()
+    read_lat: list[float] = []
+    writes = [0]
+    lock = threading.Lock()
+
+    def writer(n: int) -> None:
+        i = 0
+        while not stop.is_set():
+            storage.save_memory({
+                "id": f"w{n}-{i}",
+                "content": f"writer {n} memory {i} python",
+                "created_at": datetime.now().isoformat(),
+            })
+            storage.save_turn(f"session-{n}", i, "user", f"turn {i}")
+            i += 1
+            if args.write_interval_ms:
+                time.sleep(args.write_interval_ms / 1000)
+        with lock:
+            writes[0] += i * 2
+
+    def reader(n: int) -> None:
+        local: list[float] = []
+        i = 0
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            if i % 2:
+                storage.search_fts("python report", limit=10)
+            else:
+                storage.get_memory(f"seed-{(n * 7919 + i) % args.seed_rows}")
+            local.append((time.perf_counter() - t0) * 1000)
+            i += 1
+        with lock:
+            read_lat.extend(local)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(args.writers)]
+    threads += [threading.Thread(target=reader, args=(n,)) for n in range(args.readers)]
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    stats = storage.get_contention_stats()
+    storage.close()
+    read_lat.sort()
+    return {
+        "reads": len(read_lat),
+        "read_p50": statistics.median(read_lat) if read_lat else float("nan"),
+        "read_p99": read_lat[int(len(read_lat) * 0.99) - 1] if read_lat else float("nan"),
+        "writes_per_s": writes[0] / args.seconds,
+        "writes_per_commit": stats["writes_per_commit"],
+        "read_wait_max": stats["read_wait_max_ms"],
+        "write_wait_max": stats["write_wait_max_ms"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--seed-rows", type=int, default=5000)
+    parser.add_argument(
+        "--write-interval-ms", type=float, default=5.0,
+        help="每个写线程两次写入之间的间隔，固定写入负载；0 表示尽力写",
+    )
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        results["single lock (pool=0)"] = _run(Path(tmp) / "a.db", args, read_pool_size=0)
+        results["read pool + group commit"] = _run(Path(tmp) / "b.db", args, read_pool_size=4)
+
+    print(f"writers={args.writers} readers={args.readers} seconds={args.seconds}\n")
+    print(
+        f"{'mode':<28}{'reads':>9}{'p50 ms':>9}{'p99 ms':>9}{'writes/s':>10}"
+        f"{'w/commit':>10}{'rd wait max':>13}{'wr wait max':>13}"
+    )
+    for name, r in results.items():
+        print(
+            f"{name:<28}{r['reads']:>9}{r['read_p50']:>9.2f}{r['read_p99']:>9.2f}"
+            f"{r['writes_per_s']:>10.0f}{r['writes_per_commit']:>10.2f}"
+            f"{r['read_wait_max']:>13.1f}{r['write_wait_max']:>13.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+调度循环基准（10k 任务）
+
+目的：
+- 对比旧版轮询循环（每 check_interval 全量扫描 _tasks）与最小堆触发队列
+- 空闲 CPU：大量任务都在未来时，调度循环每秒消耗的 CPU 时间
+- 触发抖动：一批任务在未来几秒内随机到期，实际派发时间相对触发时间的延迟
+
+运行：
+    python scripts/bench_scheduler_loop.py
+    python scripts/bench_scheduler_loop.py --tasks 10000 --idle-seconds 10 --due 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from openakita.scheduler import ScheduledTask, TaskScheduler
+from openakita.scheduler.triggers import Trigger
+
+
+class PollingScheduler(TaskScheduler):
+    """旧版调度循环：固定间隔线性扫描全部任务"""
+
+    async def _scheduler_loop(self) -> None:
+        while self._running:
+            try:
+                now = datetime.now()
+                for task_id, task in list(self._tasks.items()):
+                    if not task.is_active or task_id in self._running_tasks:
+                        continue
+                    if task.next_run:
+                        trigger_time = task.next_run - timedelta(seconds=self.advance_seconds)
+                        if now >= trigger_time:
+                            self._running_tasks.add(task_id)
+                            asyncio.create_task(self._run_task_safe(task))
+                await asyncio.sleep(self.check_interval)
+            except asyncio.CancelledError:
+                break
+
+
+def _populate(scheduler: TaskScheduler, count: int, far: datetime) -> None:
+    """直接写入内存，避免 add_task 每次落盘导致 O(n²) 的准备时间"""
+    for i in range(count):
+        task = ScheduledTask.create_interval(
+            name=f"bench-{i}", description="", interval_minutes=60, prompt="noop"
+        )
+        task.next_run = far + timedelta(seconds=i)
+        scheduler._tasks[task.id] = task
+        scheduler._triggers[task.id] = Trigger.from_config(
+            task.trigger_type.value, task.trigger_config
+        )
+
+
+async def _bench(cls: type[TaskScheduler], args, storage: Path) -> dict:
+    lags: list[float] = []
+    planned: dict[str, datetime] = {}
+
+    async def executor(task):
+        lags.append((datetime.now() - planned[task.id]).total_seconds() * 1000)
+        return True, "ok"
+
+    scheduler = cls(
+        storage_path=storage,
+        executor=executor,
+        max_concurrent=args.due,
+        check_interval_seconds=args.check_interval,
+        advance_seconds=0,
+    )
+    _populate(scheduler, args.tasks, datetime.now() + timedelta(days=1))
+    scheduler._save_tasks = lambda: None  # 基准只关心调度循环本身
+    scheduler._save_executions = lambda: None
+    await scheduler.start()
+
+    # 1) 空闲 CPU
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    await asyncio.sleep(args.idle_seconds)
+    idle_cpu = (time.process_time() - cpu0) / (time.perf_counter() - wall0)
+
+    # 2) 触发抖动
+    rng = random.Random(42)
+    base = datetime.now()
+    for i in range(args.due):
+        task = ScheduledTask.create_interval(
+            name=f"due-{i}", description="", interval_minutes=60, prompt="noop"
+        )
+        await scheduler.add_task(task)
+        task.next_run = base + timedelta(seconds=0.5 + rng.random() * args.spread)
+        planned[task.id] = task.next_run
+        scheduler.reschedule(task.id)
+    await asyncio.sleep(args.spread + 1.5)
+
+    scheduler._running = False
+    if scheduler._scheduler_task:
+        scheduler._scheduler_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await scheduler._scheduler_task
+
+    lags.sort()
+    return {
+        "idle_cpu_pct": idle_cpu * 100,
+        "fired": len(lags),
+        "lag_p50": statistics.median(lags) if lags else float("nan"),
+        "lag_p99": lags[int(len(lags) * 0.99) - 1] if lags else float("nan"),
+        "lag_max": lags[-1] if lags else float("nan"),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=10000, help="空闲（远期）任务数")
+    parser.add_argument("--idle-seconds", type=float, default=6.0)
+    parser.add_argument("--due", type=int, default=200, help="即将到期的任务数")
+    parser.add_argument("--spread", type=float, default=3.0, help="到期时间分布范围（秒）")
+    parser.add_argument("--check-interval", type=int, default=2, help="旧版轮询间隔（秒）")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        results["polling (legacy)"] = await _bench(PollingScheduler, args, Path(tmp) / "poll")
+        results["heap queue"] = await _bench(TaskScheduler, args, Path(tmp) / "heap")
+
+    print(f"tasks={args.tasks} due={args.due} idle={args.idle_seconds}s\n")
+    print(f"{'loop':<20}{'idle CPU %':>12}{'fired':>8}{'lag p50 ms':>14}{'lag p99 ms':>14}{'lag max ms':>14}")
+    for name, r in results.items():
+        print(
+            f"{name:<20}{r['idle_cpu_pct']:>12.2f}{r['fired']:>8}"
+            f"{r['lag_p50']:>14.1f}{r['lag_p99']:>14.1f}{r['lag_max']:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
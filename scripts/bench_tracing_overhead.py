@@ -0,0 +1,78 @@
+"""
+追踪开销微基准
+
+目的：
+- 对比 tracing 关闭 / 开启(同步导出) / 开启(后台批量导出) 时，每个 Span 与每个 Trace 的额外耗时
+- 导出器使用真实 FileExporter（写入临时目录），反映热路径上的实际 I/O 成本
+
+运行：
+    python scripts/bench_tracing_overhead.py
+    python scripts/bench_tracing_overhead.py --traces 2000 --spans 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+
+from openakita.tracing.exporter import FileExporter
+from openakita.tracing.tracer import AgentTracer
+
+
+def _run(tracer: AgentTracer, traces: int, spans: int) -> float:
+    """返回热路径总耗时（秒），不含后台线程的导出时间"""
+    t0 = time.perf_counter()
+    for i in range(traces):
+        with tracer.start_trace(f"bench-{i}"):
+            for j in range(spans):
+                with tracer.llm_span(model="bench", iteration=j) as span:
+                    span.set_attribute("input_tokens", 100)
+                    span.set_attribute("output_tokens", 10)
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--traces", type=int, default=1000)
+    parser.add_argument("--spans", type=int, default=8, help="每个 trace 的 span 数")
+    args = parser.parse_args()
+
+    total_spans = args.traces * args.spans
+    results: dict[str, float] = {}
+
+    results["off"] = _run(AgentTracer(enabled=False), args.traces, args.spans)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tracer = AgentTracer(enabled=True, background_export=False)
+        tracer.add_exporter(FileExporter(f"{tmp}/sync"))
+        results["on (sync export)"] = _run(tracer, args.traces, args.spans)
+        tracer.shutdown()
+
+        tracer = AgentTracer(enabled=True, background_export=True, queue_size=args.traces)
+        tracer.add_exporter(FileExporter(f"{tmp}/background"))
+        results["on (background export)"] = _run(tracer, args.traces, args.spans)
+        t0 = time.perf_counter()
+        tracer.shutdown(timeout=60)
+        drain = time.perf_counter() - t0
+        stats = tracer.get_export_stats()
+
+    base = results["off"]
+    print(f"traces={args.traces} spans/trace={args.spans} total_spans={total_spans}\n")
+    print(f"{'mode':<26}{'total ms':>12}{'us/span':>12}{'us/trace':>12}{'overhead us/span':>20}")
+    for mode, elapsed in results.items():
+        print(
+            f"{mode:<26}{elapsed * 1000:>12.1f}"
+            f"{elapsed / total_spans * 1e6:>12.2f}"
+            f"{elapsed / args.traces * 1e6:>12.1f}"
+            f"{(elapsed - base) / total_spans * 1e6:>20.2f}"
+        )
+    print(
+        f"\nbackground drain on shutdown: {drain * 1000:.1f} ms, "
+        f"batches={stats['batches']} dropped={stats['dropped']} "
+        f"high_water={stats['queue_high_water']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
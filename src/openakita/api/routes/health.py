@@ -1,5 +1,5 @@
 """
-Health check routes: GET /api/health, POST /api/health/check
+Health check routes: GET /api/health, POST /api/health/check, GET /api/health/llm-stats
 
 POST /api/health/check 使用 dry_run=True 模式执行只读检测，
 不会修改 provider 的健康状态和冷静期计数，避免干扰正在运行的 Agent。
@@ -55,6 +55,21 @@ def _get_llm_client(agent: object):
     return getattr(brain, "_llm_client", None)
 
 
+@router.get("/api/health/llm-stats")
+async def llm_stats(request: Request):
+    """LLM endpoint latency / hedge counters and response cache hit rate."""
+    agent = getattr(request.app.state, "agent", None)
+    if agent is None:
+        return {"error": "Agent not initialized"}
+
+    llm_client = _get_llm_client(agent)
+    if llm_client is None:
+        return {"error": "LLM client not available"}
+
+    # response cache stats run a SQLite COUNT; keep it off the event loop
+    return await asyncio.to_thread(llm_client.get_endpoint_stats)
+
+
 async def _check_endpoint_readonly(name: str, provider) -> HealthResult:
     """Check an endpoint in dry_run mode: test connectivity without modifying provider state."""
     t0 = time.time()
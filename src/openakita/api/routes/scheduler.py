@@ -269,7 +269,7 @@ async def list_channels(request: Request):
 
     if session_manager:
         # 1. Active memory sessions
-        sessions = session_manager.list_sessions()
+        sessions = session_manager.list_sessions(with_history=False)
         if sessions:
             sessions.sort(
                 key=lambda s: getattr(s, "last_active", dt.min), reverse=True
@@ -350,4 +350,8 @@ async def scheduler_stats(request: Request):
     if scheduler is None:
         return {"error": "Agent not initialized"}
 
-    return scheduler.get_stats()
+    stats = scheduler.get_stats()
+    agent = request.app.state.agent
+    executor = getattr(getattr(agent, "_local_agent", agent), "_task_executor", None)
+    stats["agent_pool"] = executor.get_pool_stats() if executor else None
+    return stats
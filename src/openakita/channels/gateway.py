@@ -16,6 +16,8 @@ import contextlib
 import logging
 import random
 import sys
+import time
+from collections import deque
 from collections.abc import Awaitable, Callable
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
@@ -793,6 +795,9 @@ class MessageGateway:
         whisper_model: str = "base",
         whisper_language: str = "zh",
         stt_client: "STTClient | None" = None,
+        max_concurrency: int = 1,
+        channel_concurrency: dict[str, int] | None = None,
+        default_channel_concurrency: int = 0,
     ):
         """
         Args:
@@ -801,6 +806,9 @@ class MessageGateway:
             whisper_model: Whisper 模型大小 (tiny, base, small, medium, large)，默认 base
             whisper_language: 语音识别语言 (zh/en/auto/其他语言代码)
             stt_client: 在线 STT 客户端（可选，用于替代本地 Whisper）
+            max_concurrency: 全局同时处理的会话数上限（同一会话内始终串行）
+            channel_concurrency: 按通道的并发上限 {channel: limit}
+            default_channel_concurrency: 未单独配置的通道的并发上限（0 = 仅受全局上限约束）
         """
         self.session_manager = session_manager
         self.agent_handler = agent_handler
@@ -816,6 +824,20 @@ class MessageGateway:
         self._processing_task: asyncio.Task | None = None
         self._running = False
 
+        # ==================== 会话级并发调度 ====================
+        # 不同会话并发处理（受全局/通道上限约束），同一会话严格按到达顺序串行。
+        # 每个有待处理消息的会话对应一个 worker task，依次消费自己的 FIFO 队列。
+        self._max_concurrency = max(1, max_concurrency)
+        self._channel_concurrency: dict[str, int] = dict(channel_concurrency or {})
+        self._default_channel_concurrency = max(0, default_channel_concurrency)
+        self._global_semaphore = asyncio.Semaphore(self._max_concurrency)
+        self._channel_semaphores: dict[str, asyncio.Semaphore] = {}
+        self._session_queues: dict[str, deque[tuple[UnifiedMessage, float]]] = {}
+        self._session_workers: dict[str, asyncio.Task] = {}
+        self._in_flight: dict[str, str] = {}  # session_key -> channel
+        self._wait_times: deque[float] = deque(maxlen=500)
+        self._dispatch_stats = {"dispatched": 0, "completed": 0, "failed": 0}
+
         # 中间件
         self._pre_process_hooks: list[Callable[[UnifiedMessage], Awaitable[UnifiedMessage]]] = []
         self._post_process_hooks: list[Callable[[UnifiedMessage, str], Awaitable[str]]] = []
@@ -1058,6 +1080,17 @@ class MessageGateway:
             with contextlib.suppress(asyncio.CancelledError):
                 await self._processing_task
 
+        # 停止会话 worker
+        workers = list(self._session_workers.values())
+        for task in workers:
+            task.cancel()
+        for task in workers:
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await task
+        self._session_workers.clear()
+        self._session_queues.clear()
+        self._in_flight.clear()
+
         # 停止所有适配器
         for name, adapter in self._adapters.items():
             try:
@@ -1383,14 +1416,14 @@ class MessageGateway:
         logger.debug(f"[Interrupt] Registered callback for {session_key}")
 
     async def _process_loop(self) -> None:
-        """消息处理循环"""
+        """消息分发循环：按会话分发到各自的 worker，不等待处理完成"""
         while self._running:
             try:
                 # 从队列获取消息
                 message = await asyncio.wait_for(self._message_queue.get(), timeout=1.0)
 
-                # 处理消息
-                await self._handle_message(message)
+                # 分发到会话队列
+                self._dispatch(message)
 
             except TimeoutError:
                 continue
@@ -1399,6 +1432,63 @@ class MessageGateway:
             except Exception as e:
                 logger.error(f"Error processing message: {e}")
 
+    def _dispatch(self, message: UnifiedMessage) -> None:
+        """追加到会话 FIFO 队列；该会话没有 worker 时启动一个"""
+        session_key = self._get_session_key(message)
+        queue = self._session_queues.setdefault(session_key, deque())
+        queue.append((message, time.monotonic()))
+        self._dispatch_stats["dispatched"] += 1
+
+        worker = self._session_workers.get(session_key)
+        if worker is None or worker.done():
+            self._session_workers[session_key] = asyncio.create_task(
+                self._session_worker(session_key, message.channel)
+            )
+
+    def _get_channel_semaphore(self, channel: str) -> asyncio.Semaphore | None:
+        limit = self._channel_concurrency.get(channel, self._default_channel_concurrency)
+        if limit <= 0:
+            return None
+        sem = self._channel_semaphores.get(channel)
+        if sem is None:
+            sem = asyncio.Semaphore(limit)
+            self._channel_semaphores[channel] = sem
+        return sem
+
+    async def _session_worker(self, session_key: str, channel: str) -> None:
+        """
+        单个会话的处理 worker
+
+        依次处理该会话队列中的消息（保证会话内顺序），每条消息处理前
+        先取得通道配额再取得全局配额（避免占着全局配额等待通道配额）。
+        """
+        queue = self._session_queues.get(session_key)
+        try:
+            while queue:
+                message, enqueued_at = queue[0]
+                channel_sem = self._get_channel_semaphore(channel)
+                async with contextlib.AsyncExitStack() as stack:
+                    if channel_sem is not None:
+                        await stack.enter_async_context(channel_sem)
+                    await stack.enter_async_context(self._global_semaphore)
+
+                    queue.popleft()
+                    self._wait_times.append(time.monotonic() - enqueued_at)
+                    self._in_flight[session_key] = channel
+                    try:
+                        await self._handle_message(message)
+                        self._dispatch_stats["completed"] += 1
+                    except Exception as e:
+                        self._dispatch_stats["failed"] += 1
+                        logger.error(f"Error processing message for {session_key}: {e}")
+                    finally:
+                        self._in_flight.pop(session_key, None)
+        finally:
+            if self._session_workers.get(session_key) is asyncio.current_task():
+                del self._session_workers[session_key]
+            if not self._session_queues.get(session_key):
+                self._session_queues.pop(session_key, None)
+
     async def _handle_message(self, message: UnifiedMessage) -> None:
         """
         处理单条消息
@@ -2444,9 +2534,30 @@ class MessageGateway:
 
     def get_stats(self) -> dict:
         """获取网关统计"""
+        in_flight_by_channel: dict[str, int] = {}
+        for channel in self._in_flight.values():
+            in_flight_by_channel[channel] = in_flight_by_channel.get(channel, 0) + 1
+        waits = sorted(self._wait_times)
         return {
             "running": self._running,
             "adapters": {name: adapter.is_running for name, adapter in self._adapters.items()},
             "queue_size": self._message_queue.qsize(),
             "sessions": self.session_manager.get_session_count(),
+            "dispatch": {
+                "max_concurrency": self._max_concurrency,
+                "in_flight": len(self._in_flight),
+                "in_flight_by_channel": in_flight_by_channel,
+                "queued_messages": sum(len(q) for q in self._session_queues.values()),
+                "queued_sessions": sum(
+                    1 for k, q in self._session_queues.items() if q and k not in self._in_flight
+                ),
+                "active_workers": len(self._session_workers),
+                "wait_ms": {
+                    "avg": round(sum(waits) / len(waits) * 1000, 1) if waits else 0.0,
+                    "p95": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 1)
+                    if waits else 0.0,
+                    "max": round(waits[-1] * 1000, 1) if waits else 0.0,
+                },
+                **self._dispatch_stats,
+            },
         }
@@ -28,6 +28,25 @@ class Settings(BaseSettings):
         default=0,
         description="最大输出 token 数 (0=不限制，使用模型默认上限；仅 Anthropic API 强制要求此参数时才会自动使用兜底值)",
     )
+    prompt_cache_enabled: bool = Field(
+        default=True,
+        description="Anthropic 端点启用 prompt caching（在 tools / system 稳定前缀 / 对话末尾打 cache_control 断点）",
+    )
+    llm_response_cache_enabled: bool = Field(
+        default=True,
+        description="启用 LLM 响应缓存（仅对显式 cache=True 的辅助调用生效，如查询拆解、记忆去重、工具结果压缩）",
+    )
+    llm_response_cache_path: str = Field(
+        default="data/llm_cache.db", description="LLM 响应缓存数据库路径"
+    )
+    llm_response_cache_ttl_hours: int = Field(default=168, description="LLM 响应缓存有效期（小时）")
+    llm_response_cache_max_entries: int = Field(
+        default=5000, description="LLM 响应缓存最大条目数，超出按最近访问时间淘汰"
+    )
+    llm_rate_limit_db: str = Field(
+        default="data/llm_ratelimit.db",
+        description="端点限流（rpm_limit / tpm_limit / max_concurrency）的跨进程共享状态库；为空时仅在进程内共享",
+    )
 
     # Agent 配置
     agent_name: str = Field(default="OpenAkita", description="Agent 名称")
@@ -137,6 +156,19 @@ class Settings(BaseSettings):
         ),
     )
 
+    # === IM 消息并发调度 ===
+    im_max_concurrent_sessions: int = Field(
+        default=1,
+        description=(
+            "IM 网关同时处理的会话数上限（同一会话内始终按顺序处理）。"
+            "单 Agent 模式下 Agent 实例保存当前会话状态，始终按 1 处理；"
+            "仅多 Agent 协同模式（每个会话由独立 Worker 处理）下大于 1 生效"
+        ),
+    )
+    im_channel_max_concurrency: int = Field(
+        default=0, description="单个 IM 通道同时处理的会话数上限（0 = 仅受全局上限约束）"
+    )
+
     # === 全局代理配置 ===
     # 用于 LLM API 请求的代理（如果透明代理不生效）
     http_proxy: str = Field(default="", description="HTTP 代理地址 (如 http://127.0.0.1:7890)")
@@ -238,6 +270,13 @@ class Settings(BaseSettings):
     scheduler_task_timeout: int = Field(
         default=600, description="定时任务执行超时时间（秒），默认 600 秒（10分钟）"
     )
+    scheduler_agent_pool_size: int = Field(
+        default=2,
+        description="定时任务预热 Agent 池大小（复用已初始化的 Agent，0 表示每次新建）",
+    )
+    scheduler_agent_max_uses: int = Field(
+        default=20, description="池中单个 Agent 最多复用次数，达到后重建以加载新技能/配置"
+    )
 
     # === 记忆整理配置 ===
     memory_consolidation_onboarding_days: int = Field(
@@ -317,6 +356,24 @@ class Settings(BaseSettings):
     orchestration_max_workers: int = Field(default=5, description="最大 Worker 数量")
     orchestration_heartbeat_interval: int = Field(default=5, description="Worker 心跳间隔（秒）")
     orchestration_health_check_interval: int = Field(default=10, description="健康检查间隔（秒）")
+    orchestration_max_queue_depth: int = Field(
+        default=100, description="Master 任务队列最大深度（超出时拒绝新任务）"
+    )
+    orchestration_auto_scale: bool = Field(
+        default=True, description="是否按队列等待 / 繁忙比例自动扩缩 Worker 池"
+    )
+    orchestration_scale_up_wait_seconds: float = Field(
+        default=5.0, description="任务排队等待超过该秒数时扩容"
+    )
+    orchestration_scale_down_idle_seconds: float = Field(
+        default=300.0, description="Worker 连续空闲该秒数后可被回收"
+    )
+    orchestration_bus_codec: str = Field(
+        default="auto", description="总线编码: auto(msgpack 可用时优先) | msgpack | json"
+    )
+    orchestration_bus_compression: str = Field(
+        default="auto", description="总线压缩: auto(有 zstd 时用 zstd，否则不压缩) | zstd | zlib | none"
+    )
 
     # === 人格系统配置 ===
     persona_name: str = Field(
@@ -365,6 +422,10 @@ class Settings(BaseSettings):
     tracing_enabled: bool = Field(default=False, description="是否启用 Agent 追踪")
     tracing_export_dir: str = Field(default="data/traces", description="追踪导出目录")
     tracing_console_export: bool = Field(default=False, description="是否同时导出到控制台")
+    tracing_export_queue_size: int = Field(
+        default=1000, description="追踪后台导出队列上限（满时丢弃并计数）"
+    )
+    tracing_export_batch_size: int = Field(default=32, description="追踪后台导出每批最多 Trace 数")
 
     # === 评估配置 ===
     evaluation_enabled: bool = Field(default=False, description="是否启用每日自动评估")
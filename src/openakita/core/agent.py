@@ -82,6 +82,7 @@ from .response_handler import (
 )
 from .skill_manager import SkillManager
 from .task_monitor import RETROSPECT_PROMPT, TaskMonitor
+from .token_counter import estimate_text_tokens
 from .token_tracking import (
     TokenTrackingContext,
     init_token_tracking,
@@ -1433,7 +1434,11 @@ class Agent:
             from ..scheduler.executor import TaskExecutor
 
             # 创建执行器（gateway 稍后通过 set_scheduler_gateway 设置）
-            self._task_executor = TaskExecutor(timeout_seconds=settings.scheduler_task_timeout)
+            self._task_executor = TaskExecutor(
+                timeout_seconds=settings.scheduler_task_timeout,
+                agent_pool_size=settings.scheduler_agent_pool_size,
+                agent_max_uses=settings.scheduler_agent_max_uses,
+            )
             # 预设 persona/memory/proactive 引用，供活人感心跳等系统任务使用
             self._task_executor.persona_manager = getattr(self, "persona_manager", None)
             self._task_executor.memory_manager = getattr(self, "memory_manager", None)
@@ -1451,6 +1456,12 @@ class Agent:
             # 注册内置系统任务（每日记忆整理 + 每日自检）
             await self._register_system_tasks()
 
+            # 后台预热定时任务 Agent 池（初始化较慢，不阻塞启动）
+            if self._task_executor.agent_pool:
+                self._scheduler_prewarm_task = asyncio.create_task(
+                    self._task_executor.prewarm()
+                )
+
             stats = self.task_scheduler.get_stats()
             logger.info(f"TaskScheduler started with {stats['total_tasks']} tasks")
 
@@ -1541,6 +1552,7 @@ class Agent:
                     new_trigger = Trigger.from_config(desired_trigger.value, desired_config)
                     self.task_scheduler._triggers[memory_task_id] = new_trigger
                     existing_memory_task.next_run = new_trigger.get_next_run_time()
+                    self.task_scheduler.reschedule(memory_task_id)
                     logger.info(f"Switched memory task trigger to {desired_trigger.value}: {desired_desc}")
                 if changed:
                     self.task_scheduler._save_tasks()
@@ -2086,16 +2098,7 @@ search_github → install_skill → 使用
         使用中英文感知算法：中文约 1.5 字符/token，英文约 4 字符/token。
         与 prompt.budget.estimate_tokens() 保持一致，避免各处估算值差异过大。
         """
-        if not text:
-            return 0
-        # 统计中文字符数量
-        chinese_chars = sum(1 for c in text if "\u4e00" <= c <= "\u9fff")
-        total_chars = len(text)
-        english_chars = total_chars - chinese_chars
-        # 中文约 1.5 字符/token，英文约 4 字符/token
-        chinese_tokens = chinese_chars / 1.5
-        english_tokens = english_chars / 4
-        return max(int(chinese_tokens + english_tokens), 1)
+        return estimate_text_tokens(text)
 
     def _estimate_messages_tokens(self, messages: list[dict]) -> int:
         """估算消息列表的 token 数量（委托给 context_manager 的统一算法）"""
@@ -6439,9 +6442,48 @@ NEXT: 建议的下一步（如有）"""
         except Exception as e:
             logger.warning(f"Failed to await memory pending tasks: {e}")
 
+        # 关闭定时任务预热池中的空闲 Agent
+        prewarm_task = getattr(self, "_scheduler_prewarm_task", None)
+        if prewarm_task and not prewarm_task.done():
+            prewarm_task.cancel()
+        if getattr(self, "_task_executor", None):
+            try:
+                await self._task_executor.close()
+            except Exception as e:
+                logger.warning(f"Failed to close scheduler agent pool: {e}")
+
         self._running = False
         logger.info("Agent shutdown complete")
 
+    async def reset_for_reuse(self) -> None:
+        """
+        清理会话级状态，让已初始化的 Agent 可被下一次定时任务复用
+
+        保留身份、技能、MCP、记忆存储等重量级资源；结束当前记忆会话并开启新会话，
+        清空对话上下文与任务状态。
+        """
+        self.memory_manager.end_session(task_description="", success=True, errors=[])
+        try:
+            await self.memory_manager.await_pending_tasks(timeout=15.0)
+        except Exception as e:
+            logger.warning(f"Failed to await memory pending tasks: {e}")
+
+        system_prompt = self._context.system
+        self._context = Context()
+        self._context.system = system_prompt
+        self._conversation_history = []
+        self._current_session = None
+        self._current_task_monitor = None
+        self._last_finalized_trace = []
+        self.agent_state.clear_tasks()
+
+        session_id = datetime.now().strftime("%Y%m%d_%H%M%S") + "_" + str(uuid.uuid4())[:8]
+        self.memory_manager.start_session(session_id)
+        self._current_session_id = session_id
+        if hasattr(self, "_memory_handler"):
+            self._memory_handler.reset_guide()
+        logger.debug(f"Agent reset for reuse (session={session_id})")
+
     async def consolidate_memories(self) -> dict:
         """
         整理记忆 (批量处理未处理的会话)
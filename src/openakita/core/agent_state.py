@@ -393,6 +393,12 @@ class AgentState:
                 )
         self.current_task_monitor = None
 
+    def clear_tasks(self) -> None:
+        """清空所有会话的任务状态（Agent 复用前调用）"""
+        self._tasks.clear()
+        self._last_task_key = ""
+        self.current_task_monitor = None
+
     def cancel_task(self, reason: str = "用户请求停止", session_id: str | None = None) -> None:
         """取消任务。如果指定 session_id，仅取消该会话的任务。"""
         session_id = session_id or None
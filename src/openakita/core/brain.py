@@ -213,6 +213,7 @@ class Brain:
         prompt: str,
         system: str | None = None,
         max_tokens: int = 2048,
+        cache: bool = False,
     ) -> Response:
         """
         轻量级思考：优先使用 compiler 端点。
@@ -228,6 +229,7 @@ class Brain:
             prompt: 用户消息
             system: 系统提示词
             max_tokens: 最大输出 token
+            cache: 使用 LLM 响应缓存（输入相同则复用结果）
 
         Returns:
             Response 对象
@@ -247,6 +249,7 @@ class Brain:
                 system=sys_prompt,
                 enable_thinking=False,
                 max_tokens=max_tokens,
+                cache=cache,
             )
             logger.info(f"[LLM] think_lightweight completed via {client_name} endpoint")
         except Exception as e:
@@ -258,6 +261,7 @@ class Brain:
                     system=sys_prompt,
                     enable_thinking=False,
                     max_tokens=max_tokens,
+                    cache=cache,
                 )
                 client_name = "main_fallback"
             else:
@@ -432,6 +436,7 @@ class Brain:
                 thinking_depth=thinking_depth,
                 conversation_id=conversation_id,
                 extra_params=extra_params,
+                cache=kwargs.get("cache", False),
             )
             _choices = getattr(response, 'choices', None) or []
             _content = getattr(response, 'content', None) or []
@@ -783,6 +788,8 @@ class Brain:
             usage=AnthropicUsage(
                 input_tokens=response.usage.input_tokens,
                 output_tokens=response.usage.output_tokens,
+                cache_creation_input_tokens=response.usage.cache_creation_input_tokens,
+                cache_read_input_tokens=response.usage.cache_read_input_tokens,
             ),
         )
 
@@ -798,6 +805,7 @@ class Brain:
         tools: list[ToolParam] | None = None,
         max_tokens: int | None = None,
         thinking_depth: str | None = None,
+        cache: bool = False,
     ) -> Response:
         """
         发送思考请求到 LLM（通过 LLMClient）
@@ -809,6 +817,7 @@ class Brain:
             tools: 可用工具列表
             max_tokens: 最大输出 token（不传则使用 self.max_tokens）
             thinking_depth: 思考深度 ('low'/'medium'/'high'/None)
+            cache: 使用 LLM 响应缓存（输入相同则复用结果）
 
         Returns:
             Response 对象
@@ -843,6 +852,7 @@ class Brain:
             max_tokens=max_tokens or self.max_tokens,
             enable_thinking=self.is_thinking_enabled(),
             thinking_depth=thinking_depth,
+            cache=cache,
         )
 
         # 保存响应到调试文件
@@ -16,6 +16,7 @@ import logging
 from typing import Any
 
 from ..tracing.tracer import get_tracer
+from .token_counter import TokenCounter
 from .token_tracking import TokenTrackingContext, reset_tracking_context, set_tracking_context
 from .tool_executor import OVERFLOW_MARKER
 
@@ -53,6 +54,8 @@ class ContextManager:
         """
         self._brain = brain
         self._cancel_event = cancel_event
+        self._token_counter = TokenCounter()
+        self._tools_tokens: tuple[list, int, int] | None = None  # (tools, len, tokens)
 
     def set_cancel_event(self, event: asyncio.Event | None) -> None:
         """更新 cancel_event（每次任务开始时由 Agent 设置）"""
@@ -111,47 +114,51 @@ class ContextManager:
         except Exception:
             return DEFAULT_MAX_CONTEXT_TOKENS
 
+    def _sync_token_model(self) -> None:
+        """让 token 计数器跟随当前模型（OpenAI 系列且安装 tiktoken 时精确计数）"""
+        try:
+            model = self._brain.get_current_model_info().get("model")
+        except Exception:
+            return
+        if isinstance(model, str):
+            self._token_counter.set_model(model)
+
     def estimate_tokens(self, text: str) -> int:
         """
         估算文本的 token 数量。
 
-        使用中英文感知算法：中文约 1.5 字符/token，英文约 4 字符/token。
+        使用中英文感知算法：中文约 1.5 字符/token，英文约 4 字符/token；
+        当前模型有可用 tokenizer 时使用精确计数。
         """
-        if not text:
-            return 0
-        chinese_chars = sum(1 for c in text if "\u4e00" <= c <= "\u9fff")
-        total_chars = len(text)
-        english_chars = total_chars - chinese_chars
-        chinese_tokens = chinese_chars / 1.5
-        english_tokens = english_chars / 4
-        return max(int(chinese_tokens + english_tokens), 1)
+        return self._token_counter.count_text(text)
 
     def estimate_messages_tokens(self, messages: list[dict]) -> int:
         """
         估算消息列表的 token 数量。
 
-        对每条消息的 content 使用与 estimate_tokens 相同的中英文感知算法，
+        对每条消息的 content 使用与 estimate_tokens 相同的计数方式，
         并为每条消息加固定结构开销（role / tool_use_id 等约 10 tokens）。
+        逐条消息缓存，同一列表追加消息后只计算新增部分。
         """
-        total = 0
-        for msg in messages:
-            content = msg.get("content", "")
-            if isinstance(content, str):
-                total += self.estimate_tokens(content)
-            elif isinstance(content, list):
-                for item in content:
-                    if isinstance(item, dict):
-                        text = item.get("text", "") or item.get("content", "")
-                        if isinstance(text, str) and text:
-                            total += self.estimate_tokens(text)
-                        else:
-                            total += self.estimate_tokens(
-                                json.dumps(item, ensure_ascii=False, default=str)
-                            )
-                    elif isinstance(item, str):
-                        total += self.estimate_tokens(item)
-            total += 10  # 每条消息的结构开销
-        return max(total, 1)
+        self._sync_token_model()
+        return self._token_counter.count_messages(messages)
+
+    def _estimate_tools_tokens(self, tools: list) -> int:
+        """工具定义的 token 占用（工具列表不变时复用上次结果）"""
+        cached = self._tools_tokens
+        if cached and cached[0] is tools and cached[1] == len(tools):
+            return cached[2]
+        try:
+            tools_text = json.dumps(tools, ensure_ascii=False, default=str)
+            tokens = int(len(tools_text) / 2)
+        except Exception:
+            tokens = len(tools) * 300
+        self._tools_tokens = (tools, len(tools), tokens)
+        return tokens
+
+    def get_token_counter_stats(self) -> dict:
+        """token 计数缓存统计"""
+        return self._token_counter.get_stats()
 
     @staticmethod
     def group_messages(messages: list[dict]) -> list[list[dict]]:
@@ -246,13 +253,7 @@ class ContextManager:
 
         system_tokens = self.estimate_tokens(system_prompt)
 
-        tools_tokens = 0
-        if tools:
-            try:
-                tools_text = json.dumps(tools, ensure_ascii=False, default=str)
-                tools_tokens = int(len(tools_text) / 2)
-            except Exception:
-                tools_tokens = len(tools) * 300
+        tools_tokens = self._estimate_tools_tokens(tools) if tools else 0
 
         hard_limit = max_tokens - system_tokens - tools_tokens - 1000
         if hard_limit < 4096:
@@ -592,6 +593,7 @@ class ContextManager:
                     }
                 ],
                 use_thinking=False,
+                cache=True,
             )
 
             summary = ""
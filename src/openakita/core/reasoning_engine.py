@@ -684,6 +684,7 @@ class ReasoningEngine:
             _usage = getattr(_raw, "usage", None) if _raw else None
             _in_tokens = getattr(_usage, "input_tokens", 0) if _usage else 0
             _out_tokens = getattr(_usage, "output_tokens", 0) if _usage else 0
+            _cache_read = (getattr(_usage, "cache_read_input_tokens", 0) or 0) if _usage else 0
             _iter_trace: dict = {
                 "iteration": iteration + 1,
                 "timestamp": datetime.now().isoformat(),
@@ -704,6 +705,7 @@ class ReasoningEngine:
                 "tokens": {
                     "input": _in_tokens,
                     "output": _out_tokens,
+                    "cache_read": _cache_read,
                 },
                 "context_compressed": _ctx_compressed_info,
             }
@@ -1471,6 +1473,7 @@ class ReasoningEngine:
                 _usage = getattr(_raw, "usage", None) if _raw else None
                 _in_tokens = getattr(_usage, "input_tokens", 0) if _usage else 0
                 _out_tokens = getattr(_usage, "output_tokens", 0) if _usage else 0
+                _cache_read = (getattr(_usage, "cache_read_input_tokens", 0) or 0) if _usage else 0
                 _iter_trace: dict = {
                     "iteration": _iteration + 1,
                     "timestamp": datetime.now().isoformat(),
@@ -1488,7 +1491,7 @@ class ReasoningEngine:
                         for tc in (decision.tool_calls or [])
                     ],
                     "tool_results": [],
-                    "tokens": {"input": _in_tokens, "output": _out_tokens},
+                    "tokens": {"input": _in_tokens, "output": _out_tokens, "cache_read": _cache_read},
                     "context_compressed": _ctx_compressed_info,
                 }
                 tool_names_log = [tc.get("name", "?") for tc in (decision.tool_calls or [])]
@@ -2514,6 +2517,14 @@ class ReasoningEngine:
             if hasattr(response, "usage"):
                 span.set_attribute("input_tokens", getattr(response.usage, "input_tokens", 0))
                 span.set_attribute("output_tokens", getattr(response.usage, "output_tokens", 0))
+                span.set_attribute(
+                    "cache_read_input_tokens",
+                    getattr(response.usage, "cache_read_input_tokens", 0) or 0,
+                )
+                span.set_attribute(
+                    "cache_creation_input_tokens",
+                    getattr(response.usage, "cache_creation_input_tokens", 0) or 0,
+                )
 
             decision = self._parse_decision(response)
             span.set_attribute("decision_type", decision.type.value)
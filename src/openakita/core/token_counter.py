@@ -0,0 +1,201 @@
+"""
+Token 计数服务
+
+供 ContextManager 在每轮推理中反复估算整段对话的 token 数:
+- 文本计数: 纯 ASCII 快速路径；CJK 字符用 numpy（可选）/ 正则批量统计，替代逐字符 Python 循环
+- 真实 tokenizer: 安装了 tiktoken 且模型属于 OpenAI 系列时使用精确计数，否则沿用中英文感知估算
+- 逐条消息缓存: 以消息对象 + content 对象身份为键，历史消息只计算一次，
+  整段对话重新累加只是逐条查缓存
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import re
+from collections import OrderedDict
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+
+    _NUMPY_AVAILABLE = True
+except ImportError:  # pragma: no cover - depends on environment
+    np = None  # type: ignore[assignment]
+    _NUMPY_AVAILABLE = False
+
+MESSAGE_OVERHEAD_TOKENS = 10  # 每条消息的结构开销（role / tool_use_id 等）
+_NON_CJK_RE = re.compile(r"[^一-鿿]+")
+_NUMPY_MIN_CHARS = 256  # 短文本用正则更快（省去编码和数组构造）
+_TEXT_CACHE_MIN_CHARS = 512  # 只缓存较长文本，短文本直接计算
+_TIKTOKEN_MODEL_PREFIXES = ("gpt-", "o1", "o3", "o4", "text-embedding-", "chatgpt-")
+
+
+def count_cjk_chars(text: str) -> int:
+    """统计 CJK 统一表意文字（U+4E00–U+9FFF）数量"""
+    if not text or text.isascii():
+        return 0
+    if _NUMPY_AVAILABLE and len(text) >= _NUMPY_MIN_CHARS:
+        codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+        return int(np.count_nonzero((codes >= 0x4E00) & (codes <= 0x9FFF)))
+    return len(_NON_CJK_RE.sub("", text))
+
+
+def estimate_text_tokens(text: str) -> int:
+    """
+    中英文感知估算: 中文约 1.5 字符/token，其他约 4 字符/token
+
+    与 ContextManager.estimate_tokens 的历史算法一致。
+    """
+    if not text:
+        return 0
+    chinese_chars = count_cjk_chars(text)
+    english_chars = len(text) - chinese_chars
+    return max(int(chinese_chars / 1.5 + english_chars / 4), 1)
+
+
+def _load_tiktoken_encoding(model: str) -> Any | None:
+    """OpenAI 系列模型且安装了 tiktoken 时返回对应 encoding"""
+    if not model or not model.lower().startswith(_TIKTOKEN_MODEL_PREFIXES):
+        return None
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        try:
+            return tiktoken.get_encoding("o200k_base")
+        except Exception:
+            return None
+    except Exception as e:
+        logger.debug(f"[TokenCounter] tiktoken unavailable for {model}: {e}")
+        return None
+
+
+class TokenCounter:
+    """
+    带缓存的 token 计数器
+
+    Usage:
+        counter = TokenCounter()
+        counter.set_model("gpt-4o")   # 可选：切换到真实 tokenizer
+        total = counter.count_messages(messages)
+    """
+
+    def __init__(self, model: str = "", cache_size: int = 4096) -> None:
+        self._cache_size = cache_size
+        self._model = ""
+        self._encoding: Any = None
+        # id(msg) -> (msg, content, 块数, tokens)；持有强引用保证 id 不被复用
+        self._message_cache: OrderedDict[int, tuple[dict, Any, int, int]] = OrderedDict()
+        self._text_cache: OrderedDict[str, int] = OrderedDict()
+        # 单条消息缓存的命中 / 未命中次数
+        self._stats = {"message_hits": 0, "message_misses": 0}
+        self.set_model(model)
+
+    @property
+    def tokenizer_name(self) -> str:
+        return getattr(self._encoding, "name", "") or "heuristic"
+
+    def set_model(self, model: str) -> None:
+        """切换模型；tokenizer 变化时清空缓存"""
+        if model == self._model:
+            return
+        encoding = _load_tiktoken_encoding(model)
+        changed = getattr(encoding, "name", None) != getattr(self._encoding, "name", None)
+        self._model = model
+        self._encoding = encoding
+        if changed:
+            self.clear()
+
+    def clear(self) -> None:
+        self._message_cache.clear()
+        self._text_cache.clear()
+
+    def get_stats(self) -> dict:
+        return {
+            **self._stats,
+            "tokenizer": self.tokenizer_name,
+            "cached_messages": len(self._message_cache),
+            "cached_texts": len(self._text_cache),
+        }
+
+    # ==================== 计数 ====================
+
+    def count_text(self, text: str) -> int:
+        if not text:
+            return 0
+        if len(text) < _TEXT_CACHE_MIN_CHARS:
+            return self._count_uncached(text)
+        cached = self._text_cache.get(text)
+        if cached is not None:
+            self._text_cache.move_to_end(text)
+            return cached
+        tokens = self._count_uncached(text)
+        self._text_cache[text] = tokens
+        if len(self._text_cache) > self._cache_size:
+            self._text_cache.popitem(last=False)
+        return tokens
+
+    def count_message(self, msg: dict) -> int:
+        """
+        单条消息 token 数（含结构开销）
+
+        按消息与 content 对象身份缓存（content 为列表时同时校验块数）；
+        替换 content 或追加内容块都会重新计算。
+        """
+        content = msg.get("content", "")
+        blocks = len(content) if isinstance(content, list) else -1
+        key = id(msg)
+        entry = self._message_cache.get(key)
+        if entry is not None and entry[0] is msg and entry[1] is content and entry[2] == blocks:
+            self._message_cache.move_to_end(key)
+            self._stats["message_hits"] += 1
+            return entry[3]
+
+        self._stats["message_misses"] += 1
+        tokens = self._count_content(content) + MESSAGE_OVERHEAD_TOKENS
+        self._message_cache[key] = (msg, content, blocks, tokens)
+        if len(self._message_cache) > self._cache_size:
+            self._message_cache.popitem(last=False)
+        return tokens
+
+    def count_messages(self, messages: list[dict]) -> int:
+        """
+        消息列表 token 总数
+
+        每次全量累加，逐条命中消息缓存；不按列表对象保存累计值，
+        调用方原地替换列表内容（clear + extend）时也不会得到过期结果。
+        """
+        total = sum(self.count_message(msg) for msg in messages)
+        return max(total, 1)
+
+    # ==================== 内部 ====================
+
+    def _count_uncached(self, text: str) -> int:
+        if self._encoding is not None:
+            try:
+                return max(len(self._encoding.encode(text, disallowed_special=())), 1)
+            except Exception:
+                pass
+        return estimate_text_tokens(text)
+
+    def _count_content(self, content: Any) -> int:
+        if isinstance(content, str):
+            return self.count_text(content)
+        total = 0
+        if isinstance(content, list):
+            for item in content:
+                if isinstance(item, dict):
+                    text = item.get("text", "") or item.get("content", "")
+                    if isinstance(text, str) and text:
+                        total += self.count_text(text)
+                    else:
+                        total += self.count_text(json.dumps(item, ensure_ascii=False, default=str))
+                elif isinstance(item, str):
+                    total += self.count_text(item)
+        return total
@@ -7,20 +7,25 @@ LLM 统一客户端
 - 能力分流（根据请求自动选择合适的端点）
 - 健康检查
 - 动态模型切换（临时/永久）
+- 延迟感知路由与对冲请求（可选）
 """
 
 import asyncio
+import contextlib
 import json
 import logging
-from collections.abc import AsyncIterator
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from pathlib import Path
 
 from .config import get_default_config_path, load_endpoints_config
+from .latency import LatencyTracker
 from .providers.anthropic import AnthropicProvider
 from .providers.base import LLMProvider
 from .providers.openai import OpenAIProvider
+from .response_cache import cache_key, get_response_cache, request_digest
 from .types import (
     AllEndpointsFailedError,
     AudioBlock,
@@ -38,6 +43,31 @@ from .types import (
 
 logger = logging.getLogger(__name__)
 
+# 不可重试的结构性错误（重试不会修复，浪费配额）
+_NON_RETRYABLE_PATTERNS = (
+    "invalid_request_error",
+    "invalid_parameter",
+    "messages with role",
+    "must be a response to a preceeding message",
+    "does not support",  # Ollama: "model does not support thinking" 等
+    "not supported",     # 通用的"不支持"格式
+    "reasoning_content is missing",  # 自愈失败后仍作为结构性错误
+    "missing reasoning_content",
+    "missing 'reasoning_content'",
+)
+
+# 内容级错误（请求 payload 有问题），不应给端点加冷却
+_CONTENT_ERROR_PATTERNS = (
+    "exceeded limit",
+    "max bytes",
+    "payload too large",
+    "request entity too large",
+    "content too large",
+    "maximum context length",
+    "too many tokens",
+    "string too long",
+)
+
 
 def _friendly_error_hint(failed_providers: list | None = None, last_error: str = "") -> str:
     """根据失败端点的错误分类生成用户友好的提示信息。
@@ -161,6 +191,10 @@ class LLMClient:
         # 有工具上下文时，优先使用上次成功的端点（避免 failover 后又回到高优先级的故障端点）
         self._last_success_endpoint: str | None = None
 
+        # 端点延迟 / TTFT / 错误率统计（按端点名称，reload 后保留）
+        self._latency = LatencyTracker()
+        self._hedge_counts = {"fired": 0, "won": 0}
+
         if endpoints:
             self._endpoints = sorted(endpoints, key=lambda x: x.priority)
         elif config_path or get_default_config_path().exists():
@@ -243,6 +277,7 @@ class LLMClient:
         enable_thinking: bool = False,
         thinking_depth: str | None = None,
         conversation_id: str | None = None,
+        cache: bool = False,
         **kwargs,
     ) -> LLMResponse:
         """
@@ -262,6 +297,8 @@ class LLMClient:
             temperature: 温度
             enable_thinking: 是否启用思考模式
             thinking_depth: 思考深度 ('low'/'medium'/'high')
+            cache: 使用持久化响应缓存（仅适用于输出只取决于输入的辅助调用）。
+                以首选端点的模型 + 规范化请求为键，命中时不发起请求
             **kwargs: 额外参数
 
         Returns:
@@ -308,6 +345,9 @@ class LLMClient:
                 "(set settings.allow_failover_with_tool_context=true to override)."
             )
 
+        # 无工具调用可以自由换端点：允许按延迟排序和对冲
+        tool_free = not require_tools and not has_tool_context
+
         # 筛选支持所需能力的端点
         # 有工具上下文时传入端点亲和性：优先使用上次成功的端点
         eligible = self._filter_eligible_endpoints(
@@ -319,6 +359,7 @@ class LLMClient:
             require_pdf=require_pdf,
             conversation_id=conversation_id,
             prefer_endpoint=self._last_success_endpoint if has_tool_context else None,
+            rank_by="latency" if tool_free and self._latency_routing_enabled() else None,
         )
 
         # 可选：工具上下文下启用 failover（显式配置才开启）
@@ -339,8 +380,32 @@ class LLMClient:
                         f"api_types={sorted(api_types)}; failover remains disabled."
                     )
 
+        response_cache = get_response_cache() if cache else None
+        if response_cache is not None and eligible:
+            digest = request_digest(request)
+            # 缓存读写是同步 SQLite 调用，放到线程中执行，不阻塞事件循环
+            cached = await asyncio.to_thread(
+                response_cache.get, cache_key(eligible[0].model, digest)
+            )
+            if cached is not None:
+                logger.debug(f"[LLM] endpoint={eligible[0].name} response cache hit")
+                return cached
+
+            async def _store(provider: LLMProvider, response: LLMResponse) -> None:
+                # 以实际应答的模型为键：failover 到其他模型的结果不会冒充首选模型
+                await asyncio.to_thread(
+                    response_cache.put, cache_key(provider.model, digest), provider.model, response
+                )
+
+            on_response = _store
+        else:
+            on_response = None
+
         if eligible:
-            return await self._try_endpoints(eligible, request, allow_failover=allow_failover)
+            return await self._try_endpoints(
+                eligible, request, allow_failover=allow_failover, hedge=tool_free,
+                on_response=on_response,
+            )
 
         # eligible 为空 — 使用公共降级策略
         providers = await self._resolve_providers_with_fallback(
@@ -407,6 +472,7 @@ class LLMClient:
         require_audio = self._has_audio(messages)
         require_pdf = self._has_documents(messages)
         require_thinking = bool(enable_thinking)
+        tool_free = not require_tools and not self._has_tool_context(messages)
 
         # 使用公共降级策略解析端点列表
         eligible = self._filter_eligible_endpoints(
@@ -417,6 +483,7 @@ class LLMClient:
             require_audio=require_audio,
             require_pdf=require_pdf,
             conversation_id=conversation_id,
+            rank_by="ttft" if tool_free and self._latency_routing_enabled() else None,
         )
 
         if not eligible:
@@ -431,24 +498,63 @@ class LLMClient:
                 conversation_id=conversation_id,
             )
 
+        last_error: Exception | None = None
+
+        # 对冲：首个端点在 TTFT p95 内没有产出首个事件时，并发请求下一个端点
+        hedge_delay = (
+            self._hedge_delay(eligible[0], ttft=True)
+            if tool_free and len(eligible) > 1
+            else None
+        )
+        hedge_failed: set[str] = set()
+
+        def _on_hedge_error(p: LLMProvider, exc: BaseException) -> None:
+            nonlocal last_error
+            last_error = exc
+            hedge_failed.add(p.name)
+            self._latency.record_failure(p.name)
+            self._mark_endpoint_failed(p, exc)
+            logger.warning(
+                f"[LLM-Stream] endpoint={p.name} hedged stream failed: {exc} "
+                f"(category={p.error_category})"
+            )
+
         # 多端点轮询：依次尝试每个端点
         # 流式特殊处理：一旦有事件产出就不再切换（避免混合响应）
-        last_error: Exception | None = None
         for i, provider in enumerate(eligible):
+            if provider.name in hedge_failed:
+                continue
             yielded = False
+            started = time.monotonic()
+            ttft: float | None = None
             try:
                 logger.info(
                     f"[LLM-Stream] endpoint={provider.name} model={provider.model} "
                     f"action=stream_request"
                 )
-                async for event in provider.chat_stream(request):
+                if i == 0 and hedge_delay is not None:
+                    (
+                        provider, stream, first_events, started, ttft,
+                    ) = await self._open_hedged_stream(
+                        provider, eligible[1], request, hedge_delay, _on_hedge_error
+                    )
+                else:
+                    stream, first_events = provider.chat_stream(request), []
+                for event in first_events:
+                    yielded = True
+                    yield event
+                async for event in stream:
+                    if ttft is None:
+                        ttft = time.monotonic() - started
                     yielded = True
                     yield event
                 # 流完成：provider 内部已调用 mark_healthy()
+                self._latency.record_success(provider.name, time.monotonic() - started, ttft)
                 self._last_success_endpoint = provider.name
                 return
             except LLMError as e:
                 last_error = e
+                self._latency.record_failure(provider.name)
                 if yielded:
                     # 已产出部分事件，不能切换端点（客户端会收到混合响应）
                     logger.error(
@@ -464,6 +570,7 @@ class LLMClient:
                 )
             except Exception as e:
                 last_error = e
+                self._latency.record_failure(provider.name)
                 if yielded:
                     raise
                 provider.mark_unhealthy(str(e))
@@ -688,6 +795,7 @@ class LLMClient:
         require_pdf: bool = False,
         conversation_id: str | None = None,
         prefer_endpoint: str | None = None,
+        rank_by: str | None = None,
     ) -> list[LLMProvider]:
         """筛选支持所需能力的端点
 
@@ -696,6 +804,8 @@ class LLMClient:
         - 如果有临时覆盖且覆盖端点支持所需能力，优先使用覆盖端点
         - prefer_endpoint: 端点亲和性，有工具上下文时传入上次成功的端点名称，
           将其提升到队列前端（优先于 priority 排序，但低于 override）
+        - rank_by: "latency" / "ttft" 时按观测到的期望延迟重排（替代 priority 排序，
+          仍低于亲和性和 override）
         """
         # 清理过期的 override
         # 1) 清理当前 conversation 的过期 override
@@ -781,6 +891,13 @@ class LLMClient:
         # 按优先级排序
         eligible.sort(key=lambda p: p.config.priority)
 
+        # 延迟路由：稳定排序，未测量的端点保持优先级顺序并优先获得探测
+        if rank_by and len(eligible) > 1:
+            eligible = self._latency.rank(eligible, ttft=rank_by == "ttft")
+            logger.debug(
+                f"[LLM] Latency routing ({rank_by}): {[p.name for p in eligible]}"
+            )
+
         # 端点亲和性：有工具上下文时，将上次成功的端点提升到队列前端
         # 这样 failover 后的下一次调用会继续使用成功的端点，而不是回到高优先级的故障端点
         if prefer_endpoint:
@@ -807,6 +924,8 @@ class LLMClient:
         providers: list[LLMProvider],
         request: LLMRequest,
         allow_failover: bool = True,
+        hedge: bool = False,
+        on_response: Callable[[LLMProvider, LLMResponse], Awaitable[None]] | None = None,
     ) -> LLMResponse:
         """尝试多个端点
 
@@ -821,6 +940,9 @@ class LLMClient:
             allow_failover: 控制端点切换策略
                 - True: 无工具上下文，快速切换（每个端点只试 1 次）
                 - False: 有工具上下文，先重试当前端点多次再切到下一个
+            hedge: 允许对冲（仅无工具调用时由 chat() 传入；还需 settings.hedge_requests）。
+                首个端点超过 p95 延迟仍未返回时并发请求下一个端点，先成功者胜出，另一个被取消
+            on_response: 成功时以 (应答端点, 响应) 回调（响应缓存写入）
 
         默认策略：有备选端点时快速切换，不重试同一个端点（提高响应速度）
         工具上下文：每个端点重试 retry_count 次后才切到下一个（保持连续性）
@@ -848,7 +970,27 @@ class LLMClient:
         # 始终尝试所有端点（工具上下文时每个端点多次重试后再切到下一个）
         providers_to_try = providers
 
+        # 对冲只在"每个端点只试一次"的快速切换模式下启用
+        hedge_delay = (
+            self._hedge_delay(providers[0])
+            if hedge and has_fallback and allow_failover and max_attempts == 1
+            else None
+        )
+        hedge_failed: set[str] = set()
+
+        def _on_hedge_error(p: LLMProvider, exc: BaseException) -> None:
+            errors.append(f"{p.name}: {exc}")
+            failed_providers.append(p)
+            hedge_failed.add(p.name)
+            self._mark_endpoint_failed(p, exc)
+            logger.warning(
+                f"[LLM] endpoint={p.name} hedged request failed: {exc} "
+                f"(category={p.error_category})"
+            )
+
         for i, provider in enumerate(providers_to_try):
+            if provider.name in hedge_failed:
+                continue
             for attempt in range(max_attempts):
                 try:
                     tools_count = len(request.tools) if request.tools else 0
@@ -857,7 +999,16 @@ class LLMClient:
                         f"action=request tools={tools_count}"
                     )
 
-                    response = await provider.chat(request)
+                    if i == 0 and hedge_delay is not None:
+                        provider, response = await self._hedge(
+                            provider,
+                            providers[1],
+                            hedge_delay,
+                            lambda p: self._timed_chat(p, request),
+                            _on_hedge_error,
+                        )
+                    else:
+                        response = await self._timed_chat(provider, request)
 
                     # 成功：重置连续失败计数
                     provider.record_success()
@@ -874,6 +1025,12 @@ class LLMClient:
                     # 端点亲和性：记录本次成功的端点，供后续有工具上下文的调用优先使用
                     self._last_success_endpoint = provider.name
 
+                    if on_response is not None:
+                        try:
+                            await on_response(provider, response)
+                        except Exception as e:
+                            logger.warning(f"[LLM] on_response callback failed: {e}")
+
                     return response
 
                 except AuthenticationError as e:
@@ -940,37 +1097,16 @@ class LLMClient:
                         continue  # 用修正后的参数重试当前端点
 
                     # 检测不可重试的结构性错误（重试不会修复，浪费配额）
-                    non_retryable_patterns = [
-                        "invalid_request_error",
-                        "invalid_parameter",
-                        "messages with role",
-                        "must be a response to a preceeding message",
-                        "does not support",  # Ollama: "model does not support thinking" 等
-                        "not supported",     # 通用的"不支持"格式
-                        "reasoning_content is missing",  # 自愈失败后仍作为结构性错误
-                        "missing reasoning_content",
-                        "missing 'reasoning_content'",
-                    ]
                     is_non_retryable = any(
-                        pattern in error_str.lower() for pattern in non_retryable_patterns
+                        pattern in error_str.lower() for pattern in _NON_RETRYABLE_PATTERNS
                     )
 
                     if is_non_retryable:
                         # 区分内容级错误 vs 端点级错误：
                         # 内容级错误（请求 payload 有问题）不应给端点加冷却，
                         # 否则会殃及其他正常会话。
-                        _content_error_patterns = [
-                            "exceeded limit",
-                            "max bytes",
-                            "payload too large",
-                            "request entity too large",
-                            "content too large",
-                            "maximum context length",
-                            "too many tokens",
-                            "string too long",
-                        ]
                         _is_content_error = any(
-                            p in error_str.lower() for p in _content_error_patterns
+                            p in error_str.lower() for p in _CONTENT_ERROR_PATTERNS
                         )
 
                         if _is_content_error:
@@ -1070,6 +1206,174 @@ class LLMClient:
             is_structural=all_structural,
         )
 
+    # ==================== 延迟路由 / 对冲 ====================
+
+    def _latency_routing_enabled(self) -> bool:
+        """settings.routing_policy == "latency" 时，无工具调用按观测延迟选端点"""
+        return self._settings.get("routing_policy", "priority") == "latency"
+
+    @staticmethod
+    def _mark_endpoint_failed(provider: LLMProvider, exc: BaseException) -> None:
+        """按常规请求路径的错误分类设置端点冷静期（对冲路径上的失败使用）"""
+        from .providers.base import LLMProvider as _BaseProvider
+
+        error_str = str(exc)
+        lowered = error_str.lower()
+        category = _BaseProvider._classify_error(error_str)
+        if isinstance(exc, AuthenticationError):
+            provider.mark_unhealthy(error_str, category="quota" if category == "quota" else "auth")
+        elif not isinstance(exc, LLMError):
+            provider.mark_unhealthy(error_str)
+        elif category == "quota":
+            provider.mark_unhealthy(error_str, category="quota")
+        elif any(p in lowered for p in _NON_RETRYABLE_PATTERNS):
+            if any(p in lowered for p in _CONTENT_ERROR_PATTERNS):
+                # 内容级错误不冷却端点
+                provider._content_error = True
+            else:
+                provider.mark_unhealthy(error_str, category="structural")
+        else:
+            provider.mark_unhealthy(error_str)
+
+    def _hedge_delay(self, provider: LLMProvider, ttft: bool = False) -> float | None:
+        """对冲触发时限（秒）；未开启 settings.hedge_requests 时返回 None"""
+        if not self._settings.get("hedge_requests", False):
+            return None
+        return self._latency.hedge_delay(
+            provider.name,
+            floor=float(self._settings.get("hedge_min_delay_seconds", 2.0)),
+            ceiling=float(self._settings.get("hedge_max_delay_seconds", 30.0)),
+            ttft=ttft,
+        )
+
+    async def _timed_chat(self, provider: LLMProvider, request: LLMRequest) -> LLMResponse:
+        """调用 provider.chat 并记录延迟
+
+        被取消（对冲落败）不计为失败，但已耗时作为延迟下界记录，
+        避免变慢的端点一直保留旧的快速 EWMA。
+        """
+        started = time.monotonic()
+        try:
+            response = await provider.chat(request)
+        except asyncio.CancelledError:
+            self._latency.record_lower_bound(provider.name, time.monotonic() - started)
+            raise
+        except Exception:
+            self._latency.record_failure(provider.name)
+            raise
+        self._latency.record_success(provider.name, time.monotonic() - started)
+        return response
+
+    async def _hedge(
+        self,
+        primary: LLMProvider,
+        backup: LLMProvider,
+        delay: float,
+        start: Callable[[LLMProvider], Awaitable],
+        on_error: Callable[[LLMProvider, BaseException], None],
+    ) -> tuple[LLMProvider, object]:
+        """对冲执行 start(primary)：delay 秒内未完成则并发 start(backup)
+
+        先成功的一方胜出，另一方被取消。backup 的失败（以及 backup 胜出时
+        primary 的失败）通过 on_error 上报；两者都失败时抛出 primary 的异常，
+        交由调用方按常规错误处理。
+        """
+        tasks = {asyncio.ensure_future(start(primary)): primary}
+        primary_error: BaseException | None = None
+        try:
+            done, pending = await asyncio.wait(set(tasks), timeout=delay)
+            if not done:
+                self._hedge_counts["fired"] += 1
+                logger.info(
+                    f"[LLM] endpoint={primary.name} no first token within {delay:.1f}s, "
+                    f"hedging with endpoint={backup.name}"
+                )
+                backup_task = asyncio.ensure_future(start(backup))
+                tasks[backup_task] = backup
+                pending.add(backup_task)
+            while True:
+                for task in done:
+                    provider = tasks[task]
+                    exc = task.exception()
+                    if exc is None:
+                        if primary_error is not None:
+                            on_error(primary, primary_error)
+                        if provider is not primary:
+                            self._hedge_counts["won"] += 1
+                            logger.info(f"[LLM] endpoint={provider.name} won hedged request")
+                        return provider, task.result()
+                    if provider is primary:
+                        primary_error = exc
+                    else:
+                        on_error(provider, exc)
+                if not pending:
+                    raise primary_error
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            losers = [t for t in tasks if not t.done()]
+            for task in losers:
+                task.cancel()
+            if losers:
+                await asyncio.gather(*losers, return_exceptions=True)
+
+    async def _open_hedged_stream(
+        self,
+        primary: LLMProvider,
+        backup: LLMProvider,
+        request: LLMRequest,
+        delay: float,
+        on_error: Callable[[LLMProvider, BaseException], None],
+    ) -> tuple[LLMProvider, AsyncIterator[dict], list[dict], float, float]:
+        """对冲打开流：以首个事件（TTFT）为准决出胜者，关闭落败方的流
+
+        开始时间按端点各自记录：backup 胜出时其 TTFT 不含对冲等待时间。
+        落败方被取消时的已耗时记为延迟下界。
+
+        Returns:
+            (胜出端点, 已消费首个事件的流, 首个事件列表（空流时为空）,
+             胜出端点的开始时间（monotonic）, 胜出端点的 TTFT)
+        """
+        streams: dict[str, AsyncIterator[dict]] = {}
+
+        async def _first_event(p: LLMProvider) -> tuple[list[dict], float, float]:
+            started = time.monotonic()
+            stream = streams[p.name] = p.chat_stream(request)
+            try:
+                events = [await stream.__anext__()]
+            except StopAsyncIteration:
+                events = []
+            except asyncio.CancelledError:
+                self._latency.record_lower_bound(p.name, time.monotonic() - started)
+                raise
+            return events, started, time.monotonic() - started
+
+        winner: LLMProvider | None = None
+        try:
+            winner, (first_events, started, ttft) = await self._hedge(
+                primary, backup, delay, _first_event, on_error
+            )
+            return winner, streams[winner.name], first_events, started, ttft
+        finally:
+            for name, stream in streams.items():
+                if winner is None or name != winner.name:
+                    with contextlib.suppress(Exception):
+                        await stream.aclose()
+
+    def get_endpoint_stats(self) -> dict:
+        """端点延迟 / TTFT / 错误率统计、对冲计数与响应缓存命中率（供状态页与调试）
+
+        响应缓存统计会查询 SQLite，异步调用方应放到线程中执行。
+        """
+        response_cache = get_response_cache(create=False)
+        return {
+            "routing_policy": self._settings.get("routing_policy", "priority"),
+            "hedge_requests": bool(self._settings.get("hedge_requests", False)),
+            "hedge_fired": self._hedge_counts["fired"],
+            "hedge_won": self._hedge_counts["won"],
+            "endpoints": self._latency.snapshot(),
+            "response_cache": response_cache.stats() if response_cache is not None else None,
+        }
+
     def _has_images(self, messages: list[Message]) -> bool:
         """检查消息中是否包含图片"""
         for msg in messages:
@@ -17,6 +17,7 @@ from ..types import (
     ToolUseBlock,
     VideoBlock,
     VideoContent,
+    strip_cache_boundary,
 )
 from .multimodal import convert_content_blocks_to_openai
 
@@ -63,12 +64,12 @@ def convert_messages_to_openai(
     """
     result = []
 
-    # 添加 system 消息
+    # 添加 system 消息（OpenAI 兼容端点自动做前缀缓存，去掉边界标记即可）
     if system:
         result.append(
             {
                 "role": "system",
-                "content": system,
+                "content": strip_cache_boundary(system),
             }
         )
 
@@ -0,0 +1,169 @@
+"""
+端点延迟统计
+
+为 LLMClient 提供按端点的观测数据：
+- 总延迟 / 首 token 延迟（TTFT）的 EWMA 与近期样本分位数
+- 错误率 EWMA
+- 按"期望延迟"对端点排序（延迟路由策略）
+- 由 p95 推导对冲（hedge）请求的触发时限
+"""
+
+import math
+import time
+from collections import deque
+
+# EWMA 平滑系数：越大越偏向最近样本
+DEFAULT_ALPHA = 0.2
+# 每个端点保留的近期样本数（用于分位数）
+DEFAULT_WINDOW = 64
+# 计算分位数所需的最少样本数，不足时对冲时限退回下限
+MIN_QUANTILE_SAMPLES = 5
+# 统计超过该秒数未更新视为过期，排序时重新当作"未测量"参与探测
+DEFAULT_STALE_AFTER = 600.0
+
+
+def _quantile(samples: list[float], q: float) -> float:
+    """最近秩法分位数（样本量小，无需插值）"""
+    ordered = sorted(samples)
+    rank = max(0, math.ceil(q * len(ordered)) - 1)
+    return ordered[rank]
+
+
+class EndpointStats:
+    """单个端点的延迟与错误率统计"""
+
+    __slots__ = (
+        "_alpha", "latency_ewma", "ttft_ewma", "error_rate",
+        "successes", "failures", "last_update", "_latencies", "_ttfts",
+    )
+
+    def __init__(self, alpha: float = DEFAULT_ALPHA, window: int = DEFAULT_WINDOW):
+        self._alpha = alpha
+        self.latency_ewma: float | None = None
+        self.ttft_ewma: float | None = None
+        self.error_rate = 0.0
+        self.successes = 0
+        self.failures = 0
+        self.last_update = 0.0
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._ttfts: deque[float] = deque(maxlen=window)
+
+    def _ewma(self, current: float | None, value: float) -> float:
+        return value if current is None else current + self._alpha * (value - current)
+
+    def record_success(self, latency: float, ttft: float | None = None) -> None:
+        """记录一次成功请求。非流式调用没有独立的首 token 时间，TTFT 即总延迟。"""
+        ttft = latency if ttft is None else ttft
+        self.latency_ewma = self._ewma(self.latency_ewma, latency)
+        self.ttft_ewma = self._ewma(self.ttft_ewma, ttft)
+        self.error_rate = self._ewma(self.error_rate, 0.0)
+        self._latencies.append(latency)
+        self._ttfts.append(ttft)
+        self.successes += 1
+        self.last_update = time.monotonic()
+
+    def record_failure(self) -> None:
+        self.error_rate = self._ewma(self.error_rate, 1.0)
+        self.failures += 1
+        self.last_update = time.monotonic()
+
+    def record_lower_bound(self, elapsed: float) -> None:
+        """记录被取消请求（对冲落败方）已耗费的时间：真实延迟与 TTFT 都不低于该值。
+
+        只在超过当前 EWMA 时计入；低于估计的下界不带新信息。不计成功/失败次数。
+        """
+        if self.latency_ewma is None or elapsed > self.latency_ewma:
+            self.latency_ewma = self._ewma(self.latency_ewma, elapsed)
+            self._latencies.append(elapsed)
+        if self.ttft_ewma is None or elapsed > self.ttft_ewma:
+            self.ttft_ewma = self._ewma(self.ttft_ewma, elapsed)
+            self._ttfts.append(elapsed)
+        self.last_update = time.monotonic()
+
+    def quantile(self, q: float, ttft: bool = False) -> float | None:
+        """近期样本的 q 分位数；样本不足 MIN_QUANTILE_SAMPLES 时返回 None"""
+        samples = self._ttfts if ttft else self._latencies
+        if len(samples) < MIN_QUANTILE_SAMPLES:
+            return None
+        return _quantile(list(samples), q)
+
+    def expected_latency(self, ttft: bool = False) -> float | None:
+        """按错误率惩罚后的期望延迟（失败需重试，约等于 latency / 成功率）"""
+        base = self.ttft_ewma if ttft else self.latency_ewma
+        if base is None:
+            return None
+        return base / max(1.0 - self.error_rate, 0.1)
+
+    def to_dict(self) -> dict:
+        def _r(v: float | None) -> float | None:
+            return None if v is None else round(v, 3)
+
+        return {
+            "latency_ewma": _r(self.latency_ewma),
+            "ttft_ewma": _r(self.ttft_ewma),
+            "latency_p95": _r(self.quantile(0.95)),
+            "ttft_p95": _r(self.quantile(0.95, ttft=True)),
+            "error_rate": round(self.error_rate, 3),
+            "successes": self.successes,
+            "failures": self.failures,
+        }
+
+
+class LatencyTracker:
+    """按端点名称聚合的延迟统计"""
+
+    def __init__(
+        self,
+        alpha: float = DEFAULT_ALPHA,
+        window: int = DEFAULT_WINDOW,
+        stale_after: float = DEFAULT_STALE_AFTER,
+    ):
+        self._alpha = alpha
+        self._window = window
+        self._stale_after = stale_after
+        self._stats: dict[str, EndpointStats] = {}
+
+    def get(self, name: str) -> EndpointStats:
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = EndpointStats(self._alpha, self._window)
+        return stats
+
+    def record_success(self, name: str, latency: float, ttft: float | None = None) -> None:
+        self.get(name).record_success(latency, ttft)
+
+    def record_failure(self, name: str) -> None:
+        self.get(name).record_failure()
+
+    def record_lower_bound(self, name: str, elapsed: float) -> None:
+        self.get(name).record_lower_bound(elapsed)
+
+    def rank(self, providers: list, ttft: bool = False) -> list:
+        """按期望延迟升序排列端点（稳定排序，同分保持原优先级顺序）
+
+        未测量或统计已过期的端点排在最前，使其得到一次探测机会；
+        否则慢端点一旦落后就再也不会被重新测量。
+        """
+        now = time.monotonic()
+
+        def key(provider) -> float:
+            stats = self._stats.get(provider.name)
+            if stats is None or now - stats.last_update > self._stale_after:
+                return -1.0
+            expected = stats.expected_latency(ttft=ttft)
+            return -1.0 if expected is None else expected
+
+        return sorted(providers, key=key)
+
+    def hedge_delay(
+        self, name: str, *, floor: float, ceiling: float, ttft: bool = False, q: float = 0.95,
+    ) -> float:
+        """对冲触发时限：端点近期 p95，夹在 [floor, ceiling] 之间；样本不足时取 floor"""
+        stats = self._stats.get(name)
+        p = stats.quantile(q, ttft=ttft) if stats else None
+        if p is None:
+            return floor
+        return min(max(p, floor), ceiling)
+
+    def snapshot(self) -> dict[str, dict]:
+        return {name: stats.to_dict() for name, stats in self._stats.items()}
@@ -22,12 +22,16 @@ from ..types import (
     ThinkingBlock,
     ToolUseBlock,
     Usage,
+    split_system_prompt,
+    strip_cache_boundary,
 )
 from .base import LLMProvider
 from .proxy_utils import build_httpx_timeout, get_httpx_transport, get_proxy_config
 
 logger = logging.getLogger(__name__)
 
+_CACHE_CONTROL = {"type": "ephemeral"}
+
 
 class AnthropicProvider(LLMProvider):
     """Anthropic API Provider"""
@@ -104,9 +108,8 @@ class AnthropicProvider(LLMProvider):
 
         return self._client
 
-    async def chat(self, request: LLMRequest) -> LLMResponse:
+    async def _chat(self, request: LLMRequest) -> LLMResponse:
         """发送聊天请求"""
-        await self.acquire_rate_limit()
         client = await self._get_client()
 
         # 构建请求体
@@ -140,9 +143,8 @@ class AnthropicProvider(LLMProvider):
             self.mark_unhealthy(f"Request error: {detail}")
             raise LLMError(f"Request failed: {detail}")
 
-    async def chat_stream(self, request: LLMRequest) -> AsyncIterator[dict]:
+    async def _chat_stream(self, request: LLMRequest) -> AsyncIterator[dict]:
         """流式聊天请求"""
-        await self.acquire_rate_limit()
         client = await self._get_client()
 
         body = self._build_request_body(request)
@@ -199,6 +201,9 @@ class AnthropicProvider(LLMProvider):
         # 因此这里必须传一个值。使用端点配置的 max_tokens 或请求指定的值。
         thinking_enabled = request.enable_thinking and self.config.has_capability("thinking")
         messages = self._serialize_messages(request.messages, thinking_enabled)
+        prompt_cache = self._prompt_cache_enabled()
+        if prompt_cache:
+            self._mark_conversation_breakpoint(messages)
         body = {
             "model": self.config.model,
             "max_tokens": request.max_tokens or self.config.max_tokens or 16384,
@@ -206,10 +211,17 @@ class AnthropicProvider(LLMProvider):
         }
 
         if request.system:
-            body["system"] = request.system
+            if prompt_cache:
+                body["system"] = self._build_system_blocks(request.system)
+            else:
+                body["system"] = strip_cache_boundary(request.system)
 
         if request.tools:
-            body["tools"] = [tool.to_dict() for tool in request.tools]
+            tools = [tool.to_dict() for tool in request.tools]
+            if prompt_cache:
+                # 缓存顺序为 tools → system → messages，末尾工具上的断点覆盖全部工具定义
+                tools[-1] = {**tools[-1], "cache_control": dict(_CACHE_CONTROL)}
+            body["tools"] = tools
 
         if request.temperature != 1.0:
             body["temperature"] = request.temperature
@@ -245,6 +257,54 @@ class AnthropicProvider(LLMProvider):
 
         return body
 
+    @staticmethod
+    def _prompt_cache_enabled() -> bool:
+        try:
+            from ...config import settings
+
+            return bool(settings.prompt_cache_enabled)
+        except Exception:
+            return True
+
+    @staticmethod
+    def _build_system_blocks(system: str) -> list[dict]:
+        """system 拆为两个 text 块：稳定前缀打断点，易变后缀（时间、记忆等）不缓存"""
+        prefix, suffix = split_system_prompt(system)
+        blocks = []
+        if prefix:
+            blocks.append({"type": "text", "text": prefix, "cache_control": dict(_CACHE_CONTROL)})
+        if suffix:
+            blocks.append({"type": "text", "text": suffix})
+        return blocks
+
+    @staticmethod
+    def _mark_conversation_breakpoint(messages: list[dict]) -> None:
+        """在最后一条消息的最后一个可缓存块上打断点（滚动缓存）。
+
+        下一轮请求时，上一轮的断点位置成为前缀的一部分，服务端自动回溯命中，
+        长 agent 循环里每轮只需为新增的消息付全价。thinking 块不允许打断点，跳过。
+        """
+        if not messages:
+            return
+        msg = messages[-1]
+        content = msg.get("content")
+        if isinstance(content, str):
+            if content:
+                msg["content"] = [
+                    {"type": "text", "text": content, "cache_control": dict(_CACHE_CONTROL)}
+                ]
+            return
+        if not isinstance(content, list):
+            return
+        for i in range(len(content) - 1, -1, -1):
+            block = content[i]
+            if block.get("type") in ("thinking", "redacted_thinking"):
+                continue
+            if block.get("type") == "text" and not block.get("text"):
+                continue
+            content[i] = {**block, "cache_control": dict(_CACHE_CONTROL)}
+            return
+
     @staticmethod
     def _serialize_messages(messages: list, thinking_enabled: bool) -> list[dict]:
         """序列化消息列表，确保 thinking 模式下格式合规。
@@ -358,9 +418,14 @@ class AnthropicProvider(LLMProvider):
         usage = Usage(
             input_tokens=usage_data.get("input_tokens", 0),
             output_tokens=usage_data.get("output_tokens", 0),
-            cache_creation_input_tokens=usage_data.get("cache_creation_input_tokens", 0),
-            cache_read_input_tokens=usage_data.get("cache_read_input_tokens", 0),
+            cache_creation_input_tokens=usage_data.get("cache_creation_input_tokens") or 0,
+            cache_read_input_tokens=usage_data.get("cache_read_input_tokens") or 0,
         )
+        if usage.cache_read_input_tokens or usage.cache_creation_input_tokens:
+            logger.debug(
+                f"[Anthropic] prompt cache: read={usage.cache_read_input_tokens}, "
+                f"write={usage.cache_creation_input_tokens}, uncached={usage.input_tokens}"
+            )
 
         return LLMResponse(
             id=data.get("id", ""),
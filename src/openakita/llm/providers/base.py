@@ -4,71 +4,22 @@ LLM Provider 基类
 定义所有 Provider 必须实现的接口。
 """
 
-import asyncio
 import logging
 import time
 from abc import ABC, abstractmethod
-from collections import deque
 from collections.abc import AsyncIterator
 
+from ..rate_limit import (
+    EndpointRateLimiter,
+    RateLimitLease,
+    estimate_request_tokens,
+    get_rate_limiter,
+)
 from ..types import EndpointConfig, LLMRequest, LLMResponse
 
 logger = logging.getLogger(__name__)
 
 
-class RPMRateLimiter:
-    """滑动窗口 RPM (Requests Per Minute) 限流器。
-
-    采用 60 秒滑动窗口 + asyncio.Lock 保证并发安全。
-    当请求速率超过限制时，自动等待直到窗口内有空余配额。
-    """
-
-    __slots__ = ("_rpm", "_window", "_timestamps", "_lock", "_lock_loop_id")
-
-    def __init__(self, rpm: int):
-        self._rpm = rpm
-        self._window = 60.0
-        self._timestamps: deque[float] = deque()
-        self._lock: asyncio.Lock | None = None
-        self._lock_loop_id: int | None = None
-
-    def _get_lock(self) -> asyncio.Lock:
-        """获取或创建 asyncio.Lock（绑定到当前事件循环）。"""
-        try:
-            loop_id = id(asyncio.get_running_loop())
-        except RuntimeError:
-            loop_id = None
-        if self._lock is None or self._lock_loop_id != loop_id:
-            self._lock = asyncio.Lock()
-            self._lock_loop_id = loop_id
-        return self._lock
-
-    async def acquire(self, endpoint_name: str = "") -> None:
-        """获取一个请求配额，必要时等待。"""
-        if self._rpm <= 0:
-            return
-
-        lock = self._get_lock()
-        while True:
-            async with lock:
-                now = time.monotonic()
-                while self._timestamps and self._timestamps[0] <= now - self._window:
-                    self._timestamps.popleft()
-
-                if len(self._timestamps) < self._rpm:
-                    self._timestamps.append(now)
-                    return
-
-                oldest = self._timestamps[0]
-                wait_time = oldest + self._window - now
-
-            tag = f" endpoint={endpoint_name}" if endpoint_name else ""
-            logger.info(
-                f"[RPM]{tag} rate limit reached ({self._rpm} rpm), "
-                f"waiting {wait_time:.1f}s"
-            )
-            await asyncio.sleep(max(wait_time, 0.1))
-
 # 冷静期时长（秒）- 按错误类型区分
 # 设计原则：冷却只防止秒级连续轰炸，不阻塞其他会话；
 # 重试上限由上层（TaskMonitor / ReasoningEngine）控制，
@@ -100,10 +51,8 @@ class LLMProvider(ABC):
         self._error_category: str = ""   # 错误分类
         self._consecutive_cooldowns: int = 0  # 连续进入冷静期次数（无成功请求间隔）
         self._is_extended_cooldown: bool = False  # 是否处于升级冷静期
-        _rpm = config.rpm_limit if isinstance(config.rpm_limit, int) else 0
-        self._rate_limiter: RPMRateLimiter | None = (
-            RPMRateLimiter(_rpm) if _rpm > 0 else None
-        )
+        # 同一上游配额的所有 Provider 实例（跨 LLMClient / 事件循环 / 可选跨进程）共享限流器
+        self._rate_limiter: EndpointRateLimiter | None = get_rate_limiter(config)
 
     @property
     def name(self) -> str:
@@ -275,10 +224,12 @@ class LLMProvider(ABC):
             self._last_error = None
             self._error_category = ""
 
-    async def acquire_rate_limit(self):
-        """获取 RPM 限流配额，必要时等待。无限流配置时立即返回。"""
-        if self._rate_limiter:
-            await self._rate_limiter.acquire(endpoint_name=self.name)
+    async def acquire_rate_limit(self, request: LLMRequest | None = None) -> RateLimitLease | None:
+        """获取 RPM / TPM / 并发配额，必要时等待。无限流配置时立即返回 None。"""
+        if not self._rate_limiter:
+            return None
+        tokens = estimate_request_tokens(request) if request is not None else 0
+        return await self._rate_limiter.acquire(tokens, endpoint_name=self.name)
 
     def reset_cooldown(self):
         """重置冷静期，允许端点立即被重新尝试
@@ -350,10 +301,9 @@ class LLMProvider(ABC):
 
         return "unknown"
 
-    @abstractmethod
     async def chat(self, request: LLMRequest) -> LLMResponse:
         """
-        发送聊天请求
+        发送聊天请求（先取得限流配额，结束后按实际 usage 归还）
 
         Args:
             request: 统一请求格式
@@ -361,12 +311,20 @@ class LLMProvider(ABC):
         Returns:
             统一响应格式
         """
-        pass
+        lease = await self.acquire_rate_limit(request)
+        if lease is None:
+            return await self._chat(request)
+        usage = None
+        try:
+            response = await self._chat(request)
+            usage = response.usage
+            return response
+        finally:
+            lease.release(usage)
 
-    @abstractmethod
     async def chat_stream(self, request: LLMRequest) -> AsyncIterator[dict]:
         """
-        流式聊天请求
+        流式聊天请求（配额占用到流结束；流式无 usage 校正，按预估计）
 
         Args:
             request: 统一请求格式
@@ -374,7 +332,21 @@ class LLMProvider(ABC):
         Yields:
             流式事件
         """
-        pass
+        lease = await self.acquire_rate_limit(request)
+        try:
+            async for event in self._chat_stream(request):
+                yield event
+        finally:
+            if lease is not None:
+                lease.release()
+
+    @abstractmethod
+    async def _chat(self, request: LLMRequest) -> LLMResponse:
+        """发送聊天请求（子类实现，不含限流）"""
+
+    @abstractmethod
+    def _chat_stream(self, request: LLMRequest) -> AsyncIterator[dict]:
+        """流式聊天请求（子类实现，不含限流）"""
 
     async def health_check(self, dry_run: bool = False) -> bool:
         """
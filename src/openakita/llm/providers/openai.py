@@ -166,9 +166,8 @@ class OpenAIProvider(LLMProvider):
             pool=min(30.0, new_read),
         )
 
-    async def chat(self, request: LLMRequest) -> LLMResponse:
+    async def _chat(self, request: LLMRequest) -> LLMResponse:
         """发送聊天请求"""
-        await self.acquire_rate_limit()
         client = await self._get_client()
 
         # 构建请求体
@@ -248,9 +247,8 @@ class OpenAIProvider(LLMProvider):
             self.mark_unhealthy(f"Request error: {detail}", is_local=self._is_local_endpoint())
             raise LLMError(f"Request failed: {detail}")
 
-    async def chat_stream(self, request: LLMRequest) -> AsyncIterator[dict]:
+    async def _chat_stream(self, request: LLMRequest) -> AsyncIterator[dict]:
         """流式聊天请求"""
-        await self.acquire_rate_limit()
         client = await self._get_client()
 
         body = self._build_request_body(request)
@@ -625,10 +623,13 @@ class OpenAIProvider(LLMProvider):
             stop_reason = stop_reason_map.get(finish_reason, StopReason.END_TURN)
 
         # 解析使用统计
-        usage_data = data.get("usage", {})
+        usage_data = data.get("usage") or {}
+        # OpenAI 的 prompt_tokens 含缓存命中部分，换算为内部（Anthropic）口径
+        cached = (usage_data.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
         usage = Usage(
-            input_tokens=usage_data.get("prompt_tokens", 0),
-            output_tokens=usage_data.get("completion_tokens", 0),
+            input_tokens=max(0, (usage_data.get("prompt_tokens") or 0) - cached),
+            output_tokens=usage_data.get("completion_tokens") or 0,
+            cache_read_input_tokens=cached,
         )
 
         return LLMResponse(
@@ -0,0 +1,380 @@
+"""
+LLM 端点限流（RPM / TPM / 并发上限）
+
+同一上游配额（base_url + model + API Key）在进程内只有一个限流器，
+主 Agent、定时任务 Agent、编排 Worker 各自创建的 LLMClient / Provider 共用同一组令牌桶；
+配置 llm_rate_limit_db 后桶状态存放在 SQLite 中，多个 Worker 进程也共享同一配额。
+
+- RPM：请求令牌桶，容量 rpm，每秒回填 rpm/60
+- TPM：token 令牌桶，请求前按输入估算预扣，响应后按实际 usage 多退少补
+- 并发：同时在途的请求数上限（跨进程时以带过期时间的租约计数，进程崩溃不会永久占位）
+
+桶状态只用 threading.Lock / SQLite 事务保护，不绑定事件循环，
+不同线程里的事件循环（定时任务、子 Agent）可以安全共享。
+"""
+
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from .types import EndpointConfig, LLMRequest, Usage
+
+logger = logging.getLogger(__name__)
+
+# 并发已满时的轮询间隔（秒）
+_INFLIGHT_POLL = 0.05
+# 单次等待上限，到点后重新检查（配置可能被热重载）
+_MAX_SLEEP = 1.0
+# 在途租约的最长持有时间，超时视为持有者已崩溃
+DEFAULT_LEASE_TTL = 900.0
+
+
+def estimate_request_tokens(request: LLMRequest) -> int:
+    """粗略估算请求输入 token（约 3 字符/token），仅用于 TPM 预扣"""
+    chars = len(request.system or "")
+    for msg in request.messages:
+        if isinstance(msg.content, str):
+            chars += len(msg.content)
+            continue
+        for block in msg.content:
+            for attr in ("text", "thinking", "content"):
+                value = getattr(block, attr, None)
+                if isinstance(value, str):
+                    chars += len(value)
+            if getattr(block, "input", None):
+                chars += len(str(block.input))
+    return chars // 3 + 1
+
+
+def limit_key(config: EndpointConfig) -> str:
+    """上游配额标识：同一地址、模型和 Key 的端点共享限流"""
+    raw = f"{config.base_url.rstrip('/')}|{config.model}|{config.get_api_key() or ''}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:24]
+
+
+class _Limits:
+    __slots__ = ("rpm", "tpm", "max_inflight")
+
+    def __init__(self, rpm: int, tpm: int, max_inflight: int):
+        self.rpm = max(rpm, 0)
+        self.tpm = max(tpm, 0)
+        self.max_inflight = max(max_inflight, 0)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.rpm or self.tpm or self.max_inflight)
+
+
+def _refill(
+    limits: _Limits, req: float, tok: float, updated: float, now: float,
+) -> tuple[float, float]:
+    elapsed = max(now - updated, 0.0)
+    if limits.rpm:
+        req = min(float(limits.rpm), req + elapsed * limits.rpm / 60.0)
+    if limits.tpm:
+        tok = min(float(limits.tpm), tok + elapsed * limits.tpm / 60.0)
+    return req, tok
+
+
+def _wait_needed(
+    limits: _Limits, req: float, tok: float, inflight: int, tokens: int,
+) -> float:
+    """0 表示可以立即放行，否则返回建议等待秒数"""
+    wait = 0.0
+    if limits.max_inflight and inflight >= limits.max_inflight:
+        wait = _INFLIGHT_POLL
+    if limits.rpm and req < 1.0:
+        wait = max(wait, (1.0 - req) * 60.0 / limits.rpm)
+    if limits.tpm:
+        # 超过桶容量的大请求等桶满后放行，避免永远饿死
+        need = min(tokens, limits.tpm)
+        if tok < need:
+            wait = max(wait, (need - tok) * 60.0 / limits.tpm)
+    return wait
+
+
+class _MemoryBucketStore:
+    """进程内桶状态"""
+
+    blocking = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: dict[str, list] = {}  # key -> [req, tok, updated, inflight]
+
+    def try_acquire(self, key: str, limits: _Limits, tokens: int) -> tuple[str | None, float]:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(limits.rpm), float(limits.tpm), now, 0]
+            bucket[0], bucket[1] = _refill(limits, bucket[0], bucket[1], bucket[2], now)
+            bucket[2] = now
+            wait = _wait_needed(limits, bucket[0], bucket[1], bucket[3], tokens)
+            if wait > 0:
+                return None, wait
+            if limits.rpm:
+                bucket[0] -= 1.0
+            if limits.tpm:
+                bucket[1] -= tokens
+            bucket[3] += 1
+            return uuid.uuid4().hex, 0.0
+
+    def release(self, key: str, lease_id: str, limits: _Limits, token_delta: int) -> None:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                return
+            bucket[3] = max(bucket[3] - 1, 0)
+            if limits.tpm and token_delta:
+                bucket[1] = min(float(limits.tpm), bucket[1] - token_delta)
+
+    def inflight(self, key: str) -> int:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            return bucket[3] if bucket else 0
+
+
+class _SqliteBucketStore:
+    """跨进程桶状态（同一个 SQLite 文件，BEGIN IMMEDIATE 串行化）"""
+
+    blocking = True
+
+    def __init__(self, db_path: Path, lease_ttl: float = DEFAULT_LEASE_TTL):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lease_ttl = lease_ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(db_path), timeout=10, check_same_thread=False, isolation_level=None,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_rate_buckets ("
+            " key TEXT PRIMARY KEY, requests REAL NOT NULL, tokens REAL NOT NULL,"
+            " updated REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_rate_leases ("
+            " lease_id TEXT PRIMARY KEY, key TEXT NOT NULL, expires REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_llm_rate_leases_key ON llm_rate_leases(key, expires)"
+        )
+
+    def try_acquire(self, key: str, limits: _Limits, tokens: int) -> tuple[str | None, float]:
+        now = time.time()
+        with self._lock:
+            c = self._conn
+            c.execute("BEGIN IMMEDIATE")
+            try:
+                row = c.execute(
+                    "SELECT requests, tokens, updated FROM llm_rate_buckets WHERE key = ?", (key,)
+                ).fetchone()
+                req, tok, updated = row if row else (float(limits.rpm), float(limits.tpm), now)
+                req, tok = _refill(limits, req, tok, updated, now)
+                inflight = 0
+                if limits.max_inflight:
+                    c.execute("DELETE FROM llm_rate_leases WHERE key = ? AND expires < ?", (key, now))
+                    inflight = c.execute(
+                        "SELECT COUNT(*) FROM llm_rate_leases WHERE key = ?", (key,)
+                    ).fetchone()[0]
+                wait = _wait_needed(limits, req, tok, inflight, tokens)
+                lease_id = None
+                if wait <= 0:
+                    if limits.rpm:
+                        req -= 1.0
+                    if limits.tpm:
+                        tok -= tokens
+                    lease_id = uuid.uuid4().hex
+                    if limits.max_inflight:
+                        c.execute(
+                            "INSERT INTO llm_rate_leases (lease_id, key, expires) VALUES (?, ?, ?)",
+                            (lease_id, key, now + self._lease_ttl),
+                        )
+                c.execute(
+                    "INSERT OR REPLACE INTO llm_rate_buckets (key, requests, tokens, updated)"
+                    " VALUES (?, ?, ?, ?)",
+                    (key, req, tok, now),
+                )
+                c.execute("COMMIT")
+            except BaseException:
+                c.execute("ROLLBACK")
+                raise
+        return lease_id, wait
+
+    def release(self, key: str, lease_id: str, limits: _Limits, token_delta: int) -> None:
+        with self._lock:
+            c = self._conn
+            c.execute("BEGIN IMMEDIATE")
+            try:
+                c.execute("DELETE FROM llm_rate_leases WHERE lease_id = ?", (lease_id,))
+                if limits.tpm and token_delta:
+                    c.execute(
+                        "UPDATE llm_rate_buckets SET tokens = MIN(?, tokens - ?) WHERE key = ?",
+                        (float(limits.tpm), token_delta, key),
+                    )
+                c.execute("COMMIT")
+            except BaseException:
+                c.execute("ROLLBACK")
+                raise
+
+    def inflight(self, key: str) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM llm_rate_leases WHERE key = ? AND expires >= ?",
+                (key, time.time()),
+            ).fetchone()[0]
+
+
+class RateLimitLease:
+    """一次放行的凭证：请求结束后 release()，可附带实际 usage 校正 TPM"""
+
+    __slots__ = ("_limiter", "_lease_id", "_reserved", "_released")
+
+    def __init__(self, limiter: "EndpointRateLimiter", lease_id: str, reserved: int):
+        self._limiter = limiter
+        self._lease_id = lease_id
+        self._reserved = reserved
+        self._released = False
+
+    def release(self, usage: Usage | None = None) -> None:
+        if self._released:
+            return
+        self._released = True
+        delta = 0
+        if usage is not None:
+            actual = (
+                usage.input_tokens + usage.output_tokens
+                + usage.cache_read_input_tokens + usage.cache_creation_input_tokens
+            )
+            delta = actual - self._reserved
+        try:
+            self._limiter._release(self._lease_id, delta)
+        except Exception as e:
+            logger.warning(f"[RateLimit] release failed: {e}")
+
+
+class EndpointRateLimiter:
+    """单个上游配额的限流器（进程内唯一，通过 get_rate_limiter 获取）"""
+
+    def __init__(self, key: str, limits: _Limits, store):
+        self.key = key
+        self.endpoints: set[str] = set()
+        self._limits = limits
+        self._store = store
+        self._waits = 0
+        self._wait_seconds = 0.0
+        self._last_log = 0.0
+
+    def update_limits(self, rpm: int, tpm: int, max_inflight: int) -> None:
+        self._limits = _Limits(rpm, tpm, max_inflight)
+
+    @property
+    def enabled(self) -> bool:
+        return self._limits.enabled
+
+    async def acquire(self, tokens: int = 0, endpoint_name: str = "") -> RateLimitLease:
+        """等待直到 RPM / TPM / 并发均有余量，返回租约"""
+        tokens = tokens if self._limits.tpm else 0
+        started = None
+        while True:
+            if self._store.blocking:
+                # SQLite 写锁可能被其他进程持有，放到线程里等，不卡事件循环
+                lease_id, wait = await asyncio.to_thread(
+                    self._store.try_acquire, self.key, self._limits, tokens
+                )
+            else:
+                lease_id, wait = self._store.try_acquire(self.key, self._limits, tokens)
+            if lease_id is not None:
+                if started is not None:
+                    self._waits += 1
+                    self._wait_seconds += time.monotonic() - started
+                return RateLimitLease(self, lease_id, tokens)
+            if started is None:
+                started = time.monotonic()
+            now = time.monotonic()
+            if wait >= 1.0 and now - self._last_log > 5.0:
+                self._last_log = now
+                tag = f" endpoint={endpoint_name}" if endpoint_name else ""
+                logger.info(
+                    f"[RateLimit]{tag} limit reached (rpm={self._limits.rpm} "
+                    f"tpm={self._limits.tpm} concurrency={self._limits.max_inflight}), "
+                    f"waiting {wait:.1f}s"
+                )
+            await asyncio.sleep(min(wait, _MAX_SLEEP))
+
+    def _release(self, lease_id: str, token_delta: int) -> None:
+        self._store.release(self.key, lease_id, self._limits, token_delta)
+
+    def stats(self) -> dict:
+        return {
+            "endpoints": sorted(self.endpoints),
+            "rpm": self._limits.rpm,
+            "tpm": self._limits.tpm,
+            "max_concurrency": self._limits.max_inflight,
+            "inflight": self._store.inflight(self.key),
+            "throttled_requests": self._waits,
+            "throttled_seconds": round(self._wait_seconds, 3),
+        }
+
+
+_registry_lock = threading.Lock()
+_limiters: dict[str, EndpointRateLimiter] = {}
+_store = None
+
+
+def _get_store():
+    global _store
+    if _store is None:
+        db_path = ""
+        try:
+            from ..config import settings
+
+            if settings.llm_rate_limit_db:
+                db_path = str(settings.project_root / settings.llm_rate_limit_db)
+        except Exception:
+            pass
+        if db_path:
+            try:
+                _store = _SqliteBucketStore(Path(db_path))
+                logger.info(f"[RateLimit] Sharing rate limits across processes via {db_path}")
+            except Exception as e:
+                logger.warning(f"[RateLimit] Cross-process store unavailable ({e}), using in-process")
+        if _store is None:
+            _store = _MemoryBucketStore()
+    return _store
+
+
+def get_rate_limiter(config: EndpointConfig) -> EndpointRateLimiter | None:
+    """按端点配置获取共享限流器；未配置任何限额时返回 None"""
+    limits = _Limits(config.rpm_limit or 0, config.tpm_limit or 0, config.max_concurrency or 0)
+    if not limits.enabled:
+        return None
+    key = limit_key(config)
+    with _registry_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = _limiters[key] = EndpointRateLimiter(key, limits, _get_store())
+        else:
+            # 热重载后以最新配置为准
+            limiter.update_limits(limits.rpm, limits.tpm, limits.max_inflight)
+        limiter.endpoints.add(config.name)
+        return limiter
+
+
+def get_rate_limit_stats() -> dict[str, dict]:
+    with _registry_lock:
+        return {key: limiter.stats() for key, limiter in _limiters.items()}
+
+
+def reset_rate_limiters(store=None) -> None:
+    """清空限流器注册表（测试用，可注入桶存储）"""
+    global _store
+    with _registry_lock:
+        _limiters.clear()
+        _store = store
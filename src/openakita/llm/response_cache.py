@@ -0,0 +1,271 @@
+"""
+LLM 响应缓存（内容寻址，SQLite 持久化）
+
+面向"输入相同则输出可复用"的辅助调用（查询拆解、记忆去重判断、工具结果压缩、
+Prompt 编译等）。调用方按次显式开启：LLMClient.chat(..., cache=True)。
+
+- 键 = sha256(模型名 + 规范化请求)，请求包括 system / messages / tools /
+  max_tokens / temperature / thinking 参数
+- 按 TTL 过期，超过 max_entries 时按最近访问时间淘汰（LRU）
+- 命中返回的响应 usage 为 0（未产生新的调用费用）
+- 读写都是同步 SQLite 调用，异步调用方应放到线程中执行（asyncio.to_thread）
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from .types import (
+    LLMRequest,
+    LLMResponse,
+    StopReason,
+    TextBlock,
+    ThinkingBlock,
+    ToolUseBlock,
+    Usage,
+)
+
+logger = logging.getLogger(__name__)
+
+# 键格式版本：请求规范化方式变化时递增，旧条目自然失效
+_KEY_VERSION = 1
+# 每写入多少条执行一次过期 / 容量清理
+_PRUNE_EVERY = 64
+# 命中的 last_access / hits 先记在内存，攒够多少个键后批量写回
+_TOUCH_FLUSH_EVERY = 32
+
+
+def request_digest(request: LLMRequest) -> str:
+    """请求的规范化哈希（不含模型，由调用方与模型名组合成最终键）"""
+    payload = request.to_dict()
+    payload["enable_thinking"] = request.enable_thinking
+    payload["thinking_depth"] = request.thinking_depth
+    if request.extra_params:
+        payload["extra_params"] = request.extra_params
+    raw = json.dumps(
+        [_KEY_VERSION, payload], sort_keys=True, ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def cache_key(model: str, digest: str) -> str:
+    return hashlib.sha256(f"{model}\n{digest}".encode()).hexdigest()
+
+
+def _response_from_dict(data: dict) -> LLMResponse:
+    content = []
+    for block in data.get("content", []):
+        kind = block.get("type")
+        if kind == "text":
+            content.append(TextBlock(text=block.get("text", "")))
+        elif kind == "thinking":
+            content.append(ThinkingBlock(thinking=block.get("thinking", "")))
+        elif kind == "tool_use":
+            content.append(ToolUseBlock(
+                id=block.get("id", ""), name=block.get("name", ""), input=block.get("input", {}),
+            ))
+    return LLMResponse(
+        id=data.get("id", ""),
+        content=content,
+        stop_reason=StopReason(data.get("stop_reason", StopReason.END_TURN.value)),
+        usage=Usage(),
+        model=data.get("model", ""),
+        reasoning_content=data.get("reasoning_content"),
+    )
+
+
+class ResponseCache:
+    """SQLite 持久化的 LLM 响应缓存（线程安全）"""
+
+    def __init__(
+        self,
+        db_path: Path | str | None = None,
+        ttl_seconds: float = 7 * 24 * 3600,
+        max_entries: int = 5000,
+    ):
+        """
+        Args:
+            db_path: 数据库路径；None 时仅在内存中缓存（测试 / 无磁盘场景）
+            ttl_seconds: 条目有效期
+            max_entries: 最大条目数，超出后淘汰最久未访问的条目
+        """
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._writes = 0
+        self._evictions = 0
+        # key -> [最近访问时间, 未写回的命中次数]
+        self._pending_touches: dict[str, list] = {}
+
+        if db_path is None:
+            target = ":memory:"
+        else:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            target = str(db_path)
+        self._conn = sqlite3.connect(target, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_response_cache ("
+            " key TEXT PRIMARY KEY,"
+            " model TEXT NOT NULL,"
+            " response TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_access REAL NOT NULL,"
+            " hits INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_llm_cache_access ON llm_response_cache(last_access)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> LLMResponse | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM llm_response_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self._ttl:
+                if row is not None:
+                    self._conn.execute("DELETE FROM llm_response_cache WHERE key = ?", (key,))
+                    self._conn.commit()
+                self._misses += 1
+                return None
+            touch = self._pending_touches.get(key)
+            if touch is None:
+                self._pending_touches[key] = [now, 1]
+            else:
+                touch[0] = now
+                touch[1] += 1
+            if len(self._pending_touches) >= _TOUCH_FLUSH_EVERY:
+                self._flush_touches_locked()
+                self._conn.commit()
+            self._hits += 1
+        try:
+            return _response_from_dict(json.loads(row[0]))
+        except Exception as e:
+            logger.warning(f"[LLMCache] Corrupt entry {key[:12]}: {e}")
+            return None
+
+    def put(self, key: str, model: str, response: LLMResponse) -> bool:
+        """写入响应；含工具调用或没有文本的响应不缓存"""
+        if response.has_tool_calls or not response.text.strip():
+            return False
+        data = response.to_dict()
+        data["reasoning_content"] = response.reasoning_content
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_response_cache"
+                " (key, model, response, created_at, last_access, hits) VALUES (?, ?, ?, ?, ?, 0)",
+                (key, model, json.dumps(data, ensure_ascii=False), now, now),
+            )
+            self._writes += 1
+            if self._writes % _PRUNE_EVERY == 0:
+                self._prune_locked(now)
+            self._conn.commit()
+        return True
+
+    def prune(self) -> int:
+        """删除过期条目并把条目数压到 max_entries 以内，返回删除条数"""
+        with self._lock:
+            removed = self._prune_locked(time.time())
+            self._conn.commit()
+        return removed
+
+    def _flush_touches_locked(self) -> None:
+        """把内存中累计的命中写回 last_access / hits（LRU 淘汰前必须调用）"""
+        if not self._pending_touches:
+            return
+        self._conn.executemany(
+            "UPDATE llm_response_cache SET last_access = MAX(last_access, ?), hits = hits + ?"
+            " WHERE key = ?",
+            [(at, hits, key) for key, (at, hits) in self._pending_touches.items()],
+        )
+        self._pending_touches.clear()
+
+    def _prune_locked(self, now: float) -> int:
+        self._flush_touches_locked()
+        removed = self._conn.execute(
+            "DELETE FROM llm_response_cache WHERE created_at < ?", (now - self._ttl,)
+        ).rowcount
+        count = self._conn.execute("SELECT COUNT(*) FROM llm_response_cache").fetchone()[0]
+        overflow = count - self._max_entries
+        if overflow > 0:
+            removed += self._conn.execute(
+                "DELETE FROM llm_response_cache WHERE key IN ("
+                " SELECT key FROM llm_response_cache ORDER BY last_access LIMIT ?)",
+                (overflow,),
+            ).rowcount
+        self._evictions += removed
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pending_touches.clear()
+            self._conn.execute("DELETE FROM llm_response_cache")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM llm_response_cache").fetchone()[0]
+        lookups = self._hits + self._misses
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+            "writes": self._writes,
+            "evictions": self._evictions,
+            "entries": entries,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            try:
+                self._flush_touches_locked()
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"[LLMCache] Failed to flush access times on close: {e}")
+            self._conn.close()
+
+
+# 全局单例（所有 LLMClient 共享，compiler 端点与主端点的辅助调用都能命中）
+_response_cache: ResponseCache | None = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache(create: bool = True) -> ResponseCache | None:
+    """按 settings 创建全局缓存；关闭或初始化失败时返回 None
+
+    create=False 时只返回已打开的缓存，不为此新建数据库（统计查询用）。
+    """
+    global _response_cache
+    if _response_cache is not None or not create:
+        return _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            try:
+                from ..config import settings
+
+                if not settings.llm_response_cache_enabled:
+                    return None
+                _response_cache = ResponseCache(
+                    settings.project_root / settings.llm_response_cache_path,
+                    ttl_seconds=settings.llm_response_cache_ttl_hours * 3600,
+                    max_entries=settings.llm_response_cache_max_entries,
+                )
+            except Exception as e:
+                logger.warning(f"[LLMCache] Disabled, failed to open cache: {e}")
+                return None
+    return _response_cache
+
+
+def set_response_cache(cache: ResponseCache | None) -> None:
+    """替换全局缓存（测试或自定义存储位置）"""
+    global _response_cache
+    _response_cache = cache
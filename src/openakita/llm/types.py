@@ -40,9 +40,33 @@ class MessageRole(StrEnum):
     TOOL = "tool"
 
 
+# system prompt 中稳定前缀与易变后缀的分界（由 prompt.builder 写入）。
+# Anthropic 端点在此处切分 system 并为前缀打 cache_control 断点，其他端点直接去掉。
+PROMPT_CACHE_BOUNDARY = "<!-- cache-boundary -->"
+
+
+def split_system_prompt(system: str) -> tuple[str, str]:
+    """按 PROMPT_CACHE_BOUNDARY 切分为 (可缓存前缀, 易变后缀)；无边界时整段视为前缀"""
+    prefix, sep, suffix = system.partition(PROMPT_CACHE_BOUNDARY)
+    if not sep:
+        return system, ""
+    return prefix.rstrip(), suffix.lstrip()
+
+
+def strip_cache_boundary(system: str) -> str:
+    """去掉缓存边界标记，供不支持显式缓存断点的端点使用"""
+    if PROMPT_CACHE_BOUNDARY not in system:
+        return system
+    return "\n\n".join(part for part in split_system_prompt(system) if part)
+
+
 @dataclass
 class Usage:
-    """Token 使用统计"""
+    """Token 使用统计
+
+    input_tokens 不含命中缓存的部分（与 Anthropic 口径一致）：
+    cache_read_input_tokens 为缓存读取，cache_creation_input_tokens 为缓存写入。
+    """
 
     input_tokens: int = 0
     output_tokens: int = 0
@@ -53,6 +77,12 @@ class Usage:
     def total_tokens(self) -> int:
         return self.input_tokens + self.output_tokens
 
+    @property
+    def cache_hit_ratio(self) -> float:
+        """本次请求输入中命中缓存的比例"""
+        total = self.input_tokens + self.cache_creation_input_tokens + self.cache_read_input_tokens
+        return self.cache_read_input_tokens / total if total else 0.0
+
 
 @dataclass
 class ImageContent:
@@ -458,6 +488,8 @@ class EndpointConfig:
     extra_params: dict | None = None  # 额外参数
     note: str | None = None  # 备注
     rpm_limit: int = 0  # 每分钟请求数限制 (0=不限流)
+    tpm_limit: int = 0  # 每分钟 token 数限制 (0=不限流)
+    max_concurrency: int = 0  # 同时在途请求数上限 (0=不限制)
     pricing_tiers: list[dict] | None = None  # 阶梯定价 [{"max_input": 128000, "input_price": 1.2, "output_price": 7.2}, ...]
     price_currency: str = "CNY"  # 价格货币单位
 
@@ -558,6 +590,8 @@ class EndpointConfig:
             extra_params=data.get("extra_params"),
             note=data.get("note"),
             rpm_limit=int(data.get("rpm_limit") or 0),
+            tpm_limit=int(data.get("tpm_limit") or 0),
+            max_concurrency=int(data.get("max_concurrency") or 0),
             pricing_tiers=data.get("pricing_tiers"),
             price_currency=data.get("price_currency", "CNY"),
         )
@@ -587,6 +621,10 @@ class EndpointConfig:
             result["note"] = self.note
         if self.rpm_limit and self.rpm_limit > 0:
             result["rpm_limit"] = self.rpm_limit
+        if self.tpm_limit and self.tpm_limit > 0:
+            result["tpm_limit"] = self.tpm_limit
+        if self.max_concurrency and self.max_concurrency > 0:
+            result["max_concurrency"] = self.max_concurrency
         if self.pricing_tiers:
             result["pricing_tiers"] = self.pricing_tiers
         if self.price_currency and self.price_currency != "CNY":
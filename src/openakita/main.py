@@ -9,6 +9,7 @@ OpenAkita CLI 入口
 import openakita._ensure_utf8  # noqa: F401  # isort: skip
 
 import asyncio
+import atexit
 import importlib
 import logging
 import os
@@ -45,11 +46,16 @@ def _init_tracing() -> None:
     from .tracing.exporter import ConsoleExporter, FileExporter
     from .tracing.tracer import AgentTracer, set_tracer
 
-    tracer = AgentTracer(enabled=settings.tracing_enabled)
+    tracer = AgentTracer(
+        enabled=settings.tracing_enabled,
+        queue_size=settings.tracing_export_queue_size,
+        batch_size=settings.tracing_export_batch_size,
+    )
     if settings.tracing_enabled:
         tracer.add_exporter(FileExporter(settings.tracing_export_dir))
         if settings.tracing_console_export:
             tracer.add_exporter(ConsoleExporter())
+        atexit.register(tracer.shutdown)
         logger.info("[Tracing] 追踪系统已启用")
     set_tracer(tracer)
 
@@ -85,11 +91,14 @@ def get_master_agent():
     global _master_agent
     if _master_agent is None:
         from .orchestration import MasterAgent
+        from .orchestration.autoscaler import ScalingPolicy
         from .orchestration.bus import BusConfig
 
         bus_config = BusConfig(
             router_address=settings.orchestration_bus_address,
             pub_address=settings.orchestration_pub_address,
+            codec=settings.orchestration_bus_codec,
+            compression=settings.orchestration_bus_compression,
         )
 
         _master_agent = MasterAgent(
@@ -98,6 +107,14 @@ def get_master_agent():
             max_workers=settings.orchestration_max_workers,
             heartbeat_interval=settings.orchestration_heartbeat_interval,
             health_check_interval=settings.orchestration_health_check_interval,
+            max_queue_depth=settings.orchestration_max_queue_depth,
+            auto_scale=settings.orchestration_auto_scale,
+            scaling_policy=ScalingPolicy(
+                min_workers=settings.orchestration_min_workers,
+                max_workers=settings.orchestration_max_workers,
+                scale_up_wait_seconds=settings.orchestration_scale_up_wait_seconds,
+                idle_seconds=settings.orchestration_scale_down_idle_seconds,
+            ),
             data_dir=settings.project_root / "data",
         )
     return _master_agent
@@ -440,12 +457,24 @@ async def start_im_channels(agent_or_master):
     # 初始化 MessageGateway (先创建，agent_handler 会引用它)
     from .channels import MessageGateway
 
+    # 单 Agent 模式下所有会话共用一个 Agent 实例（当前会话、记忆会话、scratchpad
+    # 都保存在实例上），不同会话并发处理会互相覆盖，只能串行
+    max_concurrency = settings.im_max_concurrent_sessions
+    if max_concurrency > 1 and not is_orchestration_enabled():
+        logger.warning(
+            f"IM_MAX_CONCURRENT_SESSIONS={max_concurrency} ignored in single-agent mode "
+            "(shared Agent keeps per-session state), using 1"
+        )
+        max_concurrency = 1
+
     _message_gateway = MessageGateway(
         session_manager=_session_manager,
         agent_handler=None,  # 稍后设置
         whisper_model=settings.whisper_model,  # 从配置读取 Whisper 模型
         whisper_language=settings.whisper_language,  # 语音识别语言
         stt_client=stt_client,  # 在线 STT 客户端
+        max_concurrency=max_concurrency,
+        default_channel_concurrency=settings.im_channel_max_concurrency,
     )
 
     # 注册启用的适配器
@@ -737,6 +766,16 @@ def show_agents(master):
         f"繁忙 [yellow]{summary['busy']}[/yellow] | "
         f"故障 [red]{summary['dead']}[/red]"
     )
+    scaler = dashboard.get("autoscaler")
+    if scaler and scaler["enabled"]:
+        avg_spawn = scaler["avg_spawn_seconds"]
+        console.print(
+            f"[bold]自动扩缩:[/bold] "
+            f"Worker {scaler['workers']} (启动中 {scaler['spawning']}) | "
+            f"繁忙比例 {scaler['busy_ratio']:.0%} | "
+            f"排队 {scaler['queue_depth']} | "
+            f"平均启动 {f'{avg_spawn:.1f}s' if avg_spawn is not None else '-'}"
+        )
     console.print()
 
     # Agent 列表
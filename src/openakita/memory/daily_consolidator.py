@@ -476,68 +476,69 @@ class DailyConsolidator:
         logger.info(f"Checking {len(memories)} memories for duplicates...")
 
         deleted_ids = set()
+        vector_store = self.memory_manager.vector_store
+
+        if vector_store is None or not vector_store.enabled:
+            # 回退：去掉通用前缀后内容相同视为重复（向量库不可用时）
+            # 按 (类型, 核心内容) 分组，一次遍历完成，替代逐对比较
+            strip = self.memory_manager._strip_common_prefix
+            survivors: dict[tuple[str, str], Memory] = {}
+            for memory in memories:
+                key = (memory.type.value, strip(memory.content))
+                other = survivors.get(key)
+                if other is None:
+                    survivors[key] = memory
+                    continue
+                keep, remove = self._decide_which_to_keep(other, memory)
+                logger.info(
+                    f"Duplicate found (string match): "
+                    f"'{remove.content}' -> keeping '{keep.content}'"
+                )
+                self.memory_manager.delete_memory(remove.id)
+                deleted_ids.add(remove.id)
+                survivors[key] = keep
+
+            if deleted_ids:
+                logger.info(f"Removed {len(deleted_ids)} duplicate memories")
+            return len(deleted_ids)
+
         checked_pairs = set()  # 避免重复检查同一对
 
         for memory in memories:
             if memory.id in deleted_ids:
                 continue
 
-            if self.memory_manager.vector_store is not None and self.memory_manager.vector_store.enabled:
-                similar = self.memory_manager.vector_store.search(
-                    memory.content,
-                    limit=5,
-                    filter_type=memory.type.value,  # 只在同类型中查找
-                )
+            similar = vector_store.search(
+                memory.content,
+                limit=5,
+                filter_type=memory.type.value,  # 只在同类型中查找
+            )
 
-                for other_id, distance in similar:
-                    if other_id == memory.id or other_id in deleted_ids:
-                        continue
+            for other_id, distance in similar:
+                if other_id == memory.id or other_id in deleted_ids:
+                    continue
 
-                    pair_key = tuple(sorted([memory.id, other_id]))
-                    if pair_key in checked_pairs:
-                        continue
-                    checked_pairs.add(pair_key)
+                pair_key = tuple(sorted([memory.id, other_id]))
+                if pair_key in checked_pairs:
+                    continue
+                checked_pairs.add(pair_key)
 
-                    if distance > self.DUPLICATE_DISTANCE_THRESHOLD:
-                        continue
+                if distance > self.DUPLICATE_DISTANCE_THRESHOLD:
+                    continue
 
-                    other_memory = self.memory_manager._memories.get(other_id)
-                    if not other_memory:
-                        continue
+                other_memory = self.memory_manager._memories.get(other_id)
+                if not other_memory:
+                    continue
 
-                    is_dup = await self.memory_manager.check_duplicate_with_llm(
-                        memory.content, other_memory.content
-                    )
+                is_dup = await self.memory_manager.check_duplicate_with_llm(
+                    memory.content, other_memory.content
+                )
 
-                    if is_dup:
-                        keep, remove = self._decide_which_to_keep(memory, other_memory)
-                        logger.info(f"Duplicate found: '{remove.content}' -> keeping '{keep.content}'")
-                        self.memory_manager.delete_memory(remove.id)
-                        deleted_ids.add(remove.id)
-            else:
-                # 回退：字符串前缀匹配去重（向量库不可用时）
-                strip = self.memory_manager._strip_common_prefix
-                core_a = strip(memory.content)
-                for other in memories:
-                    if other.id == memory.id or other.id in deleted_ids:
-                        continue
-                    if other.type != memory.type:
-                        continue
-
-                    pair_key = tuple(sorted([memory.id, other.id]))
-                    if pair_key in checked_pairs:
-                        continue
-                    checked_pairs.add(pair_key)
-
-                    core_b = strip(other.content)
-                    if core_a == core_b:
-                        keep, remove = self._decide_which_to_keep(memory, other)
-                        logger.info(
-                            f"Duplicate found (string match): "
-                            f"'{remove.content}' -> keeping '{keep.content}'"
-                        )
-                        self.memory_manager.delete_memory(remove.id)
-                        deleted_ids.add(remove.id)
+                if is_dup:
+                    keep, remove = self._decide_which_to_keep(memory, other_memory)
+                    logger.info(f"Duplicate found: '{remove.content}' -> keeping '{keep.content}'")
+                    self.memory_manager.delete_memory(remove.id)
+                    deleted_ids.add(remove.id)
 
         if deleted_ids:
             logger.info(f"Removed {len(deleted_ids)} duplicate memories")
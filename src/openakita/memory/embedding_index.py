@@ -0,0 +1,313 @@
+"""
+进程内向量索引 (供 APIEmbeddingBackend 使用)
+
+将全部记忆的 embedding 保存为一个 float32 矩阵 (L2 归一化):
+- 检索 = 一次矩阵-向量乘法, 覆盖全部记忆 (而不是按重要度取前 200 条)
+- 持久化到记忆数据库旁: <db>.emb.npy (矩阵, mmap 只读加载) + <db>.emb.json (id/类型)
+- add / delete / batch_add 时增量维护, 累计一定变更后原子落盘 (写临时文件 + rename)
+
+依赖 numpy (可选); 未安装时 available=False, 调用方回退到逐条比对。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+
+    _NUMPY_AVAILABLE = True
+except ImportError:  # pragma: no cover - depends on environment
+    np = None  # type: ignore[assignment]
+    _NUMPY_AVAILABLE = False
+
+_INDEX_VERSION = 1
+
+
+class EmbeddingIndex:
+    """
+    float32 embedding 矩阵, 以 memory id 为键
+
+    Usage:
+        index = EmbeddingIndex(Path("data/memory/openakita.db"), model="text-embedding-v3")
+        index.upsert("mem_1", embedding, memory_type="fact")
+        hits = index.search(query_embedding, limit=10)
+    """
+
+    _FLUSH_EVERY = 64
+    _MIN_CAPACITY = 256
+
+    def __init__(
+        self,
+        db_path: str | Path | None,
+        model: str,
+        dimensions: int = 0,
+    ) -> None:
+        self._model = model
+        self._dim = dimensions
+        self._lock = threading.RLock()
+
+        self._matrix_path: Path | None = None
+        self._meta_path: Path | None = None
+        if db_path is not None:
+            base = Path(db_path)
+            self._matrix_path = base.with_name(base.name + ".emb.npy")
+            self._meta_path = base.with_name(base.name + ".emb.json")
+
+        self._matrix: Any = None  # np.ndarray, shape (capacity, dim)
+        self._writable = False
+        self._ids: list[str] = []
+        self._types: list[str] = []
+        self._rows: dict[str, int] = {}
+        self._pending = 0
+
+        if _NUMPY_AVAILABLE:
+            self._load()
+
+    @property
+    def available(self) -> bool:
+        return _NUMPY_AVAILABLE
+
+    @property
+    def dimensions(self) -> int:
+        return self._dim
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, memory_id: str) -> bool:
+        return memory_id in self._rows
+
+    def ids(self) -> set[str]:
+        with self._lock:
+            return set(self._ids)
+
+    # ======================================================================
+    # Mutations
+    # ======================================================================
+
+    def upsert(self, memory_id: str, embedding: list[float], memory_type: str = "") -> bool:
+        if not _NUMPY_AVAILABLE or not embedding:
+            return False
+        vec = self._normalize(embedding)
+        with self._lock:
+            if not self._check_dim(len(vec)):
+                return False
+            self._ensure_writable(len(self._ids) + 1)
+            row = self._rows.get(memory_id)
+            if row is None:
+                row = len(self._ids)
+                self._ids.append(memory_id)
+                self._types.append(memory_type.lower())
+                self._rows[memory_id] = row
+            else:
+                self._types[row] = memory_type.lower() or self._types[row]
+            self._matrix[row] = vec
+            self._mark_dirty()
+        return True
+
+    def upsert_many(self, items: list[tuple[str, list[float], str]]) -> int:
+        """批量写入 [(memory_id, embedding, memory_type), ...], 只在结束时判断一次落盘"""
+        if not _NUMPY_AVAILABLE or not items:
+            return 0
+        added = 0
+        with self._lock:
+            prepared = []
+            for memory_id, embedding, memory_type in items:
+                if not embedding:
+                    continue
+                vec = self._normalize(embedding)
+                if self._check_dim(len(vec)):
+                    prepared.append((memory_id, vec, memory_type))
+            if not prepared:
+                return 0
+            self._ensure_writable(len(self._ids) + len(prepared))
+            for memory_id, vec, memory_type in prepared:
+                row = self._rows.get(memory_id)
+                if row is None:
+                    row = len(self._ids)
+                    self._ids.append(memory_id)
+                    self._types.append((memory_type or "").lower())
+                    self._rows[memory_id] = row
+                self._matrix[row] = vec
+                added += 1
+            self._pending += added
+            if self._pending >= self._FLUSH_EVERY:
+                self.flush()
+        return added
+
+    def remove(self, memory_id: str) -> bool:
+        with self._lock:
+            row = self._rows.pop(memory_id, None)
+            if row is None:
+                return False
+            self._ensure_writable(len(self._ids))
+            last = len(self._ids) - 1
+            if row != last:
+                # swap-remove: 把最后一行搬到被删除的位置, 保持矩阵紧凑
+                moved_id = self._ids[last]
+                self._matrix[row] = self._matrix[last]
+                self._ids[row] = moved_id
+                self._types[row] = self._types[last]
+                self._rows[moved_id] = row
+            self._ids.pop()
+            self._types.pop()
+            self._mark_dirty()
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._matrix = None
+            self._writable = False
+            self._ids = []
+            self._types = []
+            self._rows = {}
+            self._mark_dirty()
+
+    # ======================================================================
+    # Search
+    # ======================================================================
+
+    def search(
+        self,
+        query_embedding: list[float],
+        limit: int = 10,
+        filter_type: str | None = None,
+    ) -> list[tuple[str, float]]:
+        """余弦相似度 top-k, 返回 [(memory_id, score), ...] 按分数降序"""
+        if not _NUMPY_AVAILABLE or not query_embedding or limit <= 0:
+            return []
+        q = self._normalize(query_embedding)
+        with self._lock:
+            n = len(self._ids)
+            if n == 0 or self._matrix is None or q.shape[0] != self._dim:
+                return []
+            scores = self._matrix[:n] @ q
+            if filter_type:
+                wanted = filter_type.lower()
+                mask = np.fromiter((t == wanted for t in self._types), dtype=bool, count=n)
+                scores = np.where(mask, scores, -np.inf)
+            k = min(limit, n)
+            top = np.argpartition(-scores, k - 1)[:k] if k < n else np.arange(n)
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return [
+                (self._ids[i], float(scores[i]))
+                for i in top
+                if np.isfinite(scores[i])
+            ]
+
+    # ======================================================================
+    # Persistence
+    # ======================================================================
+
+    def flush(self) -> None:
+        """原子写入 .npy + .json (只写有效行)"""
+        with self._lock:
+            if self._pending == 0 or self._matrix_path is None or not _NUMPY_AVAILABLE:
+                self._pending = 0
+                return
+            n = len(self._ids)
+            try:
+                tmp_matrix = self._matrix_path.with_name(self._matrix_path.name + ".tmp")
+                tmp_meta = self._meta_path.with_name(self._meta_path.name + ".tmp")
+                data = (
+                    self._matrix[:n]
+                    if self._matrix is not None
+                    else np.zeros((0, self._dim), dtype=np.float32)
+                )
+                with open(tmp_matrix, "wb") as f:
+                    np.save(f, np.ascontiguousarray(data, dtype=np.float32))
+                tmp_meta.write_text(
+                    json.dumps({
+                        "version": _INDEX_VERSION,
+                        "model": self._model,
+                        "dimensions": self._dim,
+                        "ids": self._ids,
+                        "types": self._types,
+                    }, ensure_ascii=False),
+                    encoding="utf-8",
+                )
+                os.replace(tmp_matrix, self._matrix_path)
+                os.replace(tmp_meta, self._meta_path)
+                self._pending = 0
+            except Exception as e:
+                logger.warning(f"[EmbeddingIndex] Failed to persist index: {e}")
+
+    def _load(self) -> None:
+        if self._matrix_path is None or not self._meta_path.exists():
+            return
+        if not self._matrix_path.exists():
+            return
+        try:
+            meta = json.loads(self._meta_path.read_text(encoding="utf-8"))
+            if meta.get("version") != _INDEX_VERSION or meta.get("model") != self._model:
+                logger.info("[EmbeddingIndex] Model/version changed, discarding persisted index")
+                return
+            matrix = np.load(self._matrix_path, mmap_mode="r")
+            ids = list(meta.get("ids", []))
+            types = list(meta.get("types", [""] * len(ids)))
+            if matrix.ndim != 2 or matrix.shape[0] != len(ids) or len(types) != len(ids):
+                logger.warning("[EmbeddingIndex] Index files inconsistent, discarding")
+                return
+            dim = int(meta.get("dimensions") or matrix.shape[1])
+            if self._dim and dim != self._dim:
+                logger.info("[EmbeddingIndex] Dimensions changed, discarding persisted index")
+                return
+            self._dim = dim
+            self._matrix = matrix
+            self._writable = False
+            self._ids = ids
+            self._types = types
+            self._rows = {mid: i for i, mid in enumerate(ids)}
+            logger.debug(f"[EmbeddingIndex] Loaded {len(ids)} vectors from {self._matrix_path}")
+        except Exception as e:
+            logger.warning(f"[EmbeddingIndex] Failed to load index: {e}")
+
+    # ======================================================================
+    # Helpers
+    # ======================================================================
+
+    def _mark_dirty(self) -> None:
+        self._pending += 1
+        if self._pending >= self._FLUSH_EVERY:
+            self.flush()
+
+    def _check_dim(self, dim: int) -> bool:
+        if not self._dim:
+            self._dim = dim
+        if dim != self._dim:
+            logger.warning(
+                f"[EmbeddingIndex] Dimension mismatch: got {dim}, expected {self._dim}"
+            )
+            return False
+        return True
+
+    def _ensure_writable(self, needed: int) -> None:
+        """mmap 只读矩阵在第一次修改时拷贝到内存, 并按需 2x 扩容"""
+        cap = 0 if self._matrix is None else self._matrix.shape[0]
+        if self._writable and cap >= needed:
+            return
+        new_cap = max(self._MIN_CAPACITY, cap)
+        while new_cap < needed:
+            new_cap *= 2
+        grown = np.zeros((new_cap, self._dim), dtype=np.float32)
+        n = len(self._ids)
+        if self._matrix is not None and n:
+            grown[:n] = self._matrix[:n]
+        self._matrix = grown
+        self._writable = True
+
+    @staticmethod
+    def _normalize(embedding: list[float]) -> Any:
+        vec = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        norm = float(np.linalg.norm(vec))
+        if norm > 0:
+            vec = vec / norm
+        return vec
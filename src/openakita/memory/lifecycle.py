@@ -3,7 +3,7 @@
 
 统一归纳 + 衰减 + 去重逻辑:
 - 处理未归纳的原文 → 生成 Episode → 提取语义记忆
-- O(n log n) 聚类去重 (替代 O(n²))
+- MinHash/LSH 候选 + 精确比较的聚类去重 (替代 O(n²) 逐对扫描)
 - 衰减计算与归档
 - 刷新 MEMORY.md / USER.md
 - 晋升 PERSONA_TRAIT
@@ -17,6 +17,7 @@ from datetime import datetime
 from pathlib import Path
 
 from .extractor import MemoryExtractor
+from .minhash_index import MinHashIndex, cluster_candidates
 from .types import (
     ConversationTurn,
     MemoryPriority,
@@ -228,7 +229,7 @@ class LifecycleManager:
         self.store.save_semantic(mem)
 
     # ==================================================================
-    # Deduplication (O(n log n))
+    # Deduplication (MinHash/LSH)
     # ==================================================================
 
     async def deduplicate_batch(self) -> int:
@@ -236,6 +237,7 @@ class LifecycleManager:
         all_memories = self.store.load_all_memories()
         if len(all_memories) < 2:
             return 0
+        self.store.sync_dedup_index(all_memories)
 
         by_type: dict[str, list[SemanticMemory]] = defaultdict(list)
         for mem in all_memories:
@@ -247,7 +249,9 @@ class LifecycleManager:
         for _mem_type, group in by_type.items():
             if len(group) < 2:
                 continue
-            clusters = self._cluster_by_content(group, threshold=0.7)
+            clusters = self._cluster_by_content(
+                group, threshold=0.7, index=self.store.dedup_index
+            )
             for cluster in clusters:
                 if len(cluster) < 2:
                     continue
@@ -262,35 +266,22 @@ class LifecycleManager:
         return deleted
 
     def _cluster_by_content(
-        self, memories: list[SemanticMemory], threshold: float = 0.7
+        self,
+        memories: list[SemanticMemory],
+        threshold: float = 0.7,
+        index: MinHashIndex | None = None,
     ) -> list[list[SemanticMemory]]:
-        """Simple clustering by content similarity (word overlap)."""
-        clusters: list[list[SemanticMemory]] = []
-        assigned: set[str] = set()
-
-        for i, mem_a in enumerate(memories):
-            if mem_a.id in assigned:
-                continue
-            cluster = [mem_a]
-            assigned.add(mem_a.id)
-
-            words_a = set(mem_a.content.lower().split())
-            for j in range(i + 1, len(memories)):
-                mem_b = memories[j]
-                if mem_b.id in assigned:
-                    continue
-                words_b = set(mem_b.content.lower().split())
-                if not words_a or not words_b:
-                    continue
-                overlap = len(words_a & words_b) / min(len(words_a), len(words_b))
-                if overlap >= threshold:
-                    cluster.append(mem_b)
-                    assigned.add(mem_b.id)
-
-            if len(cluster) >= 2:
-                clusters.append(cluster)
+        """
+        按内容相似度聚类
 
-        return clusters
+        LSH 候选 + 分片重叠系数 (|A∩B| / min) 精确判断; index 为空时
+        为本批记忆临时构建索引。
+        """
+        if index is None:
+            index = MinHashIndex()
+            for mem in memories:
+                index.add(mem.id, mem.content, mem.type.value)
+        return cluster_candidates(index, memories, threshold=threshold)
 
     @staticmethod
     def _pick_best_in_cluster(
@@ -355,9 +346,9 @@ class LifecycleManager:
             return 0
         from datetime import timedelta
         cutoff = (datetime.now() - timedelta(days=max_age_days)).isoformat()
-        with db._lock:
-            try:
-                cursor = db._conn.execute(
+        try:
+            with db._write() as conn:
+                cursor = conn.execute(
                     """DELETE FROM attachments
                        WHERE created_at < ?
                          AND description = ''
@@ -366,14 +357,13 @@ class LifecycleManager:
                          AND linked_memory_ids = '[]'""",
                     (cutoff,),
                 )
-                count = cursor.rowcount
-                if count:
-                    db._conn.commit()
-                    logger.info(f"[Lifecycle] Cleaned {count} stale attachments (>{max_age_days} days, no content)")
-                return count
-            except Exception as e:
-                logger.error(f"[Lifecycle] Attachment cleanup failed: {e}")
-                return 0
+            count = cursor.rowcount
+            if count:
+                logger.info(f"[Lifecycle] Cleaned {count} stale attachments (>{max_age_days} days, no content)")
+            return count
+        except Exception as e:
+            logger.error(f"[Lifecycle] Attachment cleanup failed: {e}")
+            return 0
 
     # ==================================================================
     # Refresh MEMORY.md
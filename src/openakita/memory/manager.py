@@ -16,6 +16,10 @@ v2 架构:
 - extractor: MemoryExtractor
 - retrieval_engine: RetrievalEngine
 - consolidator: MemoryConsolidator (保留, JSONL 双写)
+
+memories.json (v1 兼容副本):
+- SQLite 是权威存储; 单条增删只追加到 memories.journal, 后台定时合并为快照
+- 启动时以 快照 + 日志回放 作为旧版 JSON 的内容, 崩溃不会丢失或复活记忆
 - vector_store: VectorStore (可选, 由 SearchBackend 封装)
 """
 
@@ -76,6 +80,9 @@ _DURATION_MAP = {
 class MemoryManager:
     """记忆管理器 (v2)"""
 
+    # 单条变更后延迟合并 memories.json 快照的秒数 (期间的变更共用一次全量写入)
+    _SNAPSHOT_DELAY_SECONDS = 5.0
+
     def __init__(
         self,
         data_dir: Path,
@@ -128,8 +135,14 @@ class MemoryManager:
 
         # v1 compat: in-memory cache
         self.memories_file = self.data_dir / "memories.json"
+        self.journal_file = self.data_dir / "memories.journal"
         self._memories: dict[str, Memory] = {}
+        # content.lower() → memory ids, 与 _memories 一起在 _memories_lock 下维护, 用于精确去重
+        self._content_keys: dict[str, set[str]] = {}
         self._memories_lock = threading.RLock()
+        self._journal_lock = threading.Lock()
+        self._snapshot_timer: threading.Timer | None = None
+        self._snapshot_dirty = False
 
         self._current_session_id: str | None = None
         self._session_turns: list[ConversationTurn] = []
@@ -183,14 +196,15 @@ class MemoryManager:
                 all_mems = self.store.load_all_memories()
             with self._memories_lock:
                 for mem in all_mems:
-                    self._memories[mem.id] = mem
+                    self._cache_put(mem)
             if all_mems:
                 logger.info(f"Loaded {len(all_mems)} memories from SQLite")
+            self.store.sync_dedup_index(all_mems)
         except Exception as e:
             logger.warning(f"[Manager] Failed to load from SQLite: {e}")
 
         # Sync in-memory cache → JSON (keep JSON in sync, not the other way around)
-        if self._memories:
+        if self._memories or self.journal_file.exists():
             self._save_memories()
 
     def _backfill_legacy_json_memories(self, existing_mems: list[Memory]) -> int:
@@ -207,6 +221,8 @@ class MemoryManager:
         except Exception as e:
             logger.warning(f"[Manager] Failed to read legacy memories.json: {e}")
             return 0
+        if isinstance(raw, list):
+            raw = self._replay_journal(raw)
 
         if not isinstance(raw, list) or not raw:
             return 0
@@ -275,20 +291,118 @@ class MemoryManager:
         return migrated
 
     def _save_memories(self) -> None:
-        """Save to memories.json (backward compat, dual-write)"""
+        """Write a full memories.json snapshot (backward compat) and truncate the journal"""
         try:
             with self._memories_lock:
+                with self._journal_lock:
+                    self._snapshot_dirty = False
+                    journal_offset = self._journal_size()
                 data = [m.to_dict() for m in self._memories.values()]
             tmp = self.memories_file.with_suffix(self.memories_file.suffix + ".tmp")
             with open(tmp, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
             bak = self.memories_file.with_suffix(self.memories_file.suffix + ".bak")
             if self.memories_file.exists():
                 self.memories_file.replace(bak)
             tmp.rename(self.memories_file)
+            self._truncate_journal(journal_offset)
         except Exception as e:
             logger.error(f"Failed to save memories.json: {e}")
 
+    def _journal(self, op: str, memory: Memory | None = None, memory_id: str = "") -> None:
+        """追加一条变更 ("put" / "del") 到 memories.journal, 并安排一次快照合并"""
+        record: dict = {"op": op, "id": memory.id if memory is not None else memory_id}
+        if op == "put" and memory is not None:
+            record["m"] = memory.to_dict()
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str)
+        try:
+            with self._journal_lock, open(self.journal_file, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except Exception as e:
+            logger.error(f"Failed to append memories.journal: {e}")
+        self._schedule_snapshot()
+
+    def _schedule_snapshot(self) -> None:
+        with self._journal_lock:
+            self._snapshot_dirty = True
+            if self._snapshot_timer is not None:
+                return
+            timer = threading.Timer(self._SNAPSHOT_DELAY_SECONDS, self._snapshot_from_timer)
+            timer.daemon = True
+            self._snapshot_timer = timer
+        timer.start()
+
+    def _snapshot_from_timer(self) -> None:
+        with self._journal_lock:
+            self._snapshot_timer = None
+        self.flush_memories()
+
+    def flush_memories(self) -> None:
+        """立即把挂起的变更合并进 memories.json (shutdown 时调用)"""
+        with self._journal_lock:
+            if self._snapshot_timer is not None:
+                self._snapshot_timer.cancel()
+                self._snapshot_timer = None
+            if not self._snapshot_dirty:
+                return
+        self._save_memories()
+
+    def _journal_size(self) -> int:
+        try:
+            return self.journal_file.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def _truncate_journal(self, offset: int) -> None:
+        """丢弃已合并进快照的前 offset 字节; 之后追加的记录保留"""
+        if offset <= 0:
+            return
+        with self._journal_lock:
+            try:
+                with open(self.journal_file, "rb") as f:
+                    f.seek(offset)
+                    tail = f.read()
+                if not tail:
+                    self.journal_file.unlink()
+                    return
+                tmp = self.journal_file.with_suffix(self.journal_file.suffix + ".tmp")
+                tmp.write_bytes(tail)
+                tmp.replace(self.journal_file)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"Failed to truncate memories.journal: {e}")
+
+    def _replay_journal(self, snapshot: list) -> list:
+        """在 memories.json 快照上回放 memories.journal, 得到崩溃前的最新内容"""
+        if not self.journal_file.exists():
+            return snapshot
+        items: dict[str, dict] = {}
+        extra: list = []
+        for item in snapshot:
+            if isinstance(item, dict) and item.get("id"):
+                items[item["id"]] = item
+            else:
+                extra.append(item)
+        replayed = 0
+        try:
+            with open(self.journal_file, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # 崩溃时写了一半的最后一行
+                    if record.get("op") == "put" and isinstance(record.get("m"), dict):
+                        items[record["id"]] = record["m"]
+                    elif record.get("op") == "del":
+                        items.pop(record.get("id"), None)
+                    replayed += 1
+        except Exception as e:
+            logger.warning(f"[Manager] Failed to replay memories.journal: {e}")
+        if replayed:
+            logger.info(f"[Manager] Replayed {replayed} journal records onto memories.json")
+        return list(items.values()) + extra
+
     async def _save_memories_async(self) -> None:
         await asyncio.to_thread(self._save_memories)
 
@@ -463,13 +577,21 @@ class MemoryManager:
                 logger.debug(f"[Memory] Dedup L1: evolved {existing.id[:8]} (subject+predicate)")
                 return existing.id
 
-        # Dedup layer 2: content similarity search
+        # Dedup layer 2: MinHash 近重复候选 + 内容相似度搜索
         if content and len(content) >= 10:
             try:
-                similar = self.store.search_semantic(content, limit=5)
-                for s in similar:
+                candidates: dict[str, SemanticMemory] = {}
+                with self._memories_lock:
+                    for mid in self.store.find_near_duplicates(content)[:5]:
+                        if mid in self._memories:
+                            candidates[mid] = self._memories[mid]
+                for s in self.store.search_semantic(content, limit=5):
+                    candidates.setdefault(s.id, s)
+
+                new_bigrams = self._bigrams(content.lower().strip())
+                for s in candidates.values():
                     existing_content = (s.content or "").strip()
-                    dup_level = self._fast_dedup_check(content, existing_content)
+                    dup_level = self._fast_dedup_check(content, existing_content, new_bigrams)
 
                     if dup_level == "exact":
                         self._evolve_memory(s, content, importance)
@@ -500,18 +622,24 @@ class MemoryManager:
         self.store.save_semantic(mem)
 
         with self._memories_lock:
-            self._memories[mem.id] = mem
-            self._save_memories()
+            self._cache_put(mem)
+            self._journal("put", mem)
 
         return mem.id
 
     @staticmethod
-    def _fast_dedup_check(new: str, existing: str) -> str:
+    def _bigrams(text: str) -> set[str]:
+        return {text[i:i+2] for i in range(len(text) - 1)}
+
+    @staticmethod
+    def _fast_dedup_check(new: str, existing: str, new_bigrams: set[str] | None = None) -> str:
         """Fast local dedup: returns 'exact', 'likely', or 'no'.
 
         - exact: definitely duplicate (skip without LLM)
         - likely: might be duplicate (needs LLM confirmation)
         - no: not duplicate
+
+        new_bigrams: 预先算好的 new 的二元组, 与多条候选比较时避免重复构建
         """
         if not new or not existing:
             return "no"
@@ -521,8 +649,8 @@ class MemoryManager:
         if len(a) > 15 and len(b) > 15 and (a in b or b in a):
             return "exact"
         if len(a) >= 10 and len(b) >= 10:
-            bigrams_a = {a[i:i+2] for i in range(len(a) - 1)}
-            bigrams_b = {b[i:i+2] for i in range(len(b) - 1)}
+            bigrams_a = new_bigrams if new_bigrams is not None else MemoryManager._bigrams(a)
+            bigrams_b = MemoryManager._bigrams(b)
             if bigrams_a and bigrams_b:
                 overlap = len(bigrams_a & bigrams_b) / len(bigrams_a | bigrams_b)
                 if overlap > 0.8:
@@ -543,6 +671,7 @@ class MemoryManager:
                 f"记忆B: {existing_content}\n\n"
                 f"只回答 YES 或 NO。",
                 system="你是记忆去重判断器。如果两条记忆表达的核心信息相同（即使措辞不同），回答YES。否则回答NO。只输出一个词。",
+                cache=True,
             )
             text = (getattr(resp, "content", None) or str(resp)).strip().upper()
             return "YES" in text and "NO" not in text
@@ -683,17 +812,17 @@ class MemoryManager:
             logger.warning(f"[Memory] Failed to enqueue session turns: {e}")
 
     async def await_pending_tasks(self, timeout: float = 30.0) -> None:
-        """等待所有挂起的异步任务完成（在 shutdown 时调用）"""
-        if not self._pending_tasks:
-            return
-        pending = list(self._pending_tasks)
-        logger.info(f"[Memory] Awaiting {len(pending)} pending tasks (timeout={timeout}s)...")
-        done, not_done = await asyncio.wait(pending, timeout=timeout)
-        if not_done:
-            logger.warning(f"[Memory] {len(not_done)} tasks did not complete within timeout")
-            for t in not_done:
-                t.cancel()
-        self._pending_tasks.clear()
+        """等待所有挂起的异步任务完成（在 shutdown 时调用），并落盘 memories.json"""
+        if self._pending_tasks:
+            pending = list(self._pending_tasks)
+            logger.info(f"[Memory] Awaiting {len(pending)} pending tasks (timeout={timeout}s)...")
+            done, not_done = await asyncio.wait(pending, timeout=timeout)
+            if not_done:
+                logger.warning(f"[Memory] {len(not_done)} tasks did not complete within timeout")
+                for t in not_done:
+                    t.cancel()
+            self._pending_tasks.clear()
+        self.flush_memories()
 
     def _safe_enqueue_extraction(
         self,
@@ -742,7 +871,8 @@ class MemoryManager:
         for fact in quick_facts:
             self.store.save_semantic(fact)
             with self._memories_lock:
-                self._memories[fact.id] = fact
+                self._cache_put(fact)
+                self._journal("put", fact)
         if quick_facts:
             logger.info(f"[Memory] Quick extraction before compression: {len(quick_facts)} facts")
 
@@ -775,14 +905,37 @@ class MemoryManager:
                 return content[len(prefix):]
         return content
 
+    def _cache_put(self, memory: Memory) -> None:
+        """写入内存缓存并登记内容键 (调用方需持有 _memories_lock)"""
+        self._cache_drop(memory.id)
+        self._memories[memory.id] = memory
+        self._content_keys.setdefault((memory.content or "").lower(), set()).add(memory.id)
+
+    def _cache_drop(self, memory_id: str) -> Memory | None:
+        """从内存缓存移除并注销内容键 (调用方需持有 _memories_lock)"""
+        memory = self._memories.pop(memory_id, None)
+        if memory is not None:
+            key = (memory.content or "").lower()
+            ids = self._content_keys.get(key)
+            if ids is not None:
+                ids.discard(memory_id)
+                if not ids:
+                    del self._content_keys[key]
+        return memory
+
+    def _is_exact_duplicate(self, content: str) -> bool:
+        """内容 (忽略大小写) 与已有记忆完全相同
+
+        查 _content_keys, 与写入在同一把锁下, 并发 add_memory 不会漏判;
+        MinHash 索引只用于近重复候选。
+        """
+        return bool(self._content_keys.get(content.lower()))
+
     def add_memory(self, memory: Memory) -> str:
         """添加记忆 (v1 compat: writes to both v1 and v2 stores)"""
         with self._memories_lock:
-            existing = list(self._memories.values())
-            unique = self.extractor.deduplicate([memory], existing)
-            if not unique:
+            if self._is_exact_duplicate(memory.content):
                 return ""
-            memory = unique[0]
 
             if self.vector_store is not None and self.vector_store.enabled and len(self._memories) > 0:
                 core_content = self._strip_common_prefix(memory.content)
@@ -796,8 +949,8 @@ class MemoryManager:
                                 continue
                             return ""
 
-            self._memories[memory.id] = memory
-            self._save_memories()
+            self._cache_put(memory)
+            self._journal("put", memory)
 
             if self.vector_store is not None:
                 self.vector_store.add_memory(
@@ -857,9 +1010,8 @@ class MemoryManager:
 
     def delete_memory(self, memory_id: str) -> bool:
         with self._memories_lock:
-            if memory_id in self._memories:
-                del self._memories[memory_id]
-                self._save_memories()
+            if self._cache_drop(memory_id) is not None:
+                self._journal("del", memory_id=memory_id)
                 if self.vector_store is not None:
                     self.vector_store.delete_memory(memory_id)
                 self.store.delete_semantic(memory_id)
@@ -877,7 +1029,11 @@ class MemoryManager:
         )
 
     async def get_injection_context_async(self, task_description: str = "") -> str:
-        return await asyncio.to_thread(self.get_injection_context, task_description)
+        return await self.retrieval_engine.aretrieve(
+            query=task_description,
+            recent_messages=self._recent_messages,
+            max_tokens=700,
+        )
 
     def _keyword_search(self, query: str, limit: int = 5) -> list[Memory]:
         keywords = [kw for kw in query.lower().split() if len(kw) > 2]
@@ -928,8 +1084,10 @@ class MemoryManager:
             all_mems = self.store.load_all_memories()
             with self._memories_lock:
                 self._memories.clear()
+                self._content_keys.clear()
                 for m in all_mems:
-                    self._memories[m.id] = m
+                    self._cache_put(m)
+            self.store.sync_dedup_index(all_mems)
             self._save_memories()
             logger.debug(f"[Manager] Synced {len(all_mems)} memories: SQLite → cache → JSON")
         except Exception as e:
@@ -947,11 +1105,10 @@ class MemoryManager:
                     if (now - memory.updated_at) > timedelta(days=1):
                         expired.append(memory_id)
             for memory_id in expired:
-                with contextlib.suppress(KeyError):
-                    del self._memories[memory_id]
+                self._cache_drop(memory_id)
         if expired:
-            self._save_memories()
             for memory_id in expired:
+                self._journal("del", memory_id=memory_id)
                 with contextlib.suppress(Exception):
                     if self.vector_store is not None:
                         self.vector_store.delete_memory(memory_id)
@@ -0,0 +1,399 @@
+"""
+MinHash + LSH 近重复索引 (记忆去重)
+
+替代逐对比较的去重扫描:
+- 分片: CJK 连续片段取字符二元组, 其他按单词 (小写字母/数字), 中英文混排都能比较
+- 签名: 64 个 (a*h+b) mod p 置换的最小哈希; 有 numpy 时向量化, 否则纯 Python (结果一致)
+- LSH: 16 band × 4 行, Jaccard ≈0.5 以上的记忆对大概率落入同一桶
+- 持久化到记忆数据库旁: <db>.minhash.bin (内容指纹 + 签名) + <db>.minhash.json (id/类型)
+  add / remove 时增量维护, 累计一定变更后原子落盘 (写临时文件 + rename)
+
+索引只负责给出候选; 是否重复由调用方对候选做精确比较决定。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import random
+import re
+import threading
+import zlib
+from array import array
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+
+    _NUMPY_AVAILABLE = True
+except ImportError:  # pragma: no cover - depends on environment
+    np = None  # type: ignore[assignment]
+    _NUMPY_AVAILABLE = False
+
+_INDEX_VERSION = 1
+_PRIME = (1 << 31) - 1
+_TOKEN_RE = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯]+|[a-z0-9_]+")
+
+
+def shingles(text: str) -> set[str]:
+    """CJK 感知分片: CJK 片段取字符二元组 (单字片段保留本身), 其他取单词"""
+    result: set[str] = set()
+    if not text:
+        return result
+    for token in _TOKEN_RE.findall(text.lower()):
+        if token[0].isascii() or len(token) == 1:
+            result.add(token)
+        else:
+            result.update(token[i : i + 2] for i in range(len(token) - 1))
+    return result
+
+
+def jaccard(a: set[str], b: set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def overlap_coefficient(a: set[str], b: set[str]) -> float:
+    """|A∩B| / min(|A|, |B|): 短文本被长文本包含时也能识别"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / min(len(a), len(b))
+
+
+def content_fingerprint(text: str) -> int:
+    return zlib.crc32(text.encode("utf-8"))
+
+
+class MinHashIndex:
+    """
+    MinHash 签名 + LSH 分桶, 以 memory id 为键
+
+    Usage:
+        index = MinHashIndex(Path("data/memory/openakita.db"))
+        index.add("mem_1", "用户喜欢 Python 编程", memory_type="preference")
+        candidates = index.query("用户喜欢 Python 编程语言", memory_type="preference")
+    """
+
+    _FLUSH_EVERY = 64
+
+    def __init__(
+        self,
+        db_path: str | Path | None = None,
+        num_perm: int = 64,
+        bands: int = 16,
+        seed: int = 1,
+    ) -> None:
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self._num_perm = num_perm
+        self._bands = bands
+        self._rows_per_band = num_perm // bands
+        self._seed = seed
+        self._lock = threading.RLock()
+
+        rng = random.Random(seed)
+        self._perm_a = [rng.randrange(1, _PRIME) for _ in range(num_perm)]
+        self._perm_b = [rng.randrange(0, _PRIME) for _ in range(num_perm)]
+        if _NUMPY_AVAILABLE:
+            self._np_a = np.array(self._perm_a, dtype=np.uint64)
+            self._np_b = np.array(self._perm_b, dtype=np.uint64)
+
+        self._data_path: Path | None = None
+        self._meta_path: Path | None = None
+        if db_path is not None:
+            base = Path(db_path)
+            self._data_path = base.with_name(base.name + ".minhash.bin")
+            self._meta_path = base.with_name(base.name + ".minhash.json")
+
+        # memory_id -> (内容指纹, 类型, 签名)
+        self._entries: dict[str, tuple[int, str, tuple[int, ...]]] = {}
+        self._buckets: list[dict[int, set[str]]] = [defaultdict(set) for _ in range(bands)]
+        self._pending = 0
+        self._batch_depth = 0
+        self._stats = {"queries": 0, "candidates": 0}
+
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, memory_id: str) -> bool:
+        return memory_id in self._entries
+
+    def get_stats(self) -> dict:
+        return {
+            **self._stats,
+            "entries": len(self._entries),
+            "num_perm": self._num_perm,
+            "bands": self._bands,
+            "numpy": _NUMPY_AVAILABLE,
+        }
+
+    # ======================================================================
+    # Signatures
+    # ======================================================================
+
+    def signature(self, shingle_set: set[str]) -> tuple[int, ...] | None:
+        if not shingle_set:
+            return None
+        hashes = [zlib.crc32(s.encode("utf-8")) % _PRIME for s in shingle_set]
+        if _NUMPY_AVAILABLE:
+            h = np.array(hashes, dtype=np.uint64)
+            # a, h < 2^31 → a*h + b < 2^63, uint64 不会溢出
+            sig = ((np.outer(h, self._np_a) + self._np_b) % _PRIME).min(axis=0)
+            return tuple(int(v) for v in sig)
+        return tuple(
+            min((a * h + b) % _PRIME for h in hashes)
+            for a, b in zip(self._perm_a, self._perm_b, strict=True)
+        )
+
+    def _band_keys(self, sig: tuple[int, ...]) -> list[int]:
+        r = self._rows_per_band
+        return [hash(sig[i * r : (i + 1) * r]) for i in range(self._bands)]
+
+    # ======================================================================
+    # Mutations
+    # ======================================================================
+
+    def add(self, memory_id: str, content: str, memory_type: str = "") -> bool:
+        """写入或更新一条记忆; 内容未变化时跳过"""
+        fingerprint = content_fingerprint(content or "")
+        with self._lock:
+            current = self._entries.get(memory_id)
+            if current is not None and current[0] == fingerprint:
+                if memory_type and current[1] != memory_type.lower():
+                    self._entries[memory_id] = (fingerprint, memory_type.lower(), current[2])
+                    self._mark_dirty()
+                return True
+            sig = self.signature(shingles(content))
+            if current is not None:
+                self._unlink(memory_id, current[2])
+            if sig is None:
+                self._entries.pop(memory_id, None)
+                self._mark_dirty()
+                return False
+            self._entries[memory_id] = (fingerprint, (memory_type or "").lower(), sig)
+            for band, key in zip(self._buckets, self._band_keys(sig), strict=True):
+                band[key].add(memory_id)
+            self._mark_dirty()
+            return True
+
+    def remove(self, memory_id: str) -> bool:
+        with self._lock:
+            entry = self._entries.pop(memory_id, None)
+            if entry is None:
+                return False
+            self._unlink(memory_id, entry[2])
+            self._mark_dirty()
+            return True
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """批量写入: 期间不做中途落盘, 结束时统一 flush 一次"""
+        with self._lock:
+            self._batch_depth += 1
+            try:
+                yield
+            finally:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self.flush()
+
+    def sync(self, items: Iterable[tuple[str, str, str]]) -> int:
+        """
+        与权威数据 [(memory_id, content, memory_type), ...] 对齐
+
+        按内容指纹只重算新增/变化的条目, 删除多余条目; 返回变更条数。
+        整个过程只在结束时落盘一次。
+        """
+        changed = 0
+        with self.batch():
+            seen: set[str] = set()
+            for memory_id, content, memory_type in items:
+                seen.add(memory_id)
+                current = self._entries.get(memory_id)
+                if current is not None and current[0] == content_fingerprint(content or ""):
+                    continue
+                self.add(memory_id, content, memory_type)
+                changed += 1
+            for memory_id in [m for m in self._entries if m not in seen]:
+                self.remove(memory_id)
+                changed += 1
+            if changed:
+                logger.debug(
+                    f"[MinHashIndex] Synced {changed} entries ({len(self._entries)} total)"
+                )
+        return changed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._buckets = [defaultdict(set) for _ in range(self._bands)]
+            self._mark_dirty()
+
+    def _unlink(self, memory_id: str, sig: tuple[int, ...]) -> None:
+        for band, key in zip(self._buckets, self._band_keys(sig), strict=True):
+            bucket = band.get(key)
+            if bucket is not None:
+                bucket.discard(memory_id)
+                if not bucket:
+                    del band[key]
+
+    # ======================================================================
+    # Query
+    # ======================================================================
+
+    def query(
+        self,
+        content: str,
+        memory_type: str | None = None,
+        exclude: str | None = None,
+    ) -> list[str]:
+        """返回与 content 至少共享一个 LSH 桶的记忆 id (按估算相似度降序)"""
+        sig = self.signature(shingles(content))
+        if sig is None:
+            return []
+        wanted = memory_type.lower() if memory_type else None
+        with self._lock:
+            found: set[str] = set()
+            for band, key in zip(self._buckets, self._band_keys(sig), strict=True):
+                bucket = band.get(key)
+                if bucket:
+                    found.update(bucket)
+            found.discard(exclude)
+            scored = []
+            for memory_id in found:
+                entry = self._entries[memory_id]
+                if wanted and entry[1] != wanted:
+                    continue
+                same = sum(1 for x, y in zip(sig, entry[2], strict=True) if x == y)
+                scored.append((same, memory_id))
+            self._stats["queries"] += 1
+            self._stats["candidates"] += len(scored)
+        scored.sort(key=lambda x: x[0], reverse=True)
+        return [memory_id for _, memory_id in scored]
+
+    # ======================================================================
+    # Persistence
+    # ======================================================================
+
+    def flush(self) -> None:
+        """原子写入 .bin + .json"""
+        with self._lock:
+            if self._pending == 0 or self._data_path is None:
+                self._pending = 0
+                return
+            ids = list(self._entries)
+            data = array("I")
+            types = []
+            for memory_id in ids:
+                fingerprint, memory_type, sig = self._entries[memory_id]
+                data.append(fingerprint)
+                data.extend(sig)
+                types.append(memory_type)
+            try:
+                tmp_data = self._data_path.with_name(self._data_path.name + ".tmp")
+                tmp_meta = self._meta_path.with_name(self._meta_path.name + ".tmp")
+                tmp_data.write_bytes(data.tobytes())
+                tmp_meta.write_text(
+                    json.dumps({
+                        "version": _INDEX_VERSION,
+                        "num_perm": self._num_perm,
+                        "bands": self._bands,
+                        "seed": self._seed,
+                        "ids": ids,
+                        "types": types,
+                    }, ensure_ascii=False),
+                    encoding="utf-8",
+                )
+                os.replace(tmp_data, self._data_path)
+                os.replace(tmp_meta, self._meta_path)
+                self._pending = 0
+            except Exception as e:
+                logger.warning(f"[MinHashIndex] Failed to persist index: {e}")
+
+    def _load(self) -> None:
+        if self._data_path is None or not self._meta_path.exists() or not self._data_path.exists():
+            return
+        try:
+            meta = json.loads(self._meta_path.read_text(encoding="utf-8"))
+            params = tuple(meta.get(k) for k in ("version", "num_perm", "bands", "seed"))
+            if params != (_INDEX_VERSION, self._num_perm, self._bands, self._seed):
+                logger.info("[MinHashIndex] Parameters changed, discarding persisted index")
+                return
+            ids = list(meta.get("ids", []))
+            types = list(meta.get("types", []))
+            data = array("I")
+            data.frombytes(self._data_path.read_bytes())
+            stride = self._num_perm + 1
+            if len(types) != len(ids) or len(data) != len(ids) * stride:
+                logger.warning("[MinHashIndex] Index files inconsistent, discarding")
+                return
+            for i, memory_id in enumerate(ids):
+                row = data[i * stride : (i + 1) * stride]
+                sig = tuple(row[1:])
+                self._entries[memory_id] = (row[0], types[i], sig)
+                for band, key in zip(self._buckets, self._band_keys(sig), strict=True):
+                    band[key].add(memory_id)
+            logger.debug(f"[MinHashIndex] Loaded {len(ids)} signatures from {self._data_path}")
+        except Exception as e:
+            logger.warning(f"[MinHashIndex] Failed to load index: {e}")
+            self._entries.clear()
+            self._buckets = [defaultdict(set) for _ in range(self._bands)]
+
+    def _mark_dirty(self) -> None:
+        self._pending += 1
+        if self._pending >= self._FLUSH_EVERY and self._batch_depth == 0:
+            self.flush()
+
+
+def cluster_candidates(
+    index: MinHashIndex,
+    items: list[Any],
+    *,
+    threshold: float,
+    key: Any = lambda m: m.content,
+    similarity: Any = overlap_coefficient,
+) -> list[list[Any]]:
+    """
+    贪心聚类: 按 items 顺序, 每条未归类记忆与其 LSH 候选做精确相似度比较
+
+    items 需有 id 属性且已写入 index; 只返回成员数 ≥2 的簇。
+    """
+    by_id = {item.id: item for item in items}
+    shingle_cache: dict[str, set[str]] = {}
+
+    def _shingles(item: Any) -> set[str]:
+        cached = shingle_cache.get(item.id)
+        if cached is None:
+            cached = shingle_cache[item.id] = shingles(key(item))
+        return cached
+
+    clusters: list[list[Any]] = []
+    assigned: set[str] = set()
+    for item in items:
+        if item.id in assigned:
+            continue
+        assigned.add(item.id)
+        base = _shingles(item)
+        if not base:
+            continue
+        cluster = [item]
+        for other_id in index.query(key(item), exclude=item.id):
+            other = by_id.get(other_id)
+            if other is None or other_id in assigned:
+                continue
+            if similarity(base, _shingles(other)) >= threshold:
+                cluster.append(other)
+                assigned.add(other_id)
+        if len(cluster) >= 2:
+            clusters.append(cluster)
+    return clusters
@@ -9,18 +9,24 @@
 - LLM 查询拆解 (compiler model): 自然语言 → 搜索关键词
 - 综合排序: relevance × recency × importance × access_freq
 - Token 预算控制
+- 异步路径 (aretrieve): 各路召回在线程池中并发执行, 每路独立超时
 """
 
 from __future__ import annotations
 
 import asyncio
+import concurrent.futures
 import json
 import logging
 import math
 import re
+import time
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from datetime import datetime
+from typing import Any
 
+from ..tracing.tracer import get_tracer
 from .types import Attachment, Episode
 from .unified_store import UnifiedStore
 
@@ -68,10 +74,23 @@ class RetrievalEngine:
         "只输出 JSON，不要其他内容。"
     )
 
+    # 异步召回: 每路独立截止时间 (秒), 超时的通道按空结果处理, 不阻塞本轮推理
+    CHANNEL_TIMEOUTS: dict[str, float] = {
+        "semantic": 3.0,
+        "episode": 2.0,
+        "recent": 1.5,
+        "attachment": 2.0,
+    }
+    DECOMPOSE_TIMEOUT = 10.0
+    # 进程内拆解结果 LRU；跨进程 / 重启的复用由 LLM 响应缓存负责
+    DECOMPOSE_CACHE_SIZE = 256
+    _RECALL_WORKERS = 8
+
     def __init__(self, store: UnifiedStore, brain=None) -> None:
         self.store = store
         self.brain = brain
-        self._decompose_cache: dict[str, dict] = {}
+        self._decompose_cache: OrderedDict[str, dict] = OrderedDict()
+        self._executor: concurrent.futures.ThreadPoolExecutor | None = None
 
     def retrieve(
         self,
@@ -129,6 +148,125 @@ class RetrievalEngine:
         ranked = self._rerank(candidates, query)
         return ranked[:limit]
 
+    # ==================================================================
+    # Async Concurrent Recall
+    # ==================================================================
+
+    async def aretrieve(
+        self,
+        query: str,
+        recent_messages: list[dict] | None = None,
+        active_persona: str | None = None,
+        max_tokens: int = 700,
+    ) -> str:
+        """retrieve() 的异步版本: 多路召回并发执行, 单路超时不拖慢整体"""
+        ranked = await self._aretrieve_ranked(query, recent_messages, active_persona)
+        return self._format_within_budget(ranked, max_tokens)
+
+    async def aretrieve_candidates(
+        self,
+        query: str,
+        recent_messages: list[dict] | None = None,
+        limit: int = 20,
+    ) -> list[RetrievalCandidate]:
+        """retrieve_candidates() 的异步版本"""
+        ranked = await self._aretrieve_ranked(query, recent_messages)
+        return ranked[:limit]
+
+    async def _aretrieve_ranked(
+        self,
+        query: str,
+        recent_messages: list[dict] | None,
+        active_persona: str | None = None,
+    ) -> list[RetrievalCandidate]:
+        timings: dict[str, dict] = {}
+        with get_tracer().memory_span("retrieve", query_length=len(query or "")) as span:
+            decomposed = await self._run_channel(
+                "decompose",
+                self._decompose_query, query, recent_messages,
+                timeout=self.DECOMPOSE_TIMEOUT,
+                default=None,
+                timings=timings,
+            )
+            if decomposed is None:
+                decomposed = self._decompose_with_rules(query)
+            search_keywords = decomposed.get("keywords", [])
+            intent = decomposed.get("intent", "general")
+
+            enhanced = self._build_enhanced_query(query, recent_messages, search_keywords)
+
+            channels = [
+                ("semantic", self._search_semantic, (enhanced,)),
+                ("episode", self._search_episodes, (enhanced,)),
+                ("recent", self._search_recent, ()),
+                ("attachment", self._search_attachments, (query, search_keywords, intent)),
+            ]
+            results = await asyncio.gather(*(
+                self._run_channel(
+                    name, fn, *args,
+                    timeout=self.CHANNEL_TIMEOUTS.get(name, 2.0),
+                    default=[],
+                    timings=timings,
+                )
+                for name, fn, args in channels
+            ))
+
+            candidates = self._merge_and_deduplicate(*results)
+            ranked = self._rerank(candidates, query, active_persona)
+
+            span.set_attribute("channel_ms", {k: v["ms"] for k, v in timings.items()})
+            timed_out = [k for k, v in timings.items() if v["status"] == "timeout"]
+            failed = [k for k, v in timings.items() if v["status"] == "error"]
+            if timed_out:
+                span.set_attribute("timed_out", timed_out)
+            if failed:
+                span.set_attribute("failed", failed)
+            span.set_attribute("candidates", len(ranked))
+            return ranked
+
+    async def _run_channel(
+        self,
+        name: str,
+        fn: Any,
+        *args: Any,
+        timeout: float,
+        default: Any,
+        timings: dict[str, dict],
+    ) -> Any:
+        """在召回线程池中执行单路召回, 记录耗时; 超时/异常返回 default"""
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            future = loop.run_in_executor(self._get_executor(), fn, *args)
+            return await asyncio.wait_for(future, timeout=timeout)
+        except TimeoutError:
+            status = "timeout"
+            logger.warning(f"[Retrieval] Channel '{name}' exceeded {timeout:.1f}s deadline, skipped")
+            return default
+        except Exception as e:
+            status = "error"
+            logger.warning(f"[Retrieval] Channel '{name}' failed: {e}")
+            return default
+        finally:
+            timings[name] = {
+                "ms": round((time.perf_counter() - start) * 1000, 2),
+                "status": status,
+            }
+
+    def _get_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self._RECALL_WORKERS,
+                thread_name_prefix="memory-recall",
+            )
+        return self._executor
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
     # ==================================================================
     # Multi-way Recall
     # ==================================================================
@@ -321,17 +459,17 @@ class RetrievalEngine:
             return {"keywords": [query.strip()], "intent": "general"}
 
         cache_key = query[:200]
-        if cache_key in self._decompose_cache:
-            return self._decompose_cache[cache_key]
-
-        if self.brain:
-            result = self._decompose_with_llm(query, recent_messages)
-            if result:
-                self._decompose_cache[cache_key] = result
-                return result
-
-        result = self._decompose_with_rules(query)
+        cached = self._decompose_cache.get(cache_key)
+        if cached is not None:
+            self._decompose_cache.move_to_end(cache_key)
+            return cached
+
+        result = self._decompose_with_llm(query, recent_messages) if self.brain else None
+        if not result:
+            result = self._decompose_with_rules(query)
         self._decompose_cache[cache_key] = result
+        if len(self._decompose_cache) > self.DECOMPOSE_CACHE_SIZE:
+            self._decompose_cache.popitem(last=False)
         return result
 
     def _decompose_with_llm(
@@ -366,10 +504,12 @@ class RetrievalEngine:
             if loop and loop.is_running():
                 import concurrent.futures
                 with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
-                    future = pool.submit(asyncio.run, think_fn(prompt, system="只输出JSON"))
+                    future = pool.submit(
+                        asyncio.run, think_fn(prompt, system="只输出JSON", cache=True)
+                    )
                     response = future.result(timeout=10)
             else:
-                response = asyncio.run(think_fn(prompt, system="只输出JSON"))
+                response = asyncio.run(think_fn(prompt, system="只输出JSON", cache=True))
 
             text = (getattr(response, "content", None) or str(response)).strip()
 
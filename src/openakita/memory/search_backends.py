@@ -13,11 +13,16 @@
 
 from __future__ import annotations
 
+import concurrent.futures
 import hashlib
 import logging
 import struct
+import threading
+from pathlib import Path
 from typing import Any, Protocol, runtime_checkable
 
+from .embedding_index import EmbeddingIndex
+
 logger = logging.getLogger(__name__)
 
 
@@ -66,7 +71,8 @@ class FTS5Backend:
     """
     SQLite FTS5 全文搜索后端 (默认)
 
-    - jieba 分词: 写入前将中文文本分词为空格分隔 tokens
+    - 索引: MemoryStorage 写入时把 CJK 内容切成二元组 (content_seg 影子列)
+    - 查询: jieba 分词 (可选), 再由 search_fts 按同样规则转成二元组短语
     - BM25 排序: SQLite FTS5 内置 bm25() 函数
     - 零外部依赖 (jieba 是纯 Python, ~15MB)
     - 零初始化延迟
@@ -195,10 +201,17 @@ class APIEmbeddingBackend:
 
     支持 DashScope (text-embedding-v3) 和 OpenAI (text-embedding-3-small)。
     embedding 结果缓存到 SQLite embedding_cache 表。
+    记忆向量维护在 EmbeddingIndex (numpy 矩阵, 持久化在 DB 旁),
+    检索为一次矩阵-向量乘法, 覆盖全部记忆; 未安装 numpy 时回退到逐条比对。
     """
 
     backend_type = "api_embedding"
 
+    _FALLBACK_SCAN_LIMIT = 200
+    _REQUEST_TIMEOUT = 30
+    # 单次请求的最大 input 条数 (DashScope text-embedding-v3: 10, OpenAI: 2048)
+    _MAX_BATCH_SIZE = {"dashscope": 10, "openai": 2048}
+
     def __init__(
         self,
         storage: Any,
@@ -212,7 +225,19 @@ class APIEmbeddingBackend:
         self._api_key = api_key
         self._model = model or self._default_model(provider)
         self._dimensions = dimensions
-        self._httpx = None
+        self._client: Any = None
+        self._inflight: dict[str, concurrent.futures.Future] = {}
+        self._inflight_lock = threading.Lock()
+
+        # 维度由首个返回向量决定 (部分模型会忽略 dimensions 参数)
+        db_path = getattr(storage, "db_path", None)
+        self._index = EmbeddingIndex(
+            db_path if isinstance(db_path, (str, Path)) else None,
+            model=self._model,
+        )
+        self._index_synced = False
+        self._sync_lock = threading.Lock()
+        self._sync_thread: threading.Thread | None = None
 
     @property
     def available(self) -> bool:
@@ -236,8 +261,13 @@ class APIEmbeddingBackend:
         if query_emb is None:
             return []
 
+        if self._index.available:
+            # 对齐未完成 (或上次失败) 时在后台重试, 本次检索先用现有索引
+            self.start_index_sync()
+            return self._index.search(query_emb, limit=limit, filter_type=filter_type)
+
         memories = self._storage.query(
-            memory_type=filter_type, limit=200
+            memory_type=filter_type, limit=self._FALLBACK_SCAN_LIMIT
         )
         if not memories:
             return []
@@ -254,90 +284,229 @@ class APIEmbeddingBackend:
         return scored[:limit]
 
     def add(self, memory_id: str, content: str, metadata: dict | None = None) -> bool:
-        self._get_embedding(content)
+        embedding = self._get_embedding(content)
+        if embedding is not None:
+            self._index.upsert(memory_id, embedding, (metadata or {}).get("type", ""))
         return True
 
     def delete(self, memory_id: str) -> bool:
+        self._index.remove(memory_id)
         return True
 
     def batch_add(self, items: list[dict]) -> int:
-        for item in items:
-            self._get_embedding(item.get("content", ""))
+        embeddings = self._get_embeddings([item.get("content", "") for item in items])
+        rows: list[tuple[str, list[float], str]] = []
+        for item, embedding in zip(items, embeddings, strict=True):
+            if embedding is not None and item.get("id"):
+                rows.append((item["id"], embedding, item.get("type", "")))
+        self._index.upsert_many(rows)
+        self._index.flush()
         return len(items)
 
+    def flush(self) -> None:
+        self._index.flush()
+
+    def close(self) -> None:
+        self._index.flush()
+        if self._client is not None:
+            try:
+                self._client.close()
+            except Exception:
+                pass
+            self._client = None
+
+    def start_index_sync(self) -> None:
+        """在后台线程对齐索引 (创建时启动; 未成功前每次检索都会重新触发)"""
+        if self._index_synced or not self._index.available or not self.available:
+            return
+        with self._sync_lock:
+            if self._sync_thread is not None and self._sync_thread.is_alive():
+                return
+            self._sync_thread = threading.Thread(
+                target=self._sync_index, name="EmbeddingIndexSync", daemon=True
+            )
+            self._sync_thread.start()
+
+    def _sync_index(self) -> bool:
+        """
+        对齐索引与 SQLite: 补齐缺失向量 (多数命中 embedding_cache), 剔除已删除记忆
+
+        全部补齐后才标记完成; 部分向量获取失败时保留未完成状态, 下次检索重试。
+        """
+        try:
+            # 先取索引 id 再取 SQLite 快照: 写入先落库再入索引, 所以这批 id 都应出现在快照里。
+            # 快照之后 add() 进来的向量不在 indexed 中, 不会被误当作已删除剔除
+            indexed = self._index.ids()
+            memories = self._storage.load_all()
+
+            live_ids = {m["id"] for m in memories}
+            stale = indexed - live_ids
+            for mid in stale:
+                self._index.remove(mid)
+
+            missing = [m for m in memories if m["id"] not in self._index]
+            if missing:
+                logger.info(f"[APIEmbedding] Backfilling {len(missing)} vectors into index")
+                self.batch_add(missing)
+            elif stale:
+                self._index.flush()
+        except Exception as e:
+            logger.warning(f"[APIEmbedding] Index sync failed, will retry: {e}")
+            return False
+
+        # 空内容没有向量, 不算失败
+        failed = sum(
+            1 for m in missing if m["id"] not in self._index and m.get("content", "").strip()
+        )
+        if failed:
+            logger.warning(f"[APIEmbedding] Index backfill incomplete ({failed}), will retry")
+            return False
+        self._index_synced = True
+        return True
+
+    # ======================================================================
+    # Embedding (批量 + 缓存 + 并发合并)
+    # ======================================================================
+
     def _get_embedding(self, text: str) -> list[float] | None:
         if not text.strip():
             return None
+        return self._get_embeddings([text])[0]
+
+    def _get_embeddings(self, texts: list[str]) -> list[list[float] | None]:
+        """
+        批量获取 embedding, 顺序与 texts 对应
+
+        - 相同内容只请求一次, 先查 embedding_cache
+        - 其他线程正在请求的内容直接等待其结果 (请求合并)
+        - 其余按 provider 单次上限分批调用 API
+        """
+        hashes = [self._content_hash(t) if t.strip() else "" for t in texts]
+        resolved: dict[str, list[float] | None] = {}
+        owned: dict[str, str] = {}
+        waiting: dict[str, concurrent.futures.Future] = {}
+
+        for h, text in zip(hashes, texts, strict=True):
+            if not h or h in resolved or h in owned or h in waiting:
+                continue
+            cached = self._storage.get_cached_embedding(h)
+            if cached is not None:
+                resolved[h] = self._bytes_to_floats(cached)
+                continue
+            with self._inflight_lock:
+                fut = self._inflight.get(h)
+                if fut is None:
+                    self._inflight[h] = concurrent.futures.Future()
+                    owned[h] = text
+                else:
+                    waiting[h] = fut
+
+        if owned:
+            try:
+                try:
+                    fetched = self._fetch_batched(list(owned.values()))
+                except Exception as e:
+                    logger.error(f"Embedding API call failed: {e}")
+                    fetched = [None] * len(owned)
+                for h, embedding in zip(owned, fetched, strict=True):
+                    resolved[h] = embedding
+                    if embedding is not None:
+                        self._save_to_cache(h, embedding)
+            finally:
+                # 无论成功与否都释放占位, 否则后续同内容请求会一直等到超时
+                for h in owned:
+                    with self._inflight_lock:
+                        fut = self._inflight.pop(h, None)
+                    if fut is not None and not fut.done():
+                        fut.set_result(resolved.get(h))
+
+        for h, fut in waiting.items():
+            try:
+                resolved[h] = fut.result(timeout=self._REQUEST_TIMEOUT * 2)
+            except Exception:
+                resolved[h] = None
 
-        content_hash = hashlib.sha256(
-            f"{self._model}:{text}".encode()
-        ).hexdigest()
+        return [resolved.get(h) if h else None for h in hashes]
 
-        cached = self._storage.get_cached_embedding(content_hash)
-        if cached is not None:
-            return self._bytes_to_floats(cached)
+    def _fetch_batched(self, texts: list[str]) -> list[list[float] | None]:
+        results: list[list[float] | None] = []
+        for batch in self._batches(texts):
+            embeddings = self._call_api(batch)
+            results.extend(embeddings if embeddings is not None else [None] * len(batch))
+        return results
 
-        embedding = self._call_api(text)
-        if embedding is not None:
-            blob = self._floats_to_bytes(embedding)
-            self._storage.save_cached_embedding(
-                content_hash, blob, self._model, len(embedding)
-            )
-        return embedding
+    def _batches(self, texts: list[str]) -> list[list[str]]:
+        size = self._MAX_BATCH_SIZE.get(self._provider, 10)
+        return [texts[i:i + size] for i in range(0, len(texts), size)]
 
-    def _call_api(self, text: str) -> list[float] | None:
-        try:
-            if self._httpx is None:
-                import httpx
-                self._httpx = httpx
-
-            if self._provider == "dashscope":
-                return self._call_dashscope(text)
-            elif self._provider == "openai":
-                return self._call_openai(text)
-            else:
-                logger.warning(f"Unknown embedding provider: {self._provider}")
-                return None
-        except Exception as e:
-            logger.error(f"Embedding API call failed: {e}")
-            return None
+    def _content_hash(self, text: str) -> str:
+        return hashlib.sha256(f"{self._model}:{text}".encode()).hexdigest()
 
-    def _call_dashscope(self, text: str) -> list[float] | None:
-        url = "https://dashscope.aliyuncs.com/compatible-mode/v1/embeddings"
-        headers = {
-            "Authorization": f"Bearer {self._api_key}",
-            "Content-Type": "application/json",
-        }
-        payload = {
-            "model": self._model,
-            "input": [text],
-            "encoding_format": "float",
-        }
-        if self._dimensions:
-            payload["dimensions"] = self._dimensions
+    def _save_to_cache(self, content_hash: str, embedding: list[float]) -> None:
+        self._storage.save_cached_embedding(
+            content_hash, self._floats_to_bytes(embedding), self._model, len(embedding)
+        )
 
-        resp = self._httpx.post(url, json=payload, headers=headers, timeout=30)
-        resp.raise_for_status()
-        data = resp.json()
-        return data["data"][0]["embedding"]
+    # ======================================================================
+    # HTTP
+    # ======================================================================
 
-    def _call_openai(self, text: str) -> list[float] | None:
-        url = "https://api.openai.com/v1/embeddings"
+    def _request(self, texts: list[str]) -> tuple[str, dict, dict] | None:
+        """构造 (url, headers, payload); 未知 provider 返回 None"""
         headers = {
             "Authorization": f"Bearer {self._api_key}",
             "Content-Type": "application/json",
         }
-        payload = {
-            "model": self._model,
-            "input": text,
-        }
+        if self._provider == "dashscope":
+            url = "https://dashscope.aliyuncs.com/compatible-mode/v1/embeddings"
+            payload: dict[str, Any] = {
+                "model": self._model,
+                "input": texts,
+                "encoding_format": "float",
+            }
+        elif self._provider == "openai":
+            url = "https://api.openai.com/v1/embeddings"
+            payload = {
+                "model": self._model,
+                "input": texts,
+            }
+        else:
+            logger.warning(f"Unknown embedding provider: {self._provider}")
+            return None
         if self._dimensions:
             payload["dimensions"] = self._dimensions
+        return url, headers, payload
 
-        resp = self._httpx.post(url, json=payload, headers=headers, timeout=30)
-        resp.raise_for_status()
-        data = resp.json()
-        return data["data"][0]["embedding"]
+    @staticmethod
+    def _parse_response(data: dict, count: int) -> list[list[float] | None]:
+        out: list[list[float] | None] = [None] * count
+        for i, item in enumerate(data.get("data", [])):
+            idx = item.get("index", i)
+            if 0 <= idx < count:
+                out[idx] = item.get("embedding")
+        return out
+
+    def _call_api(self, texts: list[str]) -> list[list[float] | None] | None:
+        try:
+            req = self._request(texts)
+            if req is None:
+                return None
+            url, headers, payload = req
+            resp = self._get_client().post(url, json=payload, headers=headers)
+            resp.raise_for_status()
+            return self._parse_response(resp.json(), len(texts))
+        except Exception as e:
+            logger.error(f"Embedding API call failed: {e}")
+            return None
+
+    def _get_client(self) -> Any:
+        if self._client is None:
+            import httpx
+            self._client = httpx.Client(
+                timeout=self._REQUEST_TIMEOUT,
+                limits=httpx.Limits(max_keepalive_connections=4, max_connections=8),
+            )
+        return self._client
 
     @staticmethod
     def _cosine_similarity(a: list[float], b: list[float]) -> float:
@@ -394,6 +563,7 @@ def create_search_backend(
         )
         if backend.available:
             logger.info(f"[SearchBackend] Using API Embedding backend ({api_provider})")
+            backend.start_index_sync()
             return backend
         logger.warning("[SearchBackend] API Embedding not available, falling back to FTS5")
 
@@ -11,23 +11,62 @@ SQLite 为唯一结构化主存储，管理所有记忆数据:
 
 设计原则:
 - SQLite 是唯一真相源, 所有数据先写 SQLite
-- FTS5 全文索引通过触发器自动同步
+- FTS5 全文索引通过触发器自动同步; CJK 内容写入时切成二元组存入影子列
+  content_seg, 中文检索直接走 BM25 索引而不是 LIKE 全表扫描
 - 向后兼容 v1 schema, 自动迁移
+
+并发模型 (WAL):
+- 读: 只读连接池, 查询 / FTS / 情节检索互不阻塞, 也不等待写入
+- 写: 单一写连接串行执行; 并发写入合并为一次 COMMIT (group commit),
+  每次写入在提交完成后才返回, 读连接总能读到自己刚写入的数据
 """
 
 from __future__ import annotations
 
 import json
 import logging
+import queue
+import re
 import sqlite3
 import threading
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Any
 
 logger = logging.getLogger(__name__)
 
-_SCHEMA_VERSION = 2
+_SCHEMA_VERSION = 3
+_MAX_SQL_PARAMS = 500  # 低于旧版 SQLite 的 999 个绑定参数上限
+
+_CJK_CHARS = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af"
+_CJK_RUN_RE = re.compile(f"[{_CJK_CHARS}]+")
+_QUERY_PART_RE = re.compile(f"([{_CJK_CHARS}]+)|[^\\W_]+")
+_FTS_KEYWORDS = frozenset({"AND", "OR", "NOT", "NEAR"})
+
+
+def _cjk_bigrams(run: str) -> list[str]:
+    return [run[i : i + 2] for i in range(len(run) - 1)] or [run]
+
+
+def segment_cjk(text: str) -> str:
+    """FTS 索引分词: CJK 片段展开为重叠二元组 + 末字, 其他文本原样保留
+
+    "喜欢Python编程" -> " 喜欢 欢 Python 编程 程 "。末字单独成词,
+    这样单字查询可用前缀匹配 ("欢*"), 跨脚本短语也能保持相邻。
+    """
+    if not text:
+        return ""
+
+    def _expand(m: re.Match) -> str:
+        run = m.group()
+        tokens = _cjk_bigrams(run) + ([run[-1]] if len(run) > 1 else [])
+        return f" {' '.join(tokens)} "
+
+    return _CJK_RUN_RE.sub(_expand, text)
 
 
 class MemoryStorage:
@@ -42,13 +81,218 @@ class MemoryStorage:
 
     _BUSY_TIMEOUT_MS = 5000
 
-    def __init__(self, db_path: str | Path) -> None:
+    def __init__(
+        self,
+        db_path: str | Path,
+        *,
+        read_pool_size: int = 4,
+        group_commit_ms: float = 2.0,
+    ) -> None:
         self._db_path = Path(db_path)
         self._db_path.parent.mkdir(parents=True, exist_ok=True)
         self._conn: sqlite3.Connection | None = None
-        self._lock = threading.RLock()
+        self._lock = threading.RLock()  # 写连接锁
+
+        # 只读连接池 (按需创建, 最多 read_pool_size 个)
+        self._read_pool_size = max(read_pool_size, 0)
+        self._read_pool: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._read_conns: list[sqlite3.Connection] = []
+        self._read_pool_lock = threading.Lock()
+
+        # group commit: 写入序号 / 已提交序号 / 是否有 leader 正在提交
+        self._group_commit_s = max(group_commit_ms, 0.0) / 1000
+        self._commit_cond = threading.Condition()
+        self._write_seq = 0
+        self._committed_seq = 0
+        self._committing = False
+        self._writers_inflight = 0
+        # 提交失败的批次 (首个序号, 末个序号), 这些写入的调用方需收到异常
+        self._failed_batches: deque[tuple[int, int]] = deque(maxlen=64)
+        self._local = threading.local()  # 嵌套 _write() 深度
+
+        self._stats = {
+            "reads": 0,
+            "read_wait_ms": 0.0,
+            "read_wait_max_ms": 0.0,
+            "writes": 0,
+            "write_wait_ms": 0.0,
+            "write_wait_max_ms": 0.0,
+            "commits": 0,
+            "commit_failures": 0,
+        }
+        self._stats_lock = threading.Lock()
         self._init_db()
 
+    @property
+    def db_path(self) -> Path:
+        return self._db_path
+
+    # ======================================================================
+    # Connections: read pool + group-commit writer
+    # ======================================================================
+
+    @contextmanager
+    def _read(self) -> Iterator[sqlite3.Connection]:
+        """借出一个只读连接; 连接池不可用时退回写连接 (持写锁)"""
+        start = time.perf_counter()
+        conn = self._acquire_reader()
+        if conn is None:
+            with self._lock:
+                self._record_wait("read", start)
+                yield self._conn
+            return
+        self._record_wait("read", start)
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._read_pool.put(conn)
+
+    def _acquire_reader(self) -> sqlite3.Connection | None:
+        if self._read_pool_size == 0 or self._conn is None:
+            return None
+        try:
+            return self._read_pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._read_pool_lock:
+            if len(self._read_conns) < self._read_pool_size:
+                try:
+                    conn = sqlite3.connect(
+                        f"{self._db_path.resolve().as_uri()}?mode=ro",
+                        uri=True,
+                        check_same_thread=False,
+                    )
+                    conn.execute(f"PRAGMA busy_timeout={self._BUSY_TIMEOUT_MS}")
+                except sqlite3.Error as e:
+                    logger.warning(f"[MemoryStorage] Read connection unavailable, using writer: {e}")
+                    self._read_pool_size = 0
+                    return None
+                self._read_conns.append(conn)
+                return conn
+        return self._read_pool.get()
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        """
+        在写连接上执行一组语句 (独立 SAVEPOINT), 退出时等待 group commit 完成
+
+        异常会回滚本组语句并向上抛出; 同一窗口内的其他写入不受影响。
+        所在批次提交失败时, 退出 with 时抛出 sqlite3.Error。公开的 save_* /
+        update_* / delete_* 方法把 try 放在 with 外面, 记录日志后以返回值
+        (False / 0 / []) 表示失败, 不向调用方抛出。
+        嵌套调用并入外层写入, 由外层统一提交。
+        """
+        if getattr(self._local, "depth", 0):
+            yield self._conn
+            return
+        start = time.perf_counter()
+        with self._commit_cond:
+            self._writers_inflight += 1
+        try:
+            with self._lock:
+                self._record_wait("write", start)
+                conn = self._conn
+                if not conn.in_transaction:
+                    conn.execute("BEGIN")
+                conn.execute("SAVEPOINT write_op")
+                self._local.depth = 1
+                try:
+                    yield conn
+                except BaseException:
+                    conn.execute("ROLLBACK TO write_op")
+                    conn.execute("RELEASE write_op")
+                    raise
+                finally:
+                    self._local.depth = 0
+                conn.execute("RELEASE write_op")
+                with self._commit_cond:
+                    self._write_seq += 1
+                    seq = self._write_seq
+        finally:
+            with self._commit_cond:
+                self._writers_inflight -= 1
+                self._commit_cond.notify_all()
+        self._wait_commit(seq)
+
+    def _wait_commit(self, seq: int) -> None:
+        """
+        等待 seq 之前的写入提交; 没有 leader 时自己成为 leader 提交整批
+
+        Raises:
+            sqlite3.Error: seq 所在批次提交失败 (已回滚)
+        """
+        with self._commit_cond:
+            while self._committed_seq < seq:
+                if not self._committing:
+                    self._committing = True
+                    break
+                self._commit_cond.wait()
+            else:
+                self._raise_if_failed(seq)
+                return
+            first = self._committed_seq + 1
+            # leader: 还有写入正在执行时, 最多再等一个窗口让它们加入本批
+            deadline = time.monotonic() + self._group_commit_s
+            while self._writers_inflight > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._commit_cond.wait(remaining)
+
+        with self._lock:
+            target = self._write_seq
+            try:
+                if self._conn is not None and self._conn.in_transaction:
+                    self._conn.commit()
+                failed = False
+            except Exception as e:
+                failed = True
+                logger.error(f"[MemoryStorage] Group commit failed, batch rolled back: {e}")
+                try:
+                    self._conn.rollback()
+                except Exception:
+                    pass
+
+        with self._stats_lock:
+            self._stats["commits"] += 1
+            self._stats["commit_failures"] += int(failed)
+        with self._commit_cond:
+            if failed:
+                self._failed_batches.append((first, target))
+            self._committed_seq = max(self._committed_seq, target)
+            self._committing = False
+            self._commit_cond.notify_all()
+            self._raise_if_failed(seq)
+
+    def _raise_if_failed(self, seq: int) -> None:
+        """seq 所在批次提交失败时抛出 (持有 _commit_cond 调用)"""
+        for first, last in self._failed_batches:
+            if first <= seq <= last:
+                raise sqlite3.Error(f"Group commit failed, write #{seq} was rolled back")
+
+    def _record_wait(self, kind: str, start: float) -> None:
+        waited = (time.perf_counter() - start) * 1000
+        with self._stats_lock:
+            self._stats[f"{kind}s"] += 1
+            self._stats[f"{kind}_wait_ms"] += waited
+            if waited > self._stats[f"{kind}_wait_max_ms"]:
+                self._stats[f"{kind}_wait_max_ms"] = waited
+
+    def get_contention_stats(self) -> dict:
+        """连接争用指标: 读/写等待时间, 提交次数与每次提交合并的写入数"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["read_pool_size"] = self._read_pool_size
+        stats["read_connections"] = len(self._read_conns)
+        stats["writes_per_commit"] = (
+            round(stats["writes"] / stats["commits"], 2) if stats["commits"] else 0.0
+        )
+        for key in ("read_wait_ms", "read_wait_max_ms", "write_wait_ms", "write_wait_max_ms"):
+            stats[key] = round(stats[key], 3)
+        return stats
+
     # ======================================================================
     # Initialization & Migration
     # ======================================================================
@@ -105,6 +349,8 @@ class MemoryStorage:
 
             if from_version < 2:
                 self._migrate_v1_to_v2()
+            if from_version < 3:
+                self._migrate_v2_to_v3()
 
             self._set_schema_version(_SCHEMA_VERSION)
             logger.info("[MemoryStorage] Schema migration complete")
@@ -133,6 +379,74 @@ class MemoryStorage:
                 pass  # column already exists
         self._conn.commit()
 
+    def _migrate_v2_to_v3(self) -> None:
+        """One-shot reindex: memories_fts 改为索引 CJK 分词后的 content_seg.
+
+        先删除旧 FTS 表和触发器再回填影子列, 避免回填时触发器对空索引做 'delete'。
+        """
+        c = self._conn
+        try:
+            c.execute("ALTER TABLE memories ADD COLUMN content_seg TEXT DEFAULT ''")
+        except sqlite3.OperationalError:
+            pass  # column already exists
+        for name in ("memories_fts_ai", "memories_fts_ad", "memories_fts_au"):
+            c.execute(f"DROP TRIGGER IF EXISTS {name}")
+        c.execute("DROP TABLE IF EXISTS memories_fts")
+
+        rows = c.execute("SELECT rowid, content FROM memories").fetchall()
+        c.executemany(
+            "UPDATE memories SET content_seg = ? WHERE rowid = ?",
+            [(segment_cjk(content or ""), rowid) for rowid, content in rows],
+        )
+        if self._create_memories_fts(c):
+            try:
+                c.execute("INSERT INTO memories_fts(memories_fts) VALUES('rebuild')")
+            except sqlite3.OperationalError as e:
+                logger.warning(f"[MemoryStorage] FTS5 reindex skipped: {e}")
+        c.commit()
+        logger.info(f"[MemoryStorage] FTS5 reindexed {len(rows)} memories with CJK segmentation")
+
+    @staticmethod
+    def _create_memories_fts(c: sqlite3.Connection) -> bool:
+        """memories_fts + 同步触发器; FTS5 不可用时返回 False.
+
+        更新触发器只监听被索引的列, access_count 等统计字段的更新不会重写索引。
+        """
+        try:
+            c.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(
+                    content_seg, subject, predicate, tags,
+                    content=memories, content_rowid=rowid,
+                    tokenize='unicode61'
+                )
+            """)
+        except sqlite3.OperationalError as e:
+            logger.warning(f"[MemoryStorage] FTS5 creation skipped: {e}")
+            return False
+
+        for trigger_sql in [
+            """CREATE TRIGGER IF NOT EXISTS memories_fts_ai AFTER INSERT ON memories BEGIN
+                INSERT INTO memories_fts(rowid, content_seg, subject, predicate, tags)
+                VALUES (new.rowid, new.content_seg, new.subject, new.predicate, new.tags);
+            END""",
+            """CREATE TRIGGER IF NOT EXISTS memories_fts_ad AFTER DELETE ON memories BEGIN
+                INSERT INTO memories_fts(memories_fts, rowid, content_seg, subject, predicate, tags)
+                VALUES ('delete', old.rowid, old.content_seg, old.subject, old.predicate, old.tags);
+            END""",
+            """CREATE TRIGGER IF NOT EXISTS memories_fts_au
+                AFTER UPDATE OF content_seg, subject, predicate, tags ON memories BEGIN
+                INSERT INTO memories_fts(memories_fts, rowid, content_seg, subject, predicate, tags)
+                VALUES ('delete', old.rowid, old.content_seg, old.subject, old.predicate, old.tags);
+                INSERT INTO memories_fts(rowid, content_seg, subject, predicate, tags)
+                VALUES (new.rowid, new.content_seg, new.subject, new.predicate, new.tags);
+            END""",
+        ]:
+            try:
+                c.execute(trigger_sql)
+            except sqlite3.OperationalError:
+                pass
+        return True
+
     def _create_tables(self) -> None:
         """Create all tables, indexes, FTS virtual tables and triggers.
 
@@ -175,7 +489,8 @@ class MemoryStorage:
                 decay_rate REAL DEFAULT 0.1,
                 last_accessed_at TEXT,
                 superseded_by TEXT,
-                source_episode_id TEXT
+                source_episode_id TEXT,
+                content_seg TEXT DEFAULT ''
             )
         """)
 
@@ -327,16 +642,7 @@ class MemoryStorage:
         # Phase 3: FTS5 virtual tables + sync triggers (best-effort)
         # ==============================================================
 
-        try:
-            c.execute("""
-                CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(
-                    content, subject, predicate, tags,
-                    content=memories, content_rowid=rowid,
-                    tokenize='unicode61'
-                )
-            """)
-        except sqlite3.OperationalError as e:
-            logger.warning(f"[MemoryStorage] FTS5 creation skipped: {e}")
+        self._create_memories_fts(c)
 
         try:
             c.execute("""
@@ -350,20 +656,6 @@ class MemoryStorage:
             pass
 
         for trigger_sql in [
-            """CREATE TRIGGER IF NOT EXISTS memories_fts_ai AFTER INSERT ON memories BEGIN
-                INSERT INTO memories_fts(rowid, content, subject, predicate, tags)
-                VALUES (new.rowid, new.content, new.subject, new.predicate, new.tags);
-            END""",
-            """CREATE TRIGGER IF NOT EXISTS memories_fts_ad AFTER DELETE ON memories BEGIN
-                INSERT INTO memories_fts(memories_fts, rowid, content, subject, predicate, tags)
-                VALUES ('delete', old.rowid, old.content, old.subject, old.predicate, old.tags);
-            END""",
-            """CREATE TRIGGER IF NOT EXISTS memories_fts_au AFTER UPDATE ON memories BEGIN
-                INSERT INTO memories_fts(memories_fts, rowid, content, subject, predicate, tags)
-                VALUES ('delete', old.rowid, old.content, old.subject, old.predicate, old.tags);
-                INSERT INTO memories_fts(rowid, content, subject, predicate, tags)
-                VALUES (new.rowid, new.content, new.subject, new.predicate, new.tags);
-            END""",
             """CREATE TRIGGER IF NOT EXISTS attachments_fts_ai AFTER INSERT ON attachments BEGIN
                 INSERT INTO attachments_fts(rowid, description, transcription, extracted_text, filename, tags)
                 VALUES (new.rowid, new.description, new.transcription, new.extracted_text, new.filename, new.tags);
@@ -394,16 +686,16 @@ class MemoryStorage:
         if not self._conn:
             return
         now = datetime.now().isoformat()
-        with self._lock:
-            try:
-                self._conn.execute(
+        try:
+            with self._write() as conn:
+                conn.execute(
                     """
                     INSERT OR REPLACE INTO memories
                     (id, content, type, priority, source, importance_score,
                      access_count, tags, created_at, updated_at, expires_at, metadata,
                      subject, predicate, confidence, decay_rate,
-                     last_accessed_at, superseded_by, source_episode_id)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                     last_accessed_at, superseded_by, source_episode_id, content_seg)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                     """,
                     (
                         memory.get("id", ""),
@@ -425,26 +717,26 @@ class MemoryStorage:
                         memory.get("last_accessed_at"),
                         memory.get("superseded_by"),
                         memory.get("source_episode_id"),
+                        segment_cjk(memory.get("content", "")),
                     ),
                 )
-                self._conn.commit()
-            except Exception as e:
-                logger.error(f"Failed to save memory to SQLite: {e}")
+        except Exception as e:
+            logger.error(f"Failed to save memory to SQLite: {e}")
 
     def save_memories_batch(self, memories: list[dict]) -> None:
         if not self._conn or not memories:
             return
         now = datetime.now().isoformat()
-        with self._lock:
-            try:
-                self._conn.executemany(
+        try:
+            with self._write() as conn:
+                conn.executemany(
                     """
                     INSERT OR REPLACE INTO memories
                     (id, content, type, priority, source, importance_score,
                      access_count, tags, created_at, updated_at, expires_at, metadata,
                      subject, predicate, confidence, decay_rate,
-                     last_accessed_at, superseded_by, source_episode_id)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                     last_accessed_at, superseded_by, source_episode_id, content_seg)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                     """,
                     [
                         (
@@ -467,21 +759,21 @@ class MemoryStorage:
                             m.get("last_accessed_at"),
                             m.get("superseded_by"),
                             m.get("source_episode_id"),
+                            segment_cjk(m.get("content", "")),
                         )
                         for m in memories
                     ],
                 )
-                self._conn.commit()
                 logger.debug(f"Batch saved {len(memories)} memories to SQLite")
-            except Exception as e:
-                logger.error(f"Failed to batch save memories: {e}")
+        except Exception as e:
+            logger.error(f"Failed to batch save memories: {e}")
 
     def load_all(self) -> list[dict]:
         if not self._conn:
             return []
-        with self._lock:
+        with self._read() as conn:
             try:
-                cursor = self._conn.execute(
+                cursor = conn.execute(
                     "SELECT * FROM memories ORDER BY created_at DESC"
                 )
                 return self._rows_to_dicts(cursor)
@@ -492,9 +784,9 @@ class MemoryStorage:
     def get_memory(self, memory_id: str) -> dict | None:
         if not self._conn:
             return None
-        with self._lock:
+        with self._read() as conn:
             try:
-                cursor = self._conn.execute(
+                cursor = conn.execute(
                     "SELECT * FROM memories WHERE id = ?", (memory_id,)
                 )
                 rows = self._rows_to_dicts(cursor)
@@ -503,17 +795,75 @@ class MemoryStorage:
                 logger.error(f"Failed to get memory {memory_id}: {e}")
                 return None
 
+    def get_memories(self, memory_ids: list[str]) -> dict[str, dict]:
+        """Batch fetch by id (one SELECT per chunk); missing ids are omitted."""
+        if not self._conn or not memory_ids:
+            return {}
+        unique = list(dict.fromkeys(memory_ids))
+        result: dict[str, dict] = {}
+        with self._read() as conn:
+            try:
+                for i in range(0, len(unique), _MAX_SQL_PARAMS):
+                    chunk = unique[i : i + _MAX_SQL_PARAMS]
+                    placeholders = ",".join("?" * len(chunk))
+                    cursor = conn.execute(
+                        f"SELECT * FROM memories WHERE id IN ({placeholders})", chunk
+                    )
+                    for row in self._rows_to_dicts(cursor):
+                        result[row["id"]] = row
+            except Exception as e:
+                logger.error(f"Failed to get memories: {e}")
+        return result
+
+    def bump_access_many(
+        self, access: dict[str, int] | list[str], accessed_at: str | None = None
+    ) -> int:
+        """Increment access_count (ids, or id -> increment) in one transaction.
+
+        ids sharing the same increment are updated by a single
+        ``UPDATE ... WHERE id IN (...)``; returns the number of rows touched.
+        """
+        if not self._conn or not access:
+            return 0
+        if not isinstance(access, dict):
+            counts: dict[str, int] = {}
+            for mid in access:
+                counts[mid] = counts.get(mid, 0) + 1
+            access = counts
+        by_increment: dict[int, list[str]] = {}
+        for mid, inc in access.items():
+            if inc > 0:
+                by_increment.setdefault(inc, []).append(mid)
+        accessed_at = accessed_at or datetime.now().isoformat()
+        touched = 0
+        try:
+            with self._write() as conn:
+                for inc, ids in by_increment.items():
+                    for i in range(0, len(ids), _MAX_SQL_PARAMS):
+                        chunk = ids[i : i + _MAX_SQL_PARAMS]
+                        placeholders = ",".join("?" * len(chunk))
+                        cursor = conn.execute(
+                            "UPDATE memories SET access_count = access_count + ?, "
+                            "last_accessed_at = ?, updated_at = ? "
+                            f"WHERE id IN ({placeholders})",
+                            [inc, accessed_at, accessed_at, *chunk],
+                        )
+                        touched += cursor.rowcount
+        except Exception as e:
+            logger.error(f"Failed to bump access counts: {e}")
+            return 0
+        return touched
+
     def delete_memory(self, memory_id: str) -> bool:
         if not self._conn:
             return False
-        with self._lock:
-            try:
-                self._conn.execute("DELETE FROM memories WHERE id = ?", (memory_id,))
-                self._conn.commit()
+        try:
+            with self._write() as conn:
+                conn.execute("DELETE FROM memories WHERE id = ?", (memory_id,))
                 return True
-            except Exception as e:
-                logger.error(f"Failed to delete memory {memory_id}: {e}")
-                return False
+        except Exception as e:
+            logger.error(f"Failed to delete memory {memory_id}: {e}")
+            return False
 
     def update_memory(self, memory_id: str, updates: dict) -> bool:
         """Update specific fields of a memory."""
@@ -533,21 +883,22 @@ class MemoryStorage:
             filtered["tags"] = json.dumps(filtered["tags"], ensure_ascii=False)
         if "metadata" in filtered and isinstance(filtered["metadata"], dict):
             filtered["metadata"] = json.dumps(filtered["metadata"], ensure_ascii=False)
+        if "content" in filtered:
+            filtered["content_seg"] = segment_cjk(filtered["content"] or "")
 
         filtered.setdefault("updated_at", datetime.now().isoformat())
         set_clause = ", ".join(f"{k} = ?" for k in filtered)
         values = list(filtered.values()) + [memory_id]
 
-        with self._lock:
-            try:
-                self._conn.execute(
+        try:
+            with self._write() as conn:
+                conn.execute(
                     f"UPDATE memories SET {set_clause} WHERE id = ?", values
                 )
-                self._conn.commit()
                 return True
-            except Exception as e:
-                logger.error(f"Failed to update memory {memory_id}: {e}")
-                return False
+        except Exception as e:
+            logger.error(f"Failed to update memory {memory_id}: {e}")
+            return False
 
     def query(
         self,
@@ -585,9 +936,9 @@ class MemoryStorage:
         where = " AND ".join(conditions) if conditions else "1=1"
         params.extend([limit, offset])
 
-        with self._lock:
+        with self._read() as conn:
             try:
-                cursor = self._conn.execute(
+                cursor = conn.execute(
                     f"SELECT * FROM memories WHERE {where} "
                     f"ORDER BY importance_score DESC, created_at DESC "
                     f"LIMIT ? OFFSET ?",
@@ -601,14 +952,14 @@ class MemoryStorage:
     def count(self, memory_type: str | None = None) -> int:
         if not self._conn:
             return 0
-        with self._lock:
+        with self._read() as conn:
             try:
                 if memory_type:
-                    cur = self._conn.execute(
+                    cur = conn.execute(
                         "SELECT COUNT(*) FROM memories WHERE type = ?", (memory_type,)
                     )
                 else:
-                    cur = self._conn.execute("SELECT COUNT(*) FROM memories")
+                    cur = conn.execute("SELECT COUNT(*) FROM memories")
                 return cur.fetchone()[0]
             except Exception:
                 return 0
@@ -618,13 +969,17 @@ class MemoryStorage:
     # ======================================================================
 
     def search_fts(self, query: str, limit: int = 10) -> list[dict]:
-        """Full-text search using FTS5 with BM25 ranking, with LIKE fallback for CJK."""
+        """Full-text search using FTS5 with BM25 ranking.
+
+        CJK 查询与索引同样切成二元组短语, 直接命中 BM25 索引;
+        仅在 FTS5 不可用或查询语法出错时回退到 LIKE 扫描。
+        """
         if not self._conn or not query.strip():
             return []
-        with self._lock:
+        with self._read() as conn:
             try:
                 safe_query = self._sanitize_fts_query(query)
-                cursor = self._conn.execute(
+                cursor = conn.execute(
                     """
                     SELECT m.*, bm25(memories_fts) AS rank
                     FROM memories_fts fts
@@ -635,49 +990,82 @@ class MemoryStorage:
                     """,
                     (safe_query, limit),
                 )
-                results = self._rows_to_dicts(cursor)
-                if results:
-                    return results
+                return self._rows_to_dicts(cursor)
             except Exception as e:
                 logger.debug(f"FTS5 search failed (query={query!r}): {e}")
 
-            # Fallback: LIKE search for CJK text that FTS5 unicode61 can't tokenize
-            try:
-                keywords = query.strip().split()
-                if not keywords:
-                    return []
-                conditions = " OR ".join(["content LIKE ?"] * len(keywords))
-                params = [f"%{kw}%" for kw in keywords] + [limit]
-                cursor = self._conn.execute(
-                    f"SELECT * FROM memories WHERE {conditions} LIMIT ?",
-                    params,
-                )
-                return self._rows_to_dicts(cursor)
-            except Exception as e:
-                logger.debug(f"LIKE fallback search failed: {e}")
+            return self._search_like(conn, query, limit)
+
+    def _search_like(self, conn: sqlite3.Connection, query: str, limit: int) -> list[dict]:
+        """LIKE 全表扫描 (FTS5 不可用时的兜底)"""
+        try:
+            keywords = query.strip().split()
+            if not keywords:
                 return []
+            conditions = " OR ".join(["content LIKE ?"] * len(keywords))
+            params = [f"%{kw}%" for kw in keywords] + [limit]
+            cursor = conn.execute(
+                f"SELECT * FROM memories WHERE {conditions} LIMIT ?",
+                params,
+            )
+            return self._rows_to_dicts(cursor)
+        except Exception as e:
+            logger.debug(f"LIKE fallback search failed: {e}")
+            return []
 
     @staticmethod
     def _sanitize_fts_query(query: str) -> str:
-        """Make user input safe for FTS5 MATCH."""
-        special = set('"*(){}[]^~:')
-        cleaned = "".join(c if c not in special else " " for c in query)
-        tokens = cleaned.split()
-        if not tokens:
+        """Make user input safe for FTS5 MATCH.
+
+        每个空白分隔的词变成一个短语 (a + b + ...), 词之间 OR 连接。
+        CJK 片段按 segment_cjk 的规则展开为二元组; 位于词尾的单字用前缀匹配。
+        """
+        phrases = []
+        for word in query.split():
+            parts = list(_QUERY_PART_RE.finditer(word))
+            tokens: list[str] = []
+            for i, m in enumerate(parts):
+                last = i == len(parts) - 1
+                run = m.group(1)
+                if run is None:
+                    part = m.group()
+                    tokens.append(part.lower() if part in _FTS_KEYWORDS else part)
+                elif len(run) == 1:
+                    tokens.append(f"{run}*" if last else run)
+                else:
+                    tokens.extend(_cjk_bigrams(run))
+                    if not last:
+                        tokens.append(run[-1])
+            if tokens:
+                phrases.append(" + ".join(tokens))
+        if not phrases:
             return '""'
-        return " OR ".join(tokens)
+        return " OR ".join(phrases)
 
     def rebuild_fts_index(self) -> None:
-        """Rebuild FTS5 index from scratch (after migration)."""
+        """Rebuild FTS5 index from scratch (after migration).
+
+        先补齐与当前分词结果不一致的 content_seg (如旧代码或外部工具写入的行), 再整体重建。
+        """
         if not self._conn:
             return
-        with self._lock:
-            try:
-                self._conn.execute("INSERT INTO memories_fts(memories_fts) VALUES('rebuild')")
-                self._conn.commit()
-                logger.info("[MemoryStorage] FTS5 index rebuilt")
-            except Exception as e:
-                logger.warning(f"[MemoryStorage] FTS5 rebuild failed: {e}")
+        try:
+            with self._write() as conn:
+                stale = [
+                    (seg, rowid)
+                    for rowid, content, current in conn.execute(
+                        "SELECT rowid, content, content_seg FROM memories"
+                    )
+                    if (seg := segment_cjk(content or "")) != current
+                ]
+                if stale:
+                    conn.executemany(
+                        "UPDATE memories SET content_seg = ? WHERE rowid = ?", stale
+                    )
+                conn.execute("INSERT INTO memories_fts(memories_fts) VALUES('rebuild')")
+                logger.info(f"[MemoryStorage] FTS5 index rebuilt ({len(stale)} rows re-segmented)")
+        except Exception as e:
+            logger.warning(f"[MemoryStorage] FTS5 rebuild failed: {e}")
 
     # ======================================================================
     # Episode CRUD
@@ -686,9 +1074,9 @@ class MemoryStorage:
     def save_episode(self, episode: dict) -> None:
         if not self._conn:
             return
-        with self._lock:
-            try:
-                self._conn.execute(
+        try:
+            with self._write() as conn:
+                conn.execute(
                     """
                     INSERT OR REPLACE INTO episodes
                     (id, session_id, summary, goal, outcome, started_at, ended_at,
@@ -714,16 +1102,15 @@ class MemoryStorage:
                         episode.get("source", "session_end"),
                     ),
                 )
-                self._conn.commit()
-            except Exception as e:
-                logger.error(f"Failed to save episode: {e}")
+        except Exception as e:
+            logger.error(f"Failed to save episode: {e}")
 
     def get_episode(self, episode_id: str) -> dict | None:
         if not self._conn:
             return None
-        with self._lock:
+        with self._read() as conn:
             try:
-                cur = self._conn.execute("SELECT * FROM episodes WHERE id = ?", (episode_id,))
+                cur = conn.execute("SELECT * FROM episodes WHERE id = ?", (episode_id,))
                 rows = self._rows_to_dicts(cur, json_fields=["action_nodes", "entities", "tools_used", "linked_memory_ids", "tags"])
                 return rows[0] if rows else None
             except Exception as e:
@@ -765,9 +1152,9 @@ class MemoryStorage:
         where = " AND ".join(conditions) if conditions else "1=1"
         params.append(limit)
 
-        with self._lock:
+        with self._read() as conn:
             try:
-                cur = self._conn.execute(
+                cur = conn.execute(
                     f"SELECT * FROM episodes WHERE {where} ORDER BY started_at DESC LIMIT ?",
                     params,
                 )
@@ -797,32 +1184,30 @@ class MemoryStorage:
         set_clause = ", ".join(f"{k} = ?" for k in filtered)
         values = list(filtered.values()) + [episode_id]
 
-        with self._lock:
-            try:
-                self._conn.execute(
+        try:
+            with self._write() as conn:
+                conn.execute(
                     f"UPDATE episodes SET {set_clause} WHERE id = ?", values
                 )
-                self._conn.commit()
                 return True
-            except Exception as e:
-                logger.error(f"Failed to update episode {episode_id}: {e}")
-                return False
+        except Exception as e:
+            logger.error(f"Failed to update episode {episode_id}: {e}")
+            return False
 
     def link_turns_to_episode(self, session_id: str, episode_id: str) -> int:
         """Set episode_id on all conversation_turns for a given session."""
         if not self._conn:
             return 0
-        with self._lock:
-            try:
-                cur = self._conn.execute(
+        try:
+            with self._write() as conn:
+                cur = conn.execute(
                     "UPDATE conversation_turns SET episode_id = ? WHERE session_id = ?",
                     (episode_id, session_id),
                 )
-                self._conn.commit()
                 return cur.rowcount
-            except Exception as e:
-                logger.error(f"Failed to link turns to episode: {e}")
-                return 0
+        except Exception as e:
+            logger.error(f"Failed to link turns to episode: {e}")
+            return 0
 
     # ======================================================================
     # Scratchpad CRUD
@@ -831,9 +1216,9 @@ class MemoryStorage:
     def get_scratchpad(self, user_id: str = "default") -> dict | None:
         if not self._conn:
             return None
-        with self._lock:
+        with self._read() as conn:
             try:
-                cur = self._conn.execute(
+                cur = conn.execute(
                     "SELECT * FROM scratchpad WHERE user_id = ?", (user_id,)
                 )
                 rows = self._rows_to_dicts(cur, json_fields=["active_projects", "open_questions", "next_steps"])
@@ -845,9 +1230,9 @@ class MemoryStorage:
     def save_scratchpad(self, scratchpad: dict) -> None:
         if not self._conn:
             return
-        with self._lock:
-            try:
-                self._conn.execute(
+        try:
+            with self._write() as conn:
+                conn.execute(
                     """
                     INSERT OR REPLACE INTO scratchpad
                     (user_id, content, active_projects, current_focus,
@@ -864,9 +1249,8 @@ class MemoryStorage:
                         scratchpad.get("updated_at", datetime.now().isoformat()),
                     ),
                 )
-                self._conn.commit()
-            except Exception as e:
-                logger.error(f"Failed to save scratchpad: {e}")
+        except Exception as e:
+            logger.error(f"Failed to save scratchpad: {e}")
 
     # ======================================================================
     # Conversation Turns
@@ -887,9 +1271,9 @@ class MemoryStorage:
             return
         ts = timestamp or datetime.now().isoformat()
         has_tools = bool(tool_calls)
-        with self._lock:
-            try:
-                self._conn.execute(
+        try:
+            with self._write() as conn:
+                conn.execute(
                     """
                     INSERT OR REPLACE INTO conversation_turns
                     (session_id, turn_index, role, content, tool_calls, tool_results,
@@ -908,16 +1292,15 @@ class MemoryStorage:
                         token_estimate,
                     ),
                 )
-                self._conn.commit()
-            except Exception as e:
-                logger.error(f"Failed to save turn: {e}")
+        except Exception as e:
+            logger.error(f"Failed to save turn: {e}")
 
     def get_unextracted_turns(self, limit: int = 100) -> list[dict]:
         if not self._conn:
             return []
-        with self._lock:
+        with self._read() as conn:
             try:
-                cur = self._conn.execute(
+                cur = conn.execute(
                     "SELECT * FROM conversation_turns WHERE extracted = FALSE "
                     "ORDER BY timestamp ASC LIMIT ?",
                     (limit,),
@@ -931,23 +1314,22 @@ class MemoryStorage:
         if not self._conn or not turn_indices:
             return
         placeholders = ",".join("?" * len(turn_indices))
-        with self._lock:
-            try:
-                self._conn.execute(
+        try:
+            with self._write() as conn:
+                conn.execute(
                     f"UPDATE conversation_turns SET extracted = TRUE "
                     f"WHERE session_id = ? AND turn_index IN ({placeholders})",
                     [session_id] + turn_indices,
                 )
-                self._conn.commit()
-            except Exception as e:
-                logger.error(f"Failed to mark turns extracted: {e}")
+        except Exception as e:
+            logger.error(f"Failed to mark turns extracted: {e}")
 
     def get_session_turns(self, session_id: str) -> list[dict]:
         if not self._conn:
             return []
-        with self._lock:
+        with self._read() as conn:
             try:
-                cur = self._conn.execute(
+                cur = conn.execute(
                     "SELECT * FROM conversation_turns WHERE session_id = ? ORDER BY turn_index",
                     (session_id,),
                 )
@@ -960,9 +1342,9 @@ class MemoryStorage:
         """返回下一个可用的 turn_index（用于续接，避免覆盖历史数据）"""
         if not self._conn:
             return 0
-        with self._lock:
+        with self._read() as conn:
             try:
-                cur = self._conn.execute(
+                cur = conn.execute(
                     "SELECT MAX(turn_index) FROM conversation_turns WHERE session_id = ?",
                     (session_id,),
                 )
@@ -976,9 +1358,9 @@ class MemoryStorage:
         """按 turn_index 倒序获取最近 N 轮对话"""
         if not self._conn:
             return []
-        with self._lock:
+        with self._read() as conn:
             try:
-                cur = self._conn.execute(
+                cur = conn.execute(
                     "SELECT role, content, timestamp, tool_calls, tool_results "
                     "FROM conversation_turns "
                     "WHERE session_id = ? ORDER BY turn_index DESC LIMIT ?",
@@ -1003,10 +1385,10 @@ class MemoryStorage:
             return []
         cutoff = (datetime.now() - timedelta(days=days_back)).isoformat()
         pattern = f"%{keyword}%"
-        with self._lock:
+        with self._read() as conn:
             try:
                 if session_id:
-                    cur = self._conn.execute(
+                    cur = conn.execute(
                         "SELECT session_id, turn_index, role, content, "
                         "tool_calls, tool_results, timestamp, episode_id "
                         "FROM conversation_turns "
@@ -1016,7 +1398,7 @@ class MemoryStorage:
                         (session_id, cutoff, pattern, pattern, pattern, limit),
                     )
                 else:
-                    cur = self._conn.execute(
+                    cur = conn.execute(
                         "SELECT session_id, turn_index, role, content, "
                         "tool_calls, tool_results, timestamp, episode_id "
                         "FROM conversation_turns "
@@ -1044,9 +1426,9 @@ class MemoryStorage:
     ) -> None:
         if not self._conn:
             return
-        with self._lock:
-            try:
-                self._conn.execute(
+        try:
+            with self._write() as conn:
+                conn.execute(
                     """
                     INSERT OR IGNORE INTO extraction_queue
                     (session_id, turn_index, content, tool_calls, tool_results, created_at)
@@ -1061,22 +1443,20 @@ class MemoryStorage:
                         datetime.now().isoformat(),
                     ),
                 )
-                self._conn.commit()
-            except Exception as e:
-                logger.error(f"Failed to enqueue extraction: {e}")
+        except Exception as e:
+            logger.error(f"Failed to enqueue extraction: {e}")
 
-    def _recover_stuck_extractions(self, stuck_timeout_minutes: int = 30) -> int:
+    def _recover_stuck_extractions(
+        self, conn: sqlite3.Connection, stuck_timeout_minutes: int = 30
+    ) -> int:
         """将卡在 'processing' 超过 stuck_timeout_minutes 的项重置为 'pending'"""
-        if not self._conn:
-            return 0
         try:
             cutoff = (datetime.now() - timedelta(minutes=stuck_timeout_minutes)).isoformat()
-            cur = self._conn.execute(
+            cur = conn.execute(
                 "UPDATE extraction_queue SET status = 'pending' "
                 "WHERE status = 'processing' AND last_attempted_at < ?",
                 (cutoff,),
             )
-            self._conn.commit()
             recovered = cur.rowcount
             if recovered:
                 logger.warning(f"[ExtractionQueue] Recovered {recovered} stuck items (>{stuck_timeout_minutes}m)")
@@ -1088,12 +1468,12 @@ class MemoryStorage:
     def dequeue_extraction(self, batch_size: int = 10) -> list[dict]:
         if not self._conn:
             return []
-        with self._lock:
-            try:
+        try:
+            with self._write() as conn:
                 # 先恢复卡住的 processing 项
-                self._recover_stuck_extractions()
+                self._recover_stuck_extractions(conn)
 
-                cur = self._conn.execute(
+                cur = conn.execute(
                     "SELECT * FROM extraction_queue WHERE status = 'pending' "
                     "AND retry_count < max_retries "
                     "ORDER BY created_at ASC LIMIT ?",
@@ -1103,31 +1483,29 @@ class MemoryStorage:
                 if rows:
                     ids = [r["id"] for r in rows]
                     placeholders = ",".join("?" * len(ids))
-                    self._conn.execute(
+                    conn.execute(
                         f"UPDATE extraction_queue SET status = 'processing', "
                         f"last_attempted_at = ?, retry_count = retry_count + 1 "
                         f"WHERE id IN ({placeholders})",
                         [datetime.now().isoformat()] + ids,
                     )
-                    self._conn.commit()
                 return rows
-            except Exception as e:
-                logger.error(f"Failed to dequeue extraction: {e}")
-                return []
+        except Exception as e:
+            logger.error(f"Failed to dequeue extraction: {e}")
+            return []
 
     def complete_extraction(self, queue_id: int, success: bool = True) -> None:
         if not self._conn:
             return
         status = "completed" if success else "failed"
-        with self._lock:
-            try:
-                self._conn.execute(
+        try:
+            with self._write() as conn:
+                conn.execute(
                     "UPDATE extraction_queue SET status = ? WHERE id = ?",
                     (status, queue_id),
                 )
-                self._conn.commit()
-            except Exception as e:
-                logger.error(f"Failed to complete extraction {queue_id}: {e}")
+        except Exception as e:
+            logger.error(f"Failed to complete extraction {queue_id}: {e}")
 
     # ======================================================================
     # Embedding Cache (for API embedding backend)
@@ -1136,9 +1514,9 @@ class MemoryStorage:
     def get_cached_embedding(self, content_hash: str) -> bytes | None:
         if not self._conn:
             return None
-        with self._lock:
+        with self._read() as conn:
             try:
-                cur = self._conn.execute(
+                cur = conn.execute(
                     "SELECT embedding FROM embedding_cache WHERE content_hash = ?",
                     (content_hash,),
                 )
@@ -1152,9 +1530,9 @@ class MemoryStorage:
     ) -> None:
         if not self._conn:
             return
-        with self._lock:
-            try:
-                self._conn.execute(
+        try:
+            with self._write() as conn:
+                conn.execute(
                     """
                     INSERT OR REPLACE INTO embedding_cache
                     (content_hash, embedding, model, dimensions, created_at)
@@ -1162,9 +1540,8 @@ class MemoryStorage:
                     """,
                     (content_hash, embedding, model, dimensions, datetime.now().isoformat()),
                 )
-                self._conn.commit()
-            except Exception as e:
-                logger.error(f"Failed to cache embedding: {e}")
+        except Exception as e:
+            logger.error(f"Failed to cache embedding: {e}")
 
     # ======================================================================
     # Attachments (文件/媒体记忆)
@@ -1180,9 +1557,9 @@ class MemoryStorage:
         if isinstance(linked_val, list):
             linked_val = json.dumps(linked_val, ensure_ascii=False)
 
-        with self._lock:
-            try:
-                self._conn.execute(
+        try:
+            with self._write() as conn:
+                conn.execute(
                     """INSERT OR REPLACE INTO attachments
                        (id, session_id, episode_id, filename, original_filename,
                         mime_type, file_size, local_path, url, direction,
@@ -1208,16 +1585,15 @@ class MemoryStorage:
                         data.get("created_at", datetime.now().isoformat()),
                     ),
                 )
-                self._conn.commit()
-            except Exception as e:
-                logger.error(f"Failed to save attachment {data.get('id')}: {e}")
+        except Exception as e:
+            logger.error(f"Failed to save attachment {data.get('id')}: {e}")
 
     def get_attachment(self, attachment_id: str) -> dict | None:
         if not self._conn:
             return None
-        with self._lock:
+        with self._read() as conn:
             try:
-                cursor = self._conn.execute(
+                cursor = conn.execute(
                     "SELECT * FROM attachments WHERE id = ?", (attachment_id,)
                 )
                 rows = self._rows_to_dicts(cursor, json_fields=["linked_memory_ids"])
@@ -1236,13 +1612,13 @@ class MemoryStorage:
     ) -> list[dict]:
         if not self._conn:
             return []
-        with self._lock:
+        with self._read() as conn:
             try:
                 if query:
                     safe_query = self._sanitize_fts_query(query)
                     results = []
                     try:
-                        cursor = self._conn.execute(
+                        cursor = conn.execute(
                             """SELECT a.* FROM attachments a
                                JOIN attachments_fts f ON a.rowid = f.rowid
                                WHERE attachments_fts MATCH ?
@@ -1256,7 +1632,7 @@ class MemoryStorage:
 
                     if not results:
                         like_q = f"%{query}%"
-                        cursor = self._conn.execute(
+                        cursor = conn.execute(
                             """SELECT * FROM attachments
                                WHERE description LIKE ? OR filename LIKE ?
                                      OR transcription LIKE ? OR extracted_text LIKE ?
@@ -1265,7 +1641,7 @@ class MemoryStorage:
                         )
                         results = self._rows_to_dicts(cursor, json_fields=["linked_memory_ids"])
                 else:
-                    cursor = self._conn.execute(
+                    cursor = conn.execute(
                         "SELECT * FROM attachments ORDER BY created_at DESC LIMIT ?",
                         (limit * 3,),
                     )
@@ -1286,21 +1662,20 @@ class MemoryStorage:
     def delete_attachment(self, attachment_id: str) -> bool:
         if not self._conn:
             return False
-        with self._lock:
-            try:
-                self._conn.execute("DELETE FROM attachments WHERE id = ?", (attachment_id,))
-                self._conn.commit()
+        try:
+            with self._write() as conn:
+                conn.execute("DELETE FROM attachments WHERE id = ?", (attachment_id,))
                 return True
-            except Exception as e:
-                logger.error(f"Failed to delete attachment {attachment_id}: {e}")
-                return False
+        except Exception as e:
+            logger.error(f"Failed to delete attachment {attachment_id}: {e}")
+            return False
 
     def get_session_attachments(self, session_id: str) -> list[dict]:
         if not self._conn:
             return []
-        with self._lock:
+        with self._read() as conn:
             try:
-                cursor = self._conn.execute(
+                cursor = conn.execute(
                     "SELECT * FROM attachments WHERE session_id = ? ORDER BY created_at",
                     (session_id,),
                 )
@@ -1344,26 +1719,35 @@ class MemoryStorage:
         if not self._conn:
             return 0
         now = datetime.now().isoformat()
-        with self._lock:
-            try:
-                cursor = self._conn.execute(
+        try:
+            with self._write() as conn:
+                cursor = conn.execute(
                     "DELETE FROM memories WHERE expires_at IS NOT NULL AND expires_at < ?",
                     (now,),
                 )
-                self._conn.commit()
                 count = cursor.rowcount
                 if count > 0:
                     logger.info(f"Cleaned up {count} expired memories")
                 return count
-            except Exception as e:
-                logger.error(f"Failed to cleanup expired memories: {e}")
-                return 0
+        except Exception as e:
+            logger.error(f"Failed to cleanup expired memories: {e}")
+            return 0
 
     def close(self) -> None:
         with self._lock:
             if self._conn:
+                if self._conn.in_transaction:
+                    self._conn.commit()
                 self._conn.close()
                 self._conn = None
+        with self._read_pool_lock:
+            for conn in self._read_conns:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._read_conns.clear()
+            self._read_pool = queue.LifoQueue()
 
     # ======================================================================
     # Helpers
@@ -1380,6 +1764,7 @@ class MemoryStorage:
         results = []
         for row in cursor.fetchall():
             d = dict(zip(columns, row, strict=False))
+            d.pop("content_seg", None)  # 仅供 FTS 索引使用
             for jf in auto_json:
                 if jf in d and isinstance(d[jf], str):
                     try:
@@ -5,15 +5,19 @@
 - 写入: SQLite 主写 + SearchBackend 索引同步
 - 查询: 结构化查询走 SQLite, 语义搜索走 SearchBackend
 - 降级: SearchBackend 不可用时回退到 FTS5
+- 去重: MinHashIndex 随写入/删除增量维护, 供近重复候选查找
+- 访问计数: 读取时只在内存累计, 攒批后一条 UPDATE ... WHERE id IN (...) 写回
 """
 
 from __future__ import annotations
 
 import logging
-from datetime import datetime
+import threading
+import time
 from pathlib import Path
 from typing import Any
 
+from .minhash_index import MinHashIndex
 from .search_backends import FTS5Backend, SearchBackend, create_search_backend
 from .storage import MemoryStorage
 from .types import (
@@ -29,6 +33,10 @@ logger = logging.getLogger(__name__)
 class UnifiedStore:
     """统一存储层: SQLite 为主存储, SearchBackend 为搜索引擎"""
 
+    # get_semantic 的访问计数攒够这么多条或这么久后批量写回
+    _ACCESS_FLUSH_EVERY = 32
+    _ACCESS_FLUSH_SECONDS = 30.0
+
     def __init__(
         self,
         db_path: str | Path,
@@ -58,6 +66,12 @@ class UnifiedStore:
         if self.search.backend_type != "fts5":
             self._fts5_fallback = FTS5Backend(self.db)
 
+        self.dedup_index = MinHashIndex(self.db.db_path)
+
+        self._access_lock = threading.Lock()
+        self._pending_access: dict[str, int] = {}
+        self._pending_access_since = 0.0
+
     # ======================================================================
     # Semantic Memory
     # ======================================================================
@@ -71,6 +85,7 @@ class UnifiedStore:
             "importance": memory.importance_score,
             "tags": memory.tags,
         })
+        self.dedup_index.add(memory.id, memory.content, memory.type.value)
         return memory.id
 
     def update_semantic(self, memory_id: str, updates: dict) -> bool:
@@ -85,32 +100,65 @@ class UnifiedStore:
                     "importance": mem.get("importance_score", 0.5),
                     "tags": mem.get("tags", []),
                 })
+                self.dedup_index.add(memory_id, mem["content"], mem.get("type", "fact"))
         return ok
 
     def delete_semantic(self, memory_id: str) -> bool:
         self.search.delete(memory_id)
+        self.dedup_index.remove(memory_id)
         return self.db.delete_memory(memory_id)
 
     def bump_access(self, memory_ids: list[str]) -> None:
         """Batch-increment access_count for memories confirmed useful by LLM."""
         if not memory_ids:
             return
-        now = datetime.now().isoformat()
-        for mid in memory_ids:
-            self.db.update_memory(mid, {
-                "access_count": (self.db.get_memory(mid) or {}).get("access_count", 0) + 1,
-                "last_accessed_at": now,
-            })
+        self.db.bump_access_many(memory_ids)
 
     def get_semantic(self, memory_id: str) -> SemanticMemory | None:
         d = self.db.get_memory(memory_id)
         if d is None:
             return None
-        self.db.update_memory(memory_id, {
-            "access_count": d.get("access_count", 0) + 1,
-            "last_accessed_at": datetime.now().isoformat(),
-        })
-        return SemanticMemory.from_dict(d)
+        mem = SemanticMemory.from_dict(d)
+        with self._access_lock:
+            mem.access_count += self._pending_access.get(memory_id, 0)
+        self._record_access([memory_id])
+        return mem
+
+    def get_semantic_many(self, memory_ids: list[str]) -> list[SemanticMemory]:
+        """按 id 批量读取 (保持输入顺序, 跳过不存在的), 访问计数延迟批量写回"""
+        rows = self.db.get_memories(memory_ids)
+        memories = [
+            SemanticMemory.from_dict(rows[mid]) for mid in dict.fromkeys(memory_ids) if mid in rows
+        ]
+        with self._access_lock:
+            for mem in memories:
+                mem.access_count += self._pending_access.get(mem.id, 0)
+        self._record_access([m.id for m in memories])
+        return memories
+
+    def flush_access(self) -> int:
+        """把累计的访问计数写回 SQLite, 返回更新条数"""
+        with self._access_lock:
+            pending, self._pending_access = self._pending_access, {}
+        if not pending:
+            return 0
+        return self.db.bump_access_many(pending)
+
+    def _record_access(self, memory_ids: list[str]) -> None:
+        if not memory_ids:
+            return
+        now = time.monotonic()
+        with self._access_lock:
+            if not self._pending_access:
+                self._pending_access_since = now
+            for mid in memory_ids:
+                self._pending_access[mid] = self._pending_access.get(mid, 0) + 1
+            due = (
+                len(self._pending_access) >= self._ACCESS_FLUSH_EVERY
+                or now - self._pending_access_since >= self._ACCESS_FLUSH_SECONDS
+            )
+        if due:
+            self.flush_access()
 
     def search_semantic(
         self,
@@ -122,14 +170,15 @@ class UnifiedStore:
         if not results and self._fts5_fallback is not None:
             results = self._fts5_fallback.search(query, limit=limit, filter_type=filter_type)
 
-        memories: list[SemanticMemory] = []
-        for memory_id, _score in results:
-            d = self.db.get_memory(memory_id)
-            if d:
-                memories.append(SemanticMemory.from_dict(d))
-        return memories
+        rows = self.db.get_memories([memory_id for memory_id, _score in results])
+        return [
+            SemanticMemory.from_dict(rows[memory_id])
+            for memory_id, _score in results
+            if memory_id in rows
+        ]
 
     def query_semantic(self, **kwargs: Any) -> list[SemanticMemory]:
+        self.flush_access()
         rows = self.db.query(**kwargs)
         return [SemanticMemory.from_dict(r) for r in rows]
 
@@ -140,21 +189,37 @@ class UnifiedStore:
             if row.get("predicate", "").lower() == predicate.lower():
                 return SemanticMemory.from_dict(row)
         query = f"{subject} {predicate}"
-        results = self.search.search(query, limit=5)
-        for mid, score in results:
-            if score > 0.8:
-                d = self.db.get_memory(mid)
-                if d and d.get("subject", "").lower() == subject.lower():
-                    return SemanticMemory.from_dict(d)
+        results = [(mid, score) for mid, score in self.search.search(query, limit=5) if score > 0.8]
+        rows = self.db.get_memories([mid for mid, _ in results])
+        for mid, _score in results:
+            d = rows.get(mid)
+            if d and d.get("subject", "").lower() == subject.lower():
+                return SemanticMemory.from_dict(d)
         return None
 
     def count_memories(self, memory_type: str | None = None) -> int:
         return self.db.count(memory_type)
 
     def load_all_memories(self) -> list[SemanticMemory]:
+        self.flush_access()
         rows = self.db.load_all()
         return [SemanticMemory.from_dict(r) for r in rows]
 
+    def sync_dedup_index(self, memories: list[SemanticMemory] | None = None) -> int:
+        """按 SQLite 中的全部记忆校准去重索引 (只重算新增/内容变化的条目)"""
+        if memories is None:
+            memories = self.load_all_memories()
+        changed = self.dedup_index.sync((m.id, m.content, m.type.value) for m in memories)
+        if changed:
+            self.dedup_index.flush()
+        return changed
+
+    def find_near_duplicates(
+        self, content: str, memory_type: str | None = None, exclude: str | None = None
+    ) -> list[str]:
+        """MinHash/LSH 近重复候选 id (需调用方做精确比较)"""
+        return self.dedup_index.query(content, memory_type=memory_type, exclude=exclude)
+
     # ======================================================================
     # Episode Memory
     # ======================================================================
@@ -271,7 +336,16 @@ class UnifiedStore:
             "memory_count": self.db.count(),
             "search_backend": self.search.backend_type,
             "search_available": self.search.available,
+            "storage": self.db.get_contention_stats(),
         }
 
     def close(self) -> None:
+        self.flush_access()
+        self.dedup_index.flush()
+        close_search = getattr(self.search, "close", None)
+        if callable(close_search):
+            try:
+                close_search()
+            except Exception as e:
+                logger.warning(f"[UnifiedStore] Search backend close failed: {e}")
         self.db.close()
@@ -0,0 +1,194 @@
+"""
+Worker 池自动扩缩
+
+根据 Master 任务队列和 Worker 繁忙比例决定 Worker 数量:
+- 扩容: 排队等待超过阈值，或繁忙比例超过上限；步长受 max_step 和 max_workers 限制
+- 缩容: 无排队且繁忙比例低于下限时，终止空闲超过 idle_seconds 的 Worker（每次一个）
+- 滞回: 扩 / 缩使用不同阈值和冷却时间；扩容冷却不短于近期 Worker 启动耗时，
+  避免新 Worker 尚未上线就重复扩容
+
+AutoScaler 只做决策和记录，由 MasterAgent 的扩缩循环执行 spawn / terminate。
+"""
+
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+from .messages import AgentInfo, AgentStatus
+
+
+@dataclass
+class ScalingPolicy:
+    """扩缩策略"""
+
+    min_workers: int = 1
+    max_workers: int = 5
+    scale_up_wait_seconds: float = 5.0  # 排队等待超过该值扩容
+    scale_up_busy_ratio: float = 0.8  # 繁忙比例达到该值扩容
+    scale_down_busy_ratio: float = 0.3  # 繁忙比例低于该值才考虑缩容
+    idle_seconds: float = 300.0  # Worker 连续空闲该时长后可被回收
+    scale_up_cooldown: float = 30.0
+    scale_down_cooldown: float = 120.0
+    max_step: int = 2  # 单次最多新增的 Worker 数
+
+
+@dataclass
+class LoadSnapshot:
+    """一次评估时的负载"""
+
+    workers: list[AgentInfo]  # 非 DEAD 的 Worker
+    queue_depth: int = 0
+    oldest_wait: float = 0.0  # 队首任务已等待时长（秒）
+    wait_p95: float = 0.0  # 近期出队任务等待 p95（秒）
+    spawning: int = 0  # 正在启动的 Worker 数
+    evictable: set[str] | None = None  # 允许回收的 Worker（None 表示全部）
+
+    @property
+    def busy_ratio(self) -> float:
+        if not self.workers:
+            return 1.0 if self.queue_depth else 0.0
+        busy = sum(1 for w in self.workers if w.status == AgentStatus.BUSY.value)
+        return busy / len(self.workers)
+
+
+@dataclass
+class ScalingDecision:
+    """扩缩决策：delta > 0 扩容，victims 为待回收的 Worker"""
+
+    delta: int = 0
+    victims: list[str] = field(default_factory=list)
+    reason: str = ""
+
+
+class AutoScaler:
+    """Worker 池扩缩决策器"""
+
+    def __init__(self, policy: ScalingPolicy | None = None, history_size: int = 20):
+        self.policy = policy or ScalingPolicy()
+        self._idle_since: dict[str, float] = {}
+        self._last_scale_up = float("-inf")
+        self._last_scale_down = float("-inf")
+        self._spawn_times: deque[float] = deque(maxlen=history_size)
+        self._events: deque[dict] = deque(maxlen=history_size)
+        self._last_snapshot: LoadSnapshot | None = None
+
+    # ==================== 决策 ====================
+
+    def evaluate(self, snapshot: LoadSnapshot, now: float | None = None) -> ScalingDecision:
+        """根据负载给出扩缩决策（不修改冷却状态，执行后调用 record_*）"""
+        now = time.monotonic() if now is None else now
+        self._last_snapshot = snapshot
+        self._track_idle(snapshot.workers, now)
+
+        policy = self.policy
+        current = len(snapshot.workers) + snapshot.spawning
+        headroom = policy.max_workers - current
+
+        # 低于下限：直接补齐，不受冷却限制
+        if current < policy.min_workers:
+            return ScalingDecision(
+                delta=policy.min_workers - current, reason=f"below min ({current})"
+            )
+
+        # 扩容
+        waiting = max(snapshot.oldest_wait, snapshot.wait_p95) if snapshot.queue_depth else 0.0
+        reason = ""
+        if snapshot.queue_depth and waiting >= policy.scale_up_wait_seconds:
+            reason = f"queue wait {waiting:.1f}s (depth={snapshot.queue_depth})"
+        elif snapshot.workers and snapshot.busy_ratio >= policy.scale_up_busy_ratio:
+            reason = f"busy ratio {snapshot.busy_ratio:.0%}"
+        if reason:
+            if headroom <= 0 or now - self._last_scale_up < self.scale_up_cooldown:
+                return ScalingDecision()
+            step = max(1, min(policy.max_step, snapshot.queue_depth or 1))
+            return ScalingDecision(delta=min(step, headroom), reason=reason)
+
+        # 缩容：无排队、繁忙比例低、冷却已过，每次回收一个空闲最久的 Worker
+        if (
+            snapshot.queue_depth == 0
+            and snapshot.spawning == 0
+            and snapshot.busy_ratio <= policy.scale_down_busy_ratio
+            and len(snapshot.workers) > policy.min_workers
+            and now - self._last_scale_down >= policy.scale_down_cooldown
+            and now - self._last_scale_up >= policy.scale_down_cooldown
+        ):
+            idle = [
+                (since, agent_id)
+                for agent_id, since in self._idle_since.items()
+                if now - since >= policy.idle_seconds
+                and (snapshot.evictable is None or agent_id in snapshot.evictable)
+            ]
+            if idle:
+                since, victim = min(idle)
+                return ScalingDecision(
+                    victims=[victim], reason=f"{victim} idle {now - since:.0f}s"
+                )
+
+        return ScalingDecision()
+
+    @property
+    def scale_up_cooldown(self) -> float:
+        """扩容冷却：不短于近期 Worker 平均启动耗时"""
+        return max(self.policy.scale_up_cooldown, self.avg_spawn_seconds or 0.0)
+
+    @property
+    def avg_spawn_seconds(self) -> float | None:
+        if not self._spawn_times:
+            return None
+        return sum(self._spawn_times) / len(self._spawn_times)
+
+    def _track_idle(self, workers: list[AgentInfo], now: float) -> None:
+        idle_ids = {w.agent_id for w in workers if w.status == AgentStatus.IDLE.value}
+        for agent_id in list(self._idle_since):
+            if agent_id not in idle_ids:
+                del self._idle_since[agent_id]
+        for agent_id in idle_ids:
+            self._idle_since.setdefault(agent_id, now)
+
+    # ==================== 记录 ====================
+
+    def record_scale_up(
+        self, spawned: int, spawn_seconds: list[float], reason: str, now: float | None = None
+    ) -> None:
+        now = time.monotonic() if now is None else now
+        self._last_scale_up = now
+        self._spawn_times.extend(spawn_seconds)
+        self._record_event("scale_up", spawned, reason)
+
+    def record_scale_down(self, worker_id: str, reason: str, now: float | None = None) -> None:
+        now = time.monotonic() if now is None else now
+        self._last_scale_down = now
+        self._idle_since.pop(worker_id, None)
+        self._record_event("scale_down", 1, reason, worker_id=worker_id)
+
+    def _record_event(self, action: str, count: int, reason: str, **extra) -> None:
+        self._events.append({
+            "action": action,
+            "count": count,
+            "reason": reason,
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            **extra,
+        })
+
+    # ==================== 展示 ====================
+
+    def get_dashboard_data(self) -> dict:
+        snapshot = self._last_snapshot
+        avg_spawn = self.avg_spawn_seconds
+        return {
+            "policy": {
+                "min_workers": self.policy.min_workers,
+                "max_workers": self.policy.max_workers,
+                "scale_up_wait_seconds": self.policy.scale_up_wait_seconds,
+                "scale_up_busy_ratio": self.policy.scale_up_busy_ratio,
+                "scale_down_busy_ratio": self.policy.scale_down_busy_ratio,
+                "idle_seconds": self.policy.idle_seconds,
+            },
+            "workers": len(snapshot.workers) if snapshot else 0,
+            "spawning": snapshot.spawning if snapshot else 0,
+            "busy_ratio": round(snapshot.busy_ratio, 3) if snapshot else 0.0,
+            "queue_depth": snapshot.queue_depth if snapshot else 0,
+            "avg_spawn_seconds": round(avg_spawn, 2) if avg_spawn is not None else None,
+            "scale_up_cooldown": round(self.scale_up_cooldown, 1),
+            "recent_events": list(self._events),
+        }
@@ -5,6 +5,7 @@ Agent 通信总线
 - ROUTER/DEALER: 双向命令/响应通信
 - PUB/SUB: 事件广播
 - 异步消息处理
+- 按连接协商线路编码（msgpack / JSON，可选压缩）
 """
 
 import asyncio
@@ -27,6 +28,7 @@ except ImportError:
 
 import contextlib
 
+from .codec import DEFAULT_COMPRESS_THRESHOLD, WireFormat, negotiate
 from .messages import (
     AgentMessage,
     CommandType,
@@ -46,6 +48,9 @@ class BusConfig:
     recv_timeout_ms: int = 1000  # 接收超时（毫秒）
     send_timeout_ms: int = 5000  # 发送超时（毫秒）
     high_water_mark: int = 1000  # 高水位标记
+    codec: str = "auto"  # 线路编码: "auto" | "msgpack" | "json"
+    compression: str = "auto"  # 压缩: "auto" | "zstd" | "zlib" | "none"
+    compress_threshold: int = DEFAULT_COMPRESS_THRESHOLD  # 超过该字节数才压缩
 
 
 # 消息处理器类型
@@ -98,6 +103,11 @@ class AgentBus:
         self._pending_requests: dict[str, asyncio.Future] = {}
         self._pending_lock = threading.Lock()
 
+        # 线路格式：Master 端按 Worker 记录，Worker 端只有发往 Master 的一条
+        # 未协商时为 None，使用旧格式 JSON
+        self._peer_formats: dict[str, WireFormat] = {}
+        self._wire: WireFormat | None = None
+
         # 运行状态
         self._running = False
         self._recv_task: asyncio.Task | None = None
@@ -106,6 +116,8 @@ class AgentBus:
         self._stats = {
             "messages_sent": 0,
             "messages_received": 0,
+            "bytes_sent": 0,
+            "bytes_received": 0,
             "errors": 0,
         }
 
@@ -285,8 +297,11 @@ class AgentBus:
         )
 
         try:
-            await self._pub.send(message.to_bytes())
+            # 广播面向所有 Worker，使用任何版本都能解码的旧格式
+            data = message.to_bytes()
+            await self._pub.send(data)
             self._stats["messages_sent"] += 1
+            self._stats["bytes_sent"] += len(data)
             logger.debug(f"Broadcast event: {event_type.value}")
         except Exception as e:
             self._stats["errors"] += 1
@@ -320,15 +335,17 @@ class AgentBus:
             raise RuntimeError("Router socket not initialized")
 
         try:
+            data = message.to_bytes(self._peer_formats.get(worker_id))
             # ROUTER socket 需要先发送 identity，再发送消息
             # identity 是 Worker 连接时设置的
             await self._router.send_multipart(
                 [
                     worker_id.encode("utf-8"),  # Worker identity
-                    message.to_bytes(),
+                    data,
                 ]
             )
             self._stats["messages_sent"] += 1
+            self._stats["bytes_sent"] += len(data)
             logger.debug(f"Sent to worker {worker_id}: {message.msg_type}")
         except Exception as e:
             self._stats["errors"] += 1
@@ -341,8 +358,10 @@ class AgentBus:
             raise RuntimeError("Dealer socket not initialized")
 
         try:
-            await self._dealer.send(message.to_bytes())
+            data = message.to_bytes(self._wire)
+            await self._dealer.send(data)
             self._stats["messages_sent"] += 1
+            self._stats["bytes_sent"] += len(data)
             logger.debug(f"Sent to master: {message.msg_type}")
         except Exception as e:
             self._stats["errors"] += 1
@@ -365,7 +384,10 @@ class AgentBus:
 
         try:
             # 发送消息
-            await self._send_to_worker(message, target_id)
+            if self.is_master:
+                await self._send_to_worker(message, target_id)
+            else:
+                await self._send_to_master(message)
 
             # 等待响应
             response = await asyncio.wait_for(future, timeout=timeout)
@@ -378,6 +400,36 @@ class AgentBus:
             with self._pending_lock:
                 self._pending_requests.pop(correlation_id, None)
 
+    async def request_master(
+        self, message: AgentMessage, timeout: float = 5.0
+    ) -> AgentMessage | None:
+        """发送消息给 Master 并等待响应（Worker 端）；超时返回 None"""
+        return await self._send_and_wait(message, "master", timeout)
+
+    # ==================== 线路格式 ====================
+
+    def negotiate_peer(self, peer_id: str, offer: dict[str, Any] | None) -> WireFormat | None:
+        """按对端声明的能力协商线路格式（Master 端），之后发给该 Worker 的消息使用此格式"""
+        wire = negotiate(
+            offer,
+            codec=self.config.codec,
+            compression=self.config.compression,
+            compress_threshold=self.config.compress_threshold,
+        )
+        if wire is None:
+            self._peer_formats.pop(peer_id, None)
+        else:
+            self._peer_formats[peer_id] = wire
+        return wire
+
+    def remove_peer(self, peer_id: str) -> None:
+        """移除对端的线路格式（Worker 注销 / 死亡）"""
+        self._peer_formats.pop(peer_id, None)
+
+    def set_wire_format(self, wire: WireFormat | None) -> None:
+        """设置发往 Master 的线路格式（Worker 端，来自注册响应）"""
+        self._wire = wire
+
     # ==================== 消息接收 ====================
 
     async def _receive_loop(self) -> None:
@@ -409,6 +461,7 @@ class AgentBus:
                 message = AgentMessage.from_bytes(frames[1])
 
                 self._stats["messages_received"] += 1
+                self._stats["bytes_received"] += len(frames[1])
                 await self._handle_message(message, worker_id)
 
         except zmq.Again:
@@ -435,6 +488,7 @@ class AgentBus:
                 data = await self._dealer.recv(flags=zmq.NOBLOCK)
                 message = AgentMessage.from_bytes(data)
                 self._stats["messages_received"] += 1
+                self._stats["bytes_received"] += len(data)
                 await self._handle_message(message, "master")
 
             # 检查 SUB（广播事件）
@@ -442,6 +496,7 @@ class AgentBus:
                 data = await self._sub.recv(flags=zmq.NOBLOCK)
                 message = AgentMessage.from_bytes(data)
                 self._stats["messages_received"] += 1
+                self._stats["bytes_received"] += len(data)
                 await self._handle_message(message, "master")
 
         except zmq.Again:
@@ -569,6 +624,11 @@ class AgentBus:
             "pending_requests": len(self._pending_requests),
             "is_master": self.is_master,
             "running": self._running,
+            "wire": (
+                {peer: w.to_dict() for peer, w in self._peer_formats.items()}
+                if self.is_master
+                else (self._wire.to_dict() if self._wire else None)
+            ),
         }
 
 
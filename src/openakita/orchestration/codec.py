@@ -0,0 +1,197 @@
+"""
+AgentBus 线路编码
+
+消息字节格式:
+- 旧格式: UTF-8 JSON（首字节为 "{"），注册协商前及广播事件使用
+- 新格式: MAGIC(0xC1) + 格式字节(高 4 位编码器, 低 4 位压缩) + 数据
+
+编码器: msgpack（已安装时）/ JSON；压缩: zstd（已安装时）/ zlib / 不压缩，
+仅当序列化结果超过阈值且压缩后确实更小时才压缩。zlib 在本机回环上耗时多于
+省下的传输时间，因此 auto 只自动选择 zstd，跨机部署可显式指定 zlib。解码只看帧头，不依赖协商状态，
+因此 Master 可以同时与使用不同格式的 Worker 通信。
+
+协商: Worker 注册时在 AgentInfo.metadata["wire"] 中声明支持的编码器和压缩算法，
+Master 按自己的偏好选出双方都支持的组合，写入注册响应。
+"""
+
+import json
+import zlib
+from dataclasses import dataclass
+from typing import Any
+
+try:
+    import msgpack
+
+    HAS_MSGPACK = True
+except ImportError:
+    msgpack = None  # type: ignore[assignment]
+    HAS_MSGPACK = False
+
+try:
+    import zstandard
+
+    HAS_ZSTD = True
+except ImportError:
+    zstandard = None  # type: ignore[assignment]
+    HAS_ZSTD = False
+
+MAGIC = 0xC1  # msgpack 保留字节，也不会是 JSON 的首字节
+
+CODEC_JSON = "json"
+CODEC_MSGPACK = "msgpack"
+COMPRESS_NONE = "none"
+COMPRESS_ZLIB = "zlib"
+COMPRESS_ZSTD = "zstd"
+
+_CODEC_IDS = {CODEC_JSON: 1, CODEC_MSGPACK: 2}
+_COMPRESS_IDS = {COMPRESS_NONE: 0, COMPRESS_ZLIB: 1, COMPRESS_ZSTD: 2}
+_CODEC_NAMES = {v: k for k, v in _CODEC_IDS.items()}
+_COMPRESS_NAMES = {v: k for k, v in _COMPRESS_IDS.items()}
+
+# 默认压缩阈值（字节）：心跳、短命令等小消息不压缩
+DEFAULT_COMPRESS_THRESHOLD = 4096
+
+
+class CodecError(ValueError):
+    """无法解码的消息（格式未知或本进程缺少对应依赖）"""
+
+
+def available_codecs() -> list[str]:
+    """本进程支持的编码器（按偏好排序）"""
+    return [CODEC_MSGPACK, CODEC_JSON] if HAS_MSGPACK else [CODEC_JSON]
+
+
+def available_compressions() -> list[str]:
+    """本进程支持的压缩算法（按 auto 偏好排序，zlib 仅显式指定时使用）"""
+    algos = [COMPRESS_ZSTD] if HAS_ZSTD else []
+    return [*algos, COMPRESS_NONE, COMPRESS_ZLIB]
+
+
+def _dumps(codec: str, data: dict[str, Any]) -> bytes:
+    if codec == CODEC_MSGPACK:
+        return msgpack.packb(data, use_bin_type=True)
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+def _loads(codec: str, raw: bytes) -> dict[str, Any]:
+    if codec == CODEC_MSGPACK:
+        if not HAS_MSGPACK:
+            raise CodecError("msgpack message received but msgpack is not installed")
+        return msgpack.unpackb(raw, raw=False)
+    return json.loads(raw.decode("utf-8"))
+
+
+def _compress(algo: str, raw: bytes) -> bytes:
+    if algo == COMPRESS_ZSTD:
+        return zstandard.ZstdCompressor(level=3).compress(raw)
+    # 级别 1：JSON 文本已能压到约 1/3，比默认级别快数倍
+    return zlib.compress(raw, 1)
+
+
+def _decompress(algo: str, raw: bytes) -> bytes:
+    if algo == COMPRESS_ZSTD:
+        if not HAS_ZSTD:
+            raise CodecError("zstd message received but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(raw)
+    return zlib.decompress(raw)
+
+
+@dataclass(frozen=True)
+class WireFormat:
+    """一条连接使用的编码格式"""
+
+    codec: str = CODEC_JSON
+    compression: str = COMPRESS_NONE
+    compress_threshold: int = DEFAULT_COMPRESS_THRESHOLD
+
+    def encode(self, data: dict[str, Any]) -> bytes:
+        raw = _dumps(self.codec, data)
+        compression = COMPRESS_NONE
+        if self.compression != COMPRESS_NONE and len(raw) >= self.compress_threshold:
+            packed = _compress(self.compression, raw)
+            if len(packed) < len(raw):
+                raw, compression = packed, self.compression
+        header = (_CODEC_IDS[self.codec] << 4) | _COMPRESS_IDS[compression]
+        return bytes((MAGIC, header)) + raw
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "codec": self.codec,
+            "compression": self.compression,
+            "compress_threshold": self.compress_threshold,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "WireFormat":
+        codec = data.get("codec", CODEC_JSON)
+        compression = data.get("compression", COMPRESS_NONE)
+        if codec not in available_codecs():
+            codec = CODEC_JSON
+        if compression not in available_compressions():
+            compression = COMPRESS_NONE
+        return cls(
+            codec=codec,
+            compression=compression,
+            compress_threshold=data.get("compress_threshold", DEFAULT_COMPRESS_THRESHOLD),
+        )
+
+
+def encode_legacy(data: dict[str, Any]) -> bytes:
+    """旧格式（纯 JSON），任何版本的对端都能解码"""
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+def decode(data: bytes) -> dict[str, Any]:
+    """按帧头解码；无帧头时按旧格式 JSON 处理"""
+    if not data or data[0] != MAGIC:
+        return json.loads(data.decode("utf-8"))
+    if len(data) < 2:
+        raise CodecError("Truncated message header")
+    codec = _CODEC_NAMES.get(data[1] >> 4)
+    compression = _COMPRESS_NAMES.get(data[1] & 0x0F)
+    if codec is None or compression is None:
+        raise CodecError(f"Unknown wire format byte: {data[1]:#04x}")
+    raw = data[2:]
+    if compression != COMPRESS_NONE:
+        raw = _decompress(compression, raw)
+    return _loads(codec, raw)
+
+
+def wire_offer() -> dict[str, list[str]]:
+    """注册时声明的本端能力"""
+    return {"codecs": available_codecs(), "compression": available_compressions()}
+
+
+def _pick(preferred: list[str], setting: str, offered: list[str]) -> str | None:
+    candidates = preferred if setting == "auto" else [setting]
+    for name in candidates:
+        if name in preferred and name in offered:
+            return name
+    return None
+
+
+def negotiate(
+    offer: dict[str, Any] | None,
+    codec: str = "auto",
+    compression: str = "auto",
+    compress_threshold: int = DEFAULT_COMPRESS_THRESHOLD,
+) -> WireFormat | None:
+    """
+    按本端偏好与对端声明选出线路格式
+
+    Args:
+        offer: 对端 wire_offer()；None 表示旧版对端，返回 None（继续使用旧格式）
+        codec: "auto" 或指定编码器
+        compression: "auto" 或指定压缩算法（"none" 关闭压缩）
+        compress_threshold: 压缩阈值（字节）
+    """
+    if not offer:
+        return None
+    return WireFormat(
+        codec=_pick(available_codecs(), codec, offer.get("codecs", [])) or CODEC_JSON,
+        compression=(
+            _pick(available_compressions(), compression, offer.get("compression", []))
+            or COMPRESS_NONE
+        ),
+        compress_threshold=compress_threshold,
+    )
@@ -2,10 +2,12 @@
 MasterAgent - 主协调器
 
 多 Agent 系统的核心，负责:
-- 任务分发和路由
+- 任务分发和路由（Worker 全忙时在 Master 排队，Worker 完成后立即取下一个）
+- 会话粘性路由，只向 Worker 发送会话历史的增量
 - Worker 生命周期管理
 - 简单任务直接处理
 - 健康监控和故障恢复
+- 按队列等待 / 繁忙比例自动扩缩 Worker 池
 - 与 Session/记忆系统集成
 """
 
@@ -14,10 +16,13 @@ import contextlib
 import logging
 import multiprocessing
 import os
+import time
 import uuid
+from collections import OrderedDict
 from pathlib import Path
 from typing import Any
 
+from .autoscaler import AutoScaler, LoadSnapshot, ScalingDecision, ScalingPolicy
 from .bus import AgentBus, BusConfig
 from .messages import (
     AgentInfo,
@@ -30,6 +35,8 @@ from .messages import (
     TaskResult,
 )
 from .registry import AgentRegistry
+from .session_cache import SESSION_CACHE_MISS, history_digest
+from .task_queue import QueueFullError, TaskQueue
 
 logger = logging.getLogger(__name__)
 
@@ -56,6 +63,8 @@ class MasterAgent:
     DEFAULT_HEARTBEAT_INTERVAL = 5
     DEFAULT_HEALTH_CHECK_INTERVAL = 10
     DEFAULT_SIMPLE_TASK_THRESHOLD = 50  # 简单任务的消息长度阈值
+    DEFAULT_MAX_QUEUE_DEPTH = 100
+    DEFAULT_AUTO_SCALE_INTERVAL = 5
 
     def __init__(
         self,
@@ -66,6 +75,10 @@ class MasterAgent:
         heartbeat_interval: int = DEFAULT_HEARTBEAT_INTERVAL,
         health_check_interval: int = DEFAULT_HEALTH_CHECK_INTERVAL,
         data_dir: Path | None = None,
+        max_queue_depth: int = DEFAULT_MAX_QUEUE_DEPTH,
+        auto_scale: bool = False,
+        scaling_policy: ScalingPolicy | None = None,
+        auto_scale_interval: int = DEFAULT_AUTO_SCALE_INTERVAL,
     ):
         """
         Args:
@@ -76,6 +89,10 @@ class MasterAgent:
             heartbeat_interval: Worker 心跳间隔（秒）
             health_check_interval: 健康检查间隔（秒）
             data_dir: 数据目录
+            max_queue_depth: 任务队列最大深度（超出时拒绝新任务）
+            auto_scale: 是否启用 Worker 池自动扩缩
+            scaling_policy: 扩缩策略（默认按 min_workers / max_workers 构造）
+            auto_scale_interval: 扩缩评估间隔（秒）
         """
         self.agent_id = agent_id
         self.bus_config = bus_config or BusConfig()
@@ -83,6 +100,8 @@ class MasterAgent:
         self.max_workers = max_workers
         self.heartbeat_interval = heartbeat_interval
         self.health_check_interval = health_check_interval
+        self.auto_scale = auto_scale
+        self.auto_scale_interval = auto_scale_interval
 
         # 数据目录
         if data_dir:
@@ -107,9 +126,23 @@ class MasterAgent:
         # Worker 进程管理 {agent_id: Process}
         self._worker_processes: dict[str, multiprocessing.Process] = {}
 
-        # 任务队列 {task_id: TaskPayload}
+        # 等待 Worker 的任务队列
+        self.task_queue = TaskQueue(max_depth=max_queue_depth)
+        self._dispatch_tasks: set[asyncio.Task] = set()
+
+        # 已分发、等待结果的任务 {task_id: TaskPayload}
         self._pending_tasks: dict[str, TaskPayload] = {}
         self._task_futures: dict[str, asyncio.Future] = {}
+        self._task_workers: dict[str, str] = {}  # {task_id: worker_id}
+
+        # 已同步给绑定 Worker 的会话历史位置 {session_id: (消息数, 末条摘要)}
+        self._session_sync: OrderedDict[str, tuple[int, str]] = OrderedDict()
+
+        # 自动扩缩
+        self.autoscaler = AutoScaler(
+            scaling_policy or ScalingPolicy(min_workers=min_workers, max_workers=max_workers)
+        )
+        self._spawning = 0
 
         # 运行状态
         self._running = False
@@ -121,6 +154,12 @@ class MasterAgent:
             "tasks_total": 0,
             "tasks_local": 0,  # 本地处理的任务
             "tasks_distributed": 0,  # 分发给 Worker 的任务
+            "tasks_queued": 0,  # 入队时没有空闲 Worker 的任务
+            "tasks_rejected": 0,  # 队列已满被拒绝的任务
+            "context_full": 0,  # 发送全量会话历史的任务
+            "context_delta": 0,  # 只发送增量历史的任务
+            "context_cache_miss": 0,  # Worker 缓存缺失后重发全量
+            "context_messages_saved": 0,  # 增量发送省下的消息条数
             "tasks_success": 0,
             "tasks_failed": 0,
         }
@@ -161,7 +200,8 @@ class MasterAgent:
         self._health_check_task = asyncio.create_task(self._health_check_loop())
 
         # 启动自动扩缩（可选）
-        # self._auto_scale_task = asyncio.create_task(self._auto_scale_loop())
+        if self.auto_scale:
+            self._auto_scale_task = asyncio.create_task(self._auto_scale_loop())
 
         self._running = True
         logger.info(f"MasterAgent started with {self.registry.count()} agents")
@@ -181,12 +221,20 @@ class MasterAgent:
                 with contextlib.suppress(asyncio.CancelledError):
                     await task
 
+        # 排队中的任务直接结束
+        for entry in self.task_queue.drain():
+            if not entry.future.done():
+                entry.future.set_result("系统正在关闭，请稍后重试")
+
         # 停止所有 Worker
         await self._stop_all_workers()
 
         # 停止通信总线
         await self.bus.stop()
 
+        # 写入注册表剩余变更
+        self.registry.close()
+
         # 关闭本地 Agent
         if self._local_agent:
             await self._local_agent.shutdown()
@@ -223,6 +271,7 @@ class MasterAgent:
         session_messages: list[dict] | None = None,
         session: Any = None,
         gateway: Any = None,
+        priority: int = 0,
     ) -> str:
         """
         处理请求
@@ -235,6 +284,7 @@ class MasterAgent:
             session_messages: 会话历史（用于 IM 通道）
             session: Session 对象（用于 IM 通道）
             gateway: MessageGateway（用于 IM 通道）
+            priority: 排队优先级（数字越小越高）
 
         Returns:
             Agent 响应
@@ -250,7 +300,7 @@ class MasterAgent:
         else:
             # 分发给 Worker
             return await self._distribute_task(
-                session_id, message, session_messages, session, gateway
+                session_id, message, session_messages, session, gateway, priority=priority
             )
 
     def _should_handle_locally(
@@ -263,8 +313,9 @@ class MasterAgent:
 
         本地处理条件:
         1. 没有可用的 Worker
-        2. 简单任务（消息短、无复杂上下文）
-        3. Worker 全部繁忙且消息简单
+        2. 有空闲 Worker 但任务很简单（消息短、无上下文）
+
+        Worker 全部繁忙时任务进入队列，不占用 Master（Master 同时承载 Gateway）
         """
         # 查找空闲 Worker
         idle_worker = self.registry.find_idle_agent(exclude_ids=[self.agent_id])
@@ -280,12 +331,7 @@ class MasterAgent:
                 logger.debug("No workers available, handling locally")
                 return True
 
-            # 有 Worker 但都在忙，检查消息复杂度
-            if len(message) < self.DEFAULT_SIMPLE_TASK_THRESHOLD:
-                logger.debug("All workers busy, simple message, handling locally")
-                return True
-
-            # 复杂任务，等待 Worker
+            # 有 Worker 但都在忙，排队等待
             return False
 
         # 有空闲 Worker
@@ -338,16 +384,11 @@ class MasterAgent:
         session_messages: list[dict] | None = None,
         session: Any = None,
         gateway: Any = None,
+        priority: int = 0,
     ) -> str:
-        """分发任务给 Worker"""
-        self._stats["tasks_distributed"] += 1
-
-        # 查找空闲 Worker
-        worker = self.registry.find_idle_agent(exclude_ids=[self.agent_id])
-
-        if not worker:
-            # 所有 Worker 都在忙，等待或本地处理
-            logger.warning("No idle worker, falling back to local handling")
+        """任务入队并等待 Worker 返回结果"""
+        if not self._has_active_workers():
+            logger.warning("No active worker, handling locally")
             return await self._handle_locally(
                 session_id, message, session_messages, session, gateway
             )
@@ -366,30 +407,32 @@ class MasterAgent:
                 "has_session": session is not None,
                 "has_gateway": gateway is not None,
             },
+            priority=priority,
         )
 
-        # 记录任务
-        self._pending_tasks[task_id] = task
-
         # 创建 Future 等待结果
         future = asyncio.get_event_loop().create_future()
-        self._task_futures[task_id] = future
 
-        # 标记 Worker 为 BUSY
-        self.registry.set_agent_task(worker.agent_id, task_id, task.description)
+        try:
+            self.task_queue.put(task, future)
+        except QueueFullError as e:
+            # 背压：队列满时直接拒绝，而不是压到 Master 上
+            logger.warning(f"Task {task_id} rejected: {e}")
+            self._stats["tasks_rejected"] += 1
+            return "当前请求较多，请稍后重试"
 
-        logger.info(f"Distributing task {task_id} to worker {worker.agent_id}")
+        self._stats["tasks_distributed"] += 1
+        self._task_futures[task_id] = future
 
-        try:
-            # 发送任务
-            await self.bus.send_command(
-                target_id=worker.agent_id,
-                command_type=CommandType.ASSIGN_TASK,
-                payload=task.to_dict(),
-                wait_response=False,  # 异步等待结果
+        await self._dispatch_pending()
+        if task_id not in self._task_workers and not future.done():
+            self._stats["tasks_queued"] += 1
+            logger.info(
+                f"No idle worker, task {task_id} queued (depth={len(self.task_queue)})"
             )
 
-            # 等待任务完成
+        try:
+            # 超时包含排队时间
             result = await asyncio.wait_for(future, timeout=task.timeout_seconds)
 
             self._stats["tasks_success"] += 1
@@ -398,24 +441,110 @@ class MasterAgent:
         except TimeoutError:
             logger.error(f"Task {task_id} timeout")
             self._stats["tasks_failed"] += 1
-
-            # 清理
-            self.registry.clear_agent_task(worker.agent_id, success=False)
-            self._pending_tasks.pop(task_id, None)
-            self._task_futures.pop(task_id, None)
-
+            self._abandon_task(task_id)
             return "任务处理超时，请稍后重试"
 
+        except asyncio.CancelledError:
+            self._abandon_task(task_id)
+            raise
+
         except Exception as e:
             logger.error(f"Task distribution error: {e}", exc_info=True)
             self._stats["tasks_failed"] += 1
+            self._abandon_task(task_id)
+            return f"任务处理出错: {str(e)}"
 
-            # 清理
-            self.registry.clear_agent_task(worker.agent_id, success=False)
-            self._pending_tasks.pop(task_id, None)
-            self._task_futures.pop(task_id, None)
+    def _has_active_workers(self) -> bool:
+        workers = self.registry.list_by_type(AgentType.WORKER)
+        return any(w.status != AgentStatus.DEAD.value for w in workers)
 
-            return f"任务处理出错: {str(e)}"
+    async def _dispatch_pending(self) -> None:
+        """把排队任务分配给空闲 Worker，直到队列为空或没有空闲 Worker"""
+        while self.task_queue:
+            if not self.registry.find_idle_agent(exclude_ids=[self.agent_id]):
+                return
+
+            entry = self.task_queue.pop()
+            if entry is None:
+                return
+
+            task = entry.task
+            task_id = task.task_id
+            worker = self.registry.find_idle_agent(
+                exclude_ids=[self.agent_id], session_id=task.session_id
+            )
+
+            # 先同步标记 BUSY，并发的派发调用不会选中同一个 Worker
+            self.registry.set_agent_task(worker.agent_id, task_id, task.description)
+            self._pending_tasks[task_id] = task
+            self._task_workers[task_id] = worker.agent_id
+
+            logger.info(f"Distributing task {task_id} to worker {worker.agent_id}")
+
+            try:
+                await self._send_task(worker.agent_id, task)
+            except Exception as e:
+                logger.error(f"Failed to assign task {task_id}: {e}")
+                self._abandon_task(task_id)
+                if not entry.future.done():
+                    entry.future.set_result(f"任务处理出错: {str(e)}")
+
+    async def _send_task(self, worker_id: str, task: TaskPayload, full: bool = False) -> None:
+        """发送 ASSIGN_TASK；结果通过 TASK_RESULT 返回"""
+        await self.bus.send_command(
+            target_id=worker_id,
+            command_type=CommandType.ASSIGN_TASK,
+            payload=self._build_task_payload(worker_id, task, full=full),
+            wait_response=False,
+        )
+
+    def _build_task_payload(self, worker_id: str, task: TaskPayload, full: bool = False) -> dict:
+        """
+        构造任务负载
+
+        会话上次由同一 Worker 服务、且历史只在末尾追加时，只发送新增消息；
+        否则（首次、换 Worker、会话被截断、Worker 缓存缺失）发送全量并重新绑定。
+        """
+        payload = task.to_dict()
+        session_id = task.session_id
+        messages = task.context.get("session_messages")
+        if not session_id or not messages:
+            return payload
+
+        sync = self._session_sync.get(session_id)
+        if (
+            not full
+            and sync is not None
+            and self.registry.get_session_agent(session_id) == worker_id
+            and sync[0] <= len(messages)
+            and history_digest(messages, sync[0]) == sync[1]
+        ):
+            base = sync[0]
+            context = {k: v for k, v in task.context.items() if k != "session_messages"}
+            context["session_messages_delta"] = messages[base:]
+            context["session_base"] = base
+            context["session_digest"] = sync[1]
+            payload["context"] = context
+            self._stats["context_delta"] += 1
+            self._stats["context_messages_saved"] += base
+        else:
+            self._stats["context_full"] += 1
+
+        self.registry.bind_session(session_id, worker_id)
+        self._session_sync[session_id] = (len(messages), history_digest(messages))
+        self._session_sync.move_to_end(session_id)
+        while len(self._session_sync) > self.registry.MAX_SESSION_AFFINITY:
+            self._session_sync.popitem(last=False)
+        return payload
+
+    def _abandon_task(self, task_id: str) -> None:
+        """清理超时或分发失败的任务：仍在排队则出队，已分配则释放 Worker"""
+        self.task_queue.remove(task_id)
+        worker_id = self._task_workers.pop(task_id, None)
+        if worker_id:
+            self.registry.clear_agent_task(worker_id, success=False)
+        self._pending_tasks.pop(task_id, None)
+        self._task_futures.pop(task_id, None)
 
     # ==================== 消息处理器 ====================
 
@@ -430,24 +559,37 @@ class MasterAgent:
         agent_info = AgentInfo.from_dict(message.payload)
         success = self.registry.register(agent_info)
 
+        # 协商线路格式（旧版 Worker 不声明，继续使用 JSON）
+        wire = self.bus.negotiate_peer(agent_info.agent_id, agent_info.metadata.get("wire"))
+
         # 广播事件
         if success:
             await self.bus.broadcast_event(
                 EventType.AGENT_REGISTERED,
                 {"agent_id": agent_info.agent_id, "type": agent_info.agent_type},
             )
+            # 新 Worker 可以立即接手排队任务；先返回注册响应再派发，
+            # 否则 Worker 先收到任务并在接收循环内执行，注册请求会超时
+            self._schedule_dispatch()
 
         return AgentMessage.response(
             sender_id=self.agent_id,
             target_id=message.sender_id,
             correlation_id=message.msg_id,
-            payload={"success": success},
+            payload={"success": success, "wire": wire.to_dict() if wire else None},
         )
 
+    def _schedule_dispatch(self) -> None:
+        """在后台派发排队任务（不阻塞当前消息处理器的响应）"""
+        task = asyncio.create_task(self._dispatch_pending())
+        self._dispatch_tasks.add(task)
+        task.add_done_callback(self._dispatch_tasks.discard)
+
     async def _handle_unregister(self, message: AgentMessage) -> AgentMessage | None:
         """处理注销请求"""
         agent_id = message.payload.get("agent_id")
         success = self.registry.unregister(agent_id)
+        self.bus.remove_peer(agent_id)
 
         if success:
             await self.bus.broadcast_event(
@@ -466,13 +608,28 @@ class MasterAgent:
         """处理任务结果"""
         result = TaskResult.from_dict(message.payload)
         task_id = result.task_id
+        worker_id = message.sender_id
+
+        # Worker 没有该会话的缓存：Worker 仍为此任务保留，直接重发全量历史
+        task = self._pending_tasks.get(task_id)
+        cache_miss = bool(result.metadata.get(SESSION_CACHE_MISS))
+        if cache_miss and task is not None:
+            logger.info(
+                f"Task {task_id}: session cache miss on {worker_id}, resending full history"
+            )
+            self._stats["context_cache_miss"] += 1
+            try:
+                await self._send_task(worker_id, task, full=True)
+                return None
+            except Exception as e:
+                logger.error(f"Failed to resend task {task_id}: {e}")
 
         logger.info(f"Task {task_id} result: success={result.success}")
 
-        # 清理任务状态
-        worker_id = message.sender_id
-        self.registry.clear_agent_task(worker_id, success=result.success)
+        # 清理任务状态（缓存未命中是协议层重发，不计为失败）
+        self.registry.clear_agent_task(worker_id, success=result.success, record=not cache_miss)
         self._pending_tasks.pop(task_id, None)
+        self._task_workers.pop(task_id, None)
 
         # 完成 Future
         future = self._task_futures.pop(task_id, None)
@@ -482,6 +639,9 @@ class MasterAgent:
             else:
                 future.set_result(result.error or "任务失败")
 
+        # Worker 已空闲，立即取下一个排队任务
+        await self._dispatch_pending()
+
         return None  # 不需要响应
 
     async def _handle_chat_response(self, message: AgentMessage) -> AgentMessage | None:
@@ -541,11 +701,14 @@ class MasterAgent:
 
         logger.info(f"Spawned worker {worker_id} (pid={process.pid})")
 
-        # 等待 Worker 注册（最多 10 秒）
+        # 等待 Worker 注册（最多 10 秒）；注册后可能立即接手排队任务而变为 BUSY
         for _ in range(100):
             await asyncio.sleep(0.1)
             agent_info = self.registry.get(worker_id)
-            if agent_info and agent_info.status == AgentStatus.IDLE.value:
+            if agent_info and agent_info.status not in (
+                AgentStatus.STARTING.value,
+                AgentStatus.DEAD.value,
+            ):
                 logger.info(f"Worker {worker_id} registered successfully")
                 return worker_id
 
@@ -577,14 +740,14 @@ class MasterAgent:
                     wait_response=False,
                 )
 
-                # 等待进程退出
+                # 等待进程退出（在线程中 join，不阻塞事件循环）
                 process = self._worker_processes[worker_id]
-                process.join(timeout=5)
+                await asyncio.to_thread(process.join, 5)
 
                 if process.is_alive():
                     logger.warning(f"Worker {worker_id} didn't exit gracefully, killing")
                     process.terminate()
-                    process.join(timeout=2)
+                    await asyncio.to_thread(process.join, 2)
 
             except Exception as e:
                 logger.error(f"Error shutting down worker {worker_id}: {e}")
@@ -592,11 +755,12 @@ class MasterAgent:
             # 强制终止
             process = self._worker_processes[worker_id]
             process.terminate()
-            process.join(timeout=2)
+            await asyncio.to_thread(process.join, 2)
 
         # 清理
         del self._worker_processes[worker_id]
         self.registry.unregister(worker_id)
+        self.bus.remove_peer(worker_id)
 
         logger.info(f"Worker {worker_id} terminated")
         return True
@@ -659,9 +823,11 @@ class MasterAgent:
                 future.set_result("Worker 故障，请重试")
 
             self._pending_tasks.pop(task_id, None)
+            self._task_workers.pop(task_id, None)
 
         # 注销死亡的 Worker
         self.registry.unregister(worker_id)
+        self.bus.remove_peer(worker_id)
 
         # 检查是否需要创建新 Worker
         current_workers = len(
@@ -676,6 +842,76 @@ class MasterAgent:
             logger.info("Spawning replacement worker...")
             await self.spawn_worker()
 
+        await self._dispatch_pending()
+
+    # ==================== 自动扩缩 ====================
+
+    async def _auto_scale_loop(self) -> None:
+        """自动扩缩循环"""
+        while self._running:
+            try:
+                await asyncio.sleep(self.auto_scale_interval)
+                await self._auto_scale_once()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Auto scale error: {e}")
+
+    def _load_snapshot(self) -> LoadSnapshot:
+        workers = [
+            w
+            for w in self.registry.list_by_type(AgentType.WORKER)
+            if w.status not in (AgentStatus.DEAD.value, AgentStatus.STOPPING.value)
+        ]
+        return LoadSnapshot(
+            workers=workers,
+            queue_depth=len(self.task_queue),
+            oldest_wait=self.task_queue.oldest_wait(),
+            wait_p95=self.task_queue.wait_percentile(0.95) or 0.0,
+            spawning=self._spawning,
+            evictable=set(self._worker_processes),
+        )
+
+    async def _auto_scale_once(self) -> ScalingDecision:
+        """评估一次负载并执行扩缩"""
+        decision = self.autoscaler.evaluate(self._load_snapshot())
+
+        if decision.delta > 0:
+            logger.info(f"[AutoScale] Scaling up by {decision.delta}: {decision.reason}")
+            results = await asyncio.gather(
+                *(self._timed_spawn() for _ in range(decision.delta))
+            )
+            spawned = [t for t in results if t is not None]
+            self.autoscaler.record_scale_up(len(spawned), spawned, decision.reason)
+            await self._dispatch_pending()
+
+        for worker_id in decision.victims:
+            agent_info = self.registry.get(worker_id)
+            # 只回收本进程启动、且此刻仍空闲的 Worker
+            if (
+                worker_id not in self._worker_processes
+                or agent_info is None
+                or agent_info.status != AgentStatus.IDLE.value
+            ):
+                continue
+            # 先标记 STOPPING，避免关闭期间被分配任务
+            self.registry.set_agent_status(worker_id, AgentStatus.STOPPING)
+            logger.info(f"[AutoScale] Scaling down {worker_id}: {decision.reason}")
+            await self.terminate_worker(worker_id, graceful=True)
+            self.autoscaler.record_scale_down(worker_id, decision.reason)
+
+        return decision
+
+    async def _timed_spawn(self) -> float | None:
+        """启动一个 Worker，返回启动耗时（秒）；失败返回 None"""
+        self._spawning += 1
+        start = time.monotonic()
+        try:
+            worker_id = await self.spawn_worker()
+        finally:
+            self._spawning -= 1
+        return time.monotonic() - start if worker_id else None
+
     def _on_agent_status_change(
         self,
         agent_id: str,
@@ -695,11 +931,20 @@ class MasterAgent:
             "bus": self.bus.get_stats(),
             "worker_processes": len(self._worker_processes),
             "pending_tasks": len(self._pending_tasks),
+            "queue": self.task_queue.stats(),
+            "autoscaler": self.autoscaler.get_dashboard_data(),
         }
 
     def get_dashboard_data(self) -> dict[str, Any]:
         """获取仪表盘数据"""
-        return self.registry.get_dashboard_data()
+        return {
+            **self.registry.get_dashboard_data(),
+            "queue": self.task_queue.stats(),
+            "autoscaler": {
+                "enabled": self.auto_scale,
+                **self.autoscaler.get_dashboard_data(),
+            },
+        }
 
 
 # ==================== Worker 进程入口 ====================
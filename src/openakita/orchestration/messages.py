@@ -2,17 +2,19 @@
 多 Agent 通信消息协议
 
 定义 Agent 之间通信的消息格式和数据结构。
-所有消息通过 ZMQ 传输，使用 JSON 序列化。
+所有消息通过 ZMQ 传输，默认 JSON 序列化；注册时可协商 msgpack 与压缩（见 codec.py）。
 """
 
 import json
 import logging
 import uuid
-from dataclasses import asdict, dataclass, field
+from dataclasses import asdict, dataclass, field, fields
 from datetime import datetime
 from enum import Enum
 from typing import Any
 
+from . import codec
+
 logger = logging.getLogger(__name__)
 
 
@@ -128,11 +130,13 @@ class AgentInfo:
         self.current_task_desc = task_desc
         self.status = AgentStatus.BUSY.value
 
-    def clear_task(self, success: bool = True) -> None:
-        """清除当前任务"""
+    def clear_task(self, success: bool = True, record: bool = True) -> None:
+        """清除当前任务；record=False 时不计入完成/失败数（如会话缓存未命中的重发）"""
         self.current_task = None
         self.current_task_desc = None
         self.status = AgentStatus.IDLE.value
+        if not record:
+            return
         if success:
             self.tasks_completed += 1
         else:
@@ -247,9 +251,13 @@ class AgentMessage:
         """序列化为 JSON"""
         return json.dumps(asdict(self), ensure_ascii=False)
 
-    def to_bytes(self) -> bytes:
-        """序列化为字节（用于 ZMQ 传输）"""
-        return self.to_json().encode("utf-8")
+    def to_bytes(self, wire: "codec.WireFormat | None" = None) -> bytes:
+        """序列化为字节（用于 ZMQ 传输）；wire 为 None 时使用旧格式 JSON"""
+        # 浅拷贝字段即可（asdict 会深拷贝整个 payload）
+        data = {f.name: getattr(self, f.name) for f in fields(self)}
+        if wire is None:
+            return codec.encode_legacy(data)
+        return wire.encode(data)
 
     @classmethod
     def from_json(cls, json_str: str) -> "AgentMessage":
@@ -259,8 +267,8 @@ class AgentMessage:
 
     @classmethod
     def from_bytes(cls, data: bytes) -> "AgentMessage":
-        """从字节反序列化"""
-        return cls.from_json(data.decode("utf-8"))
+        """从字节反序列化（自动识别线路格式）"""
+        return cls(**codec.decode(data))
 
     def is_expired(self) -> bool:
         """检查消息是否过期"""
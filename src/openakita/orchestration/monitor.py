@@ -18,6 +18,7 @@ from typing import Any
 
 from .messages import AgentStatus
 from .registry import AgentRegistry
+from .task_queue import TaskQueue
 
 logger = logging.getLogger(__name__)
 
@@ -42,6 +43,8 @@ class PerformanceMetrics:
     # 系统指标
     pending_tasks: int = 0
     queue_depth: int = 0
+    queue_wait_p50_seconds: float = 0.0
+    queue_wait_p95_seconds: float = 0.0
 
 
 @dataclass
@@ -68,20 +71,24 @@ class AgentMonitor:
     ALERT_BUSY_RATIO_THRESHOLD = 0.9  # 繁忙比例
     ALERT_TASK_FAILURE_RATE = 0.3  # 任务失败率
     ALERT_AVG_DURATION_THRESHOLD = 60  # 平均任务时长（秒）
+    ALERT_QUEUE_WAIT_THRESHOLD = 30  # 排队等待 p95（秒）
 
     def __init__(
         self,
         registry: AgentRegistry,
         on_alert: Callable[[Alert], None] | None = None,
         metrics_history_size: int = 100,
+        task_queue: TaskQueue | None = None,
     ):
         """
         Args:
             registry: Agent 注册中心
             on_alert: 告警回调
             metrics_history_size: 指标历史保留数量
+            task_queue: Master 的任务队列（用于队列深度和等待时间指标）
         """
         self.registry = registry
+        self.task_queue = task_queue
         self.on_alert = on_alert
         self.metrics_history_size = metrics_history_size
 
@@ -158,6 +165,14 @@ class AgentMonitor:
             sum(1 for r in recent_results if r) / len(recent_results) if recent_results else 1.0
         )
 
+        # 队列指标
+        queue_depth = 0
+        wait_p50 = wait_p95 = 0.0
+        if self.task_queue is not None:
+            queue_depth = len(self.task_queue)
+            wait_p50 = self.task_queue.wait_percentile(0.5) or 0.0
+            wait_p95 = self.task_queue.wait_percentile(0.95) or 0.0
+
         return PerformanceMetrics(
             tasks_per_minute=tasks_per_minute,
             avg_task_duration_seconds=avg_duration,
@@ -166,6 +181,9 @@ class AgentMonitor:
             idle_agents=status_counts.get(AgentStatus.IDLE.value, 0),
             busy_agents=status_counts.get(AgentStatus.BUSY.value, 0),
             dead_agents=status_counts.get(AgentStatus.DEAD.value, 0),
+            queue_depth=queue_depth,
+            queue_wait_p50_seconds=wait_p50,
+            queue_wait_p95_seconds=wait_p95,
         )
 
     def record_task_completion(
@@ -223,6 +241,17 @@ class AgentMonitor:
                 metadata={"avg_duration": metrics.avg_task_duration_seconds},
             )
 
+        # 检查排队等待
+        if metrics.queue_wait_p95_seconds > self.ALERT_QUEUE_WAIT_THRESHOLD:
+            self._create_alert(
+                level="warning",
+                message=f"任务排队等待过长: p95 {metrics.queue_wait_p95_seconds:.1f}s",
+                metadata={
+                    "queue_depth": metrics.queue_depth,
+                    "wait_p95": metrics.queue_wait_p95_seconds,
+                },
+            )
+
     def _create_alert(
         self,
         level: str,
@@ -306,6 +335,11 @@ class AgentMonitor:
                 "busy": metrics.busy_agents,
                 "dead": metrics.dead_agents,
             },
+            "queue": {
+                "depth": metrics.queue_depth,
+                "wait_p50": f"{metrics.queue_wait_p50_seconds:.1f}s",
+                "wait_p95": f"{metrics.queue_wait_p95_seconds:.1f}s",
+            },
             "alerts": {
                 "total": len(self._alerts),
                 "unacknowledged": len([a for a in self._alerts if not a.acknowledged]),
@@ -4,13 +4,17 @@ Agent 注册中心
 管理所有活跃 Agent 的注册信息，提供:
 - Agent 注册/注销
 - 状态查询和监控
-- 空闲 Agent 查找
+- 空闲 Agent 查找（支持会话亲和）
 - 健康检查（心跳超时检测）
+- 按状态/类型索引（查询不扫描全部 Agent）
+- 延迟合并的原子持久化（后台线程定期写入，写文件不持有注册表锁）
 """
 
 import json
 import logging
+import os
 import threading
+from collections import OrderedDict
 from collections.abc import Callable
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -34,34 +38,58 @@ class AgentRegistry:
     设计说明:
     - 运行在主进程中
     - 使用线程锁保证并发安全
-    - 支持持久化到文件（可选）
+    - 支持持久化到文件（可选）：变更只置脏标记，由后台线程每 flush_interval 秒
+      合并写入一次（临时文件 + 原子替换），close() 时写入剩余变更
     """
 
     # 默认心跳超时（秒）
     DEFAULT_HEARTBEAT_TIMEOUT = 15
+    # 会话亲和表上限（按最近绑定淘汰）
+    MAX_SESSION_AFFINITY = 10000
+    # 默认持久化间隔（秒）
+    DEFAULT_FLUSH_INTERVAL = 1.0
 
     def __init__(
         self,
         heartbeat_timeout: int = DEFAULT_HEARTBEAT_TIMEOUT,
         storage_path: Path | None = None,
         on_status_change: Callable[[str, AgentStatus, AgentStatus], None] | None = None,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
     ):
         """
         Args:
             heartbeat_timeout: 心跳超时时间（秒）
             storage_path: 持久化存储路径（可选）
             on_status_change: 状态变更回调 (agent_id, old_status, new_status)
+            flush_interval: 持久化间隔（秒），<= 0 时只在 flush()/close() 时写入
         """
         self.heartbeat_timeout = heartbeat_timeout
         self.storage_path = storage_path
         self.on_status_change = on_status_change
+        self.flush_interval = flush_interval
 
         # Agent 注册表 {agent_id: AgentInfo}
         self._agents: dict[str, AgentInfo] = {}
 
+        # 索引 {status: {agent_id: AgentInfo}} / {type: {agent_id: AgentInfo}}
+        # 桶内按进入该状态的先后排序；_indexed_status 记录 Agent 当前所在的状态桶
+        self._by_status: dict[str, dict[str, AgentInfo]] = {}
+        self._by_type: dict[str, dict[str, AgentInfo]] = {}
+        self._indexed_status: dict[str, str] = {}
+
+        # 会话亲和 {session_id: agent_id}，Worker 进程内缓存了该会话的历史（不持久化）
+        self._session_affinity: OrderedDict[str, str] = OrderedDict()
+
         # 线程锁
         self._lock = threading.RLock()
 
+        # 持久化：脏标记 + 后台写入线程；_flush_lock 保证写入按快照顺序进行
+        self._dirty = False
+        self._flush_lock = threading.Lock()
+        self._flush_stop = threading.Event()
+        self._flush_thread: threading.Thread | None = None
+        self._saves = 0
+
         # 事件记录（最近 100 条）
         self._events: list[dict[str, Any]] = []
         self._max_events = 100
@@ -96,11 +124,16 @@ class AgentRegistry:
                     )
                     # 标记旧的为 DEAD
                     self._set_status(agent_id, AgentStatus.DEAD)
+                self._unindex(agent_id)
+
+            # 新进程没有会话缓存
+            self._unbind_agent_sessions(agent_id)
 
             # 注册
             agent_info.status = AgentStatus.IDLE.value
             agent_info.update_heartbeat()
             self._agents[agent_id] = agent_info
+            self._index(agent_info)
 
             self._record_event(
                 "register",
@@ -114,7 +147,7 @@ class AgentRegistry:
             logger.info(f"Agent registered: {agent_id} (type={agent_info.agent_type})")
 
             # 持久化
-            self._save()
+            self._mark_dirty()
 
             return True
 
@@ -135,6 +168,8 @@ class AgentRegistry:
 
             agent_info = self._agents[agent_id]
             del self._agents[agent_id]
+            self._unindex(agent_id)
+            self._unbind_agent_sessions(agent_id)
 
             self._record_event(
                 "unregister",
@@ -147,7 +182,7 @@ class AgentRegistry:
             logger.info(f"Agent unregistered: {agent_id}")
 
             # 持久化
-            self._save()
+            self._mark_dirty()
 
             return True
 
@@ -179,6 +214,8 @@ class AgentRegistry:
                 existing.current_task_desc = agent_info.current_task_desc
                 existing.tasks_completed = agent_info.tasks_completed
                 existing.tasks_failed = agent_info.tasks_failed
+                if self._index(existing):
+                    self._mark_dirty()
 
             # 如果之前是 DEAD 状态，恢复为 IDLE
             if existing.status == AgentStatus.DEAD.value:
@@ -212,6 +249,7 @@ class AgentRegistry:
                         f"({elapsed:.1f}s > {self.heartbeat_timeout}s)"
                     )
                     self._set_status(agent_id, AgentStatus.DEAD)
+                    self._unbind_agent_sessions(agent_id)
                     dead_agents.append(agent_id)
 
         return dead_agents
@@ -231,17 +269,18 @@ class AgentRegistry:
     def list_by_status(self, status: AgentStatus) -> list[AgentInfo]:
         """按状态列出 Agent"""
         with self._lock:
-            return [a for a in self._agents.values() if a.status == status.value]
+            return list(self._by_status.get(status.value, {}).values())
 
     def list_by_type(self, agent_type: AgentType) -> list[AgentInfo]:
         """按类型列出 Agent"""
         with self._lock:
-            return [a for a in self._agents.values() if a.agent_type == agent_type.value]
+            return list(self._by_type.get(agent_type.value, {}).values())
 
     def find_idle_agent(
         self,
         capabilities: list[str] | None = None,
         exclude_ids: list[str] | None = None,
+        session_id: str | None = None,
     ) -> AgentInfo | None:
         """
         查找空闲的 Agent
@@ -249,6 +288,7 @@ class AgentRegistry:
         Args:
             capabilities: 需要的能力列表（可选）
             exclude_ids: 排除的 Agent ID 列表
+            session_id: 会话 ID（可选），绑定的 Agent 空闲时优先返回
 
         Returns:
             找到的 Agent 或 None
@@ -258,15 +298,13 @@ class AgentRegistry:
         with self._lock:
             candidates = []
 
-            for agent_id, agent_info in self._agents.items():
+            # 只遍历 IDLE 状态的 Agent
+            idle_agents = self._by_status.get(AgentStatus.IDLE.value, {})
+            for agent_id, agent_info in idle_agents.items():
                 # 跳过排除的
                 if agent_id in exclude_ids:
                     continue
 
-                # 必须是 IDLE 状态
-                if agent_info.status != AgentStatus.IDLE.value:
-                    continue
-
                 # 必须是 Worker 类型
                 if agent_info.agent_type not in (
                     AgentType.WORKER.value,
@@ -284,9 +322,37 @@ class AgentRegistry:
             if not candidates:
                 return None
 
+            # 会话亲和：上次服务该会话的 Agent 空闲则继续使用
+            if session_id:
+                bound_id = self._session_affinity.get(session_id)
+                for agent_info in candidates:
+                    if agent_info.agent_id == bound_id:
+                        return agent_info
+
             # 返回任务完成数最少的（负载均衡）
             return min(candidates, key=lambda a: a.tasks_completed)
 
+    # ==================== 会话亲和 ====================
+
+    def bind_session(self, session_id: str, agent_id: str) -> None:
+        """记录会话由哪个 Agent 服务"""
+        with self._lock:
+            self._session_affinity[session_id] = agent_id
+            self._session_affinity.move_to_end(session_id)
+            while len(self._session_affinity) > self.MAX_SESSION_AFFINITY:
+                self._session_affinity.popitem(last=False)
+
+    def get_session_agent(self, session_id: str) -> str | None:
+        """获取会话绑定的 Agent ID"""
+        with self._lock:
+            return self._session_affinity.get(session_id)
+
+    def _unbind_agent_sessions(self, agent_id: str) -> None:
+        """解除 Agent 的所有会话绑定（Agent 注销 / 死亡 / 重启后缓存失效）"""
+        stale = [s for s, a in self._session_affinity.items() if a == agent_id]
+        for session_id in stale:
+            del self._session_affinity[session_id]
+
     def count(self) -> int:
         """返回 Agent 数量"""
         with self._lock:
@@ -295,11 +361,38 @@ class AgentRegistry:
     def count_by_status(self) -> dict[str, int]:
         """按状态统计数量"""
         with self._lock:
-            counts = {}
-            for agent_info in self._agents.values():
-                status = agent_info.status
-                counts[status] = counts.get(status, 0) + 1
-            return counts
+            return {status: len(agents) for status, agents in self._by_status.items() if agents}
+
+    # ==================== 索引 ====================
+
+    def _index(self, agent_info: AgentInfo) -> bool:
+        """
+        将 Agent 放入当前状态 / 类型的索引桶
+
+        所有修改 AgentInfo.status 的路径都必须在持锁状态下调用。
+
+        Returns:
+            状态桶是否发生变化
+        """
+        agent_id = agent_info.agent_id
+        old_status = self._indexed_status.get(agent_id)
+        if old_status == agent_info.status:
+            return False
+
+        if old_status is not None:
+            self._by_status[old_status].pop(agent_id, None)
+        self._by_status.setdefault(agent_info.status, {})[agent_id] = agent_info
+        self._by_type.setdefault(agent_info.agent_type, {})[agent_id] = agent_info
+        self._indexed_status[agent_id] = agent_info.status
+        return True
+
+    def _unindex(self, agent_id: str) -> None:
+        """从索引中移除 Agent"""
+        old_status = self._indexed_status.pop(agent_id, None)
+        if old_status is not None:
+            self._by_status[old_status].pop(agent_id, None)
+        for agents in self._by_type.values():
+            agents.pop(agent_id, None)
 
     # ==================== 状态管理 ====================
 
@@ -322,6 +415,8 @@ class AgentRegistry:
             agent_info = self._agents[agent_id]
             old_status = agent_info.status
             agent_info.set_task(task_id, task_desc)
+            self._index(agent_info)
+            self._mark_dirty()
 
             if old_status != agent_info.status:
                 self._trigger_status_change(agent_id, old_status, agent_info.status)
@@ -337,8 +432,8 @@ class AgentRegistry:
 
             return True
 
-    def clear_agent_task(self, agent_id: str, success: bool = True) -> bool:
-        """清除 Agent 当前任务"""
+    def clear_agent_task(self, agent_id: str, success: bool = True, record: bool = True) -> bool:
+        """清除 Agent 当前任务；record=False 时不计入完成/失败数，也不记录事件"""
         with self._lock:
             if agent_id not in self._agents:
                 return False
@@ -346,11 +441,16 @@ class AgentRegistry:
             agent_info = self._agents[agent_id]
             task_id = agent_info.current_task
             old_status = agent_info.status
-            agent_info.clear_task(success)
+            agent_info.clear_task(success, record=record)
+            self._index(agent_info)
+            self._mark_dirty()
 
             if old_status != agent_info.status:
                 self._trigger_status_change(agent_id, old_status, agent_info.status)
 
+            if not record:
+                return True
+
             self._record_event(
                 "task_completed" if success else "task_failed",
                 {
@@ -370,8 +470,10 @@ class AgentRegistry:
         agent_info = self._agents[agent_id]
         old_status = agent_info.status
         agent_info.set_status(status)
+        self._index(agent_info)
 
         if old_status != status.value:
+            self._mark_dirty()
             self._trigger_status_change(agent_id, old_status, status.value)
             self._record_event(
                 "status_changed",
@@ -503,6 +605,7 @@ class AgentRegistry:
                     # 加载时标记为 DEAD（需要重新注册）
                     agent_info.status = AgentStatus.DEAD.value
                     self._agents[agent_info.agent_id] = agent_info
+                    self._index(agent_info)
                 except Exception as e:
                     logger.warning(f"Failed to load agent: {e}")
 
@@ -511,24 +614,80 @@ class AgentRegistry:
         except Exception as e:
             logger.error(f"Failed to load registry: {e}")
 
-    def _save(self) -> None:
-        """保存到文件"""
+    def _mark_dirty(self) -> None:
+        """标记有未保存的变更（持锁调用），由后台线程合并写入"""
         if not self.storage_path:
             return
 
-        try:
-            self.storage_path.parent.mkdir(parents=True, exist_ok=True)
+        self._dirty = True
+        if (
+            self.flush_interval > 0
+            and self._flush_thread is None
+            and not self._flush_stop.is_set()
+        ):
+            self._flush_thread = threading.Thread(
+                target=self._flush_loop, name="AgentRegistryFlush", daemon=True
+            )
+            self._flush_thread.start()
+
+    def _flush_loop(self) -> None:
+        """后台写入循环"""
+        while not self._flush_stop.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self) -> bool:
+        """
+        将未保存的变更写入文件
+
+        只在持锁期间生成快照，序列化和写文件在锁外进行。
+
+        Returns:
+            是否写入了文件
+        """
+        if not self.storage_path:
+            return False
+
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty:
+                    return False
+                self._dirty = False
+                agents = [a.to_dict() for a in self._agents.values()]
 
             data = {
-                "agents": [a.to_dict() for a in self._agents.values()],
+                "agents": agents,
                 "updated_at": datetime.now().isoformat(),
             }
+            try:
+                self._write_atomic(data)
+            except Exception as e:
+                with self._lock:
+                    self._dirty = True
+                logger.error(f"Failed to save registry: {e}")
+                return False
 
-            with open(self.storage_path, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            self._saves += 1
+            return True
 
-        except Exception as e:
-            logger.error(f"Failed to save registry: {e}")
+    def _write_atomic(self, data: dict[str, Any]) -> None:
+        """写入临时文件后原子替换，进程中途退出不会留下半截文件"""
+        self.storage_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.storage_path.with_suffix(self.storage_path.suffix + ".tmp")
+
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp, self.storage_path)
+
+    def close(self) -> None:
+        """停止后台写入线程并写入剩余变更"""
+        self._flush_stop.set()
+        if self._flush_thread is not None:
+            self._flush_thread.join(timeout=5)
+            self._flush_thread = None
+        self.flush()
 
     # ==================== 清理 ====================
 
@@ -558,10 +717,11 @@ class AgentRegistry:
 
             for agent_id in to_remove:
                 del self._agents[agent_id]
+                self._unindex(agent_id)
                 cleaned += 1
                 logger.info(f"Cleaned up dead agent: {agent_id}")
 
             if cleaned > 0:
-                self._save()
+                self._mark_dirty()
 
         return cleaned
@@ -0,0 +1,80 @@
+"""
+Session 历史增量同步
+
+Master 按会话把任务粘到上次服务该会话的 Worker（AgentRegistry 会话亲和），
+并只发送上次同步之后新增的消息；Worker 在本地缓存会话历史，拼接后执行。
+
+TaskPayload.context 中的两种形式:
+- 全量: {"session_messages": [...]}
+- 增量: {"session_messages_delta": [...], "session_base": n, "session_digest": d}
+  表示"在你缓存的前 n 条消息（末条摘要为 d）之后追加这些消息"
+
+Worker 缓存缺失或不一致时返回 metadata={"session_cache_miss": True} 的失败结果，
+Master 收到后改发全量历史。
+"""
+
+import hashlib
+import json
+from collections import OrderedDict
+
+# Worker 端缓存的会话数上限
+DEFAULT_MAX_SESSIONS = 64
+
+SESSION_CACHE_MISS = "session_cache_miss"
+
+
+def history_digest(messages: list[dict], count: int | None = None) -> str:
+    """前 count 条消息的摘要（条数 + 末条内容），用于校验双方前缀一致
+
+    会话被截断 / 压缩后末条位置或内容变化，摘要即不再匹配。
+    """
+    count = len(messages) if count is None else count
+    last = messages[count - 1] if count else None
+    raw = json.dumps([count, last], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class SessionCache:
+    """Worker 端的会话历史缓存（LRU）"""
+
+    def __init__(self, max_sessions: int = DEFAULT_MAX_SESSIONS):
+        self.max_sessions = max_sessions
+        self._sessions: OrderedDict[str, list[dict]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def put(self, session_id: str, messages: list[dict]) -> None:
+        self._sessions[session_id] = list(messages)
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def resolve(self, session_id: str, context: dict) -> list[dict] | None:
+        """从任务上下文还原完整历史并更新缓存；增量无法拼接时返回 None"""
+        if "session_messages_delta" not in context:
+            messages = context.get("session_messages", [])
+            if messages:
+                self.put(session_id, messages)
+            return messages
+
+        cached = self._sessions.get(session_id)
+        base = context.get("session_base", 0)
+        if (
+            cached is None
+            or len(cached) < base
+            or history_digest(cached, base) != context.get("session_digest")
+        ):
+            self.misses += 1
+            self._sessions.pop(session_id, None)
+            return None
+
+        self.hits += 1
+        messages = cached[:base] + list(context["session_messages_delta"])
+        self.put(session_id, messages)
+        return messages
+
+    def stats(self) -> dict:
+        return {"sessions": len(self._sessions), "hits": self.hits, "misses": self.misses}
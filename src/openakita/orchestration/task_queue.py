@@ -0,0 +1,174 @@
+"""
+Master 任务队列
+
+Worker 全忙时任务在 Master 排队，而不是退回本地处理:
+- 优先级: TaskPayload.priority 数字越小越先出队
+- 有界深度: 超过 max_depth 时拒绝入队（背压），由调用方提示用户稍后重试
+- 会话公平: 同一优先级内按会话轮转出队，单个会话的突发不会饿死其他会话
+- 排队时长: 记录近期出队任务的等待时间，提供分位数
+"""
+
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+
+from .messages import TaskPayload
+
+# 保留的近期等待时间样本数（用于分位数）
+WAIT_SAMPLE_WINDOW = 256
+
+
+class QueueFullError(Exception):
+    """任务队列已满"""
+
+
+@dataclass
+class QueuedTask:
+    """排队中的任务"""
+
+    task: TaskPayload
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def session_key(self) -> str:
+        return self.task.session_id or ""
+
+
+def _quantile(samples: list[float], q: float) -> float:
+    """最近秩法分位数"""
+    ordered = sorted(samples)
+    rank = max(0, math.ceil(q * len(ordered)) - 1)
+    return ordered[rank]
+
+
+class TaskQueue:
+    """
+    带优先级、会话轮转与深度上限的任务队列
+
+    仅在 Master 的事件循环内使用，不加锁。
+    """
+
+    def __init__(self, max_depth: int = 100, wait_window: int = WAIT_SAMPLE_WINDOW):
+        """
+        Args:
+            max_depth: 最大排队任务数，<= 0 表示不限
+            wait_window: 保留的等待时间样本数
+        """
+        self.max_depth = max_depth
+        # {priority: OrderedDict[session_key, deque[QueuedTask]]}，会话按轮转顺序排列
+        self._levels: dict[int, OrderedDict[str, deque[QueuedTask]]] = {}
+        self._depth = 0
+        self._waits: deque[float] = deque(maxlen=wait_window)
+
+        self._enqueued = 0
+        self._dispatched = 0
+        self._rejected = 0
+
+    def __len__(self) -> int:
+        return self._depth
+
+    @property
+    def is_full(self) -> bool:
+        return 0 < self.max_depth <= self._depth
+
+    def put(self, task: TaskPayload, future: asyncio.Future) -> QueuedTask:
+        """入队；队列已满时抛出 QueueFullError"""
+        if self.is_full:
+            self._rejected += 1
+            raise QueueFullError(f"Task queue full ({self._depth}/{self.max_depth})")
+
+        entry = QueuedTask(task=task, future=future)
+        sessions = self._levels.setdefault(task.priority, OrderedDict())
+        sessions.setdefault(entry.session_key, deque()).append(entry)
+        self._depth += 1
+        self._enqueued += 1
+        return entry
+
+    def pop(self) -> QueuedTask | None:
+        """取出下一个任务：最高优先级中轮到的会话的最早任务；跳过已结束（超时/取消）的任务"""
+        while self._depth:
+            priority = min(self._levels)
+            sessions = self._levels[priority]
+            session_key, tasks = next(iter(sessions.items()))
+            entry = tasks.popleft()
+            self._depth -= 1
+
+            # 轮转：该会话移到队尾，空会话 / 空优先级直接移除
+            del sessions[session_key]
+            if tasks:
+                sessions[session_key] = tasks
+            if not sessions:
+                del self._levels[priority]
+
+            if entry.future.done():
+                continue
+
+            self._waits.append(time.monotonic() - entry.enqueued_at)
+            self._dispatched += 1
+            return entry
+        return None
+
+    def remove(self, task_id: str) -> bool:
+        """移除指定任务（排队期间超时），返回是否找到"""
+        for priority, sessions in list(self._levels.items()):
+            for session_key, tasks in list(sessions.items()):
+                for entry in tasks:
+                    if entry.task.task_id != task_id:
+                        continue
+                    tasks.remove(entry)
+                    self._depth -= 1
+                    if not tasks:
+                        del sessions[session_key]
+                    if not sessions:
+                        del self._levels[priority]
+                    return True
+        return False
+
+    def drain(self) -> list[QueuedTask]:
+        """清空队列并返回剩余任务（Master 停止时使用）"""
+        entries = [
+            entry
+            for sessions in self._levels.values()
+            for tasks in sessions.values()
+            for entry in tasks
+        ]
+        self._levels.clear()
+        self._depth = 0
+        return entries
+
+    def oldest_wait(self) -> float:
+        """队列中最早入队任务已等待的时长（秒），空队列为 0"""
+        heads = [
+            tasks[0].enqueued_at
+            for sessions in self._levels.values()
+            for tasks in sessions.values()
+        ]
+        return time.monotonic() - min(heads) if heads else 0.0
+
+    def wait_percentile(self, q: float) -> float | None:
+        """近期出队任务等待时间的 q 分位数（秒）；无样本时返回 None"""
+        if not self._waits:
+            return None
+        return _quantile(list(self._waits), q)
+
+    def stats(self) -> dict:
+        def _r(v: float | None) -> float | None:
+            return None if v is None else round(v, 3)
+
+        return {
+            "depth": self._depth,
+            "max_depth": self.max_depth,
+            "sessions": sum(len(s) for s in self._levels.values()),
+            "by_priority": {
+                p: sum(len(t) for t in s.values()) for p, s in sorted(self._levels.items())
+            },
+            "enqueued": self._enqueued,
+            "dispatched": self._dispatched,
+            "rejected": self._rejected,
+            "wait_p50_seconds": _r(self.wait_percentile(0.5)),
+            "wait_p95_seconds": _r(self.wait_percentile(0.95)),
+            "wait_max_seconds": _r(max(self._waits) if self._waits else None),
+        }
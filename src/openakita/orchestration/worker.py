@@ -11,7 +11,7 @@ WorkerAgent - 工作进程
 - 每个 WorkerAgent 是一个独立进程
 - 使用 ZMQ DEALER 与 Master 通信
 - 内置完整的 Agent 实例用于任务执行
-- Session 历史通过消息传递，不本地保存
+- Session 历史通过消息传递；Master 粘性路由会话，本地缓存历史以便只接收增量
 - 记忆系统使用共享文件存储
 """
 
@@ -25,6 +25,7 @@ from pathlib import Path
 from typing import Any
 
 from .bus import BusConfig, WorkerBus
+from .codec import WireFormat, wire_offer
 from .messages import (
     AgentInfo,
     AgentMessage,
@@ -36,6 +37,7 @@ from .messages import (
     create_register_command,
     create_unregister_command,
 )
+from .session_cache import SESSION_CACHE_MISS, SessionCache
 
 logger = logging.getLogger(__name__)
 
@@ -47,7 +49,7 @@ class WorkerAgent:
     在独立进程中运行，执行 Master 分发的任务
 
     特点:
-    - 无状态：不保存 Session 历史（通过消息传递）
+    - 近似无状态：Session 历史以 Master 为准，本地只做可丢弃的缓存
     - 共享记忆：使用共享文件存储
     - 心跳机制：定期向 Master 报告状态
     """
@@ -101,6 +103,9 @@ class WorkerAgent:
         self._heartbeat_task: asyncio.Task | None = None
         self._current_task: TaskPayload | None = None
 
+        # 会话历史缓存（配合 Master 的增量发送）
+        self._session_cache = SessionCache()
+
         # 信号处理
         self._setup_signal_handlers()
 
@@ -144,7 +149,9 @@ class WorkerAgent:
         self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
 
         self._running = True
-        self.agent_info.set_status(AgentStatus.IDLE)
+        # 注册后 Master 可能已派发任务，不覆盖 BUSY
+        if self.agent_info.status != AgentStatus.BUSY.value:
+            self.agent_info.set_status(AgentStatus.IDLE)
 
         logger.info(f"WorkerAgent {self.agent_id} started")
 
@@ -197,16 +204,25 @@ class WorkerAgent:
     # ==================== 注册/注销 ====================
 
     async def _register(self) -> None:
-        """向 Master 注册"""
+        """向 Master 注册，并按响应切换线路格式"""
+        self.agent_info.metadata["wire"] = wire_offer()
         message = create_register_command(self.agent_info)
 
         try:
-            await self.bus._send_to_master(message)
-            logger.info(f"Worker {self.agent_id}: registration sent")
+            response = await self.bus.request_master(message)
         except Exception as e:
             logger.error(f"Worker {self.agent_id}: registration failed: {e}")
             raise
 
+        if response is None:
+            logger.warning(f"Worker {self.agent_id}: no registration response, using JSON")
+            return
+
+        wire = response.payload.get("wire")
+        if wire:
+            self.bus.set_wire_format(WireFormat.from_dict(wire))
+        logger.info(f"Worker {self.agent_id}: registered (wire={wire or 'json'})")
+
     async def _unregister(self) -> None:
         """向 Master 注销"""
         message = create_unregister_command(self.agent_id)
@@ -262,7 +278,10 @@ class WorkerAgent:
 
         # 清除任务状态
         self._current_task = None
-        self.agent_info.clear_task(success=result.success)
+        # 会话缓存未命中由 Master 重发，不计为失败
+        self.agent_info.clear_task(
+            success=result.success, record=not result.metadata.get(SESSION_CACHE_MISS)
+        )
 
         # 更新统计
         result.duration_seconds = duration
@@ -304,8 +323,17 @@ class WorkerAgent:
 
     async def _execute_chat_task(self, task: TaskPayload) -> TaskResult:
         """执行对话任务"""
-        session_messages = task.context.get("session_messages", [])
         session_id = task.session_id or "worker"
+        session_messages = self._session_cache.resolve(session_id, task.context)
+        if session_messages is None:
+            # 增量无法拼接（缓存被淘汰 / 进程重启），请 Master 重发全量
+            logger.info(f"Worker {self.agent_id}: session cache miss for {session_id}")
+            return TaskResult(
+                task_id=task.task_id,
+                success=False,
+                error="session cache miss",
+                metadata={SESSION_CACHE_MISS: True},
+            )
 
         try:
             if session_messages:
@@ -419,6 +447,7 @@ class WorkerAgent:
             "tasks_failed": self.agent_info.tasks_failed,
             "current_task": self._current_task.task_id if self._current_task else None,
             "uptime": self._calculate_uptime(),
+            "session_cache": self._session_cache.stats(),
         }
 
     def _calculate_uptime(self) -> str:
@@ -10,17 +10,38 @@ Prompt Builder - 消息组装模块
 4. Catalogs 层: tools + skills + mcp 清单
 5. Memory 层: retriever 输出
 6. User 层: user.summary
+
+输出布局（prompt caching）:
+    稳定前缀 System(Identity) / User / Tool
+    PROMPT_CACHE_BOUNDARY
+    易变后缀 Runtime(Persona + 运行时信息) / Developer(会话规则 + 记忆)
+前缀在会话内逐字节不变，Anthropic 端点在边界处打 cache_control 断点。
+
+段落级缓存:
+    identity / user / catalogs / 运行环境事实按指纹（文件 mtime、清单版本号、预算）
+    memo，每轮只重建指纹变化的段落；命中统计见 get_prompt_debug_info()["section_cache"]。
 """
 
+import itertools
 import logging
 import os
 import platform
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
 from datetime import datetime
 from pathlib import Path
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Any, Optional, TypeVar
 
+from ..llm.types import PROMPT_CACHE_BOUNDARY
 from .budget import BudgetConfig, apply_budget, estimate_tokens
-from .compiler import check_compiled_outdated, compile_all, get_compiled_content
+from .compiler import (
+    compile_all,
+    get_compiled_at,
+    get_compiled_content,
+    is_compiled_at_outdated,
+)
 from .retriever import retrieve_memory
 
 if TYPE_CHECKING:
@@ -32,6 +53,8 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+_T = TypeVar("_T")
+
 # ---------------------------------------------------------------------------
 # 系统策略（代码硬编码，升级自动生效，用户不可删除）
 # 新增系统级规则只需在此追加，无需迁移用户文件。
@@ -84,6 +107,118 @@ _DEFAULT_USER_POLICIES = """\
 **陪伴型回复**：自然对话，符合当前角色风格"""
 
 
+# ---------------------------------------------------------------------------
+# 段落级缓存
+# ---------------------------------------------------------------------------
+_RUNTIME_FACTS_TTL_SECONDS = 300  # PATH 工具 / Python 环境探测结果的最长复用时间
+
+
+class _SectionCache:
+    """段落 memo：(段落名, 指纹) -> 结果，LRU 淘汰，按段落统计命中/未命中"""
+
+    def __init__(self, max_entries: int = 64) -> None:
+        self._entries: OrderedDict[tuple, Any] = OrderedDict()
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._hits: dict[str, int] = {}
+        self._misses: dict[str, int] = {}
+
+    def get(self, name: str, fingerprint: tuple, build: Callable[[], _T]) -> _T:
+        key = (name, fingerprint)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._hits[name] = self._hits.get(name, 0) + 1
+                return self._entries[key]
+            self._misses[name] = self._misses.get(name, 0) + 1
+
+        value = build()
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._hits.clear()
+            self._misses.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            names = sorted(set(self._hits) | set(self._misses))
+            sections = {
+                n: {"hits": self._hits.get(n, 0), "misses": self._misses.get(n, 0)} for n in names
+            }
+            entries = len(self._entries)
+        hits = sum(v["hits"] for v in sections.values())
+        misses = sum(v["misses"] for v in sections.values())
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            "entries": entries,
+            "sections": sections,
+        }
+
+
+_section_cache = _SectionCache()
+_catalog_tokens = itertools.count(1)
+
+
+def _file_stamp(path: Path) -> tuple[int, int] | None:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _dir_stamp(directory: Path) -> tuple:
+    """目录下各文件的 (name, mtime_ns, size)"""
+    try:
+        with os.scandir(directory) as it:
+            return tuple(sorted(
+                (e.name, e.stat().st_mtime_ns, e.stat().st_size) for e in it if e.is_file()
+            ))
+    except OSError:
+        return ()
+
+
+def _catalog_stamp(catalog: Any) -> tuple | None:
+    """清单指纹：实例令牌 + version（+ 技能注册表大小）。
+
+    不用 id(catalog)：对象释放后 id 可能被新实例复用，导致误命中。
+    """
+    if catalog is None:
+        return None
+    token = getattr(catalog, "_prompt_section_token", None)
+    if token is None:
+        token = next(_catalog_tokens)
+        try:
+            catalog._prompt_section_token = token
+        except Exception:
+            return ("uncacheable", token)
+    registry = getattr(catalog, "registry", None)
+    try:
+        registry_size = len(registry) if registry is not None else None
+    except TypeError:
+        registry_size = None
+    return (token, getattr(catalog, "version", 0), registry_size)
+
+
+def _compiled_outdated(identity_dir: Path) -> bool:
+    """check_compiled_outdated 的缓存版：仅在 .compiled_at 变化时重新读取"""
+    timestamp_file = identity_dir / "compiled" / ".compiled_at"
+    compiled_at = _section_cache.get(
+        "compiled_at",
+        (str(timestamp_file), _file_stamp(timestamp_file)),
+        lambda: get_compiled_at(identity_dir),
+    )
+    return is_compiled_at_outdated(compiled_at)
+
+
 def build_system_prompt(
     identity_dir: Path,
     tools_enabled: bool = True,
@@ -120,24 +255,39 @@ def build_system_prompt(
         budget_config = BudgetConfig()
 
     # 目标：在单个 system_prompt 字符串内显式分段，模拟 system/developer/user/tool 结构
+    # system/user/tool 为稳定前缀；runtime/developer 含时间、记忆等易变内容，放在缓存边界之后
     system_parts: list[str] = []
+    runtime_parts: list[str] = []
     developer_parts: list[str] = []
     tool_parts: list[str] = []
     user_parts: list[str] = []
 
-    # 1. 检查并加载编译产物
-    if check_compiled_outdated(identity_dir):
+    # 1. 检查并加载编译产物（按文件 mtime 缓存）
+    if _compiled_outdated(identity_dir):
         logger.info("Compiled files outdated, recompiling...")
         compile_all(identity_dir)
 
-    compiled = get_compiled_content(identity_dir)
+    compiled_fp = (str(identity_dir), _dir_stamp(identity_dir / "compiled"))
+    compiled = _section_cache.get(
+        "compiled", compiled_fp, lambda: get_compiled_content(identity_dir)
+    )
 
     # 2. 构建 Identity 层
-    identity_section = _build_identity_section(
-        compiled=compiled,
-        identity_dir=identity_dir,
-        tools_enabled=tools_enabled,
-        budget_tokens=budget_config.identity_budget,
+    identity_fp = (
+        compiled_fp,
+        _file_stamp(identity_dir / "prompts" / "policies.md"),
+        tools_enabled,
+        budget_config.identity_budget,
+    )
+    identity_section = _section_cache.get(
+        "identity",
+        identity_fp,
+        lambda: _build_identity_section(
+            compiled=compiled,
+            identity_dir=identity_dir,
+            tools_enabled=tools_enabled,
+            budget_tokens=budget_config.identity_budget,
+        ),
     )
     if identity_section:
         system_parts.append(identity_section)
@@ -146,11 +296,11 @@ def build_system_prompt(
     if persona_manager:
         persona_section = _build_persona_section(persona_manager)
         if persona_section:
-            system_parts.append(persona_section)
+            runtime_parts.append(persona_section)
 
     # 3. 构建 Runtime 层
     runtime_section = _build_runtime_section()
-    system_parts.append(runtime_section)
+    runtime_parts.append(runtime_section)
 
     # 3.5 构建会话类型规则（建议 8）
     persona_active = persona_manager.is_persona_active() if persona_manager else False
@@ -158,13 +308,24 @@ def build_system_prompt(
     if session_rules:
         developer_parts.append(session_rules)
 
-    # 4. 构建 Catalogs 层
-    catalogs_section = _build_catalogs_section(
-        tool_catalog=tool_catalog,
-        skill_catalog=skill_catalog,
-        mcp_catalog=mcp_catalog,
-        budget_tokens=budget_config.catalogs_budget,
-        include_tools_guide=include_tools_guide,
+    # 4. 构建 Catalogs 层（按清单版本号缓存）
+    catalogs_fp = (
+        _catalog_stamp(tool_catalog),
+        _catalog_stamp(skill_catalog),
+        _catalog_stamp(mcp_catalog),
+        budget_config.catalogs_budget,
+        include_tools_guide,
+    )
+    catalogs_section = _section_cache.get(
+        "catalogs",
+        catalogs_fp,
+        lambda: _build_catalogs_section(
+            tool_catalog=tool_catalog,
+            skill_catalog=skill_catalog,
+            mcp_catalog=mcp_catalog,
+            budget_tokens=budget_config.catalogs_budget,
+            include_tools_guide=include_tools_guide,
+        ),
     )
     if catalogs_section:
         tool_parts.append(catalogs_section)
@@ -182,28 +343,43 @@ def build_system_prompt(
         developer_parts.append(memory_section)
 
     # 6. 构建 User 层
-    user_section = _build_user_section(
-        compiled=compiled,
-        budget_tokens=budget_config.user_budget,
+    user_fp = (compiled_fp, budget_config.user_budget)
+    user_section = _section_cache.get(
+        "user",
+        user_fp,
+        lambda: _build_user_section(compiled=compiled, budget_tokens=budget_config.user_budget),
     )
     if user_section:
         user_parts.append(user_section)
 
-    # 组装最终提示词
-    sections: list[str] = []
+    # 组装最终提示词：稳定前缀 + 缓存边界 + 易变后缀
+    stable: list[str] = []
     if system_parts:
-        sections.append("## System\n\n" + "\n\n".join(system_parts))
-    if developer_parts:
-        sections.append("## Developer\n\n" + "\n\n".join(developer_parts))
+        stable.append("## System\n\n" + "\n\n".join(system_parts))
     if user_parts:
-        sections.append("## User\n\n" + "\n\n".join(user_parts))
+        stable.append("## User\n\n" + "\n\n".join(user_parts))
     if tool_parts:
-        sections.append("## Tool\n\n" + "\n\n".join(tool_parts))
+        stable.append("## Tool\n\n" + "\n\n".join(tool_parts))
 
-    system_prompt = "\n\n---\n\n".join(sections)
+    volatile: list[str] = []
+    if runtime_parts:
+        volatile.append("## Runtime\n\n" + "\n\n".join(runtime_parts))
+    if developer_parts:
+        volatile.append("## Developer\n\n" + "\n\n".join(developer_parts))
 
-    # 记录 token 统计
-    total_tokens = estimate_tokens(system_prompt)
+    system_prompt = "\n\n---\n\n".join(stable)
+    stable_tokens = _section_cache.get(
+        "stable_tokens",
+        (identity_fp, catalogs_fp, user_fp),
+        lambda: estimate_tokens(system_prompt),
+    )
+    volatile_text = ""
+    if volatile:
+        volatile_text = "\n\n---\n\n".join(volatile)
+        system_prompt += f"\n\n{PROMPT_CACHE_BOUNDARY}\n\n" + volatile_text
+
+    # 记录 token 统计（稳定前缀的估算结果随段落一起缓存）
+    total_tokens = stable_tokens + estimate_tokens(volatile_text)
     logger.info(f"System prompt built: {total_tokens} tokens")
 
     return system_prompt
@@ -328,7 +504,74 @@ def _get_current_time(timezone_name: str = "Asia/Shanghai") -> str:
 
 
 def _build_runtime_section() -> str:
-    """构建 Runtime 层（运行时信息）"""
+    """构建 Runtime 层（运行时信息）
+
+    时间和工具状态每次实时生成；Python 环境、PATH 工具等探测结果按
+    (cwd, PATH, 时间片) 缓存，避免每轮都执行 which / 子进程校验。
+    """
+    from ..config import settings
+
+    current_time = _get_current_time(settings.scheduler_timezone)
+    facts = _section_cache.get(
+        "runtime_facts",
+        (
+            os.getcwd(),
+            os.environ.get("PATH", ""),
+            int(time.monotonic() // _RUNTIME_FACTS_TTL_SECONDS),
+        ),
+        _collect_runtime_facts,
+    )
+
+    # --- 工具可用性 ---
+    tool_status = []
+    try:
+        browser_lock = settings.project_root / "data" / "browser.lock"
+        if browser_lock.exists():
+            tool_status.append("- **浏览器**: 可能已启动（检测到 lock 文件）")
+        else:
+            tool_status.append("- **浏览器**: 未启动（需要先调用 browser_open）")
+    except Exception:
+        tool_status.append("- **浏览器**: 状态未知")
+
+    try:
+        mcp_config = settings.project_root / "data" / "mcp_servers.json"
+        if mcp_config.exists():
+            tool_status.append("- **MCP 服务**: 配置已存在")
+        else:
+            tool_status.append("- **MCP 服务**: 未配置")
+    except Exception:
+        tool_status.append("- **MCP 服务**: 状态未知")
+
+    tool_status_text = "\n".join(tool_status) if tool_status else "- 工具状态: 正常"
+
+    return f"""## 运行环境
+
+- **OpenAkita 版本**: {facts["version_str"]}
+- **部署模式**: {facts["deploy_mode"]}
+- **当前时间**: {current_time}
+- **操作系统**: {platform.system()} {platform.release()} ({platform.machine()})
+- **当前工作目录**: {os.getcwd()}
+- **工作区信息**: 需要操作系统文件（日志/配置/数据/截图等）时，先调用 `get_workspace_map` 获取目录布局
+- **临时目录**: data/temp/{facts["shell_hint"]}
+
+### Python 环境
+{facts["python_info"]}
+
+### 系统环境
+- **系统编码**: {facts["system_encoding"]}
+- **默认语言环境**: {facts["locale_str"]}
+- **Shell**: {facts["shell_type"]}
+- **PATH 可用工具**: {facts["path_tools_str"]}
+
+## 工具可用性
+{tool_status_text}
+
+⚠️ **重要**：服务重启后浏览器、变量、连接等状态会丢失，执行任务前必须通过工具检查实时状态。
+如果工具不可用，允许纯文本回复并说明限制。"""
+
+
+def _collect_runtime_facts() -> dict[str, str]:
+    """探测部署模式 / Python 环境 / PATH 工具等相对稳定的运行时事实"""
     import locale as _locale
     import shutil as _shutil
     import sys as _sys
@@ -342,8 +585,6 @@ def _build_runtime_section() -> str:
         verify_python_executable,
     )
 
-    current_time = _get_current_time(settings.scheduler_timezone)
-
     # --- 部署模式与 Python 环境 ---
     deploy_mode = _detect_deploy_mode()
     ext_python = get_python_executable()
@@ -359,28 +600,6 @@ def _build_runtime_section() -> str:
     except Exception:
         version_str = "unknown"
 
-    # --- 工具可用性 ---
-    tool_status = []
-    try:
-        browser_lock = settings.project_root / "data" / "browser.lock"
-        if browser_lock.exists():
-            tool_status.append("- **浏览器**: 可能已启动（检测到 lock 文件）")
-        else:
-            tool_status.append("- **浏览器**: 未启动（需要先调用 browser_open）")
-    except Exception:
-        tool_status.append("- **浏览器**: 状态未知")
-
-    try:
-        mcp_config = settings.project_root / "data" / "mcp_servers.json"
-        if mcp_config.exists():
-            tool_status.append("- **MCP 服务**: 配置已存在")
-        else:
-            tool_status.append("- **MCP 服务**: 未配置")
-    except Exception:
-        tool_status.append("- **MCP 服务**: 状态未知")
-
-    tool_status_text = "\n".join(tool_status) if tool_status else "- 工具状态: 正常"
-
     # --- Shell 提示 ---
     shell_hint = ""
     if platform.system() == "Windows":
@@ -415,30 +634,16 @@ def _build_runtime_section() -> str:
         path_tools.append(cmd)
     path_tools_str = ", ".join(path_tools) if path_tools else "无"
 
-    return f"""## 运行环境
-
-- **OpenAkita 版本**: {version_str}
-- **部署模式**: {deploy_mode}
-- **当前时间**: {current_time}
-- **操作系统**: {platform.system()} {platform.release()} ({platform.machine()})
-- **当前工作目录**: {os.getcwd()}
-- **工作区信息**: 需要操作系统文件（日志/配置/数据/截图等）时，先调用 `get_workspace_map` 获取目录布局
-- **临时目录**: data/temp/{shell_hint}
-
-### Python 环境
-{python_info}
-
-### 系统环境
-- **系统编码**: {system_encoding}
-- **默认语言环境**: {locale_str}
-- **Shell**: {shell_type}
-- **PATH 可用工具**: {path_tools_str}
-
-## 工具可用性
-{tool_status_text}
-
-⚠️ **重要**：服务重启后浏览器、变量、连接等状态会丢失，执行任务前必须通过工具检查实时状态。
-如果工具不可用，允许纯文本回复并说明限制。"""
+    return {
+        "deploy_mode": deploy_mode,
+        "python_info": python_info,
+        "version_str": version_str,
+        "shell_hint": shell_hint,
+        "system_encoding": system_encoding,
+        "locale_str": locale_str,
+        "shell_type": shell_type,
+        "path_tools_str": path_tools_str,
+    }
 
 
 def _detect_deploy_mode() -> str:
@@ -851,7 +1056,8 @@ def get_prompt_debug_info(
     用于 `openakita prompt-debug` 命令。
 
     Returns:
-        包含各部分 token 统计的字典
+        包含各部分 token 统计的字典；section_cache 为 build_system_prompt
+        段落级缓存的命中/未命中计数
     """
     budget_config = BudgetConfig()
 
@@ -904,5 +1110,6 @@ def get_prompt_debug_info(
         "memory": budget_config.memory_budget,
         "total": budget_config.total_budget,
     }
+    info["section_cache"] = _section_cache.stats()
 
     return info
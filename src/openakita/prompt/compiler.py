@@ -175,11 +175,11 @@ class PromptCompiler:
                 )
                 if hasattr(self.brain, "think_lightweight"):
                     response = await self.brain.think_lightweight(
-                        prompt, system=config["system"]
+                        prompt, system=config["system"], cache=True
                     )
                 else:
                     response = await self.brain.think(
-                        prompt, system=config["system"]
+                        prompt, system=config["system"], cache=True
                     )
                 result = (getattr(response, "content", None) or str(response)).strip()
                 if result:
@@ -304,19 +304,24 @@ def _is_up_to_date(source: Path, output: Path) -> bool:
         return False
 
 
-def check_compiled_outdated(identity_dir: Path, max_age_hours: int = 24) -> bool:
-    compiled_dir = identity_dir / "compiled"
-    timestamp_file = compiled_dir / ".compiled_at"
-    if not timestamp_file.exists():
-        return True
+def get_compiled_at(identity_dir: Path) -> datetime | None:
+    """读取 compiled/.compiled_at；缺失或损坏时返回 None"""
+    timestamp_file = identity_dir / "compiled" / ".compiled_at"
     try:
-        compiled_at = datetime.fromisoformat(
-            timestamp_file.read_text(encoding="utf-8").strip()
-        )
-        age = datetime.now() - compiled_at
-        return age.total_seconds() > max_age_hours * 3600
+        return datetime.fromisoformat(timestamp_file.read_text(encoding="utf-8").strip())
     except Exception:
+        return None
+
+
+def is_compiled_at_outdated(compiled_at: datetime | None, max_age_hours: int = 24) -> bool:
+    if compiled_at is None:
         return True
+    age = datetime.now() - compiled_at
+    return age.total_seconds() > max_age_hours * 3600
+
+
+def check_compiled_outdated(identity_dir: Path, max_age_hours: int = 24) -> bool:
+    return is_compiled_at_outdated(get_compiled_at(identity_dir), max_age_hours)
 
 
 def get_compiled_content(identity_dir: Path) -> dict[str, str]:
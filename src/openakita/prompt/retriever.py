@@ -149,9 +149,15 @@ async def async_search_related_memories(
     if retrieval_engine and query:
         try:
             recent = getattr(memory_manager, "_recent_messages", None)
-            result = retrieval_engine.retrieve(
-                query=query, recent_messages=recent, max_tokens=400,
-            )
+            aretrieve = getattr(retrieval_engine, "aretrieve", None)
+            if aretrieve is not None:
+                result = await aretrieve(
+                    query=query, recent_messages=recent, max_tokens=400,
+                )
+            else:
+                result = retrieval_engine.retrieve(
+                    query=query, recent_messages=recent, max_tokens=400,
+                )
             if result:
                 return result, True
         except Exception as e:
@@ -6,8 +6,10 @@
 - TaskScheduler: 调度器
 - 支持 once/interval/cron 三种触发类型
 - ConsolidationTracker: 整理时间追踪
+- AgentPool: 定时任务预热 Agent 池
 """
 
+from .agent_pool import AgentPool
 from .consolidation_tracker import ConsolidationTracker
 from .executor import TaskExecutor
 from .scheduler import TaskScheduler
@@ -24,5 +26,6 @@ __all__ = [
     "CronTrigger",
     "TaskScheduler",
     "TaskExecutor",
+    "AgentPool",
     "ConsolidationTracker",
 ]
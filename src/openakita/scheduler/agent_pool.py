@@ -0,0 +1,199 @@
+"""
+定时任务 Agent 池
+
+复用已初始化的 Agent 实例执行定时任务，避免每次运行都重新加载
+身份、技能、MCP 清单、记忆和提示词:
+- acquire(): 取一个空闲 Agent，没有则新建（记录初始化耗时）
+- release(): 清理会话级状态后放回池中；异常/超时/用满次数的实例直接关闭
+- 空闲过久或使用次数达到上限的实例会被替换，以便拾取新安装的技能/配置
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PooledAgent:
+    agent: Any
+    created_at: float = field(default_factory=time.monotonic)
+    last_used_at: float = field(default_factory=time.monotonic)
+    uses: int = 0
+
+
+class AgentPool:
+    """
+    预初始化 Agent 池
+
+    Usage:
+        pool = AgentPool(factory=create_agent, max_size=2)
+        agent = await pool.acquire()
+        try:
+            ...
+        finally:
+            await pool.release(agent, healthy=ok)
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Awaitable[Any]],
+        max_size: int = 2,
+        max_uses: int = 20,
+        max_idle_seconds: float = 3600.0,
+    ):
+        """
+        Args:
+            factory: 创建并初始化 Agent 的协程函数
+            max_size: 池中最多保留的空闲 Agent 数
+            max_uses: 单个 Agent 最多复用次数，达到后关闭重建
+            max_idle_seconds: 空闲超过该时长的 Agent 不再复用
+        """
+        self._factory = factory
+        self.max_size = max(0, max_size)
+        self.max_uses = max(1, max_uses)
+        self.max_idle_seconds = max_idle_seconds
+
+        self._idle: list[_PooledAgent] = []
+        self._leased: dict[int, _PooledAgent] = {}
+        self._lock = asyncio.Lock()
+        self._closed = False
+
+        self._stats = {
+            "created": 0,
+            "reused": 0,
+            "discarded": 0,
+            "reset_failures": 0,
+            "init_seconds_total": 0.0,
+        }
+
+    # ==================== 借出 / 归还 ====================
+
+    async def acquire(self) -> Any:
+        """取一个可用的 Agent（优先复用空闲实例）"""
+        stale: list[_PooledAgent] = []
+        entry: _PooledAgent | None = None
+        async with self._lock:
+            now = time.monotonic()
+            while self._idle:
+                candidate = self._idle.pop()
+                if now - candidate.last_used_at > self.max_idle_seconds:
+                    stale.append(candidate)
+                    continue
+                entry = candidate
+                break
+
+        for old in stale:
+            await self._discard(old, reason="idle too long")
+
+        if entry is not None:
+            self._stats["reused"] += 1
+        else:
+            entry = _PooledAgent(agent=await self._create())
+
+        entry.uses += 1
+        self._leased[id(entry.agent)] = entry
+        return entry.agent
+
+    async def release(self, agent: Any, healthy: bool = True) -> None:
+        """
+        归还 Agent
+
+        Args:
+            agent: acquire() 返回的实例
+            healthy: 本次运行是否正常结束（超时/异常的实例可能残留运行状态，直接关闭）
+        """
+        entry = self._leased.pop(id(agent), None)
+        if entry is None:
+            entry = _PooledAgent(agent=agent, uses=self.max_uses)
+
+        if not healthy or self._closed or self.max_size == 0:
+            await self._discard(entry, reason="unhealthy" if not healthy else "pool disabled")
+            return
+        if entry.uses >= self.max_uses:
+            await self._discard(entry, reason="max uses reached")
+            return
+
+        try:
+            await self._reset(agent)
+        except Exception as e:
+            self._stats["reset_failures"] += 1
+            logger.warning(f"[AgentPool] Failed to reset agent, discarding: {e}")
+            await self._discard(entry, reason="reset failed", shutdown=False)
+            return
+
+        entry.last_used_at = time.monotonic()
+        async with self._lock:
+            if len(self._idle) < self.max_size:
+                self._idle.append(entry)
+                return
+        await self._discard(entry, reason="pool full")
+
+    async def prewarm(self, count: int | None = None) -> int:
+        """预先创建空闲 Agent，返回实际新建的数量"""
+        target = self.max_size if count is None else min(count, self.max_size)
+        created = 0
+        while not self._closed and len(self._idle) < target:
+            agent = await self._create()
+            async with self._lock:
+                self._idle.append(_PooledAgent(agent=agent))
+            created += 1
+        return created
+
+    async def close(self) -> None:
+        """关闭所有空闲 Agent（借出中的实例在归还时关闭）"""
+        self._closed = True
+        async with self._lock:
+            idle, self._idle = self._idle, []
+        for entry in idle:
+            await self._discard(entry, reason="pool closed")
+
+    # ==================== 统计 ====================
+
+    def get_stats(self) -> dict:
+        created = self._stats["created"]
+        avg_init = self._stats["init_seconds_total"] / created if created else 0.0
+        return {
+            "max_size": self.max_size,
+            "idle": len(self._idle),
+            "leased": len(self._leased),
+            "created": created,
+            "reused": self._stats["reused"],
+            "discarded": self._stats["discarded"],
+            "reset_failures": self._stats["reset_failures"],
+            "avg_init_seconds": round(avg_init, 3),
+            "init_seconds_saved": round(avg_init * self._stats["reused"], 3),
+        }
+
+    # ==================== 内部 ====================
+
+    async def _create(self) -> Any:
+        start = time.monotonic()
+        agent = await self._factory()
+        elapsed = time.monotonic() - start
+        self._stats["created"] += 1
+        self._stats["init_seconds_total"] += elapsed
+        logger.info(f"[AgentPool] Initialized new agent in {elapsed:.2f}s")
+        return agent
+
+    @staticmethod
+    async def _reset(agent: Any) -> None:
+        reset = getattr(agent, "reset_for_reuse", None)
+        if reset is None:
+            raise RuntimeError(f"{type(agent).__name__} does not support reset_for_reuse()")
+        result = reset()
+        if asyncio.iscoroutine(result):
+            await result
+
+    async def _discard(self, entry: _PooledAgent, reason: str, shutdown: bool = True) -> None:
+        self._stats["discarded"] += 1
+        logger.debug(f"[AgentPool] Discarding agent ({reason}, uses={entry.uses})")
+        if shutdown and hasattr(entry.agent, "shutdown"):
+            try:
+                await entry.agent.shutdown()
+            except Exception as e:
+                logger.debug(f"[AgentPool] Agent shutdown failed: {e}")
@@ -14,6 +14,7 @@ import logging
 from collections.abc import Awaitable, Callable
 from typing import Any
 
+from .agent_pool import AgentPool
 from .task import ScheduledTask
 
 logger = logging.getLogger(__name__)
@@ -31,16 +32,27 @@ class TaskExecutor:
         agent_factory: Callable[[], Any] | None = None,
         gateway: Any | None = None,
         timeout_seconds: int = 600,  # 10 分钟超时
+        agent_pool_size: int = 0,
+        agent_max_uses: int = 20,
     ):
         """
         Args:
             agent_factory: Agent 工厂函数
             gateway: 消息网关（用于发送结果通知）
             timeout_seconds: 执行超时（秒），默认 600 秒（10分钟）
+            agent_pool_size: 预热 Agent 池大小（0 = 每次任务新建并销毁 Agent）
+            agent_max_uses: 池中单个 Agent 最多复用次数
         """
         self.agent_factory = agent_factory
         self.gateway = gateway
         self.timeout_seconds = timeout_seconds
+        self.agent_pool: AgentPool | None = None
+        if agent_pool_size > 0:
+            self.agent_pool = AgentPool(
+                factory=lambda: self._create_agent(),
+                max_size=agent_pool_size,
+                max_uses=agent_max_uses,
+            )
         # 可选：由 Agent 设置，用于活人感心跳等系统任务
         self.persona_manager = None
         self.memory_manager = None
@@ -247,9 +259,10 @@ class TaskExecutor:
 
         agent = None
         im_context_set = False
+        healthy = False
         try:
-            # 1. 创建 Agent
-            agent = await self._create_agent()
+            # 1. 获取 Agent（优先从预热池借用）
+            agent = await self._acquire_agent()
 
             # 2. 如果任务有 IM 通道信息，注入 IM 上下文
             if task.channel_id and task.chat_id and self.gateway:
@@ -276,6 +289,7 @@ class TaskExecutor:
                 await self._send_end_notification(task, success=True, message=result)
 
             logger.info(f"TaskExecutor: task {task.id} completed successfully")
+            healthy = True
             return True, result
 
         except Exception as e:
@@ -288,10 +302,10 @@ class TaskExecutor:
             # 清理 IM 上下文
             if agent and im_context_set:
                 self._cleanup_im_context(agent)
-            # 清理 Agent（确保超时/异常路径也会执行）
+            # 归还或清理 Agent（确保超时/异常路径也会执行；异常实例不回池）
             if agent:
                 with contextlib.suppress(Exception):
-                    await self._cleanup_agent(agent)
+                    await self._release_agent(agent, healthy=healthy)
 
     async def _send_start_notification(self, task: ScheduledTask) -> None:
         """发送任务开始通知"""
@@ -451,6 +465,41 @@ class TaskExecutor:
         if hasattr(agent, "shutdown"):
             await agent.shutdown()
 
+    async def _acquire_agent(self) -> Any:
+        """从预热池借用 Agent；未启用池时新建"""
+        if self.agent_pool:
+            return await self.agent_pool.acquire()
+        return await self._create_agent()
+
+    async def _release_agent(self, agent: Any, healthy: bool) -> None:
+        """归还 Agent 到预热池；未启用池时直接清理"""
+        if self.agent_pool:
+            await self.agent_pool.release(agent, healthy=healthy)
+        else:
+            await self._cleanup_agent(agent)
+
+    async def prewarm(self, count: int = 1) -> int:
+        """预热 Agent 池（调度器启动时调用，首个定时任务无需冷启动），返回新建数量"""
+        if not self.agent_pool:
+            return 0
+        try:
+            created = await self.agent_pool.prewarm(count)
+        except Exception as e:
+            logger.warning(f"Failed to prewarm scheduler agent pool: {e}")
+            return 0
+        if created:
+            logger.info(f"Scheduler agent pool prewarmed with {created} agent(s)")
+        return created
+
+    def get_pool_stats(self) -> dict | None:
+        """预热 Agent 池统计（未启用时返回 None）"""
+        return self.agent_pool.get_stats() if self.agent_pool else None
+
+    async def close(self) -> None:
+        """关闭执行器持有的空闲 Agent"""
+        if self.agent_pool:
+            await self.agent_pool.close()
+
     async def _execute_system_task(self, task: ScheduledTask) -> tuple[bool, str]:
         """
         执行系统内置任务
@@ -776,7 +825,7 @@ class TaskExecutor:
         session_manager = getattr(self.gateway, "session_manager", None)
         if not session_manager:
             return targets
-        sessions = session_manager.list_sessions()
+        sessions = session_manager.list_sessions(with_history=False)
         if sessions:
             sessions.sort(
                 key=lambda s: getattr(s, "last_active", datetime.min), reverse=True
@@ -3,15 +3,18 @@
 
 核心调度器:
 - 管理任务生命周期
-- 触发任务执行
+- 触发任务执行（按触发时间维护最小堆，休眠到最早的任务，增删改时提前唤醒）
 - 任务持久化
 """
 
 import asyncio
 import contextlib
+import heapq
+import itertools
 import json
 import logging
 import os
+import time
 from collections.abc import Awaitable, Callable
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -42,8 +45,9 @@ class TaskScheduler:
         executor: TaskExecutorFunc | None = None,
         timezone: str = "Asia/Shanghai",
         max_concurrent: int = 5,
-        check_interval_seconds: int = 2,  # 优化：从 10 秒改为 2 秒，提高提醒精度
+        check_interval_seconds: int = 2,
         advance_seconds: int = 20,  # 提前执行秒数，补偿 Agent 初始化和 LLM 调用延迟
+        max_sleep_seconds: float = 60.0,
     ):
         """
         Args:
@@ -51,7 +55,10 @@ class TaskScheduler:
             executor: 任务执行器函数
             timezone: 时区
             max_concurrent: 最大并发执行数
-            check_interval_seconds: 检查间隔（秒）
+            check_interval_seconds: 调度循环出错后的重试间隔（秒）
+            advance_seconds: 提前执行秒数
+            max_sleep_seconds: 单次最长休眠（秒），到期后全量重建触发队列，
+                兜底外部直接修改 next_run 或系统时钟跳变
         """
         self.storage_path = Path(storage_path) if storage_path else Path("data/scheduler")
         self.storage_path.mkdir(parents=True, exist_ok=True)
@@ -61,6 +68,7 @@ class TaskScheduler:
         self.max_concurrent = max_concurrent
         self.check_interval = check_interval_seconds
         self.advance_seconds = advance_seconds  # 提前执行秒数
+        self.max_sleep_seconds = max_sleep_seconds
 
         # 任务存储 {task_id: ScheduledTask}
         self._tasks: dict[str, ScheduledTask] = {}
@@ -77,6 +85,14 @@ class TaskScheduler:
         self._running_tasks: set[str] = set()
         self._semaphore: asyncio.Semaphore | None = None
 
+        # 触发队列: 最小堆 [(trigger_time, seq, task_id, next_run)]
+        # 条目惰性失效：出堆时任务已删除/禁用/next_run 已变化则丢弃
+        self._queue: list[tuple[datetime, int, str, datetime]] = []
+        self._queued: dict[str, datetime] = {}  # task_id -> 最近入堆的 next_run
+        self._seq = itertools.count()
+        self._wakeup: asyncio.Event | None = None
+        self._wakeups = 0
+
         # 加载任务
         self._load_tasks()
         self._load_executions()
@@ -100,6 +116,9 @@ class TaskScheduler:
                     self._recalculate_missed_run(task, now)
                 # 如果 next_run 在未来，保持不变
 
+        self._wakeup = asyncio.Event()
+        self._rebuild_queue()
+
         # 启动调度循环
         self._scheduler_task = asyncio.create_task(self._scheduler_loop())
 
@@ -146,6 +165,7 @@ class TaskScheduler:
         self._triggers[task.id] = trigger
 
         self._save_tasks()
+        self._schedule(task)
 
         logger.info(f"Added task: {task.id} ({task.name}), next run: {task.next_run}")
         return task.id
@@ -203,6 +223,7 @@ class TaskScheduler:
             task.next_run = trigger.get_next_run_time(task.last_run)
 
         self._save_tasks()
+        self._schedule(task)
         logger.info(f"Updated task: {task_id}")
         return True
 
@@ -213,6 +234,7 @@ class TaskScheduler:
             task.enable()
             self._update_next_run(task)
             self._save_tasks()
+            self._schedule(task)
             return True
         return False
 
@@ -255,41 +277,102 @@ class TaskScheduler:
         if not task:
             return None
 
-        return await self._execute_task(task)
+        execution = await self._execute_task(task)
+        self._schedule(task)
+        return execution
+
+    def reschedule(self, task_id: str) -> None:
+        """
+        外部直接修改了任务的 next_run / 状态后调用，使调度队列立即生效
+
+        未调用时也会在 max_sleep_seconds 内的全量重建中被修正。
+        """
+        task = self._tasks.get(task_id)
+        if task:
+            self._schedule(task)
 
     # ==================== 调度循环 ====================
 
     async def _scheduler_loop(self) -> None:
-        """调度循环"""
+        """调度循环：休眠到最早的触发时间，或被新增/修改任务提前唤醒"""
+        last_rebuild = time.monotonic()
         while self._running:
             try:
-                now = datetime.now()
-
-                # 检查需要执行的任务
-                for task_id, task in list(self._tasks.items()):
-                    if not task.is_active:
-                        continue
-
-                    if task_id in self._running_tasks:
-                        continue  # 正在执行
-
-                    # 提前 advance_seconds 秒执行，补偿 Agent 初始化和 LLM 调用延迟
-                    if task.next_run:
-                        trigger_time = task.next_run - timedelta(seconds=self.advance_seconds)
-                        if now >= trigger_time:
-                            # 重要：先标记为运行中，防止重复触发！
-                            # 必须在 create_task 之前执行
-                            self._running_tasks.add(task_id)
-                            # 异步执行任务
-                            asyncio.create_task(self._run_task_safe(task))
+                if time.monotonic() - last_rebuild >= self.max_sleep_seconds:
+                    self._rebuild_queue()
+                    last_rebuild = time.monotonic()
 
-                await asyncio.sleep(self.check_interval)
+                # 先清除唤醒标记再派发：派发到等待之间没有 await，不会丢失唤醒
+                self._wakeup.clear()
+                self._dispatch_due(datetime.now())
+
+                delay = self.max_sleep_seconds
+                if self._queue:
+                    until_next = (self._queue[0][0] - datetime.now()).total_seconds()
+                    delay = max(0.0, min(delay, until_next))
+
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                self._wakeups += 1
 
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.error(f"Scheduler loop error: {e}")
-                await asyncio.sleep(1)
+                await asyncio.sleep(self.check_interval)
+
+    def _dispatch_due(self, now: datetime) -> None:
+        """弹出所有已到触发时间的条目并启动执行"""
+        while self._queue and self._queue[0][0] <= now:
+            _, _, task_id, next_run = heapq.heappop(self._queue)
+            if self._queued.get(task_id) == next_run:
+                del self._queued[task_id]
+
+            task = self._tasks.get(task_id)
+            if not task or not task.is_active:
+                continue
+            if task_id in self._running_tasks:
+                continue  # 正在执行，结束后会重新入堆
+            if task.next_run != next_run:
+                # 过期条目：按当前 next_run 重新入堆（若已到期会在本轮继续弹出）
+                self._schedule(task)
+                continue
+
+            # 重要：先标记为运行中，防止重复触发！
+            # 必须在 create_task 之前执行
+            self._running_tasks.add(task_id)
+            asyncio.create_task(self._run_task_safe(task))
+
+    def _trigger_time(self, next_run: datetime) -> datetime:
+        # 提前 advance_seconds 秒执行，补偿 Agent 初始化和 LLM 调用延迟
+        return next_run - timedelta(seconds=self.advance_seconds)
+
+    def _schedule(self, task: ScheduledTask) -> None:
+        """把任务的当前 next_run 放入触发队列（重复调用幂等）"""
+        if not task.is_active or not task.next_run or task.id in self._running_tasks:
+            return
+        if self._queued.get(task.id) == task.next_run:
+            return
+        seq = next(self._seq)
+        self._queued[task.id] = task.next_run
+        heapq.heappush(
+            self._queue, (self._trigger_time(task.next_run), seq, task.id, task.next_run)
+        )
+        # 新条目成为堆顶时才需要唤醒调度循环重新计算休眠时间
+        if self._wakeup is not None and self._queue[0][1] == seq:
+            self._wakeup.set()
+
+    def _rebuild_queue(self) -> None:
+        """按当前任务状态全量重建触发队列"""
+        self._queue = []
+        self._queued = {}
+        for task in self._tasks.values():
+            if task.is_active and task.next_run and task.id not in self._running_tasks:
+                self._queue.append(
+                    (self._trigger_time(task.next_run), next(self._seq), task.id, task.next_run)
+                )
+                self._queued[task.id] = task.next_run
+        heapq.heapify(self._queue)
 
     async def _run_task_safe(self, task: ScheduledTask) -> None:
         """
@@ -302,6 +385,7 @@ class TaskScheduler:
                 await self._execute_task(task)
         finally:
             self._running_tasks.discard(task.id)
+            self._schedule(task)
 
     async def _execute_task(self, task: ScheduledTask) -> TaskExecution:
         """执行任务"""
@@ -540,6 +624,8 @@ class TaskScheduler:
             "total_tasks": len(self._tasks),
             "active_tasks": len(active_tasks),
             "running_tasks": len(self._running_tasks),
+            "queued_triggers": len(self._queue),
+            "loop_wakeups": self._wakeups,
             "total_executions": len(self._executions),
             "by_type": {
                 "once": len(
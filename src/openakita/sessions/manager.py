@@ -6,13 +6,20 @@
 - 管理会话生命周期
 - 隔离不同会话的上下文
 - 会话持久化
+
+持久化布局:
+- sessions.json: 会话索引（元数据 + 上下文变量，不含消息历史）
+- history/<session_key>.json: 每个会话一份消息历史，只有变更过的会话才重写
+- 启动时只为最近活跃的会话加载历史，其余会话在首次访问时再加载
 """
 
 import asyncio
 import contextlib
 import json
 import logging
-from datetime import datetime
+import os
+import re
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Any
 
@@ -37,15 +44,20 @@ class SessionManager:
         storage_path: Path | None = None,
         default_config: SessionConfig | None = None,
         cleanup_interval_seconds: int = 300,  # 5 分钟清理一次
+        history_preload_minutes: int = 60,
     ):
         """
         Args:
             storage_path: 会话存储目录
             default_config: 默认会话配置
             cleanup_interval_seconds: 清理间隔（秒）
+            history_preload_minutes: 启动时预加载历史的活跃窗口（分钟），
+                更早的会话首次访问时才加载消息历史
         """
         self.storage_path = Path(storage_path) if storage_path else Path("data/sessions")
         self.storage_path.mkdir(parents=True, exist_ok=True)
+        self._history_dir = self.storage_path / "history"
+        self.history_preload_minutes = history_preload_minutes
 
         self.default_config = default_config or SessionConfig()
         self.cleanup_interval = cleanup_interval_seconds
@@ -71,6 +83,12 @@ class SessionManager:
         self._dirty = False
         self._save_delay_seconds = 5  # 防抖延迟：5 秒内的多次修改只保存一次
 
+        # 增量持久化状态
+        self._dirty_keys: set[str] = set()  # 显式标记了历史变更的会话
+        self._history_fingerprints: dict[str, tuple] = {}  # 上次落盘时的历史指纹
+        self._unloaded: dict[str, dict] = {}  # 尚未加载历史的会话 {key: 索引中的历史摘要}
+        self._persisted_keys: set[str] = set()  # 已有历史文件的会话
+
         # 可选：从外部存储（SQLite）加载 turns 的回调，用于崩溃恢复时回填
         # 签名: (safe_session_id: str) -> list[dict]  (每个 dict 含 role, content, timestamp)
         self._turn_loader = None
@@ -85,9 +103,17 @@ class SessionManager:
         self._save_task = asyncio.create_task(self._save_loop())
         logger.info("SessionManager started")
 
-    def mark_dirty(self) -> None:
-        """标记会话数据已修改，需要保存"""
+    def mark_dirty(self, session: Session | str | None = None) -> None:
+        """
+        标记会话数据已修改，需要保存
+
+        Args:
+            session: 发生变更的会话（或 session_key）。不指定时在保存时
+                通过历史指纹找出变更的会话；原地修改消息内容时应显式指定。
+        """
         self._dirty = True
+        if session is not None:
+            self._dirty_keys.add(session if isinstance(session, str) else session.session_key)
 
     def flush(self) -> None:
         """立即保存所有待写入的会话（绕过防抖延迟）"""
@@ -105,18 +131,22 @@ class SessionManager:
         Returns:
             回填的总 turn 数
         """
-        import re
-
         if not self._turn_loader:
             return 0
         total_backfilled = 0
         for session in self._sessions.values():
             try:
-                safe_id = session.session_key.replace(":", "__")
-                safe_id = re.sub(r'[/\\+=%?*<>|"\x00-\x1f]', "_", safe_id)
+                safe_id = self._safe_session_id(session.session_key)
                 db_turns = self._turn_loader(safe_id)
                 if not db_turns:
                     continue
+                summary = self._unloaded.get(session.session_key)
+                if summary is not None:
+                    # 历史尚未加载：仅当 SQLite 中有更新的 turn 时才需要加载比对
+                    last_at = summary.get("last_message_at") or ""
+                    if last_at and all(t.get("timestamp", "") <= last_at for t in db_turns):
+                        continue
+                    self._ensure_history(session)
                 last_ts = ""
                 if session.context.messages:
                     last_ts = session.context.messages[-1].get("timestamp", "")
@@ -130,6 +160,7 @@ class SessionManager:
                     )
                 if newer:
                     total_backfilled += len(newer)
+                    self._dirty_keys.add(session.session_key)
                     logger.info(
                         f"Backfilled {len(newer)} turns from SQLite for {session.session_key}"
                     )
@@ -185,6 +216,7 @@ class SessionManager:
         # 检查缓存
         if session_key in self._sessions:
             session = self._sessions[session_key]
+            self._ensure_history(session)
             session.touch()
             return session
 
@@ -201,6 +233,7 @@ class SessionManager:
         """通过 session_id 获取会话"""
         for session in self._sessions.values():
             if session.id == session_id:
+                self._ensure_history(session)
                 return session
         return None
 
@@ -248,6 +281,7 @@ class SessionManager:
         channel: str | None = None,
         user_id: str | None = None,
         state: SessionState | None = None,
+        with_history: bool = True,
     ) -> list[Session]:
         """
         列出会话
@@ -256,6 +290,8 @@ class SessionManager:
             channel: 过滤通道
             user_id: 过滤用户
             state: 过滤状态
+            with_history: 是否确保返回的会话已加载消息历史
+                （只需要 channel/chat_id 等元数据时传 False）
         """
         sessions = list(self._sessions.values())
 
@@ -266,6 +302,9 @@ class SessionManager:
         if state:
             sessions = [s for s in sessions if s.state == state]
 
+        if with_history:
+            for session in sessions:
+                self._ensure_history(session)
         return sessions
 
     def get_session_count(self) -> dict[str, int]:
@@ -342,7 +381,12 @@ class SessionManager:
                 logger.error(f"Error in save loop: {e}")
 
     def _load_sessions(self) -> None:
-        """从文件加载会话"""
+        """
+        从索引文件加载会话
+
+        最近活跃的会话立即加载历史，其余会话延迟到首次访问。
+        旧格式（消息内嵌在 sessions.json 中）直接使用内嵌消息，并在下次保存时迁移。
+        """
         sessions_file = self.storage_path / "sessions.json"
 
         if not sessions_file.exists():
@@ -352,21 +396,43 @@ class SessionManager:
             with open(sessions_file, encoding="utf-8") as f:
                 data = json.load(f)
 
+            preload_after = datetime.now() - timedelta(minutes=self.history_preload_minutes)
             skipped_expired = 0
+            deferred = 0
             for item in data:
                 try:
+                    context_data = item.get("context", {})
+                    inline = "messages" in context_data
                     session = Session.from_dict(item)
+                    key = session.session_key
                     if not session.is_expired() and session.state != SessionState.CLOSED:
+                        self._sessions[key] = session
+                        if inline:
+                            self._clean_large_content_in_messages(session.context.messages)
+                            self._dirty_keys.add(key)
+                            self._dirty = True
+                        else:
+                            self._persisted_keys.add(key)
+                            if session.last_active >= preload_after:
+                                self._load_history(session)
+                            else:
+                                self._unloaded[key] = {
+                                    "message_count": context_data.get("message_count", 0),
+                                    "last_message_at": context_data.get("last_message_at"),
+                                }
+                                deferred += 1
                         msg_count = len(session.context.messages)
-                        self._clean_large_content_in_messages(session.context.messages)
-                        self._sessions[session.session_key] = session
                         if msg_count > 0:
                             logger.debug(
-                                f"Loaded session {session.session_key}: "
+                                f"Loaded session {key}: "
                                 f"{msg_count} messages preserved (last_active: {session.last_active})"
                             )
                     else:
                         skipped_expired += 1
+                        if not inline:
+                            # 索引中残留的过期会话：保存时清理其历史文件
+                            self._persisted_keys.add(key)
+                            self._dirty = True
 
                     session_ts = session.last_active.isoformat()
                     existing = self._channel_registry.get(session.channel)
@@ -385,11 +451,50 @@ class SessionManager:
             logger.info(
                 f"Loaded {len(self._sessions)} sessions from storage"
                 f"{f' (skipped {skipped_expired} expired)' if skipped_expired else ''}"
+                f"{f', {deferred} histories deferred' if deferred else ''}"
             )
 
         except Exception as e:
             logger.error(f"Failed to load sessions: {e}")
 
+    def _ensure_history(self, session: Session) -> None:
+        """首次访问延迟加载的会话时读取其消息历史"""
+        if self._unloaded and session.session_key in self._unloaded:
+            self._load_history(session)
+
+    def _load_history(self, session: Session) -> None:
+        key = session.session_key
+        self._unloaded.pop(key, None)
+        history_file = self._history_path(key)
+        if not history_file.exists():
+            return
+        try:
+            with open(history_file, encoding="utf-8") as f:
+                messages = json.load(f)
+            self._clean_large_content_in_messages(messages)
+            session.context.messages = messages
+            self._history_fingerprints[key] = self._history_fingerprint(messages)
+        except Exception as e:
+            logger.error(f"Failed to load history for session {key}: {e}")
+
+    @staticmethod
+    def _safe_session_id(session_key: str) -> str:
+        """session_key -> 可用作文件名 / SQLite conversation id 的安全字符串"""
+        safe_id = session_key.replace(":", "__")
+        return re.sub(r'[/\\+=%?*<>|"\x00-\x1f]', "_", safe_id)
+
+    def _history_path(self, session_key: str) -> Path:
+        return self._history_dir / f"{self._safe_session_id(session_key)}.json"
+
+    @staticmethod
+    def _history_fingerprint(messages: list[dict]) -> tuple:
+        """
+        历史变更指纹（O(1)）
+
+        覆盖追加、截断、清空和整体替换；原地修改已有消息需调用 mark_dirty(session)。
+        """
+        return (id(messages), len(messages), id(messages[-1]) if messages else 0)
+
     def _clean_large_content_in_messages(self, messages: list[dict]) -> None:
         """
         清理消息中的大型数据（如 base64 截图）
@@ -478,46 +583,92 @@ class SessionManager:
 
     def _save_sessions(self) -> None:
         """
-        保存会话到文件（原子写入）
+        增量保存会话
 
-        使用临时文件 + 重命名的方式，确保写入过程中断不会损坏原文件
+        - 只重写历史发生变更的会话的 history 文件
+        - 索引文件（不含消息）整体原子写入：临时文件 + 重命名，保留 .bak
+        - 已移除会话的历史文件随之删除
         """
         sessions_file = self.storage_path / "sessions.json"
         temp_file = self.storage_path / "sessions.json.tmp"
         backup_file = self.storage_path / "sessions.json.bak"
 
         try:
-            data = [session.to_dict() for session in self._sessions.values()]
+            index = []
+            written = 0
+            for key, session in list(self._sessions.items()):
+                if key in self._unloaded and session.context.messages:
+                    # 未加载历史的会话被直接追加了消息：先合并磁盘上的历史，避免覆盖
+                    pending = session.context.messages
+                    session.context.messages = []
+                    self._load_history(session)
+                    session.context.messages.extend(pending)
+                data = session.to_dict()
+                messages = data["context"].pop("messages")
+                summary = self._unloaded.get(key)
+                if summary is not None:
+                    # 历史未加载，沿用索引中的摘要，不触碰历史文件
+                    data["context"].update(summary)
+                else:
+                    data["context"]["message_count"] = len(messages)
+                    data["context"]["last_message_at"] = (
+                        messages[-1].get("timestamp") if messages else None
+                    )
+                    fingerprint = self._history_fingerprint(messages)
+                    if (
+                        key in self._dirty_keys
+                        or key not in self._persisted_keys
+                        or self._history_fingerprints.get(key) != fingerprint
+                    ):
+                        self._write_history(key, messages)
+                        self._history_fingerprints[key] = fingerprint
+                        self._persisted_keys.add(key)
+                        written += 1
+                    self._dirty_keys.discard(key)
+                index.append(data)
 
             # 1. 先写入临时文件
             with open(temp_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-
-            # 2. 验证临时文件可以正确解析
-            with open(temp_file, encoding="utf-8") as f:
-                json.load(f)  # 验证 JSON 格式正确
+                json.dump(index, f, ensure_ascii=False, indent=2)
 
-            # 3. 备份旧文件（如果存在）
+            # 2. 备份旧文件（如果存在）
             if sessions_file.exists():
                 try:
-                    if backup_file.exists():
-                        backup_file.unlink()
-                    sessions_file.rename(backup_file)
+                    os.replace(sessions_file, backup_file)
                 except Exception as e:
                     logger.warning(f"Failed to backup sessions file: {e}")
 
-            # 4. 原子重命名临时文件为正式文件
-            temp_file.rename(sessions_file)
+            # 3. 原子重命名临时文件为正式文件
+            os.replace(temp_file, sessions_file)
 
-            logger.debug(f"Saved {len(data)} sessions to storage (atomic)")
+            # 4. 清理已移除会话的历史文件（索引落盘之后，避免崩溃时索引指向缺失文件）
+            for key in self._persisted_keys - self._sessions.keys():
+                with contextlib.suppress(FileNotFoundError):
+                    self._history_path(key).unlink()
+                self._persisted_keys.discard(key)
+                self._history_fingerprints.pop(key, None)
+                self._unloaded.pop(key, None)
+
+            logger.debug(f"Saved {len(index)} sessions to storage ({written} histories written)")
 
         except Exception as e:
             logger.error(f"Failed to save sessions: {e}")
+            # 下一次保存重试
+            self._dirty = True
             # 清理临时文件
             if temp_file.exists():
                 with contextlib.suppress(Exception):
                     temp_file.unlink()
 
+    def _write_history(self, session_key: str, messages: list[dict]) -> None:
+        """原子写入单个会话的消息历史"""
+        self._history_dir.mkdir(parents=True, exist_ok=True)
+        target = self._history_path(session_key)
+        tmp = target.with_suffix(".json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(messages, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, target)
+
     async def _save_sessions_async(self) -> None:
         """异步保存会话（在线程池中执行同步 I/O）"""
         await asyncio.to_thread(self._save_sessions)
@@ -536,7 +687,7 @@ class SessionManager:
         """添加消息到会话"""
         session = self.get_session(channel, chat_id, user_id)
         session.add_message(role, content, **metadata)
-        self.mark_dirty()  # 标记需要保存
+        self.mark_dirty(session)  # 标记需要保存
         return session
 
     def get_history(
@@ -562,7 +713,7 @@ class SessionManager:
         session = self.get_session(channel, chat_id, user_id, create_if_missing=False)
         if session:
             session.context.clear_messages()
-            self.mark_dirty()  # 标记需要保存
+            self.mark_dirty(session)  # 标记需要保存
             return True
         return False
 
@@ -39,6 +39,7 @@ Use `get_skill_info(skill_name)` to load full instructions when needed.
     def __init__(self, registry: SkillRegistry):
         self.registry = registry
         self._cached_catalog: str | None = None
+        self._version = 0
 
     def generate_catalog(self) -> str:
         """
@@ -70,6 +71,8 @@ Use `get_skill_info(skill_name)` to load full instructions when needed.
         skill_list = "\n".join(skill_entries)
 
         catalog = self.CATALOG_TEMPLATE.format(skill_list=skill_list)
+        if self._cached_catalog is not None and catalog != self._cached_catalog:
+            self._version += 1
         self._cached_catalog = catalog
 
         logger.info(f"Generated skill catalog with {len(skills)} skills")
@@ -166,6 +169,12 @@ Use `get_skill_info(skill_name)` to load full instructions when needed.
     def invalidate_cache(self) -> None:
         """使缓存失效"""
         self._cached_catalog = None
+        self._version += 1
+
+    @property
+    def version(self) -> int:
+        """清单版本号：缓存失效或内容变化时递增（prompt builder 据此做段落级缓存）"""
+        return self._version
 
     @property
     def skill_count(self) -> int:
@@ -104,6 +104,7 @@ Use `get_tool_info(tool_name)` to see full parameters before calling.
         """
         self._tools = {t["name"]: t for t in tools}
         self._cached_catalog: str | None = None
+        self._version = 0
 
     def generate_catalog(self, exclude_high_freq: bool = True) -> str:
         """
@@ -169,6 +170,8 @@ Use `get_tool_info(tool_name)` to see full parameters before calling.
 
         tool_list = "\n".join(category_sections)
         catalog = self.CATALOG_TEMPLATE.format(tool_list=tool_list)
+        if self._cached_catalog is not None and catalog != self._cached_catalog:
+            self._version += 1
         self._cached_catalog = catalog
 
         logger.info(f"Generated tool catalog with {len(self._tools)} tools")
@@ -412,7 +415,7 @@ Use `get_tool_info(tool_name)` to see full parameters before calling.
             tools: 新的工具定义列表
         """
         self._tools = {t["name"]: t for t in tools}
-        self._cached_catalog = None
+        self.invalidate_cache()
 
     def add_tool(self, tool: dict) -> None:
         """
@@ -422,7 +425,7 @@ Use `get_tool_info(tool_name)` to see full parameters before calling.
             tool: 工具定义
         """
         self._tools[tool["name"]] = tool
-        self._cached_catalog = None
+        self.invalidate_cache()
 
     def remove_tool(self, tool_name: str) -> bool:
         """
@@ -436,13 +439,19 @@ Use `get_tool_info(tool_name)` to see full parameters before calling.
         """
         if tool_name in self._tools:
             del self._tools[tool_name]
-            self._cached_catalog = None
+            self.invalidate_cache()
             return True
         return False
 
     def invalidate_cache(self) -> None:
         """使缓存失效"""
         self._cached_catalog = None
+        self._version += 1
+
+    @property
+    def version(self) -> int:
+        """清单版本号：缓存失效或内容变化时递增（prompt builder 据此做段落级缓存）"""
+        return self._version
 
     @property
     def tool_count(self) -> int:
@@ -182,7 +182,7 @@ class IMChannelHandler:
         # 2. 从 session_manager 查找活跃 session
         session_manager = getattr(gateway, "session_manager", None)
         if session_manager:
-            sessions = session_manager.list_sessions(channel=target_channel)
+            sessions = session_manager.list_sessions(channel=target_channel, with_history=False)
             if sessions:
                 sessions.sort(
                     key=lambda s: getattr(s, "last_active", datetime.min),
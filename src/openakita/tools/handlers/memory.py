@@ -489,8 +489,9 @@ class MemoryHandler:
 
         if ep.linked_memory_ids:
             lines.append(f"\n## 关联记忆（{len(ep.linked_memory_ids)} 条）\n")
+            linked = {m.id: m for m in store.get_semantic_many(ep.linked_memory_ids[:10])}
             for mid in ep.linked_memory_ids[:10]:
-                mem = store.get_semantic(mid)
+                mem = linked.get(mid)
                 if mem:
                     lines.append(f"- [{mem.type.value}] {mem.content[:150]}")
                 else:
@@ -268,7 +268,7 @@ class ScheduledHandler:
         # 2. 从 session_manager 查找该通道的最近活跃 session
         session_manager = getattr(gateway, "session_manager", None)
         if session_manager:
-            sessions = session_manager.list_sessions(channel=target_channel)
+            sessions = session_manager.list_sessions(channel=target_channel, with_history=False)
             if sessions:
                 # 按最近活跃排序
                 sessions.sort(
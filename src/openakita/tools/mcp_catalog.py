@@ -74,6 +74,7 @@ Use `call_mcp_tool(server, tool_name, arguments)` to call an MCP tool when neede
         self.mcp_config_dir = mcp_config_dir
         self._servers: list[MCPServerInfo] = []
         self._cached_catalog: str | None = None
+        self._version = 0
 
     def scan_mcp_directory(self, mcp_dir: Path | None = None, clear: bool = False) -> int:
         """
@@ -267,6 +268,8 @@ Use `call_mcp_tool(server, tool_name, arguments)` to call an MCP tool when neede
         server_list = "\n\n".join(server_sections)
 
         catalog = self.CATALOG_TEMPLATE.format(server_list=server_list)
+        if self._cached_catalog is not None and catalog != self._cached_catalog:
+            self._version += 1
         self._cached_catalog = catalog
 
         logger.info(f"Generated MCP catalog with {len(self._servers)} servers")
@@ -361,13 +364,19 @@ Use `call_mcp_tool(server, tool_name, arguments)` to call an MCP tool when neede
                 arguments=t.get("input_schema") or t.get("inputSchema", {}),
             ))
         target.tools = tool_infos
-        self._cached_catalog = None
+        self.invalidate_cache()
         logger.info(f"Synced {len(tool_infos)} tools from runtime for MCP server: {server_id}")
         return len(tool_infos)
 
     def invalidate_cache(self) -> None:
         """使缓存失效"""
         self._cached_catalog = None
+        self._version += 1
+
+    @property
+    def version(self) -> int:
+        """清单版本号：缓存失效或内容变化时递增（prompt builder 据此做段落级缓存）"""
+        return self._version
 
     @property
     def servers(self) -> list[MCPServerInfo]:
@@ -7,8 +7,12 @@
 - OpenTelemetry: OTEL 兼容导出 (可选扩展)
 """
 
+import bisect
 import json
 import logging
+import os
+import threading
+import time
 from abc import ABC, abstractmethod
 from datetime import datetime
 from pathlib import Path
@@ -27,12 +31,108 @@ class TraceExporter(ABC):
         """导出一个 Trace"""
         ...
 
+    def export_batch(self, traces: list[Trace]) -> None:
+        """批量导出 (后台导出线程调用) - 子类可重写以合并 I/O"""
+        for trace in traces:
+            self.export(trace)
+
     def shutdown(self) -> None:
         """关闭导出器（释放资源）- 子类可重写"""
         # 默认实现不做任何事情，子类可以重写此方法释放资源
         return None
 
 
+class _DailyAggregate:
+    """
+    单日运行聚合 (内存中增量维护)。
+
+    计数/token 求和为精确值; 耗时用对数分桶直方图近似分位数。
+    """
+
+    # 耗时分桶上界 (ms)，最后一个桶收纳所有更大的值
+    DURATION_BOUNDS_MS: tuple[float, ...] = (
+        50, 100, 200, 350, 500, 750, 1000, 1500, 2000, 3000, 5000, 7500,
+        10000, 15000, 20000, 30000, 45000, 60000, 90000, 120000, 180000, 300000, 600000,
+    )
+
+    _SUM_FIELDS = (
+        "llm_calls",
+        "tool_calls",
+        "tool_errors",
+        "total_input_tokens",
+        "total_output_tokens",
+    )
+
+    def __init__(self, date_str: str) -> None:
+        self.date = date_str
+        self.total_traces = 0
+        self.sums: dict[str, int] = dict.fromkeys(self._SUM_FIELDS, 0)
+        self.duration_count = 0
+        self.duration_sum = 0.0
+        self.duration_min: float | None = None
+        self.duration_max: float | None = None
+        self.histogram = [0] * (len(self.DURATION_BOUNDS_MS) + 1)
+
+    def add(self, entry: dict[str, Any]) -> None:
+        self.total_traces += 1
+        for key in self._SUM_FIELDS:
+            self.sums[key] += entry.get(key, 0) or 0
+        duration = entry.get("duration_ms")
+        if duration:
+            self.duration_count += 1
+            self.duration_sum += duration
+            self.duration_min = duration if self.duration_min is None else min(self.duration_min, duration)
+            self.duration_max = duration if self.duration_max is None else max(self.duration_max, duration)
+            self.histogram[bisect.bisect_left(self.DURATION_BOUNDS_MS, duration)] += 1
+
+    def percentile(self, q: float) -> float:
+        """按直方图线性插值估算分位数 (q ∈ [0, 1])"""
+        if not self.duration_count:
+            return 0.0
+        target = q * self.duration_count
+        cumulative = 0
+        for i, count in enumerate(self.histogram):
+            if count and cumulative + count >= target:
+                lower = self.DURATION_BOUNDS_MS[i - 1] if i > 0 else 0.0
+                upper = (
+                    self.DURATION_BOUNDS_MS[i]
+                    if i < len(self.DURATION_BOUNDS_MS)
+                    else (self.duration_max or lower)
+                )
+                lower = max(lower, self.duration_min or lower)
+                upper = min(upper, self.duration_max or upper)
+                frac = (target - cumulative) / count
+                return round(lower + (upper - lower) * frac, 2)
+            cumulative += count
+        return round(self.duration_max or 0.0, 2)
+
+    def to_dict(self) -> dict[str, Any]:
+        tool_calls = self.sums["tool_calls"]
+        avg_duration = self.duration_sum / self.duration_count if self.duration_count else 0
+        return {
+            "date": self.date,
+            "total_traces": self.total_traces,
+            "total_llm_calls": self.sums["llm_calls"],
+            "total_tool_calls": tool_calls,
+            "total_tool_errors": self.sums["tool_errors"],
+            "total_input_tokens": self.sums["total_input_tokens"],
+            "total_output_tokens": self.sums["total_output_tokens"],
+            "avg_duration_ms": round(avg_duration, 2),
+            "min_duration_ms": round(self.duration_min or 0.0, 2),
+            "max_duration_ms": round(self.duration_max or 0.0, 2),
+            "duration_percentiles_ms": {
+                "p50": self.percentile(0.50),
+                "p90": self.percentile(0.90),
+                "p99": self.percentile(0.99),
+            },
+            "duration_histogram": {
+                "bounds_ms": list(self.DURATION_BOUNDS_MS),
+                "counts": list(self.histogram),
+            },
+            "tool_error_rate": round(self.sums["tool_errors"] / max(tool_calls, 1), 4),
+        }
+
+
 class FileExporter(TraceExporter):
     """
     JSON 文件导出器。
@@ -42,15 +142,33 @@ class FileExporter(TraceExporter):
         2026-02-10/
           trace-abc123.json
           trace-def456.json
+          traces.jsonl          # 每个 trace 一行摘要 (只追加)
+          daily_summary.json    # 聚合统计快照 (定期刷新)
         2026-02-11/
           ...
 
-    同时维护一个 daily_summary.json 用于聚合统计。
+    聚合统计在内存中增量维护，每 flush_interval 秒或 flush_every 条 trace
+    刷新一次 daily_summary.json，shutdown() 时强制刷新。
     """
 
-    def __init__(self, base_dir: str | Path = "data/traces") -> None:
+    TRACE_LOG_NAME = "traces.jsonl"
+    SUMMARY_NAME = "daily_summary.json"
+
+    def __init__(
+        self,
+        base_dir: str | Path = "data/traces",
+        *,
+        flush_interval: float = 30.0,
+        flush_every: int = 100,
+    ) -> None:
         self._base_dir = Path(base_dir)
         self._base_dir.mkdir(parents=True, exist_ok=True)
+        self._flush_interval = flush_interval
+        self._flush_every = max(1, flush_every)
+        self._lock = threading.Lock()
+        self._aggregate: _DailyAggregate | None = None
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
 
     def export(self, trace: Trace) -> None:
         """导出 Trace 到 JSON 文件"""
@@ -76,63 +194,111 @@ class FileExporter(TraceExporter):
             logger.warning(f"[Tracing] Failed to export trace to file: {e}")
 
     def _update_daily_summary(self, day_dir: Path, trace: Trace) -> None:
-        """更新每日摘要文件"""
-        summary_file = day_dir / "daily_summary.json"
-
-        # 加载现有摘要
-        summary: dict[str, Any] = {}
-        if summary_file.exists():
+        """追加 trace 摘要到 traces.jsonl，并增量更新内存聚合"""
+        entry = self._trace_entry(trace)
+        with self._lock:
+            aggregate = self._get_aggregate(day_dir)
             try:
-                with open(summary_file, encoding="utf-8") as f:
-                    summary = json.load(f)
-            except Exception:
-                summary = {}
-
-        # 更新统计
+                with open(day_dir / self.TRACE_LOG_NAME, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+            except Exception as e:
+                logger.warning(f"[Tracing] Failed to append trace log: {e}")
+                return
+            aggregate.add(entry)
+            self._unflushed += 1
+
+            if (
+                self._unflushed >= self._flush_every
+                or time.monotonic() - self._last_flush >= self._flush_interval
+            ):
+                self._flush_locked()
+
+    @staticmethod
+    def _trace_entry(trace: Trace) -> dict[str, Any]:
         trace_summary = trace.get_summary()
-        traces = summary.get("traces", [])
-        traces.append(
-            {
-                "trace_id": trace.trace_id,
-                "session_id": trace.session_id,
-                "duration_ms": trace_summary.get("duration_ms"),
-                "llm_calls": trace_summary.get("llm_calls", 0),
-                "tool_calls": trace_summary.get("tool_calls", 0),
-                "tool_errors": trace_summary.get("tool_errors", 0),
-                "total_input_tokens": trace_summary.get("total_input_tokens", 0),
-                "total_output_tokens": trace_summary.get("total_output_tokens", 0),
-            }
-        )
-
-        # 聚合统计
-        total_llm_calls = sum(t.get("llm_calls", 0) for t in traces)
-        total_tool_calls = sum(t.get("tool_calls", 0) for t in traces)
-        total_tool_errors = sum(t.get("tool_errors", 0) for t in traces)
-        total_input_tokens = sum(t.get("total_input_tokens", 0) for t in traces)
-        total_output_tokens = sum(t.get("total_output_tokens", 0) for t in traces)
-
-        durations = [t.get("duration_ms", 0) for t in traces if t.get("duration_ms")]
-        avg_duration = sum(durations) / len(durations) if durations else 0
-
-        summary = {
-            "date": day_dir.name,
-            "total_traces": len(traces),
-            "total_llm_calls": total_llm_calls,
-            "total_tool_calls": total_tool_calls,
-            "total_tool_errors": total_tool_errors,
-            "total_input_tokens": total_input_tokens,
-            "total_output_tokens": total_output_tokens,
-            "avg_duration_ms": round(avg_duration, 2),
-            "tool_error_rate": round(total_tool_errors / max(total_tool_calls, 1), 4),
-            "traces": traces,
+        return {
+            "trace_id": trace.trace_id,
+            "session_id": trace.session_id,
+            "duration_ms": trace_summary.get("duration_ms"),
+            "llm_calls": trace_summary.get("llm_calls", 0),
+            "tool_calls": trace_summary.get("tool_calls", 0),
+            "tool_errors": trace_summary.get("tool_errors", 0),
+            "total_input_tokens": trace_summary.get("total_input_tokens", 0),
+            "total_output_tokens": trace_summary.get("total_output_tokens", 0),
         }
 
+    def _get_aggregate(self, day_dir: Path) -> _DailyAggregate:
+        """返回当天的聚合; 换日时先刷新旧的，再从磁盘恢复新一天已有的记录"""
+        if self._aggregate is not None and self._aggregate.date == day_dir.name:
+            return self._aggregate
+        if self._aggregate is not None:
+            self._flush_locked()
+        self._aggregate = self._rebuild_aggregate(day_dir)
+        self._unflushed = 0
+        return self._aggregate
+
+    def _rebuild_aggregate(self, day_dir: Path) -> _DailyAggregate:
+        """从 traces.jsonl 重建聚合 (兼容只有旧版 daily_summary.json 的目录)"""
+        aggregate = _DailyAggregate(day_dir.name)
+        trace_log = day_dir / self.TRACE_LOG_NAME
+        if trace_log.exists():
+            for entry in self._iter_trace_log(trace_log):
+                aggregate.add(entry)
+            return aggregate
+
+        legacy = day_dir / self.SUMMARY_NAME
+        if legacy.exists():
+            try:
+                with open(legacy, encoding="utf-8") as f:
+                    legacy_traces = json.load(f).get("traces", [])
+                if legacy_traces:
+                    with open(trace_log, "w", encoding="utf-8") as f:
+                        for entry in legacy_traces:
+                            f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+                            aggregate.add(entry)
+            except Exception as e:
+                logger.warning(f"[Tracing] Failed to migrate legacy daily summary: {e}")
+        return aggregate
+
+    @staticmethod
+    def _iter_trace_log(trace_log: Path):
         try:
-            with open(summary_file, "w", encoding="utf-8") as f:
-                json.dump(summary, f, ensure_ascii=False, indent=2, default=str)
+            with open(trace_log, encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # 进程中断可能留下半行
+        except Exception as e:
+            logger.warning(f"[Tracing] Failed to read trace log {trace_log}: {e}")
+
+    def flush(self) -> None:
+        """立即将内存聚合写入 daily_summary.json"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        self._last_flush = time.monotonic()
+        if self._aggregate is None or self._unflushed == 0:
+            return
+        summary = self._aggregate.to_dict()
+        summary["trace_log"] = self.TRACE_LOG_NAME
+        summary_file = self._base_dir / self._aggregate.date / self.SUMMARY_NAME
+        tmp_file = summary_file.with_suffix(".json.tmp")
+        try:
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(summary, f, ensure_ascii=False, default=str)
+            os.replace(tmp_file, summary_file)
+            self._unflushed = 0
         except Exception as e:
             logger.warning(f"[Tracing] Failed to update daily summary: {e}")
 
+    def shutdown(self) -> None:
+        self.flush()
+
     def load_traces_by_date(self, date_str: str) -> list[dict]:
         """加载指定日期的所有 Trace"""
         day_dir = self._base_dir / date_str
@@ -149,14 +315,36 @@ class FileExporter(TraceExporter):
 
         return traces
 
-    def load_daily_summary(self, date_str: str) -> dict | None:
-        """加载指定日期的摘要"""
-        summary_file = self._base_dir / date_str / "daily_summary.json"
+    def load_daily_summary(self, date_str: str, include_traces: bool = True) -> dict | None:
+        """
+        加载指定日期的摘要。
+
+        由 traces.jsonl 重建 (总是与已导出的 trace 一致，不受刷新间隔影响)；
+        只有旧版 daily_summary.json 的日期直接读取该文件。
+        """
+        day_dir = self._base_dir / date_str
+        trace_log = day_dir / self.TRACE_LOG_NAME
+        if trace_log.exists():
+            aggregate = _DailyAggregate(date_str)
+            traces: list[dict] = []
+            for entry in self._iter_trace_log(trace_log):
+                aggregate.add(entry)
+                if include_traces:
+                    traces.append(entry)
+            summary = aggregate.to_dict()
+            if include_traces:
+                summary["traces"] = traces
+            return summary
+
+        summary_file = day_dir / self.SUMMARY_NAME
         if not summary_file.exists():
             return None
         try:
             with open(summary_file, encoding="utf-8") as f:
-                return json.load(f)
+                summary = json.load(f)
+            if not include_traces:
+                summary.pop("traces", None)
+            return summary
         except Exception:
             return None
 
@@ -5,6 +5,8 @@
 """
 
 import logging
+import queue
+import threading
 import time
 import uuid
 from collections.abc import Generator
@@ -140,6 +142,8 @@ class Trace:
 
         total_input_tokens = sum(s.attributes.get("input_tokens", 0) for s in llm_spans)
         total_output_tokens = sum(s.attributes.get("output_tokens", 0) for s in llm_spans)
+        cache_read = sum(s.attributes.get("cache_read_input_tokens", 0) for s in llm_spans)
+        cache_creation = sum(s.attributes.get("cache_creation_input_tokens", 0) for s in llm_spans)
 
         tool_errors = sum(1 for s in tool_spans if s.status == SpanStatus.ERROR)
 
@@ -153,6 +157,8 @@ class Trace:
             "tool_errors": tool_errors,
             "total_input_tokens": total_input_tokens,
             "total_output_tokens": total_output_tokens,
+            "total_cache_read_tokens": cache_read,
+            "total_cache_creation_tokens": cache_creation,
             "metadata": self.metadata,
         }
 
@@ -186,12 +192,45 @@ class AgentTracer:
                 span.set_attribute("input_tokens", 100)
     """
 
-    def __init__(self, enabled: bool = True) -> None:
+    def __init__(
+        self,
+        enabled: bool = True,
+        *,
+        background_export: bool = True,
+        queue_size: int = 1000,
+        batch_size: int = 32,
+        block_on_full: float = 0.0,
+    ) -> None:
+        """
+        Args:
+            enabled: 是否启用追踪
+            background_export: 在后台线程中批量导出 (热路径只做一次入队)
+            queue_size: 导出队列上限, 满时丢弃 (或按 block_on_full 等待)
+            batch_size: 每批最多导出的 Trace 数
+            block_on_full: 队列满时最多等待的秒数 (0 = 立即丢弃)
+        """
         self._enabled = enabled
         self._exporters: list[Any] = []  # TraceExporter instances
         self._current_trace: Trace | None = None
         self._span_stack: list[Span] = []
 
+        self._background_export = background_export
+        self._batch_size = max(1, batch_size)
+        self._block_on_full = block_on_full
+        self._export_queue: queue.Queue[Trace | None] = queue.Queue(maxsize=max(1, queue_size))
+        self._export_thread: threading.Thread | None = None
+        self._export_thread_lock = threading.Lock()
+        self._closed = False
+        self._export_stats = {
+            "enqueued": 0,
+            "exported": 0,
+            "dropped": 0,
+            "blocked": 0,
+            "batches": 0,
+            "export_errors": 0,
+            "queue_high_water": 0,
+        }
+
     @property
     def enabled(self) -> bool:
         return self._enabled
@@ -385,13 +424,136 @@ class AgentTracer:
         self._current_trace = None
         self._span_stack = []
 
-    def _export_trace(self, trace: Trace) -> None:
-        """导出 Trace 到所有已注册的导出器"""
+    def get_export_stats(self) -> dict[str, Any]:
+        """导出管线统计 (入队/导出/丢弃/批次/队列深度)"""
+        return {
+            **self._export_stats,
+            "queue_depth": self._export_queue.qsize(),
+            "background": self._background_export,
+        }
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """等待导出队列清空, 返回是否在超时前完成"""
+        if not self._background_export or self._export_thread is None:
+            return True
+        deadline = time.monotonic() + timeout
+        while self._export_queue.unfinished_tasks:
+            if time.monotonic() >= deadline or not self._export_thread.is_alive():
+                return False
+            time.sleep(0.005)
+        return True
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """刷新导出队列、停止后台线程并关闭所有导出器"""
+        if self._closed:
+            return
+        self._closed = True
+        thread = self._export_thread
+        if thread is not None and thread.is_alive():
+            self.flush(timeout)
+            try:
+                self._export_queue.put(None, timeout=timeout)
+            except queue.Full:
+                pass
+            thread.join(timeout)
         for exporter in self._exporters:
             try:
-                exporter.export(trace)
+                exporter.shutdown()
             except Exception as e:
-                logger.warning(f"[Tracing] Failed to export trace to {type(exporter).__name__}: {e}")
+                logger.warning(f"[Tracing] Failed to shut down {type(exporter).__name__}: {e}")
+
+    def _export_trace(self, trace: Trace) -> None:
+        """导出 Trace: 后台模式下仅入队, 否则同步导出"""
+        if not self._exporters:
+            return
+        if not self._background_export or self._closed:
+            self._export_batch([trace])
+            return
+
+        self._ensure_export_thread()
+        try:
+            if self._block_on_full > 0:
+                try:
+                    self._export_queue.put_nowait(trace)
+                except queue.Full:
+                    self._export_stats["blocked"] += 1
+                    self._export_queue.put(trace, timeout=self._block_on_full)
+            else:
+                self._export_queue.put_nowait(trace)
+        except queue.Full:
+            self._export_stats["dropped"] += 1
+            if self._export_stats["dropped"] in (1, 10, 100) or self._export_stats["dropped"] % 1000 == 0:
+                logger.warning(
+                    f"[Tracing] Export queue full, dropped {self._export_stats['dropped']} trace(s)"
+                )
+            return
+        self._export_stats["enqueued"] += 1
+        depth = self._export_queue.qsize()
+        if depth > self._export_stats["queue_high_water"]:
+            self._export_stats["queue_high_water"] = depth
+
+    def _ensure_export_thread(self) -> None:
+        if self._export_thread is not None and self._export_thread.is_alive():
+            return
+        with self._export_thread_lock:
+            if self._export_thread is not None and self._export_thread.is_alive():
+                return
+            self._export_thread = threading.Thread(
+                target=self._export_worker, name="trace-exporter", daemon=True
+            )
+            self._export_thread.start()
+
+    def _export_worker(self) -> None:
+        """后台导出循环: 阻塞取第一条, 再非阻塞凑满一批"""
+        while True:
+            item = self._export_queue.get()
+            batch: list[Trace] = []
+            stop = item is None
+            if item is not None:
+                batch.append(item)
+            taken = 1
+            while not stop and len(batch) < self._batch_size:
+                try:
+                    item = self._export_queue.get_nowait()
+                except queue.Empty:
+                    break
+                taken += 1
+                if item is None:
+                    stop = True
+                else:
+                    batch.append(item)
+            try:
+                if batch:
+                    self._export_batch(batch)
+            finally:
+                for _ in range(taken):
+                    self._export_queue.task_done()
+            if stop:
+                return
+
+    def _export_batch(self, traces: list[Trace]) -> None:
+        """导出一批 Trace 到所有已注册的导出器"""
+        for exporter in self._exporters:
+            export_batch = getattr(exporter, "export_batch", None)
+            if callable(export_batch):
+                try:
+                    export_batch(traces)
+                except Exception as e:
+                    self._export_stats["export_errors"] += 1
+                    logger.warning(
+                        f"[Tracing] Failed to export trace to {type(exporter).__name__}: {e}"
+                    )
+                continue
+            for trace in traces:
+                try:
+                    exporter.export(trace)
+                except Exception as e:
+                    self._export_stats["export_errors"] += 1
+                    logger.warning(
+                        f"[Tracing] Failed to export trace to {type(exporter).__name__}: {e}"
+                    )
+        self._export_stats["exported"] += len(traces)
+        self._export_stats["batches"] += 1
 
 
 # 全局 tracer 实例
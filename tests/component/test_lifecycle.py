@@ -50,6 +50,26 @@ class TestDeduplication:
         assert len(remaining) == 1
         assert remaining[0].importance_score == 0.8  # kept the better one
 
+    def test_removes_near_duplicates_and_updates_index(self, lifecycle, store):
+        keep = SemanticMemory(
+            content="用户习惯在每天早上八点查看邮件和日程安排", importance_score=0.9,
+            type=MemoryType.FACT,
+        )
+        dup = SemanticMemory(
+            content="用户习惯在每天早上八点查看邮件和日程", importance_score=0.4,
+            type=MemoryType.FACT,
+        )
+        other = SemanticMemory(content="项目使用 PostgreSQL 数据库", type=MemoryType.FACT)
+        for m in (keep, dup, other):
+            store.save_semantic(m)
+
+        import asyncio
+        removed = asyncio.run(lifecycle.deduplicate_batch())
+
+        assert removed == 1
+        assert {m.id for m in store.load_all_memories()} == {keep.id, other.id}
+        assert dup.id not in store.dedup_index
+
 
 class TestDecay:
     def test_decay_old_short_term(self, lifecycle, store):
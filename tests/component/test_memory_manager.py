@@ -1,5 +1,7 @@
 """L2 Component Tests: MemoryManager add/search/inject operations."""
 
+import json
+
 import pytest
 from pathlib import Path
 
@@ -41,6 +43,36 @@ class TestMemoryManagerAdd:
             ids.append(memory_manager.add_memory(mem))
         assert len(set(ids)) == 5
 
+    def test_add_exact_duplicate_rejected(self, memory_manager):
+        assert memory_manager.add_memory(Memory(content="User likes Python", type=MemoryType.FACT))
+        assert memory_manager.add_memory(Memory(content="user LIKES python", type=MemoryType.FACT)) == ""
+        assert memory_manager.add_memory(Memory(content="User likes Python a lot", type=MemoryType.FACT))
+
+    def test_exact_duplicate_checked_before_store_save(self, memory_manager, monkeypatch):
+        from concurrent.futures import ThreadPoolExecutor
+
+        monkeypatch.setattr(memory_manager.store, "save_semantic", lambda mem: mem.id)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            ids = list(pool.map(
+                lambda _: memory_manager.add_memory(Memory(content="Concurrent fact", type=MemoryType.FACT)),
+                range(8),
+            ))
+        assert sum(1 for mid in ids if mid) == 1
+
+        memory_manager.delete_memory(next(mid for mid in ids if mid))
+        assert memory_manager.add_memory(Memory(content="concurrent FACT", type=MemoryType.FACT))
+
+    def test_dedup_index_survives_restart(self, memory_dir, mock_brain):
+        from openakita.memory.manager import MemoryManager
+        mem_dir, memory_md = memory_dir
+        first = MemoryManager(data_dir=mem_dir, memory_md_path=memory_md, brain=mock_brain)
+        first.add_memory(Memory(content="用户偏好深色主题", type=MemoryType.PREFERENCE))
+        first.store.close()
+
+        second = MemoryManager(data_dir=mem_dir, memory_md_path=memory_md, brain=mock_brain)
+        assert len(second.store.dedup_index) == 1
+        assert second.add_memory(Memory(content="用户偏好深色主题", type=MemoryType.PREFERENCE)) == ""
+
     def test_get_memory_by_id(self, memory_manager):
         mem = Memory(content="retrievable fact", type=MemoryType.FACT)
         mid = memory_manager.add_memory(mem)
@@ -105,3 +137,52 @@ class TestMemoryManagerInjection:
         memory_manager.add_memory(Memory(content="User birthday is March 15"))
         ctx = memory_manager.get_injection_context(task_description="greeting")
         assert isinstance(ctx, str)
+
+
+class TestMemoriesJsonWriteBehind:
+    def _manager(self, memory_dir, mock_brain):
+        from openakita.memory.manager import MemoryManager
+        mem_dir, memory_md = memory_dir
+        return MemoryManager(data_dir=mem_dir, memory_md_path=memory_md, brain=mock_brain)
+
+    def test_mutations_append_to_journal(self, memory_manager):
+        before = memory_manager.memories_file.read_text(encoding="utf-8") \
+            if memory_manager.memories_file.exists() else None
+        mids = [
+            memory_manager.add_memory(Memory(content=f"journal fact {i}", type=MemoryType.FACT))
+            for i in range(10)
+        ]
+        memory_manager.delete_memory(mids[0])
+
+        lines = memory_manager.journal_file.read_text(encoding="utf-8").splitlines()
+        assert len(lines) == 11
+        after = memory_manager.memories_file.read_text(encoding="utf-8") \
+            if memory_manager.memories_file.exists() else None
+        assert after == before  # 没有逐次全量重写
+
+    def test_flush_coalesces_into_snapshot(self, memory_manager):
+        for i in range(5):
+            memory_manager.add_memory(Memory(content=f"snapshot fact {i}", type=MemoryType.FACT))
+        memory_manager.flush_memories()
+
+        data = json.loads(memory_manager.memories_file.read_text(encoding="utf-8"))
+        assert len(data) == 5
+        assert not memory_manager.journal_file.exists()
+
+    def test_journal_replayed_after_crash(self, memory_dir, mock_brain):
+        first = self._manager(memory_dir, mock_brain)
+        keep = first.add_memory(Memory(content="survives the crash", type=MemoryType.FACT))
+        gone = first.add_memory(Memory(content="deleted before crash", type=MemoryType.FACT))
+        first.flush_memories()
+        first.delete_memory(gone)
+        first._snapshot_timer.cancel()  # 模拟进程在快照合并前退出
+
+        replayed = first._replay_journal(
+            json.loads(first.memories_file.read_text(encoding="utf-8"))
+        )
+        assert [m["id"] for m in replayed] == [keep]
+
+        second = self._manager(memory_dir, mock_brain)
+        assert second.get_memory(gone) is None
+        assert second.get_memory(keep) is not None
+        assert not second.journal_file.exists()
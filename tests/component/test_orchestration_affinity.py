@@ -0,0 +1,177 @@
+"""L2 Component Tests: session-affinity routing and delta session history."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from openakita.orchestration.master import MasterAgent
+from openakita.orchestration.messages import (
+    AgentInfo,
+    AgentMessage,
+    AgentStatus,
+    CommandType,
+    TaskResult,
+)
+from openakita.orchestration.registry import AgentRegistry
+from openakita.orchestration.session_cache import (
+    SESSION_CACHE_MISS,
+    SessionCache,
+    history_digest,
+)
+
+
+def _worker(agent_id: str, completed: int = 0) -> AgentInfo:
+    info = AgentInfo(agent_id=agent_id, agent_type="worker", process_id=hash(agent_id))
+    info.set_status(AgentStatus.IDLE)
+    info.tasks_completed = completed
+    return info
+
+
+def _history(n: int) -> list[dict]:
+    return [{"role": "user" if i % 2 == 0 else "assistant", "content": f"m{i}"} for i in range(n)]
+
+
+class TestRegistryAffinity:
+    def test_bound_worker_preferred(self):
+        registry = AgentRegistry()
+        registry.register(_worker("w1", completed=0))
+        registry.register(_worker("w2", completed=5))
+        registry.bind_session("s1", "w2")
+
+        assert registry.find_idle_agent(session_id="s1").agent_id == "w2"
+        assert registry.find_idle_agent(session_id="other").agent_id == "w1"
+
+    def test_busy_bound_worker_falls_back(self):
+        registry = AgentRegistry()
+        registry.register(_worker("w1"))
+        registry.register(_worker("w2"))
+        registry.bind_session("s1", "w2")
+        registry.set_agent_task("w2", "t", "busy")
+
+        assert registry.find_idle_agent(session_id="s1").agent_id == "w1"
+
+    def test_unregister_clears_binding(self):
+        registry = AgentRegistry()
+        registry.register(_worker("w1"))
+        registry.bind_session("s1", "w1")
+        registry.unregister("w1")
+
+        assert registry.get_session_agent("s1") is None
+
+
+class TestSessionCache:
+    def test_full_then_delta(self):
+        cache = SessionCache()
+        history = _history(4)
+        assert cache.resolve("s", {"session_messages": history}) == history
+
+        delta = {
+            "session_messages_delta": _history(6)[4:],
+            "session_base": 4,
+            "session_digest": history_digest(history),
+        }
+        assert cache.resolve("s", delta) == _history(6)
+        assert cache.stats()["hits"] == 1
+
+    def test_miss_on_unknown_or_diverged_session(self):
+        cache = SessionCache()
+        delta = {"session_messages_delta": [], "session_base": 2, "session_digest": "x"}
+        assert cache.resolve("s", delta) is None
+
+        cache.resolve("s", {"session_messages": _history(2)})
+        assert cache.resolve("s", delta) is None
+        assert cache.stats()["misses"] == 2
+
+
+@pytest.fixture
+def master(tmp_path, monkeypatch):
+    # 总线替换为 mock（不依赖 pyzmq）
+    monkeypatch.setattr("openakita.orchestration.master.AgentBus", MagicMock())
+    master = MasterAgent(data_dir=tmp_path)
+    master.bus.send_command = AsyncMock()
+    master.registry.register(_worker("w1"))
+    master.registry.register(_worker("w2", completed=3))
+    return master
+
+
+def _sent(master: MasterAgent) -> list[dict]:
+    return [c.kwargs["payload"] for c in master.bus.send_command.await_args_list]
+
+
+async def _turn(master: MasterAgent, history: list[dict], reply: str = "ok") -> str:
+    task = asyncio.create_task(master._distribute_task("s1", "x" * 40, history))
+    await asyncio.sleep(0)
+    payload = _sent(master)[-1]
+    sender = master._task_workers[payload["task_id"]]
+    await master._handle_task_result(AgentMessage.command(
+        sender_id=sender, target_id="master", command_type=CommandType.TASK_RESULT,
+        payload=TaskResult(task_id=payload["task_id"], success=True, result=reply).to_dict(),
+    ))
+    return await task
+
+
+class TestMasterDeltaContext:
+    def test_second_turn_sends_delta_to_same_worker(self, master):
+        async def run():
+            await _turn(master, _history(10))
+            await _turn(master, _history(12))
+
+        asyncio.run(run())
+        first, second = _sent(master)
+        assert len(first["context"]["session_messages"]) == 10
+        assert "session_messages" not in second["context"]
+        assert second["context"]["session_base"] == 10
+        assert second["context"]["session_messages_delta"] == _history(12)[10:]
+        assert master.registry.get_session_agent("s1") == "w1"
+        stats = master.get_stats()
+        assert (stats["context_full"], stats["context_delta"]) == (1, 1)
+
+    def test_truncated_history_sends_full(self, master):
+        async def run():
+            await _turn(master, _history(10))
+            await _turn(master, _history(12)[4:])
+
+        asyncio.run(run())
+        assert len(_sent(master)[1]["context"]["session_messages"]) == 8
+
+    def test_cache_miss_resends_full(self, master):
+        async def run():
+            await _turn(master, _history(4))
+            task = asyncio.create_task(master._distribute_task("s1", "x" * 40, _history(6)))
+            await asyncio.sleep(0)
+            task_id = _sent(master)[-1]["task_id"]
+            await master._handle_task_result(AgentMessage.command(
+                sender_id="w1", target_id="master", command_type=CommandType.TASK_RESULT,
+                payload=TaskResult(
+                    task_id=task_id, success=False, error="miss",
+                    metadata={SESSION_CACHE_MISS: True},
+                ).to_dict(),
+            ))
+            resent = _sent(master)[-1]
+            await master._handle_task_result(AgentMessage.command(
+                sender_id="w1", target_id="master", command_type=CommandType.TASK_RESULT,
+                payload=TaskResult(task_id=task_id, success=True, result="done").to_dict(),
+            ))
+            return resent, await task
+
+        resent, result = asyncio.run(run())
+        assert resent["context"]["session_messages"] == _history(6)
+        assert result == "done"
+        assert master.get_stats()["context_cache_miss"] == 1
+
+    def test_cache_miss_not_counted_as_failure(self, master):
+        master.registry.set_agent_task("w1", "gone")
+
+        # 任务已超时结束，缓存未命中结果仍不计入失败
+        asyncio.run(master._handle_task_result(AgentMessage.command(
+            sender_id="w1", target_id="master", command_type=CommandType.TASK_RESULT,
+            payload=TaskResult(
+                task_id="gone", success=False, error="miss",
+                metadata={SESSION_CACHE_MISS: True},
+            ).to_dict(),
+        )))
+
+        info = master.registry.get("w1")
+        assert info.status == AgentStatus.IDLE.value
+        assert (info.tasks_completed, info.tasks_failed) == (0, 0)
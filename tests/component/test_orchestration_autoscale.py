@@ -0,0 +1,183 @@
+"""L2 Component Tests: worker pool autoscaler."""
+
+import asyncio
+import threading
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from openakita.orchestration.autoscaler import AutoScaler, LoadSnapshot, ScalingPolicy
+from openakita.orchestration.master import MasterAgent
+from openakita.orchestration.messages import AgentInfo, AgentStatus
+
+POLICY = ScalingPolicy(
+    min_workers=1, max_workers=4, scale_up_wait_seconds=5, scale_up_busy_ratio=0.8,
+    scale_down_busy_ratio=0.3, idle_seconds=60, scale_up_cooldown=30,
+    scale_down_cooldown=120, max_step=2,
+)
+
+
+def _workers(busy: int, idle: int) -> list[AgentInfo]:
+    workers = []
+    for i in range(busy + idle):
+        info = AgentInfo(agent_id=f"w{i}", agent_type="worker", process_id=i)
+        info.set_status(AgentStatus.BUSY if i < busy else AgentStatus.IDLE)
+        workers.append(info)
+    return workers
+
+
+class TestAutoScaler:
+    def test_scale_up_on_queue_wait(self):
+        scaler = AutoScaler(POLICY)
+        snapshot = LoadSnapshot(workers=_workers(2, 0), queue_depth=5, oldest_wait=8)
+
+        decision = scaler.evaluate(snapshot, now=1000)
+
+        assert decision.delta == 2
+        assert "queue wait" in decision.reason
+
+    def test_short_wait_does_not_scale(self):
+        scaler = AutoScaler(POLICY)
+        snapshot = LoadSnapshot(workers=_workers(1, 1), queue_depth=1, oldest_wait=1)
+        assert scaler.evaluate(snapshot, now=1000).delta == 0
+
+    def test_bounded_by_max_and_spawning(self):
+        scaler = AutoScaler(POLICY)
+        snapshot = LoadSnapshot(workers=_workers(3, 0), queue_depth=9, oldest_wait=30)
+        assert scaler.evaluate(snapshot, now=1000).delta == 1
+
+        snapshot.spawning = 1
+        assert scaler.evaluate(snapshot, now=1000).delta == 0
+
+    def test_cooldown_extends_to_spawn_time(self):
+        scaler = AutoScaler(POLICY)
+        scaler.record_scale_up(1, [45.0], "test", now=1000)
+        snapshot = LoadSnapshot(workers=_workers(2, 0), queue_depth=3, oldest_wait=10)
+
+        assert scaler.scale_up_cooldown == 45.0
+        assert scaler.evaluate(snapshot, now=1040).delta == 0
+        assert scaler.evaluate(snapshot, now=1046).delta == 2
+
+    def test_busy_ratio_scales_up(self):
+        scaler = AutoScaler(POLICY)
+        decision = scaler.evaluate(LoadSnapshot(workers=_workers(1, 0)), now=1000)
+        assert decision.delta == 1
+        assert "busy ratio" in decision.reason
+
+    def test_below_min_ignores_cooldown(self):
+        scaler = AutoScaler(POLICY)
+        scaler.record_scale_up(1, [], "test", now=1000)
+        assert scaler.evaluate(LoadSnapshot(workers=[]), now=1001).delta == 1
+
+    def test_scale_down_after_idle_and_cooldown(self):
+        scaler = AutoScaler(POLICY)
+        snapshot = LoadSnapshot(workers=_workers(0, 3))
+
+        assert scaler.evaluate(snapshot, now=1000).victims == []
+        # 空闲时长不足
+        assert scaler.evaluate(snapshot, now=1030).victims == []
+        decision = scaler.evaluate(snapshot, now=1061)
+        assert len(decision.victims) == 1
+
+        scaler.record_scale_down(decision.victims[0], decision.reason, now=1061)
+        remaining = [w for w in snapshot.workers if w.agent_id not in decision.victims]
+        snapshot = LoadSnapshot(workers=remaining)
+        # 缩容冷却
+        assert scaler.evaluate(snapshot, now=1100).victims == []
+        assert len(scaler.evaluate(snapshot, now=1182).victims) == 1
+
+    def test_hysteresis_band_holds(self):
+        scaler = AutoScaler(POLICY)
+        # 繁忙比例 50%：既不扩也不缩
+        snapshot = LoadSnapshot(workers=_workers(2, 2))
+        scaler.evaluate(snapshot, now=0)
+        decision = scaler.evaluate(snapshot, now=10_000)
+        assert decision.delta == 0 and decision.victims == []
+
+    def test_busy_worker_resets_idle_clock(self):
+        scaler = AutoScaler(POLICY)
+        workers = _workers(0, 2)
+        scaler.evaluate(LoadSnapshot(workers=workers), now=1000)
+        workers[0].set_status(AgentStatus.BUSY)
+        scaler.evaluate(LoadSnapshot(workers=workers), now=1010)
+        workers[0].set_status(AgentStatus.IDLE)
+
+        decision = scaler.evaluate(LoadSnapshot(workers=workers), now=1200)
+
+        assert decision.victims == ["w1"]
+
+
+@pytest.fixture
+def master(tmp_path, monkeypatch):
+    # 总线替换为 mock（不依赖 pyzmq）
+    monkeypatch.setattr("openakita.orchestration.master.AgentBus", MagicMock())
+    return MasterAgent(data_dir=tmp_path, auto_scale=True, scaling_policy=POLICY)
+
+
+class TestMasterAutoScale:
+    def test_spawns_and_records(self, master):
+        for info in _workers(1, 0):
+            master.registry.register(info)
+            master.registry.set_agent_status(info.agent_id, AgentStatus.BUSY)
+        master.spawn_worker = AsyncMock(return_value="w-new")
+
+        decision = asyncio.run(master._auto_scale_once())
+
+        assert decision.delta == 1
+        master.spawn_worker.assert_awaited_once()
+        data = master.get_dashboard_data()["autoscaler"]
+        assert data["enabled"] is True
+        assert data["recent_events"][0]["action"] == "scale_up"
+        assert data["avg_spawn_seconds"] is not None
+
+    def test_terminates_only_idle_owned_workers(self, master):
+        for info in _workers(0, 3):
+            master.registry.register(info)
+        master._worker_processes = {"w0": MagicMock(), "w1": MagicMock()}
+        master.terminate_worker = AsyncMock(return_value=True)
+        master.autoscaler._idle_since = {"w0": -1000.0, "w1": -500.0, "w2": -2000.0}
+        master.autoscaler._last_scale_down = -1000.0
+        master.autoscaler._last_scale_up = -1000.0
+
+        decision = asyncio.run(master._auto_scale_once())
+
+        # w2 空闲最久，但不是本进程启动的，不参与回收
+        assert decision.victims == ["w0"]
+        master.terminate_worker.assert_awaited_once_with("w0", graceful=True)
+        assert master.registry.get("w0").status == AgentStatus.STOPPING.value
+
+    def test_spawn_returns_once_registered_even_if_busy(self, master, monkeypatch):
+        process = MagicMock(pid=123)
+        monkeypatch.setattr(
+            "openakita.orchestration.master.multiprocessing.Process", lambda **kw: process
+        )
+        monkeypatch.setattr(
+            "openakita.orchestration.master.uuid.uuid4", lambda: MagicMock(hex="ab" * 16)
+        )
+
+        async def run():
+            spawn = asyncio.create_task(master.spawn_worker())
+            await asyncio.sleep(0)
+            # 注册后立即接手排队任务
+            info = AgentInfo(agent_id="worker-abababab", agent_type="worker", process_id=123)
+            master.registry.register(info)
+            master.registry.set_agent_task(info.agent_id, "queued")
+            start = time.monotonic()
+            worker_id = await spawn
+            return worker_id, time.monotonic() - start
+
+        worker_id, waited = asyncio.run(run())
+        assert worker_id == "worker-abababab"
+        assert waited < 1
+
+    def test_terminate_joins_off_event_loop(self, master):
+        joined_on = []
+        process = MagicMock()
+        process.join.side_effect = lambda *a, **kw: joined_on.append(threading.get_ident())
+        process.is_alive.return_value = False
+        master._worker_processes = {"w0": process}
+        master.bus.send_command = AsyncMock()
+
+        assert asyncio.run(master.terminate_worker("w0", graceful=True)) is True
+        assert joined_on and threading.get_ident() not in joined_on
@@ -0,0 +1,178 @@
+"""L2 Component Tests: MasterAgent task queue (priority, fairness, backpressure)."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from openakita.orchestration.master import MasterAgent
+from openakita.orchestration.messages import (
+    AgentInfo,
+    AgentMessage,
+    AgentStatus,
+    CommandType,
+    TaskPayload,
+    TaskResult,
+)
+from openakita.orchestration.monitor import AgentMonitor
+from openakita.orchestration.task_queue import QueueFullError, TaskQueue
+
+
+def _task(task_id: str, session: str = "s1", priority: int = 0) -> TaskPayload:
+    return TaskPayload(
+        task_id=task_id, task_type="chat", description="d", content="c",
+        session_id=session, priority=priority,
+    )
+
+
+class TestTaskQueue:
+    def test_priority_then_session_round_robin(self):
+        async def run():
+            loop = asyncio.get_running_loop()
+            queue = TaskQueue(max_depth=10)
+            for task in [
+                _task("a1", "a"), _task("a2", "a"), _task("a3", "a"),
+                _task("b1", "b"), _task("urgent", "c", priority=-1),
+            ]:
+                queue.put(task, loop.create_future())
+            return [queue.pop().task.task_id for _ in range(5)]
+
+        assert asyncio.run(run()) == ["urgent", "a1", "b1", "a2", "a3"]
+
+    def test_bounded_depth(self):
+        async def run():
+            loop = asyncio.get_running_loop()
+            queue = TaskQueue(max_depth=1)
+            queue.put(_task("t1"), loop.create_future())
+            with pytest.raises(QueueFullError):
+                queue.put(_task("t2"), loop.create_future())
+            return queue.stats()
+
+        stats = asyncio.run(run())
+        assert stats["depth"] == 1
+        assert stats["rejected"] == 1
+
+    def test_remove_and_skip_finished(self):
+        async def run():
+            loop = asyncio.get_running_loop()
+            queue = TaskQueue()
+            done = loop.create_future()
+            done.cancel()
+            queue.put(_task("gone"), loop.create_future())
+            queue.put(_task("cancelled"), done)
+            queue.put(_task("live"), loop.create_future())
+            assert queue.remove("gone")
+            assert not queue.remove("missing")
+            entry = queue.pop()
+            return entry.task.task_id, len(queue), queue.wait_percentile(0.95)
+
+        task_id, depth, wait = asyncio.run(run())
+        assert task_id == "live"
+        assert depth == 0
+        assert wait is not None and wait >= 0
+
+
+@pytest.fixture
+def master(tmp_path, monkeypatch):
+    # 只测排队逻辑，总线替换为 mock（不依赖 pyzmq）
+    monkeypatch.setattr("openakita.orchestration.master.AgentBus", MagicMock())
+    master = MasterAgent(data_dir=tmp_path, max_queue_depth=2)
+    master.bus.send_command = AsyncMock()
+    master.bus.broadcast_event = AsyncMock()
+    worker = AgentInfo(agent_id="w1", agent_type="worker", process_id=1)
+    worker.set_status(AgentStatus.IDLE)
+    master.registry.register(worker)
+    return master
+
+
+def _result_message(task_id: str, text: str) -> AgentMessage:
+    return AgentMessage.command(
+        sender_id="w1", target_id="master", command_type=CommandType.TASK_RESULT,
+        payload=TaskResult(task_id=task_id, success=True, result=text).to_dict(),
+    )
+
+
+def _assigned(master: MasterAgent) -> list[str]:
+    return [c.kwargs["payload"]["task_id"] for c in master.bus.send_command.await_args_list]
+
+
+class TestMasterQueue:
+    def test_busy_worker_queues_instead_of_local(self, master):
+        master._handle_locally = AsyncMock(return_value="local")
+
+        async def run():
+            first = asyncio.create_task(master._distribute_task("s1", "first"))
+            second = asyncio.create_task(master._distribute_task("s2", "second"))
+            await asyncio.sleep(0)
+            assert len(_assigned(master)) == 1
+            assert len(master.task_queue) == 1
+
+            # Worker 报告完成后立即拿到排队任务
+            await master._handle_task_result(_result_message(_assigned(master)[0], "r1"))
+            assert len(_assigned(master)) == 2
+            await master._handle_task_result(_result_message(_assigned(master)[1], "r2"))
+            return await first, await second
+
+        assert asyncio.run(run()) == ("r1", "r2")
+        master._handle_locally.assert_not_called()
+        stats = master.get_stats()
+        assert stats["tasks_queued"] == 1
+        assert stats["queue"]["dispatched"] == 2
+        assert stats["queue"]["wait_p95_seconds"] is not None
+
+    def test_full_queue_rejects(self, master):
+        async def run():
+            tasks = [
+                asyncio.create_task(master._distribute_task("s", f"m{i}")) for i in range(4)
+            ]
+            await asyncio.sleep(0)
+            # 1 个在 Worker 上，2 个排队，第 4 个被拒绝
+            rejected = await tasks[3]
+            for task in tasks[:3]:
+                task.cancel()
+            await asyncio.gather(*tasks[:3], return_exceptions=True)
+            return rejected
+
+        assert "稍后重试" in asyncio.run(run())
+        assert master.get_stats()["tasks_rejected"] == 1
+
+    def test_no_workers_handles_locally(self, master):
+        master.registry.unregister("w1")
+        master._handle_locally = AsyncMock(return_value="local")
+
+        assert asyncio.run(master._distribute_task("s1", "hello")) == "local"
+
+    def test_register_responds_before_dispatch(self, master):
+        async def run():
+            first = asyncio.create_task(master._distribute_task("s1", "first"))
+            second = asyncio.create_task(master._distribute_task("s2", "second"))
+            await asyncio.sleep(0)
+            assert len(master.task_queue) == 1
+
+            new_worker = AgentInfo(agent_id="w2", agent_type="worker", process_id=2)
+            register = AgentMessage.command(
+                sender_id="w2", target_id="master", command_type=CommandType.REGISTER,
+                payload=new_worker.to_dict(),
+            )
+            response = await master._handle_register(register)
+            # 注册响应先返回，排队任务随后派发
+            assert response.payload["success"] is True
+            assert len(_assigned(master)) == 1
+            await asyncio.sleep(0)
+            assert len(_assigned(master)) == 2
+            for task in (first, second):
+                task.cancel()
+            await asyncio.gather(first, second, return_exceptions=True)
+
+        asyncio.run(run())
+
+    def test_monitor_reports_queue(self, master):
+        master.task_queue._waits.extend([0.1, 0.2, 3.0])
+        monitor = AgentMonitor(master.registry, task_queue=master.task_queue)
+
+        metrics = monitor.collect_metrics()
+
+        assert metrics.queue_depth == 0
+        assert metrics.queue_wait_p50_seconds == 0.2
+        assert metrics.queue_wait_p95_seconds == 3.0
+        assert monitor.get_dashboard_data()["queue"]["wait_p95"] == "3.0s"
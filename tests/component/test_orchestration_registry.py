@@ -0,0 +1,104 @@
+"""L2 Component Tests: AgentRegistry indexes and debounced persistence."""
+
+import json
+
+import pytest
+
+from openakita.orchestration.messages import AgentInfo, AgentStatus, AgentType
+from openakita.orchestration.registry import AgentRegistry
+
+
+def _info(agent_id: str, agent_type: str = "worker") -> AgentInfo:
+    return AgentInfo(agent_id=agent_id, agent_type=agent_type, process_id=1)
+
+
+class TestIndexes:
+    @pytest.fixture
+    def registry(self):
+        registry = AgentRegistry()
+        for i in range(3):
+            registry.register(_info(f"w{i}"))
+        registry.register(_info("m", agent_type="master"))
+        return registry
+
+    def test_status_index_follows_changes(self, registry):
+        registry.set_agent_task("w0", "t1")
+        registry.set_agent_status("w1", AgentStatus.DEAD)
+
+        assert registry.count_by_status() == {"idle": 2, "busy": 1, "dead": 1}
+        assert [a.agent_id for a in registry.list_by_status(AgentStatus.BUSY)] == ["w0"]
+
+        registry.clear_agent_task("w0")
+        registry.heartbeat("w1")
+
+        assert registry.count_by_status() == {"idle": 4}
+
+    def test_heartbeat_status_update_reindexes(self, registry):
+        update = _info("w2")
+        update.status = AgentStatus.BUSY.value
+        registry.heartbeat("w2", update)
+
+        assert [a.agent_id for a in registry.list_by_status(AgentStatus.BUSY)] == ["w2"]
+        assert registry.find_idle_agent(exclude_ids=["w0", "w1"]) is None
+
+    def test_unregister_and_type_index(self, registry):
+        registry.unregister("w0")
+
+        assert [a.agent_id for a in registry.list_by_type(AgentType.WORKER)] == ["w1", "w2"]
+        assert [a.agent_id for a in registry.list_by_type(AgentType.MASTER)] == ["m"]
+        assert registry.count_by_status() == {"idle": 3}
+
+    def test_find_idle_skips_non_workers(self, registry):
+        for agent_id in ("w0", "w1", "w2"):
+            registry.set_agent_task(agent_id, "t")
+        assert registry.find_idle_agent() is None
+
+
+class TestPersistence:
+    def test_changes_are_coalesced_until_flush(self, tmp_path):
+        path = tmp_path / "registry.json"
+        registry = AgentRegistry(storage_path=path, flush_interval=0)
+
+        for i in range(5):
+            registry.register(_info(f"w{i}"))
+            registry.set_agent_task(f"w{i}", "t")
+        assert not path.exists()
+
+        assert registry.flush() is True
+        assert registry.flush() is False
+        assert registry._saves == 1
+        assert len(json.loads(path.read_text(encoding="utf-8"))["agents"]) == 5
+        assert not path.with_suffix(".json.tmp").exists()
+
+    def test_plain_heartbeat_does_not_dirty(self, tmp_path):
+        registry = AgentRegistry(storage_path=tmp_path / "registry.json", flush_interval=0)
+        registry.register(_info("w0"))
+        registry.flush()
+
+        registry.heartbeat("w0")
+
+        assert registry.flush() is False
+
+    def test_background_flush_and_reload(self, tmp_path):
+        path = tmp_path / "registry.json"
+        registry = AgentRegistry(storage_path=path, flush_interval=0.01)
+        registry.register(_info("w0"))
+        registry.register(_info("w1"))
+        registry.close()
+
+        reloaded = AgentRegistry(storage_path=path, flush_interval=0)
+
+        assert reloaded.count_by_status() == {"dead": 2}
+        assert reloaded.find_idle_agent() is None
+
+    def test_write_failure_keeps_dirty(self, tmp_path, monkeypatch):
+        registry = AgentRegistry(storage_path=tmp_path / "registry.json", flush_interval=0)
+        registry.register(_info("w0"))
+
+        def _fail(data):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(registry, "_write_atomic", _fail)
+        assert registry.flush() is False
+        monkeypatch.undo()
+        assert registry.flush() is True
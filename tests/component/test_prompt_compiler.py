@@ -94,3 +94,81 @@ class TestBuildSystemPrompt:
             budget_config=budget,
         )
         assert isinstance(prompt, str)
+
+
+class TestPromptSectionCache:
+    @pytest.fixture(autouse=True)
+    def _fresh_cache(self):
+        from openakita.prompt import builder
+
+        builder._section_cache.clear()
+        yield
+        builder._section_cache.clear()
+
+    @staticmethod
+    def _identity(tmp_path):
+        identity_dir = tmp_path / "identity"
+        (identity_dir / "prompts").mkdir(parents=True)
+        (identity_dir / "SOUL.md").write_text("# Soul\nI am OpenAkita.", encoding="utf-8")
+        (identity_dir / "prompts" / "policies.md").write_text("## 规则\n- A", encoding="utf-8")
+        return identity_dir
+
+    @staticmethod
+    def _catalog():
+        from openakita.tools.catalog import ToolCatalog
+
+        return ToolCatalog([{"name": "web_search", "description": "搜索网页", "input_schema": {}}])
+
+    def test_second_build_hits_every_stable_section(self, tmp_path):
+        from openakita.prompt.builder import build_system_prompt, get_prompt_debug_info
+
+        identity_dir = self._identity(tmp_path)
+        catalog = self._catalog()
+        first = build_system_prompt(identity_dir=identity_dir, tool_catalog=catalog)
+        second = build_system_prompt(identity_dir=identity_dir, tool_catalog=catalog)
+
+        assert first.split("当前时间")[0] == second.split("当前时间")[0]
+        sections = get_prompt_debug_info(identity_dir)["section_cache"]["sections"]
+        for name in ("compiled", "identity", "catalogs", "user", "stable_tokens", "runtime_facts"):
+            assert sections[name] == {"hits": 1, "misses": 1}, name
+
+    def test_policies_change_rebuilds_identity_only(self, tmp_path):
+        from openakita.prompt import builder
+
+        identity_dir = self._identity(tmp_path)
+        catalog = self._catalog()
+        builder.build_system_prompt(identity_dir=identity_dir, tool_catalog=catalog)
+        (identity_dir / "prompts" / "policies.md").write_text("## 规则\n- 新增规则 B", encoding="utf-8")
+
+        prompt = builder.build_system_prompt(identity_dir=identity_dir, tool_catalog=catalog)
+
+        assert "新增规则 B" in prompt
+        sections = builder._section_cache.stats()["sections"]
+        assert sections["identity"]["misses"] == 2
+        assert sections["catalogs"] == {"hits": 1, "misses": 1}
+
+    def test_catalog_invalidation_rebuilds_catalogs(self, tmp_path):
+        from openakita.prompt import builder
+
+        identity_dir = self._identity(tmp_path)
+        catalog = self._catalog()
+        builder.build_system_prompt(identity_dir=identity_dir, tool_catalog=catalog)
+        version = catalog.version
+        catalog.add_tool({"name": "deploy_app", "description": "部署应用", "input_schema": {}})
+
+        prompt = builder.build_system_prompt(identity_dir=identity_dir, tool_catalog=catalog)
+
+        assert catalog.version > version
+        assert "deploy_app" in prompt
+        assert builder._section_cache.stats()["sections"]["catalogs"]["misses"] == 2
+
+    def test_distinct_catalog_instances_do_not_share_entries(self, tmp_path):
+        from openakita.prompt import builder
+        from openakita.tools.catalog import ToolCatalog
+
+        identity_dir = self._identity(tmp_path)
+        a = ToolCatalog([{"name": "tool_alpha", "description": "a", "input_schema": {}}])
+        b = ToolCatalog([{"name": "tool_beta", "description": "b", "input_schema": {}}])
+
+        assert "tool_alpha" in builder.build_system_prompt(identity_dir=identity_dir, tool_catalog=a)
+        assert "tool_beta" in builder.build_system_prompt(identity_dir=identity_dir, tool_catalog=b)
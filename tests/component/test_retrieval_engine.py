@@ -95,3 +95,53 @@ class TestRetrievalEngine:
         ]
         ranked = engine._rerank(candidates, "test")
         assert ranked[0].memory_id == "b"
+
+
+class TestAsyncRetrieval:
+    async def test_aretrieve_matches_sync(self, populated_store):
+        engine = RetrievalEngine(populated_store)
+        sync_ids = [c.memory_id for c in engine.retrieve_candidates("Python 3.12", limit=10)]
+        async_ids = [c.memory_id for c in await engine.aretrieve_candidates("Python 3.12", limit=10)]
+        assert sorted(async_ids) == sorted(sync_ids)
+        assert isinstance(await engine.aretrieve("Python 3.12"), str)
+        engine.shutdown()
+
+    async def test_channels_run_concurrently(self, engine, monkeypatch):
+        import time
+
+        def slow(*_args, **_kwargs):
+            time.sleep(0.2)
+            return []
+
+        for name in ("_search_semantic", "_search_episodes", "_search_recent", "_search_attachments"):
+            monkeypatch.setattr(engine, name, slow)
+
+        start = time.perf_counter()
+        await engine.aretrieve_candidates("concurrent recall test")
+        assert time.perf_counter() - start < 0.6
+        engine.shutdown()
+
+    async def test_slow_channel_hits_deadline(self, populated_store, monkeypatch):
+        import threading
+
+        from openakita.tracing.tracer import AgentTracer, set_tracer
+
+        tracer = AgentTracer(enabled=True)
+        set_tracer(tracer)
+        release = threading.Event()
+        engine = RetrievalEngine(populated_store)
+        engine.CHANNEL_TIMEOUTS = {**engine.CHANNEL_TIMEOUTS, "semantic": 0.05}
+        monkeypatch.setattr(engine, "_search_semantic", lambda *_: release.wait(2) or [])
+
+        try:
+            with tracer.start_trace("s1") as trace:
+                candidates = await engine.aretrieve_candidates("Python 3.12 项目")
+        finally:
+            release.set()
+            set_tracer(AgentTracer(enabled=False))
+            engine.shutdown()
+
+        assert isinstance(candidates, list)
+        span = next(s for s in trace.spans if s.name == "memory.retrieve")
+        assert span.attributes["timed_out"] == ["semantic"]
+        assert set(span.attributes["channel_ms"]) >= {"semantic", "episode", "recent", "attachment"}
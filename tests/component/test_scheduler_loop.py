@@ -0,0 +1,116 @@
+"""L2 Component Tests: TaskScheduler heap-based trigger queue."""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from openakita.scheduler import ScheduledTask, TaskScheduler
+
+
+def _once(name: str, seconds: float) -> ScheduledTask:
+    return ScheduledTask.create_once(
+        name=name,
+        description=name,
+        run_at=datetime.now() + timedelta(seconds=seconds),
+        prompt=name,
+    )
+
+
+@pytest.fixture
+async def scheduler(tmp_path):
+    fired: list[tuple[str, datetime]] = []
+
+    async def executor(task):
+        fired.append((task.id, datetime.now()))
+        return True, "ok"
+
+    sched = TaskScheduler(storage_path=tmp_path, executor=executor, advance_seconds=0)
+    sched.fired = fired
+    await sched.start()
+    yield sched
+    await sched.stop()
+
+
+class TestTriggerQueue:
+    async def test_fires_on_time_without_polling(self, scheduler):
+        task = _once("soon", 0.3)
+        await scheduler.add_task(task)
+        planned = task.next_run
+        await asyncio.sleep(0.6)
+
+        assert [tid for tid, _ in scheduler.fired] == [task.id]
+        assert (scheduler.fired[0][1] - planned).total_seconds() < 0.2
+        # 空闲期间只在到期时醒来，而不是按固定间隔轮询
+        assert scheduler.get_stats()["loop_wakeups"] <= 4
+
+    async def test_earlier_task_wakes_loop(self, scheduler):
+        late = _once("late", 30)
+        await scheduler.add_task(late)
+        early = _once("early", 0.2)
+        await scheduler.add_task(early)
+        await asyncio.sleep(0.5)
+
+        assert [tid for tid, _ in scheduler.fired] == [early.id]
+
+    async def test_fires_in_next_run_order(self, scheduler):
+        tasks = [_once(f"t{i}", 0.1 + 0.05 * (5 - i)) for i in range(5)]
+        for t in tasks:
+            await scheduler.add_task(t)
+        await asyncio.sleep(0.8)
+
+        assert [tid for tid, _ in scheduler.fired] == [t.id for t in reversed(tasks)]
+
+    async def test_disabled_and_removed_tasks_do_not_fire(self, scheduler):
+        disabled = _once("disabled", 0.2)
+        removed = _once("removed", 0.2)
+        await scheduler.add_task(disabled)
+        await scheduler.add_task(removed)
+        await scheduler.disable_task(disabled.id)
+        await scheduler.remove_task(removed.id)
+        await asyncio.sleep(0.5)
+
+        assert scheduler.fired == []
+
+    async def test_updated_next_run_is_respected(self, scheduler):
+        task = _once("moved", 30)
+        await scheduler.add_task(task)
+        task.next_run = datetime.now() + timedelta(seconds=0.2)
+        scheduler.reschedule(task.id)
+        await asyncio.sleep(0.5)
+
+        assert [tid for tid, _ in scheduler.fired] == [task.id]
+
+    async def test_running_task_not_dispatched_twice(self, tmp_path):
+        started = asyncio.Event()
+        release = asyncio.Event()
+        calls = []
+
+        async def slow(task):
+            calls.append(task.id)
+            started.set()
+            await release.wait()
+            return True, "ok"
+
+        sched = TaskScheduler(storage_path=tmp_path, executor=slow, advance_seconds=0)
+        await sched.start()
+        try:
+            task = ScheduledTask.create_interval(
+                name="interval", description="", interval_minutes=1, prompt="x"
+            )
+            await sched.add_task(task)
+            task.next_run = datetime.now()
+            sched.reschedule(task.id)
+            await asyncio.wait_for(started.wait(), 1)
+            # 运行期间即使 next_run 又到期也不会重复派发
+            task.next_run = datetime.now()
+            sched.reschedule(task.id)
+            await asyncio.sleep(0.2)
+            assert calls == [task.id]
+            release.set()
+            await asyncio.sleep(0.1)
+            assert task.id not in sched._running_tasks
+            assert task.next_run > datetime.now()
+        finally:
+            release.set()
+            await sched.stop()
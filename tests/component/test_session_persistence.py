@@ -476,5 +476,116 @@ class TestGracefulShutdownSave:
         assert sessions_file.exists()
         data = json.loads(sessions_file.read_text(encoding="utf-8"))
         assert len(data) == 1
-        msgs = data[0]["context"]["messages"]
+        assert data[0]["context"]["message_count"] == 1
+
+        reloaded = _make_session_manager(tmp_path)
+        msgs = reloaded.get_session(
+            "telegram", "123", "user1", create_if_missing=False
+        ).context.messages
         assert any(m["content"] == "important message" for m in msgs)
+
+
+# ===========================================================================
+# Incremental persistence: per-session history files + lazy loading
+# ===========================================================================
+
+class TestIncrementalPersistence:
+
+    def _history_files(self, tmp_path):
+        return {p.name: p.stat().st_mtime_ns for p in (tmp_path / "history").glob("*.json")}
+
+    def test_index_has_no_messages(self, tmp_path):
+        sm = _make_session_manager(tmp_path)
+        sm.add_message("telegram", "1", "u", "user", "hello")
+        sm.flush()
+
+        data = json.loads((tmp_path / "sessions.json").read_text(encoding="utf-8"))
+        assert "messages" not in data[0]["context"]
+        assert data[0]["channel"] == "telegram"
+        assert data[0]["chat_id"] == "1"
+        history = json.loads((tmp_path / "history" / "telegram__1__u.json").read_text(encoding="utf-8"))
+        assert history[0]["content"] == "hello"
+
+    def test_only_changed_sessions_rewritten(self, tmp_path):
+        sm = _make_session_manager(tmp_path)
+        a = sm.get_session("telegram", "a", "u")
+        b = sm.get_session("telegram", "b", "u")
+        a.add_message("user", "a1")
+        b.add_message("user", "b1")
+        sm.mark_dirty()
+        sm.flush()
+        before = self._history_files(tmp_path)
+
+        b.add_message("user", "b2")
+        sm.mark_dirty()
+        sm.flush()
+        after = self._history_files(tmp_path)
+
+        assert after["telegram__a__u.json"] == before["telegram__a__u.json"]
+        assert after["telegram__b__u.json"] != before["telegram__b__u.json"]
+
+    def test_explicit_mark_dirty_catches_in_place_edit(self, tmp_path):
+        sm = _make_session_manager(tmp_path)
+        session = sm.add_message("telegram", "1", "u", "user", "draft")
+        sm.flush()
+
+        session.context.messages[-1]["content"] = "edited"
+        sm.mark_dirty(session)
+        sm.flush()
+
+        reloaded = _make_session_manager(tmp_path)
+        msgs = reloaded.get_history("telegram", "1", "u")
+        assert msgs[-1]["content"] == "edited"
+
+    def test_inactive_history_loaded_lazily(self, tmp_path):
+        sm = _make_session_manager(tmp_path)
+        session = sm.add_message("telegram", "old", "u", "user", "long ago")
+        session.last_active = datetime.now() - timedelta(days=2)
+        sm.add_message("telegram", "new", "u", "user", "just now")
+        sm.flush()
+
+        reloaded = _make_session_manager(tmp_path)
+        assert set(reloaded._unloaded) == {"telegram:old:u"}
+        assert reloaded.list_sessions(channel="telegram", with_history=False)
+        assert set(reloaded._unloaded) == {"telegram:old:u"}
+
+        # 未访问的会话保存时不会被清空
+        reloaded.mark_dirty()
+        reloaded.flush()
+        old = reloaded.get_session("telegram", "old", "u", create_if_missing=False)
+        assert [m["content"] for m in old.context.messages] == ["long ago"]
+        assert not reloaded._unloaded
+
+    def test_legacy_inline_format_migrated(self, tmp_path):
+        from openakita.sessions.session import Session, SessionContext
+
+        session = Session(
+            id="legacy",
+            channel="telegram",
+            chat_id="9",
+            user_id="u",
+            context=SessionContext(messages=[
+                {"role": "user", "content": "legacy msg", "timestamp": "2026-01-01T00:00:00"},
+            ]),
+        )
+        (tmp_path / "sessions.json").write_text(
+            json.dumps([session.to_dict()], ensure_ascii=False), encoding="utf-8"
+        )
+
+        sm = _make_session_manager(tmp_path)
+        sm.flush()
+
+        data = json.loads((tmp_path / "sessions.json").read_text(encoding="utf-8"))
+        assert "messages" not in data[0]["context"]
+        reloaded = _make_session_manager(tmp_path)
+        assert reloaded.get_history("telegram", "9", "u")[0]["content"] == "legacy msg"
+
+    def test_closed_session_history_removed(self, tmp_path):
+        sm = _make_session_manager(tmp_path)
+        sm.add_message("telegram", "1", "u", "user", "bye")
+        sm.flush()
+        assert (tmp_path / "history" / "telegram__1__u.json").exists()
+
+        sm.close_session("telegram:1:u")
+        sm.flush()
+        assert not (tmp_path / "history" / "telegram__1__u.json").exists()
@@ -92,3 +92,103 @@ class TestMessageTypes:
         assert mc.voices == []
         assert mc.files == []
         assert mc.videos == []
+
+
+class TestSessionDispatch:
+    """MessageGateway 会话级并发调度: 跨会话并发、会话内有序、并发上限."""
+
+    @staticmethod
+    def _make_gateway(**kwargs):
+        import asyncio
+
+        from openakita.channels.gateway import MessageGateway
+
+        session_manager = MagicMock()
+        session_manager.get_session_count.return_value = 0
+        gateway = MessageGateway(session_manager=session_manager, **kwargs)
+        log: list[tuple[str, str, str]] = []
+        state = {"active": 0, "peak": 0}
+
+        async def fake_handle(message):
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+            log.append(("start", message.chat_id, message.plain_text))
+            await asyncio.sleep(0.05)
+            log.append(("end", message.chat_id, message.plain_text))
+            state["active"] -= 1
+
+        gateway._handle_message = fake_handle
+        return gateway, log, state
+
+    @staticmethod
+    async def _drain(gateway):
+        import asyncio
+
+        for _ in range(200):
+            await asyncio.sleep(0.01)
+            if not gateway._session_workers and gateway._message_queue.empty():
+                return
+
+    async def test_sessions_run_concurrently_and_in_order(self):
+        import asyncio
+
+        gateway, log, state = self._make_gateway(max_concurrency=4)
+        gateway._running = True
+        loop_task = asyncio.create_task(gateway._process_loop())
+        try:
+            for i in range(3):
+                for chat in ("a", "b", "c"):
+                    await gateway._message_queue.put(
+                        create_channel_message(chat_id=chat, text=f"{chat}{i}")
+                    )
+            await self._drain(gateway)
+        finally:
+            gateway._running = False
+            loop_task.cancel()
+
+        assert state["peak"] == 3
+        for chat in ("a", "b", "c"):
+            events = [(kind, text) for kind, c, text in log if c == chat]
+            assert events == [
+                (kind, f"{chat}{i}") for i in range(3) for kind in ("start", "end")
+            ]
+
+        stats = gateway.get_stats()["dispatch"]
+        assert stats["completed"] == 9
+        assert stats["in_flight"] == 0
+        assert stats["queued_messages"] == 0
+
+    async def test_global_and_channel_limits(self):
+        gateway, _log, state = self._make_gateway(max_concurrency=2)
+        for chat in "abcdef":
+            gateway._dispatch(create_channel_message(chat_id=chat))
+        await self._drain(gateway)
+        assert state["peak"] == 2
+
+        gateway, _log, state = self._make_gateway(
+            max_concurrency=8, channel_concurrency={"telegram": 1}
+        )
+        for chat in "abc":
+            gateway._dispatch(create_channel_message(channel="telegram", chat_id=chat))
+        for chat in "xy":
+            gateway._dispatch(create_channel_message(channel="feishu", chat_id=chat))
+        await self._drain(gateway)
+        assert state["peak"] == 3  # 1 telegram + 2 feishu
+
+    async def test_stats_expose_queue_and_wait_time(self):
+        import asyncio
+
+        gateway, _log, _state = self._make_gateway(max_concurrency=1)
+        for chat in "ab":
+            gateway._dispatch(create_channel_message(chat_id=chat))
+        await asyncio.sleep(0.01)
+
+        stats = gateway.get_stats()["dispatch"]
+        assert stats["in_flight"] == 1
+        assert stats["in_flight_by_channel"] == {"telegram": 1}
+        assert stats["queued_messages"] == 1
+        assert stats["queued_sessions"] == 1
+
+        await self._drain(gateway)
+        stats = gateway.get_stats()["dispatch"]
+        assert stats["wait_ms"]["max"] >= 40
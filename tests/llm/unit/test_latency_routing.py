@@ -0,0 +1,237 @@
+"""
+单元测试 - 延迟感知路由与对冲请求
+
+LatencyTracker 统计、routing_policy=latency 排序、hedge_requests 对冲（非流式 / 流式）
+"""
+
+import asyncio
+
+import pytest
+
+from openakita.llm.client import LLMClient
+from openakita.llm.latency import LatencyTracker
+from openakita.llm.types import (
+    AuthenticationError,
+    EndpointConfig,
+    LLMError,
+    LLMResponse,
+    Message,
+    StopReason,
+    TextBlock,
+    Tool,
+    Usage,
+)
+
+
+def _client(**settings) -> LLMClient:
+    client = LLMClient(endpoints=[
+        EndpointConfig(
+            name=name, provider="openai", api_type="openai",
+            base_url="https://example.com/v1", api_key="k", model=name,
+            priority=i, capabilities=["text", "tools"],
+        )
+        for i, name in enumerate(("primary", "secondary"))
+    ])
+    client._settings = settings
+    return client
+
+
+def _response(text: str) -> LLMResponse:
+    return LLMResponse(
+        id=text, content=[TextBlock(text=text)], stop_reason=StopReason.END_TURN,
+        usage=Usage(input_tokens=1, output_tokens=1), model="m",
+    )
+
+
+def _slow_chat(text: str, delay: float, calls: list, cancelled: list | None = None):
+    async def chat(request):
+        calls.append(text)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            if cancelled is not None:
+                cancelled.append(text)
+            raise
+        return _response(text)
+    return chat
+
+
+HELLO = [Message(role="user", content="hello")]
+
+
+class TestLatencyTracker:
+    def test_ewma_quantile_and_error_penalty(self):
+        tracker = LatencyTracker()
+        for latency in (1.0, 1.0, 1.0, 1.0, 5.0):
+            tracker.record_success("a", latency)
+        stats = tracker.get("a")
+
+        assert stats.quantile(0.95) == 5.0
+        assert 1.0 < stats.latency_ewma < 5.0
+        before = stats.expected_latency()
+        tracker.record_failure("a")
+        assert stats.expected_latency() > before
+
+    def test_hedge_delay_clamped(self):
+        tracker = LatencyTracker()
+        assert tracker.hedge_delay("a", floor=2.0, ceiling=30.0) == 2.0
+        for _ in range(10):
+            tracker.record_success("a", 100.0, ttft=4.0)
+        assert tracker.hedge_delay("a", floor=2.0, ceiling=30.0) == 30.0
+        assert tracker.hedge_delay("a", floor=2.0, ceiling=30.0, ttft=True) == 4.0
+
+    def test_lower_bound_only_raises_estimate(self):
+        tracker = LatencyTracker()
+        tracker.record_success("a", 2.0)
+        stats = tracker.get("a")
+
+        tracker.record_lower_bound("a", 1.0)
+        assert stats.latency_ewma == 2.0
+
+        tracker.record_lower_bound("a", 10.0)
+        assert stats.latency_ewma > 2.0 and stats.ttft_ewma > 2.0
+        assert (stats.successes, stats.failures) == (1, 0)
+
+
+class TestLatencyRouting:
+    @pytest.mark.asyncio
+    async def test_prefers_fastest_endpoint_for_tool_free_calls(self):
+        client = _client(routing_policy="latency")
+        calls: list[str] = []
+        client.providers["primary"].chat = _slow_chat("primary", 0, calls)
+        client.providers["secondary"].chat = _slow_chat("secondary", 0, calls)
+        client._latency.record_success("primary", 8.0)
+        client._latency.record_success("secondary", 1.0)
+
+        response = await client.chat(HELLO)
+
+        assert response.text == "secondary"
+
+    @pytest.mark.asyncio
+    async def test_keeps_priority_when_tools_present(self):
+        client = _client(routing_policy="latency")
+        calls: list[str] = []
+        client.providers["primary"].chat = _slow_chat("primary", 0, calls)
+        client.providers["secondary"].chat = _slow_chat("secondary", 0, calls)
+        client._latency.record_success("primary", 8.0)
+        client._latency.record_success("secondary", 1.0)
+
+        tools = [Tool(name="t", description="d", input_schema={"type": "object"})]
+        response = await client.chat(HELLO, tools=tools)
+
+        assert response.text == "primary"
+
+    @pytest.mark.asyncio
+    async def test_default_policy_is_priority(self):
+        client = _client()
+        calls: list[str] = []
+        client.providers["primary"].chat = _slow_chat("primary", 0, calls)
+        client.providers["secondary"].chat = _slow_chat("secondary", 0, calls)
+        client._latency.record_success("primary", 8.0)
+        client._latency.record_success("secondary", 1.0)
+
+        assert (await client.chat(HELLO)).text == "primary"
+
+
+class TestHedging:
+    @pytest.mark.asyncio
+    async def test_backup_wins_and_slow_primary_is_cancelled(self):
+        client = _client(hedge_requests=True, hedge_min_delay_seconds=0.05)
+        calls, cancelled = [], []
+        client.providers["primary"].chat = _slow_chat("primary", 5, calls, cancelled)
+        client.providers["secondary"].chat = _slow_chat("secondary", 0.01, calls)
+
+        response = await client.chat(HELLO)
+
+        assert response.text == "secondary"
+        assert cancelled == ["primary"]
+        stats = client.get_endpoint_stats()
+        assert (stats["hedge_fired"], stats["hedge_won"]) == (1, 1)
+        # 被取消的一方既不计为成功也不计为失败，已耗时作为延迟下界记录
+        primary = stats["endpoints"]["primary"]
+        assert (primary["successes"], primary["failures"]) == (0, 0)
+        assert primary["latency_ewma"] >= 0.05
+
+    @pytest.mark.asyncio
+    async def test_cancelled_slow_primary_loses_latency_rank(self):
+        client = _client(hedge_requests=True, hedge_min_delay_seconds=0.3, routing_policy="latency")
+        calls, cancelled = [], []
+        client._latency.record_success("primary", 0.01)
+        client._latency.record_success("secondary", 0.02)
+        client.providers["primary"].chat = _slow_chat("primary", 5, calls, cancelled)
+        client.providers["secondary"].chat = _slow_chat("secondary", 0.01, calls)
+
+        assert (await client.chat(HELLO)).text == "secondary"
+        assert cancelled == ["primary"]
+
+        ranked = client._latency.rank(list(client.providers.values()))
+        assert [p.name for p in ranked] == ["secondary", "primary"]
+
+    @pytest.mark.asyncio
+    async def test_fast_primary_does_not_fire_hedge(self):
+        client = _client(hedge_requests=True, hedge_min_delay_seconds=0.5)
+        calls: list[str] = []
+        client.providers["primary"].chat = _slow_chat("primary", 0, calls)
+        client.providers["secondary"].chat = _slow_chat("secondary", 0, calls)
+
+        assert (await client.chat(HELLO)).text == "primary"
+        assert calls == ["primary"]
+
+    @pytest.mark.asyncio
+    async def test_backup_failure_waits_for_primary_without_retrying_backup(self):
+        client = _client(hedge_requests=True, hedge_min_delay_seconds=0.02)
+        calls: list[str] = []
+        client.providers["primary"].chat = _slow_chat("primary", 0.1, calls)
+
+        async def failing(request):
+            calls.append("secondary")
+            raise LLMError("boom")
+
+        client.providers["secondary"].chat = failing
+
+        assert (await client.chat(HELLO)).text == "primary"
+        assert calls == ["primary", "secondary"]
+
+    @pytest.mark.asyncio
+    async def test_hedged_auth_failure_cools_down_backup(self):
+        client = _client(hedge_requests=True, hedge_min_delay_seconds=0.02)
+        calls: list[str] = []
+        client.providers["primary"].chat = _slow_chat("primary", 0.1, calls)
+
+        async def unauthorized(request):
+            raise AuthenticationError("401 invalid api key")
+
+        client.providers["secondary"].chat = unauthorized
+
+        assert (await client.chat(HELLO)).text == "primary"
+        backup = client.providers["secondary"]
+        assert not backup.is_healthy
+        assert backup.error_category == "auth"
+
+    @pytest.mark.asyncio
+    async def test_stream_hedge_by_first_event(self):
+        client = _client(hedge_requests=True, hedge_min_delay_seconds=0.05)
+        closed: list[str] = []
+
+        def _stream(name: str, ttft: float):
+            async def chat_stream(request):
+                try:
+                    await asyncio.sleep(ttft)
+                    yield {"type": "text", "text": f"{name}-1"}
+                    yield {"type": "text", "text": f"{name}-2"}
+                finally:
+                    closed.append(name)
+            return chat_stream
+
+        client.providers["primary"].chat_stream = _stream("primary", 5)
+        client.providers["secondary"].chat_stream = _stream("secondary", 0.01)
+
+        events = [e["text"] async for e in client.chat_stream(HELLO)]
+
+        assert events == ["secondary-1", "secondary-2"]
+        assert sorted(closed) == ["primary", "secondary"]
+        endpoints = client.get_endpoint_stats()["endpoints"]
+        assert endpoints["secondary"]["successes"] == 1
+        # backup 的 TTFT 从它自己开始计时，不含对冲等待
+        assert endpoints["secondary"]["ttft_ewma"] < 0.05
+        assert endpoints["primary"]["ttft_ewma"] >= 0.05
@@ -0,0 +1,157 @@
+"""
+单元测试 - Prompt caching
+
+稳定前缀 / 易变后缀切分、Anthropic cache_control 断点、缓存用量解析
+"""
+
+import pytest
+
+from openakita.llm.converters.messages import convert_messages_to_openai
+from openakita.llm.providers.anthropic import AnthropicProvider
+from openakita.llm.providers.openai import OpenAIProvider
+from openakita.llm.types import (
+    PROMPT_CACHE_BOUNDARY,
+    EndpointConfig,
+    LLMRequest,
+    Message,
+    TextBlock,
+    ThinkingBlock,
+    Tool,
+    Usage,
+    split_system_prompt,
+    strip_cache_boundary,
+)
+
+SYSTEM = f"## System\n\nidentity\n\n{PROMPT_CACHE_BOUNDARY}\n\n## Runtime\n\n当前时间: 12:00"
+
+
+@pytest.fixture
+def anthropic_provider():
+    return AnthropicProvider(EndpointConfig(
+        name="claude", provider="anthropic", api_type="anthropic",
+        base_url="https://api.anthropic.com", api_key="k", model="claude-test",
+    ))
+
+
+def _tools(n: int = 3) -> list[Tool]:
+    return [
+        Tool(name=f"tool_{i}", description="d", input_schema={"type": "object", "properties": {}})
+        for i in range(n)
+    ]
+
+
+class TestBoundaryHelpers:
+    def test_split(self):
+        assert split_system_prompt(SYSTEM) == ("## System\n\nidentity", "## Runtime\n\n当前时间: 12:00")
+
+    def test_split_without_boundary(self):
+        assert split_system_prompt("plain") == ("plain", "")
+
+    def test_strip(self):
+        stripped = strip_cache_boundary(SYSTEM)
+        assert PROMPT_CACHE_BOUNDARY not in stripped
+        assert stripped == "## System\n\nidentity\n\n## Runtime\n\n当前时间: 12:00"
+
+    def test_cache_hit_ratio(self):
+        assert Usage(input_tokens=100, cache_read_input_tokens=900).cache_hit_ratio == 0.9
+        assert Usage().cache_hit_ratio == 0.0
+
+
+class TestAnthropicBreakpoints:
+    def test_system_tools_and_last_message(self, anthropic_provider):
+        request = LLMRequest(
+            messages=[
+                Message(role="user", content="hi"),
+                Message(role="assistant", content=[TextBlock(text="hello")]),
+                Message(role="user", content="next"),
+            ],
+            system=SYSTEM,
+            tools=_tools(),
+        )
+
+        body = anthropic_provider._build_request_body(request)
+
+        assert body["system"] == [
+            {"type": "text", "text": "## System\n\nidentity", "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": "## Runtime\n\n当前时间: 12:00"},
+        ]
+        assert [("cache_control" in t) for t in body["tools"]] == [False, False, True]
+        assert body["messages"][-1]["content"] == [
+            {"type": "text", "text": "next", "cache_control": {"type": "ephemeral"}},
+        ]
+        assert body["messages"][0]["content"] == "hi"
+        # Anthropic 每个请求最多 4 个断点
+        assert str(body).count("ephemeral") == 3
+
+    def test_skips_thinking_block(self, anthropic_provider):
+        request = LLMRequest(messages=[
+            Message(role="assistant", content=[TextBlock(text="answer"), ThinkingBlock(thinking="...")]),
+        ])
+
+        content = anthropic_provider._build_request_body(request)["messages"][-1]["content"]
+
+        assert "cache_control" in content[0]
+        assert "cache_control" not in content[1]
+
+    def test_disabled_by_setting(self, anthropic_provider, monkeypatch):
+        from openakita.config import settings
+
+        monkeypatch.setattr(settings, "prompt_cache_enabled", False)
+        body = anthropic_provider._build_request_body(
+            LLMRequest(messages=[Message(role="user", content="x")], system=SYSTEM, tools=_tools(1))
+        )
+
+        assert body["system"] == strip_cache_boundary(SYSTEM)
+        assert "ephemeral" not in str(body)
+
+    def test_parses_cache_usage(self, anthropic_provider):
+        response = anthropic_provider._parse_response({
+            "id": "m", "content": [{"type": "text", "text": "ok"}], "stop_reason": "end_turn",
+            "usage": {
+                "input_tokens": 20, "output_tokens": 5,
+                "cache_creation_input_tokens": None, "cache_read_input_tokens": 4000,
+            },
+        })
+        assert response.usage.cache_read_input_tokens == 4000
+        assert response.usage.cache_creation_input_tokens == 0
+
+
+class TestOpenAICompat:
+    def test_converter_strips_boundary(self):
+        messages = convert_messages_to_openai([Message(role="user", content="x")], SYSTEM)
+        assert PROMPT_CACHE_BOUNDARY not in messages[0]["content"]
+
+    def test_cached_tokens_normalized(self):
+        provider = OpenAIProvider(EndpointConfig(
+            name="gpt", provider="openai", api_type="openai",
+            base_url="https://api.openai.com/v1", api_key="k", model="gpt-4o",
+        ))
+        response = provider._parse_response({
+            "id": "c",
+            "choices": [{"message": {"role": "assistant", "content": "ok"}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": 1000, "completion_tokens": 10,
+                "prompt_tokens_details": {"cached_tokens": 768},
+            },
+        })
+        assert response.usage.input_tokens == 232
+        assert response.usage.cache_read_input_tokens == 768
+
+
+class TestBuilderLayout:
+    def test_volatile_sections_after_boundary(self, tmp_path):
+        from openakita.prompt.builder import build_system_prompt
+
+        identity_dir = tmp_path / "identity"
+        identity_dir.mkdir()
+        (identity_dir / "SOUL.md").write_text("# Soul\nI am OpenAkita.", encoding="utf-8")
+
+        prompt = build_system_prompt(
+            identity_dir=identity_dir, tools_enabled=False, precomputed_memory="## 记忆\n- m1",
+        )
+        prefix, suffix = split_system_prompt(prompt)
+
+        assert "当前时间" not in prefix
+        assert "当前时间" in suffix
+        assert "m1" in suffix
+        assert prefix.startswith("## System")
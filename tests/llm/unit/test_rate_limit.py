@@ -0,0 +1,177 @@
+"""
+单元测试 - 端点限流
+
+共享令牌桶（RPM / TPM / 并发上限）、跨事件循环共享、SQLite 跨进程状态
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from openakita.llm import rate_limit
+from openakita.llm.providers.openai import OpenAIProvider
+from openakita.llm.rate_limit import (
+    _Limits,
+    _MemoryBucketStore,
+    _SqliteBucketStore,
+    get_rate_limiter,
+)
+from openakita.llm.types import (
+    EndpointConfig,
+    LLMRequest,
+    LLMResponse,
+    Message,
+    StopReason,
+    TextBlock,
+    Usage,
+)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_registry():
+    rate_limit.reset_rate_limiters(_MemoryBucketStore())
+    yield
+    rate_limit.reset_rate_limiters()
+
+
+def _config(name: str = "ep", model: str = "gpt-4o", **limits) -> EndpointConfig:
+    return EndpointConfig(
+        name=name, provider="openai", api_type="openai",
+        base_url="https://api.example.com/v1", api_key="k", model=model, **limits,
+    )
+
+
+def _request() -> LLMRequest:
+    return LLMRequest(messages=[Message(role="user", content="hello")])
+
+
+class TestRegistry:
+    def test_same_upstream_shares_one_limiter(self):
+        a = OpenAIProvider(_config("main", rpm_limit=10))
+        b = OpenAIProvider(_config("worker", rpm_limit=10))
+
+        assert a._rate_limiter is b._rate_limiter
+        assert a._rate_limiter.stats()["endpoints"] == ["main", "worker"]
+
+    def test_different_model_has_own_limiter(self):
+        a = get_rate_limiter(_config(model="a", rpm_limit=10))
+        b = get_rate_limiter(_config(model="b", rpm_limit=10))
+        assert a is not b
+
+    def test_no_limits_means_no_limiter(self):
+        assert OpenAIProvider(_config())._rate_limiter is None
+
+    def test_config_roundtrip(self):
+        data = _config(tpm_limit=5000, max_concurrency=3).to_dict()
+        restored = EndpointConfig.from_dict(data)
+        assert (restored.tpm_limit, restored.max_concurrency) == (5000, 3)
+
+
+class TestBuckets:
+    def test_rpm_bucket(self):
+        store = _MemoryBucketStore()
+        limits = _Limits(rpm=2, tpm=0, max_inflight=0)
+
+        assert store.try_acquire("k", limits, 0)[0]
+        assert store.try_acquire("k", limits, 0)[0]
+        lease, wait = store.try_acquire("k", limits, 0)
+
+        assert lease is None
+        assert 29 < wait <= 30
+
+    def test_tpm_reserve_and_refund(self):
+        store = _MemoryBucketStore()
+        limits = _Limits(rpm=0, tpm=1000, max_inflight=0)
+
+        lease = store.try_acquire("k", limits, 800)[0]
+        assert store.try_acquire("k", limits, 300)[0] is None
+        # 实际只用了 100 token，退回 700
+        store.release("k", lease, limits, 100 - 800)
+        assert store.try_acquire("k", limits, 300)[0]
+
+    def test_oversized_request_waits_for_full_bucket(self):
+        store = _MemoryBucketStore()
+        limits = _Limits(rpm=0, tpm=100, max_inflight=0)
+        assert store.try_acquire("k", limits, 10_000)[0]
+
+    def test_sqlite_store_shared_between_connections(self, tmp_path):
+        db = tmp_path / "rl.db"
+        proc_a, proc_b = _SqliteBucketStore(db), _SqliteBucketStore(db)
+        limits = _Limits(rpm=0, tpm=0, max_inflight=1)
+
+        lease = proc_a.try_acquire("k", limits, 0)[0]
+        assert lease
+        assert proc_b.try_acquire("k", limits, 0)[0] is None
+        proc_a.release("k", lease, limits, 0)
+        assert proc_b.try_acquire("k", limits, 0)[0]
+
+    def test_sqlite_expired_lease_is_reclaimed(self, tmp_path):
+        store = _SqliteBucketStore(tmp_path / "rl.db", lease_ttl=0.01)
+        limits = _Limits(rpm=0, tpm=0, max_inflight=1)
+
+        assert store.try_acquire("k", limits, 0)[0]
+        time.sleep(0.02)
+        assert store.try_acquire("k", limits, 0)[0]
+
+
+class TestProviderIntegration:
+    @staticmethod
+    def _provider(name: str, active: list, peak: list, lock: threading.Lock, **limits):
+        provider = OpenAIProvider(_config(name, **limits))
+
+        async def _chat(request):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            await asyncio.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            return LLMResponse(
+                id="r", content=[TextBlock(text="ok")], stop_reason=StopReason.END_TURN,
+                usage=Usage(input_tokens=1, output_tokens=1), model="m",
+            )
+
+        provider._chat = _chat
+        return provider
+
+    @pytest.mark.asyncio
+    async def test_concurrency_cap_across_provider_instances(self):
+        active, peak, lock = [0], [0], threading.Lock()
+        providers = [self._provider(f"p{i}", active, peak, lock, max_concurrency=2) for i in range(3)]
+
+        await asyncio.gather(*(p.chat(_request()) for p in providers for _ in range(2)))
+
+        assert peak[0] == 2
+        assert providers[0]._rate_limiter.stats()["inflight"] == 0
+
+    def test_concurrency_cap_across_event_loops(self):
+        active, peak, lock = [0], [0], threading.Lock()
+
+        def run(i: int) -> None:
+            provider = self._provider(f"thread{i}", active, peak, lock, max_concurrency=1)
+            asyncio.run(provider.chat(_request()))
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert peak[0] == 1
+
+    @pytest.mark.asyncio
+    async def test_stream_holds_slot_until_closed(self):
+        provider = OpenAIProvider(_config(max_concurrency=1))
+
+        async def _chat_stream(request):
+            yield {"type": "text"}
+            yield {"type": "text"}
+
+        provider._chat_stream = _chat_stream
+        stream = provider.chat_stream(_request())
+        await stream.__anext__()
+        assert provider._rate_limiter.stats()["inflight"] == 1
+        await stream.aclose()
+        assert provider._rate_limiter.stats()["inflight"] == 0
@@ -0,0 +1,192 @@
+"""
+单元测试 - LLM 响应缓存
+
+内容寻址键、TTL / LRU 淘汰、命中率统计、LLMClient.chat(cache=True) 接入
+"""
+
+import sqlite3
+import time
+
+import pytest
+
+from openakita.llm import response_cache as rc
+from openakita.llm.client import LLMClient
+from openakita.llm.response_cache import ResponseCache, cache_key, request_digest
+from openakita.llm.types import (
+    EndpointConfig,
+    LLMError,
+    LLMRequest,
+    LLMResponse,
+    Message,
+    StopReason,
+    TextBlock,
+    ToolUseBlock,
+    Usage,
+)
+
+
+def _response(text: str = "ok", model: str = "m") -> LLMResponse:
+    return LLMResponse(
+        id="r", content=[TextBlock(text=text)], stop_reason=StopReason.END_TURN,
+        usage=Usage(input_tokens=100, output_tokens=10), model=model,
+    )
+
+
+def _request(text: str = "hello", **kw) -> LLMRequest:
+    return LLMRequest(messages=[Message(role="user", content=text)], system="sys", **kw)
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    c = ResponseCache(None)
+    monkeypatch.setattr(rc, "_response_cache", c)
+    yield c
+    c.close()
+
+
+class TestKeys:
+    def test_digest_is_stable_and_parameter_sensitive(self):
+        assert request_digest(_request()) == request_digest(_request())
+        assert request_digest(_request()) != request_digest(_request("other"))
+        assert request_digest(_request()) != request_digest(_request(max_tokens=10))
+        assert request_digest(_request()) != request_digest(_request(enable_thinking=True))
+
+    def test_model_is_part_of_key(self):
+        digest = request_digest(_request())
+        assert cache_key("a", digest) != cache_key("b", digest)
+
+
+class TestResponseCache:
+    def test_roundtrip_zeroes_usage(self, cache):
+        cache.put("k", "m", _response("答案"))
+
+        hit = cache.get("k")
+
+        assert hit.text == "答案"
+        assert hit.usage.input_tokens == 0
+        assert cache.stats()["hits"] == 1
+
+    def test_tool_calls_and_empty_text_not_cached(self, cache):
+        tool = LLMResponse(
+            id="r", content=[ToolUseBlock(id="t", name="x", input={})],
+            stop_reason=StopReason.TOOL_USE, usage=Usage(), model="m",
+        )
+        assert cache.put("a", "m", tool) is False
+        assert cache.put("b", "m", _response("  ")) is False
+        assert cache.stats()["entries"] == 0
+
+    def test_ttl_expiry(self):
+        cache = ResponseCache(None, ttl_seconds=0.01)
+        cache.put("k", "m", _response())
+        time.sleep(0.02)
+        assert cache.get("k") is None
+        assert cache.stats()["entries"] == 0
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(None, max_entries=2)
+        for key in ("a", "b", "c"):
+            cache.put(key, "m", _response(key))
+            time.sleep(0.001)
+        cache.get("a")
+
+        assert cache.prune() == 1
+        assert cache.get("b") is None
+        assert cache.get("a").text == "a"
+
+    def test_hit_access_times_written_in_batches(self, tmp_path):
+        db = tmp_path / "cache.db"
+        cache = ResponseCache(db)
+        cache.put("k", "m", _response())
+        for _ in range(3):
+            cache.get("k")
+
+        def hits() -> int:
+            reader = sqlite3.connect(db)
+            try:
+                return reader.execute("SELECT hits FROM llm_response_cache").fetchone()[0]
+            finally:
+                reader.close()
+
+        # 命中不再逐次 UPDATE + commit
+        assert hits() == 0
+        cache.close()
+        assert hits() == 3
+
+    def test_persists_across_instances(self, tmp_path):
+        db = tmp_path / "cache.db"
+        first = ResponseCache(db)
+        first.put("k", "m", _response("persisted"))
+        first.close()
+
+        assert ResponseCache(db).get("k").text == "persisted"
+
+
+class TestClientIntegration:
+    @staticmethod
+    def _client() -> LLMClient:
+        return LLMClient(endpoints=[
+            EndpointConfig(
+                name=name, provider="openai", api_type="openai",
+                base_url="https://example.com/v1", api_key="k", model=f"model-{name}",
+                priority=i, capabilities=["text"],
+            )
+            for i, name in enumerate(("primary", "secondary"))
+        ])
+
+    @pytest.mark.asyncio
+    async def test_second_identical_call_is_served_from_cache(self, cache):
+        client = self._client()
+        calls = []
+
+        async def chat(request):
+            calls.append(request)
+            return _response("summary")
+
+        client.providers["primary"].chat = chat
+        messages = [Message(role="user", content="压缩这段工具输出")]
+
+        await client.chat(messages, cache=True)
+        second = await client.chat(messages, cache=True)
+
+        assert second.text == "summary"
+        assert len(calls) == 1
+        assert cache.stats()["hit_rate"] == 0.5
+        assert client.get_endpoint_stats()["response_cache"]["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_opt_in_only(self, cache):
+        client = self._client()
+        calls = []
+
+        async def chat(request):
+            calls.append(request)
+            return _response()
+
+        client.providers["primary"].chat = chat
+        messages = [Message(role="user", content="x")]
+
+        await client.chat(messages)
+        await client.chat(messages)
+
+        assert len(calls) == 2
+        assert cache.stats()["entries"] == 0
+
+    @pytest.mark.asyncio
+    async def test_failover_answer_keyed_by_serving_model(self, cache):
+        client = self._client()
+
+        async def failing(request):
+            raise LLMError("timeout")
+
+        async def backup(request):
+            return _response("from backup")
+
+        client.providers["primary"].chat = failing
+        client.providers["secondary"].chat = backup
+        messages = [Message(role="user", content="x")]
+
+        await client.chat(messages, cache=True)
+
+        digest = request_digest(LLMRequest(messages=messages))
+        assert cache.get(cache_key("model-secondary", digest)).text == "from backup"
+        assert cache.get(cache_key("model-primary", digest)) is None
@@ -0,0 +1,124 @@
+"""L1 Unit Tests: MinHash/LSH near-duplicate index."""
+
+import pytest
+
+from openakita.memory import minhash_index
+from openakita.memory.minhash_index import (
+    MinHashIndex,
+    cluster_candidates,
+    jaccard,
+    overlap_coefficient,
+    shingles,
+)
+from openakita.memory.types import MemoryType, SemanticMemory
+
+
+class TestShingles:
+    def test_cjk_bigrams_and_words(self):
+        assert shingles("用户喜欢 Python") == {"用户", "户喜", "喜欢", "python"}
+
+    def test_single_cjk_char_kept(self):
+        assert shingles("猫 cat") == {"猫", "cat"}
+
+    def test_punctuation_only_is_empty(self):
+        assert shingles("!!! ...") == set()
+
+    def test_similarity_helpers(self):
+        a, b = {"x", "y"}, {"x", "y", "z", "w"}
+        assert jaccard(a, b) == 0.5
+        assert overlap_coefficient(a, b) == 1.0
+
+
+class TestSignature:
+    def test_numpy_and_python_paths_agree(self, monkeypatch):
+        index = MinHashIndex()
+        s = shingles("用户每天早上八点喝咖啡 and reads news")
+        fast = index.signature(s)
+        monkeypatch.setattr(minhash_index, "_NUMPY_AVAILABLE", False)
+        assert index.signature(s) == fast
+
+
+class TestIndex:
+    def test_query_finds_near_duplicate(self):
+        index = MinHashIndex()
+        index.add("a", "用户喜欢使用 Python 编写自动化脚本和数据处理工具", "preference")
+        index.add("b", "项目部署在阿里云的杭州机房，使用 Kubernetes 管理", "fact")
+
+        hits = index.query("用户喜欢使用 Python 编写自动化脚本与数据处理工具")
+
+        assert hits[0] == "a"
+        assert "b" not in hits
+
+    def test_type_filter_and_exclude(self):
+        index = MinHashIndex()
+        index.add("a", "the user prefers dark mode in every editor", "preference")
+        assert index.query("the user prefers dark mode in every editor", memory_type="fact") == []
+        assert index.query("the user prefers dark mode in every editor", exclude="a") == []
+
+    def test_remove_and_update(self):
+        index = MinHashIndex()
+        index.add("a", "alpha beta gamma delta")
+        index.add("a", "completely unrelated words here")
+        assert index.query("alpha beta gamma delta") == []
+        index.remove("a")
+        assert len(index) == 0
+        assert index.query("completely unrelated words here") == []
+
+    def test_sync_only_recomputes_changed(self, monkeypatch):
+        index = MinHashIndex()
+        index.add("a", "alpha beta gamma")
+        index.add("gone", "stale entry")
+
+        changed = index.sync([("a", "alpha beta gamma", "fact"), ("b", "new memory text", "fact")])
+
+        assert changed == 2
+        assert "gone" not in index
+        assert index.sync([("a", "alpha beta gamma", "fact"), ("b", "new memory text", "fact")]) == 0
+
+    def test_sync_flushes_once(self, tmp_path, monkeypatch):
+        index = MinHashIndex(tmp_path / "mem.db")
+        flushes = []
+        original = index.flush
+        monkeypatch.setattr(index, "flush", lambda: (flushes.append(1), original()))
+
+        index.sync([(f"m{i}", f"memory number {i} text", "fact") for i in range(200)])
+
+        assert len(flushes) == 1
+        assert len(MinHashIndex(tmp_path / "mem.db")) == 200
+
+    def test_persistence_roundtrip(self, tmp_path):
+        db = tmp_path / "mem.db"
+        index = MinHashIndex(db)
+        index.add("a", "用户喜欢 Python 编程", "preference")
+        index.flush()
+
+        reloaded = MinHashIndex(db)
+        assert "a" in reloaded
+        assert reloaded.query("用户喜欢 Python 编程") == ["a"]
+
+    def test_changed_parameters_discard_index(self, tmp_path):
+        db = tmp_path / "mem.db"
+        index = MinHashIndex(db)
+        index.add("a", "alpha beta")
+        index.flush()
+        assert len(MinHashIndex(db, num_perm=32, bands=8)) == 0
+
+    def test_invalid_band_layout(self):
+        with pytest.raises(ValueError):
+            MinHashIndex(num_perm=64, bands=10)
+
+
+class TestClusterCandidates:
+    def test_clusters_with_exact_check(self):
+        mems = [
+            SemanticMemory(content="用户喜欢 Python 编程", type=MemoryType.PREFERENCE),
+            SemanticMemory(content="用户喜欢 Python 编程语言", type=MemoryType.PREFERENCE),
+            SemanticMemory(content="完全不相关的内容 XYZ ABC", type=MemoryType.PREFERENCE),
+        ]
+        index = MinHashIndex()
+        for m in mems:
+            index.add(m.id, m.content)
+
+        clusters = cluster_candidates(index, mems, threshold=0.7)
+
+        assert [[m.id for m in c] for c in clusters] == [[mems[0].id, mems[1].id]]
@@ -0,0 +1,79 @@
+"""L1 Unit Tests: AgentBus wire codec (framing, compression, negotiation)."""
+
+import json
+
+import pytest
+
+from openakita.orchestration import codec
+from openakita.orchestration.codec import CodecError, WireFormat, decode, negotiate
+from openakita.orchestration.messages import AgentMessage, CommandType
+
+
+def _message(size: int = 10) -> AgentMessage:
+    return AgentMessage.command(
+        sender_id="master", target_id="w1", command_type=CommandType.ASSIGN_TASK,
+        payload={"content": "你好" * size, "n": 1, "items": [1, 2, 3]},
+    )
+
+
+class TestFraming:
+    def test_default_is_legacy_json(self):
+        data = _message().to_bytes()
+        assert json.loads(data)["target_id"] == "w1"
+
+    def test_legacy_bytes_still_decode(self):
+        msg = _message()
+        assert AgentMessage.from_bytes(msg.to_json().encode("utf-8")) == msg
+
+    def test_small_message_not_compressed(self):
+        data = _message().to_bytes(WireFormat(compression="zlib"))
+        assert data[0] == codec.MAGIC
+        assert data[1] & 0x0F == 0
+
+    def test_large_message_compressed(self):
+        msg = _message(size=5000)
+        data = msg.to_bytes(WireFormat(compression="zlib", compress_threshold=1024))
+
+        assert data[1] & 0x0F == 1
+        assert len(data) < len(msg.to_bytes()) / 5
+        assert AgentMessage.from_bytes(data) == msg
+
+    def test_unknown_format_byte(self):
+        with pytest.raises(CodecError):
+            decode(bytes((codec.MAGIC, 0xFF)) + b"x")
+
+    def test_msgpack_roundtrip(self):
+        pytest.importorskip("msgpack")
+        msg = _message(size=5000)
+        data = msg.to_bytes(WireFormat(codec="msgpack", compression="zlib"))
+        assert data[1] >> 4 == 2
+        assert AgentMessage.from_bytes(data) == msg
+
+
+class TestNegotiate:
+    def test_legacy_peer(self):
+        assert negotiate(None) is None
+
+    def test_common_subset(self):
+        wire = negotiate({"codecs": ["json"], "compression": ["none", "zlib"]})
+        assert wire.codec == "json"
+        # 对端没有 zstd 时 auto 不压缩，不会自动选 zlib
+        assert wire.compression == "none"
+
+    def test_forced_zlib(self):
+        wire = negotiate({"codecs": ["json"], "compression": ["none", "zlib"]}, compression="zlib")
+        assert wire.compression == "zlib"
+
+    def test_setting_overrides_preference(self):
+        wire = negotiate(codec.wire_offer(), codec="json", compression="none")
+        assert (wire.codec, wire.compression) == ("json", "none")
+
+    def test_unsupported_forced_value_falls_back(self):
+        wire = negotiate({"codecs": ["json"], "compression": ["none"]}, codec="msgpack")
+        assert wire.codec == "json"
+
+    def test_from_dict_drops_unavailable(self, monkeypatch):
+        monkeypatch.setattr(codec, "HAS_MSGPACK", False)
+        monkeypatch.setattr(codec, "HAS_ZSTD", False)
+        wire = WireFormat.from_dict({"codec": "msgpack", "compression": "zstd"})
+        assert (wire.codec, wire.compression) == ("json", "none")
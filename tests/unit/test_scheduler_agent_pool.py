@@ -0,0 +1,190 @@
+"""L1 Unit Tests: Warm agent pool for scheduled task execution."""
+
+import asyncio
+
+from openakita.scheduler.agent_pool import AgentPool
+from openakita.scheduler.executor import TaskExecutor
+from openakita.scheduler.task import ScheduledTask, TriggerType
+
+
+class FakeAgent:
+    def __init__(self, fail_reset: bool = False):
+        self.resets = 0
+        self.shutdowns = 0
+        self.history: list[str] = []
+        self.fail_reset = fail_reset
+
+    async def reset_for_reuse(self):
+        if self.fail_reset:
+            raise RuntimeError("reset failed")
+        self.resets += 1
+        self.history.clear()
+
+    async def shutdown(self):
+        self.shutdowns += 1
+
+    async def chat(self, prompt: str) -> str:
+        self.history.append(prompt)
+        return f"done: {prompt[:10]}"
+
+
+def _make_factory(created: list, **kwargs):
+    async def factory():
+        agent = FakeAgent(**kwargs)
+        created.append(agent)
+        return agent
+
+    return factory
+
+
+class TestAgentPool:
+    async def test_reuses_released_agent(self):
+        created = []
+        pool = AgentPool(_make_factory(created), max_size=2)
+
+        a1 = await pool.acquire()
+        a1.history.append("task 1")
+        await pool.release(a1)
+        a2 = await pool.acquire()
+
+        assert a2 is a1
+        assert len(created) == 1
+        assert a1.resets == 1
+        assert a1.history == []
+        stats = pool.get_stats()
+        assert stats["created"] == 1
+        assert stats["reused"] == 1
+        assert stats["leased"] == 1
+
+    async def test_unhealthy_agent_is_discarded(self):
+        created = []
+        pool = AgentPool(_make_factory(created), max_size=2)
+
+        a1 = await pool.acquire()
+        await pool.release(a1, healthy=False)
+        a2 = await pool.acquire()
+
+        assert a2 is not a1
+        assert a1.shutdowns == 1
+        assert pool.get_stats()["discarded"] == 1
+
+    async def test_reset_failure_discards(self):
+        created = []
+        pool = AgentPool(_make_factory(created, fail_reset=True), max_size=2)
+
+        a1 = await pool.acquire()
+        await pool.release(a1)
+
+        assert pool.get_stats()["idle"] == 0
+        assert pool.get_stats()["reset_failures"] == 1
+
+    async def test_max_uses_recycles_agent(self):
+        created = []
+        pool = AgentPool(_make_factory(created), max_size=1, max_uses=2)
+
+        a1 = await pool.acquire()
+        await pool.release(a1)
+        assert await pool.acquire() is a1
+        await pool.release(a1)
+
+        assert a1.shutdowns == 1
+        assert await pool.acquire() is not a1
+
+    async def test_idle_timeout_recycles_agent(self):
+        created = []
+        pool = AgentPool(_make_factory(created), max_size=1, max_idle_seconds=0)
+
+        a1 = await pool.acquire()
+        await pool.release(a1)
+        await asyncio.sleep(0.01)
+
+        assert await pool.acquire() is not a1
+        assert a1.shutdowns == 1
+
+    async def test_pool_size_bounds_idle_agents(self):
+        created = []
+        pool = AgentPool(_make_factory(created), max_size=1)
+
+        a1 = await pool.acquire()
+        a2 = await pool.acquire()
+        await pool.release(a1)
+        await pool.release(a2)
+
+        assert pool.get_stats()["idle"] == 1
+        assert a2.shutdowns == 1
+
+    async def test_prewarm_and_close(self):
+        created = []
+        pool = AgentPool(_make_factory(created), max_size=2)
+
+        assert await pool.prewarm() == 2
+        assert pool.get_stats()["idle"] == 2
+        await pool.close()
+
+        assert pool.get_stats()["idle"] == 0
+        assert all(a.shutdowns == 1 for a in created)
+
+
+class TestExecutorWithPool:
+    def _task(self) -> ScheduledTask:
+        return ScheduledTask.create(
+            name="hourly",
+            description="hourly task",
+            trigger_type=TriggerType.INTERVAL,
+            trigger_config={"interval_minutes": 60},
+            prompt="Summarize news",
+        )
+
+    async def test_scheduled_runs_share_one_agent(self):
+        created = []
+        executor = TaskExecutor(agent_pool_size=1)
+        executor._create_agent = _make_factory(created)
+
+        for _ in range(3):
+            ok, _ = await executor._execute_complex_task_core(self._task())
+            assert ok
+
+        assert len(created) == 1
+        assert created[0].resets == 3
+        assert created[0].shutdowns == 0
+        stats = executor.get_pool_stats()
+        assert stats["reused"] == 2
+
+    async def test_failed_run_does_not_return_agent(self):
+        created = []
+        executor = TaskExecutor(agent_pool_size=1)
+        executor._create_agent = _make_factory(created)
+
+        async def boom(agent, prompt):
+            raise RuntimeError("llm down")
+
+        executor._run_agent = boom
+        ok, _ = await executor._execute_complex_task_core(self._task())
+
+        assert not ok
+        assert created[0].shutdowns == 1
+        assert executor.get_pool_stats()["idle"] == 0
+
+    async def test_without_pool_agent_is_shut_down(self):
+        created = []
+        executor = TaskExecutor()
+        executor._create_agent = _make_factory(created)
+
+        ok, _ = await executor._execute_complex_task_core(self._task())
+
+        assert ok
+        assert executor.get_pool_stats() is None
+        assert created[0].shutdowns == 1
+
+    async def test_prewarm_makes_first_run_warm(self):
+        created = []
+        executor = TaskExecutor(agent_pool_size=2)
+        executor._create_agent = _make_factory(created)
+
+        assert await executor.prewarm() == 1
+        ok, _ = await executor._execute_complex_task_core(self._task())
+
+        assert ok
+        assert len(created) == 1
+        assert executor.get_pool_stats()["reused"] == 1
+        assert await TaskExecutor().prewarm() == 0
@@ -164,3 +164,186 @@ class TestFactoryFallbacks:
     def test_api_no_key_fallback(self, tmp_storage):
         backend = create_search_backend("api_embedding", storage=tmp_storage, api_key="")
         assert isinstance(backend, FTS5Backend)
+
+
+class TestEmbeddingIndex:
+    @pytest.fixture(autouse=True)
+    def _require_numpy(self):
+        pytest.importorskip("numpy")
+
+    def test_search_ranks_by_cosine(self, tmp_path):
+        from openakita.memory.embedding_index import EmbeddingIndex
+
+        index = EmbeddingIndex(tmp_path / "m.db", model="m")
+        index.upsert("a", [1.0, 0.0, 0.0], "fact")
+        index.upsert("b", [0.7, 0.7, 0.0], "preference")
+        index.upsert("c", [0.0, 0.0, 5.0], "fact")
+
+        results = index.search([1.0, 0.0, 0.0], limit=2)
+        assert [r[0] for r in results] == ["a", "b"]
+        assert results[0][1] == pytest.approx(1.0)
+
+    def test_filter_type(self, tmp_path):
+        from openakita.memory.embedding_index import EmbeddingIndex
+
+        index = EmbeddingIndex(tmp_path / "m.db", model="m")
+        index.upsert("a", [1.0, 0.0], "fact")
+        index.upsert("b", [0.9, 0.1], "preference")
+        results = index.search([1.0, 0.0], limit=5, filter_type="PREFERENCE")
+        assert [r[0] for r in results] == ["b"]
+
+    def test_remove_keeps_rows_consistent(self, tmp_path):
+        from openakita.memory.embedding_index import EmbeddingIndex
+
+        index = EmbeddingIndex(tmp_path / "m.db", model="m")
+        index.upsert("a", [1.0, 0.0], "fact")
+        index.upsert("b", [0.0, 1.0], "fact")
+        index.upsert("c", [0.6, 0.8], "fact")
+        assert index.remove("a") is True
+        assert index.remove("a") is False
+        assert len(index) == 2
+        assert index.search([0.0, 1.0], limit=1)[0][0] == "b"
+        assert index.search([0.6, 0.8], limit=1)[0][0] == "c"
+
+    def test_persist_and_reload(self, tmp_path):
+        from openakita.memory.embedding_index import EmbeddingIndex
+
+        index = EmbeddingIndex(tmp_path / "m.db", model="m")
+        index.upsert_many([("a", [1.0, 0.0], "fact"), ("b", [0.0, 1.0], "skill")])
+        index.flush()
+
+        reloaded = EmbeddingIndex(tmp_path / "m.db", model="m")
+        assert len(reloaded) == 2
+        assert reloaded.search([0.0, 1.0], limit=1)[0][0] == "b"
+        reloaded.upsert("c", [1.0, 1.0], "fact")
+        assert len(reloaded) == 3
+
+        other_model = EmbeddingIndex(tmp_path / "m.db", model="other")
+        assert len(other_model) == 0
+
+    def test_backend_search_covers_all_memories(self, tmp_storage):
+        vectors = {"query": [1.0, 0.0], "low importance": [0.9, 0.1], "noise": [0.0, 1.0]}
+        backend = APIEmbeddingBackend(storage=tmp_storage, api_key="sk-test")
+        now = datetime.now().isoformat()
+        for i, (content, importance) in enumerate([("low importance", 0.01), ("noise", 0.9)]):
+            tmp_storage.save_memory({
+                "id": f"m{i}", "content": content, "type": "fact",
+                "importance_score": importance, "created_at": now, "updated_at": now,
+            })
+
+        def fake_api(texts):
+            return [vectors[t] for t in texts]
+
+        with patch.object(backend, "_call_api", side_effect=fake_api) as mock_api:
+            # 首次检索在后台补齐索引
+            backend.search("query", limit=1)
+            backend._sync_thread.join(5)
+            assert backend.search("query", limit=1)[0][0] == "m0"
+            calls = mock_api.call_count
+            backend.search("query", limit=1)
+            assert mock_api.call_count == calls
+
+        assert backend.delete("m0") is True
+        with patch.object(backend, "_call_api", side_effect=fake_api):
+            assert backend.search("query", limit=1)[0][0] == "m1"
+
+    def test_failed_backfill_is_retried(self, tmp_storage):
+        backend = APIEmbeddingBackend(storage=tmp_storage, api_key="sk-test")
+        now = datetime.now().isoformat()
+        tmp_storage.save_memory({
+            "id": "m0", "content": "memory", "type": "fact", "created_at": now, "updated_at": now,
+        })
+
+        with patch.object(backend, "_call_api", return_value=None):
+            assert backend._sync_index() is False
+        assert backend._index_synced is False
+
+        with patch.object(backend, "_call_api", side_effect=lambda ts: [[1.0, 0.0]] * len(ts)):
+            assert backend._sync_index() is True
+        assert "m0" in backend._index
+
+    def test_sync_keeps_vectors_added_after_snapshot(self, tmp_storage):
+        backend = APIEmbeddingBackend(storage=tmp_storage, api_key="sk-test")
+        backend._index.upsert("gone", [0.0, 1.0], "fact")
+        load_all = tmp_storage.load_all
+
+        def load_then_add():
+            snapshot = load_all()
+            # 快照之后并发写入的记忆: 已入库并入索引, 但不在快照里
+            backend._index.upsert("late", [1.0, 0.0], "fact")
+            return snapshot
+
+        with patch.object(tmp_storage, "load_all", side_effect=load_then_add):
+            assert backend._sync_index() is True
+        assert "late" in backend._index
+        assert "gone" not in backend._index
+
+
+class TestAPIEmbeddingBatching:
+    @staticmethod
+    def _fake_api(calls):
+        def _call(texts):
+            calls.append(list(texts))
+            return [[float(len(t)), 1.0] for t in texts]
+        return _call
+
+    def test_batches_by_provider_limit_and_dedups(self, tmp_storage):
+        backend = APIEmbeddingBackend(storage=tmp_storage, provider="dashscope", api_key="k")
+        calls: list[list[str]] = []
+        texts = [f"text {i}" for i in range(25)] + ["text 0", "  "]
+        with patch.object(backend, "_call_api", side_effect=self._fake_api(calls)):
+            result = backend._get_embeddings(texts)
+
+        assert [len(c) for c in calls] == [10, 10, 5]
+        assert result[0] == result[25]
+        assert result[26] is None
+
+        with patch.object(backend, "_call_api", side_effect=self._fake_api(calls)):
+            backend._get_embeddings(texts)
+        assert len(calls) == 3  # all served from embedding_cache
+
+    def test_concurrent_identical_requests_coalesce(self, tmp_storage):
+        import threading
+        import time
+
+        backend = APIEmbeddingBackend(storage=tmp_storage, api_key="k")
+        calls: list[list[str]] = []
+        fake = self._fake_api(calls)
+
+        def slow_api(texts):
+            time.sleep(0.2)
+            return fake(texts)
+
+        results = []
+        with patch.object(backend, "_call_api", side_effect=slow_api):
+            threads = [
+                threading.Thread(target=lambda: results.append(backend._get_embedding("same")))
+                for _ in range(4)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        assert len(calls) == 1
+        assert results == [[4.0, 1.0]] * 4
+
+    def test_failed_owner_releases_inflight(self, tmp_storage):
+        backend = APIEmbeddingBackend(storage=tmp_storage, api_key="k")
+        with (
+            patch.object(backend, "_fetch_batched", side_effect=KeyboardInterrupt),
+            pytest.raises(KeyboardInterrupt),
+        ):
+            backend._get_embeddings(["x"])
+        assert backend._inflight == {}
+
+    def test_request_payload_batches_inputs(self, tmp_storage):
+        backend = APIEmbeddingBackend(storage=tmp_storage, provider="openai", api_key="k")
+        url, headers, payload = backend._request(["a", "b"])
+        assert payload["input"] == ["a", "b"]
+        assert headers["Authorization"] == "Bearer k"
+
+        parsed = APIEmbeddingBackend._parse_response(
+            {"data": [{"index": 1, "embedding": [2.0]}, {"index": 0, "embedding": [1.0]}]}, 2
+        )
+        assert parsed == [[1.0], [2.0]]
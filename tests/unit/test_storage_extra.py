@@ -138,3 +138,180 @@ class TestExpiryCleanup:
         })
         storage.cleanup_expired()
         assert storage.get_memory("fresh") is not None
+
+
+class TestConcurrentAccess:
+    def _mem(self, i: int) -> dict:
+        return {"id": f"m{i}", "content": f"concurrent memory {i}", "created_at": datetime.now().isoformat()}
+
+    def test_read_your_writes_through_pool(self, storage):
+        storage.save_memory(self._mem(1))
+        assert storage.get_memory("m1")["content"] == "concurrent memory 1"
+        assert storage.get_contention_stats()["read_connections"] == 1
+
+    def test_failed_write_rolls_back_only_itself(self, storage):
+        storage.save_memory(self._mem(1))
+        with pytest.raises(sqlite3.OperationalError), storage._write() as conn:
+            conn.execute("UPDATE memories SET content = 'changed' WHERE id = 'm1'")
+            conn.execute("SELECT * FROM no_such_table")
+        storage.save_memory(self._mem(2))
+
+        assert storage.get_memory("m1")["content"] == "concurrent memory 1"
+        assert storage.get_memory("m2") is not None
+
+    def test_concurrent_writers_group_commit(self, storage):
+        import threading
+
+        barrier = threading.Barrier(8)
+
+        def writer(base: int) -> None:
+            barrier.wait()
+            for i in range(25):
+                storage.save_memory(self._mem(base * 100 + i))
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        stats = storage.get_contention_stats()
+        assert storage.count() == 200
+        assert stats["writes"] >= 200
+        assert stats["commits"] <= stats["writes"]
+        assert stats["commit_failures"] == 0
+
+    def test_failed_group_commit_reported_to_batch(self, storage):
+        class _FailingCommit:
+            def __init__(self, conn):
+                self._conn = conn
+
+            def __getattr__(self, name):
+                return getattr(self._conn, name)
+
+            def commit(self):
+                raise sqlite3.OperationalError("disk I/O error")
+
+        storage.save_memory(self._mem(1))
+        real = storage._conn
+        storage._conn = _FailingCommit(real)
+        try:
+            with pytest.raises(sqlite3.Error), storage._write() as conn:
+                conn.execute("DELETE FROM memories WHERE id = 'm1'")
+            # 公开方法记录日志并以返回值表示失败, 不抛出
+            assert storage.delete_memory("m1") is False
+            storage.save_memory(self._mem(2))
+        finally:
+            storage._conn = real
+
+        assert storage.get_memory("m1") is not None
+        assert storage.get_memory("m2") is None
+        assert storage.get_contention_stats()["commit_failures"] == 3
+        # 后续批次不受影响
+        assert storage.delete_memory("m1") is True
+        assert storage.get_memory("m1") is None
+
+    def test_reads_not_blocked_by_open_write(self, storage):
+        import threading
+
+        storage.save_memory(self._mem(1))
+        entered, release = threading.Event(), threading.Event()
+
+        def slow_writer():
+            with storage._write() as conn:
+                conn.execute("UPDATE memories SET content = 'pending' WHERE id = 'm1'")
+                entered.set()
+                release.wait(2)
+
+        t = threading.Thread(target=slow_writer)
+        t.start()
+        try:
+            assert entered.wait(2)
+            # 写锁被占用时, 读连接仍能立即读到已提交的数据
+            assert storage.get_memory("m1")["content"] == "concurrent memory 1"
+        finally:
+            release.set()
+            t.join()
+        assert storage.get_memory("m1")["content"] == "pending"
+
+    def test_writer_fallback_without_pool(self, tmp_path):
+        db = MemoryStorage(tmp_path / "nopool.db", read_pool_size=0)
+        db.save_memory(self._mem(1))
+        assert db.get_memory("m1") is not None
+        assert db.get_contention_stats()["read_connections"] == 0
+        db.close()
+
+
+class TestCjkFts:
+    def _save(self, storage, mid, content):
+        storage.save_memory({"id": mid, "content": content, "created_at": datetime.now().isoformat()})
+
+    def test_segment_cjk(self):
+        from openakita.memory.storage import segment_cjk
+
+        assert segment_cjk("喜欢Python编程").split() == ["喜欢", "欢", "Python", "编程", "程"]
+        assert segment_cjk("") == ""
+
+    def test_cjk_query_hits_index(self, storage, monkeypatch):
+        self._save(storage, "m1", "用户喜欢使用深色主题的编辑器")
+        self._save(storage, "m2", "项目部署在杭州机房")
+        monkeypatch.setattr(
+            storage, "_search_like",
+            lambda *a: pytest.fail("CJK query should not fall back to LIKE"),
+        )
+
+        assert [r["id"] for r in storage.search_fts("深色主题")] == ["m1"]
+        assert [r["id"] for r in storage.search_fts("杭")] == ["m2"]
+        assert storage.search_fts("主题编辑") == []
+        assert "content_seg" not in storage.search_fts("机房")[0]
+
+    def test_update_content_reindexes(self, storage):
+        self._save(storage, "m1", "喜欢喝咖啡")
+        storage.update_memory("m1", {"content": "喜欢喝绿茶"})
+        assert storage.search_fts("咖啡") == []
+        assert [r["id"] for r in storage.search_fts("绿茶")] == ["m1"]
+
+    def test_access_bump_does_not_touch_fts(self, storage):
+        self._save(storage, "m1", "喜欢喝咖啡")
+        statements: list[str] = []
+        storage._conn.set_trace_callback(statements.append)
+        storage.bump_access_many(["m1"])
+        storage._conn.set_trace_callback(None)
+        assert not any("memories_fts" in s for s in statements)
+
+    def test_migrates_v2_database(self, tmp_path):
+        path = tmp_path / "v2.db"
+        conn = sqlite3.connect(path)
+        conn.executescript("""
+            CREATE TABLE _schema_meta (key TEXT PRIMARY KEY, value TEXT);
+            INSERT INTO _schema_meta VALUES ('version', '2');
+            CREATE TABLE memories (
+                id TEXT PRIMARY KEY, content TEXT NOT NULL,
+                type TEXT NOT NULL DEFAULT 'FACT', priority TEXT NOT NULL DEFAULT 'SHORT_TERM',
+                source TEXT DEFAULT '', importance_score REAL DEFAULT 0.5,
+                access_count INTEGER DEFAULT 0, tags TEXT DEFAULT '[]',
+                created_at TEXT NOT NULL, updated_at TEXT NOT NULL, expires_at TEXT,
+                metadata TEXT DEFAULT '{}', subject TEXT DEFAULT '', predicate TEXT DEFAULT '',
+                confidence REAL DEFAULT 0.5, decay_rate REAL DEFAULT 0.1,
+                last_accessed_at TEXT, superseded_by TEXT, source_episode_id TEXT
+            );
+            CREATE VIRTUAL TABLE memories_fts USING fts5(
+                content, subject, predicate, tags, content=memories, content_rowid=rowid
+            );
+            CREATE TRIGGER memories_fts_ai AFTER INSERT ON memories BEGIN
+                INSERT INTO memories_fts(rowid, content, subject, predicate, tags)
+                VALUES (new.rowid, new.content, new.subject, new.predicate, new.tags);
+            END;
+            INSERT INTO memories (id, content, created_at, updated_at)
+            VALUES ('old', '每周五下午提交周报', '2024-01-01', '2024-01-01');
+        """)
+        conn.close()
+
+        db = MemoryStorage(path)
+        try:
+            assert db._get_schema_version() == 3
+            assert [r["id"] for r in db.search_fts("周报")] == ["old"]
+            self._save(db, "new", "周一例会")
+            assert [r["id"] for r in db.search_fts("例会")] == ["new"]
+        finally:
+            db.close()
@@ -0,0 +1,103 @@
+"""L1 Unit Tests: cached token counting service."""
+
+import pytest
+
+from openakita.core import token_counter
+from openakita.core.token_counter import TokenCounter, count_cjk_chars, estimate_text_tokens
+
+
+def _legacy_estimate(text: str) -> int:
+    if not text:
+        return 0
+    chinese = sum(1 for c in text if "一" <= c <= "鿿")
+    return max(int(chinese / 1.5 + (len(text) - chinese) / 4), 1)
+
+
+class TestTextEstimate:
+    @pytest.mark.parametrize("text", [
+        "",
+        "hello world",
+        "你好世界",
+        "混合 mixed 文本，带标点！and emoji 🎉",
+        "中文" * 500 + "english" * 300,
+    ])
+    def test_matches_legacy_algorithm(self, text):
+        assert estimate_text_tokens(text) == _legacy_estimate(text)
+
+    def test_cjk_count_without_numpy(self, monkeypatch):
+        monkeypatch.setattr(token_counter, "_NUMPY_AVAILABLE", False)
+        text = "中文abc" * 200
+        assert count_cjk_chars(text) == 400
+
+    def test_ascii_fast_path(self):
+        assert count_cjk_chars("plain ascii " * 100) == 0
+
+
+class TestMessageCounting:
+    def test_counts_block_content(self):
+        counter = TokenCounter()
+        msgs = [
+            {"role": "user", "content": "hello"},
+            {"role": "assistant", "content": [
+                {"type": "text", "text": "world"},
+                {"type": "tool_use", "id": "t1", "name": "run", "input": {"cmd": "ls"}},
+            ]},
+        ]
+        assert counter.count_messages(msgs) > 20
+
+    def test_message_cache_hits(self):
+        counter = TokenCounter()
+        msgs = [{"role": "user", "content": "x" * 1000} for _ in range(3)]
+        first = counter.count_messages(msgs)
+        assert counter.count_messages(list(msgs)) == first
+        assert counter.get_stats()["message_hits"] == 3
+
+    def test_replaced_content_is_recounted(self):
+        counter = TokenCounter()
+        msg = {"role": "user", "content": "short"}
+        before = counter.count_message(msg)
+        msg["content"] = "much longer content " * 50
+        assert counter.count_message(msg) > before
+
+    def test_appended_block_is_recounted(self):
+        counter = TokenCounter()
+        msg = {"role": "user", "content": [{"type": "text", "text": "a" * 100}]}
+        before = counter.count_message(msg)
+        msg["content"].append({"type": "text", "text": "b" * 400})
+        assert counter.count_message(msg) == before + 100
+
+    def test_append_reuses_message_cache(self):
+        counter = TokenCounter()
+        msgs = [{"role": "user", "content": f"message {i} " * 20} for i in range(50)]
+        total = counter.count_messages(msgs)
+        msgs.append({"role": "assistant", "content": "reply " * 20})
+
+        appended = counter.count_messages(msgs)
+
+        assert counter.get_stats()["message_misses"] == 51
+        assert appended == TokenCounter().count_messages(msgs)
+        assert appended > total
+
+    def test_truncation(self):
+        counter = TokenCounter()
+        msgs = [{"role": "user", "content": "abcd" * 10} for _ in range(5)]
+        counter.count_messages(msgs)
+        del msgs[2:]
+        assert counter.count_messages(msgs) == TokenCounter().count_messages(msgs)
+
+    def test_in_place_replacement(self):
+        counter = TokenCounter()
+        msgs = [{"role": "user", "content": "long message " * 200} for _ in range(5)]
+        counter.count_messages(msgs)
+
+        # 压缩后原地替换: clear + extend
+        summary = [{"role": "user", "content": "summary"}, {"role": "assistant", "content": "ok"}]
+        msgs.clear()
+        msgs.extend(summary)
+
+        assert counter.count_messages(msgs) == TokenCounter().count_messages(msgs)
+
+    def test_unknown_model_uses_heuristic(self):
+        counter = TokenCounter(model="qwen-max")
+        assert counter.tokenizer_name == "heuristic"
+        assert counter.count_text("你好世界") == estimate_text_tokens("你好世界")
@@ -0,0 +1,94 @@
+"""FileExporter: 追加式 trace 日志 + 内存聚合 + 定期刷新的每日摘要."""
+
+import json
+import time
+
+from openakita.tracing.exporter import FileExporter, _DailyAggregate
+from openakita.tracing.tracer import Span, SpanStatus, SpanType, Trace
+
+
+def _make_trace(trace_id: str, duration_s: float = 1.0, tool_error: bool = False) -> Trace:
+    start = time.time()
+    trace = Trace(trace_id=trace_id, session_id="s1", start_time=start)
+    llm = Span(span_id=f"{trace_id}-llm", name="llm.call", span_type=SpanType.LLM, start_time=start)
+    llm.attributes.update({"input_tokens": 100, "output_tokens": 20})
+    tool = Span(span_id=f"{trace_id}-tool", name="tool.execute", span_type=SpanType.TOOL, start_time=start)
+    if tool_error:
+        tool.status = SpanStatus.ERROR
+    trace.add_span(llm)
+    trace.add_span(tool)
+    trace.end_time = start + duration_s
+    return trace
+
+
+class TestDailyAggregate:
+    def test_sums_and_percentiles(self):
+        agg = _DailyAggregate("2026-01-01")
+        for ms in range(1, 1001):
+            agg.add({"duration_ms": float(ms), "llm_calls": 1, "tool_calls": 2, "tool_errors": 0})
+        d = agg.to_dict()
+        assert d["total_traces"] == 1000
+        assert d["total_llm_calls"] == 1000
+        assert d["avg_duration_ms"] == 500.5
+        assert 400 <= d["duration_percentiles_ms"]["p50"] <= 600
+        assert 850 <= d["duration_percentiles_ms"]["p90"] <= 1000
+        assert d["duration_percentiles_ms"]["p99"] <= 1000
+        assert sum(d["duration_histogram"]["counts"]) == 1000
+
+    def test_empty(self):
+        d = _DailyAggregate("2026-01-01").to_dict()
+        assert d["total_traces"] == 0
+        assert d["duration_percentiles_ms"]["p50"] == 0.0
+
+
+class TestFileExporter:
+    def test_appends_trace_log_and_summary_is_consistent(self, tmp_path):
+        exporter = FileExporter(tmp_path, flush_every=1000, flush_interval=3600)
+        for i in range(5):
+            exporter.export(_make_trace(f"trace-{i:04d}", tool_error=(i == 0)))
+
+        date_str = next(p.name for p in tmp_path.iterdir() if p.is_dir())
+        day_dir = tmp_path / date_str
+        lines = (day_dir / "traces.jsonl").read_text(encoding="utf-8").splitlines()
+        assert len(lines) == 5
+        assert not (day_dir / "daily_summary.json").exists()
+
+        summary = exporter.load_daily_summary(date_str)
+        assert summary["total_traces"] == 5
+        assert summary["total_input_tokens"] == 500
+        assert summary["total_tool_errors"] == 1
+        assert len(summary["traces"]) == 5
+
+        exporter.shutdown()
+        flushed = json.loads((day_dir / "daily_summary.json").read_text(encoding="utf-8"))
+        assert flushed["total_traces"] == 5
+        assert "traces" not in flushed
+
+    def test_flush_every(self, tmp_path):
+        exporter = FileExporter(tmp_path, flush_every=2, flush_interval=3600)
+        exporter.export(_make_trace("a" * 12))
+        exporter.export(_make_trace("b" * 12))
+        day_dir = next(p for p in tmp_path.iterdir() if p.is_dir())
+        assert json.loads((day_dir / "daily_summary.json").read_text())["total_traces"] == 2
+
+    def test_resumes_from_existing_log(self, tmp_path):
+        first = FileExporter(tmp_path)
+        first.export(_make_trace("a" * 12))
+        second = FileExporter(tmp_path, flush_every=1)
+        second.export(_make_trace("b" * 12))
+        day_dir = next(p for p in tmp_path.iterdir() if p.is_dir())
+        assert json.loads((day_dir / "daily_summary.json").read_text())["total_traces"] == 2
+
+    def test_migrates_legacy_summary(self, tmp_path):
+        exporter = FileExporter(tmp_path, flush_every=1)
+        trace = _make_trace("c" * 12)
+        date_str = time.strftime("%Y-%m-%d", time.localtime(trace.start_time))
+        day_dir = tmp_path / date_str
+        day_dir.mkdir()
+        legacy = {"total_traces": 1, "traces": [{"trace_id": "old", "duration_ms": 10, "llm_calls": 3}]}
+        (day_dir / "daily_summary.json").write_text(json.dumps(legacy), encoding="utf-8")
+
+        exporter.export(trace)
+        summary = exporter.load_daily_summary(date_str)
+        assert summary["total_traces"] == 2
+        assert summary["total_llm_calls"] == 4
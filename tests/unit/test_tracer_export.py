@@ -0,0 +1,93 @@
+"""AgentTracer 后台导出管线: 入队、批量导出、丢弃计数、关闭时刷新."""
+
+import threading
+
+from openakita.tracing.tracer import AgentTracer
+
+
+class _RecordingExporter:
+    def __init__(self, gate: threading.Event | None = None) -> None:
+        self.batches: list[list[str]] = []
+        self.shutdown_called = False
+        self._gate = gate
+
+    def export(self, trace) -> None:
+        self.export_batch([trace])
+
+    def export_batch(self, traces) -> None:
+        if self._gate is not None:
+            self._gate.wait(2)
+        self.batches.append([t.session_id for t in traces])
+
+    def shutdown(self) -> None:
+        self.shutdown_called = True
+
+
+class _LegacyExporter:
+    def __init__(self) -> None:
+        self.ids: list[str] = []
+
+    def export(self, trace) -> None:
+        self.ids.append(trace.session_id)
+
+
+def _run_traces(tracer: AgentTracer, n: int) -> None:
+    for i in range(n):
+        with tracer.start_trace(f"s{i}"), tracer.llm_span(model="m"):
+            pass
+
+
+class TestBackgroundExport:
+    def test_exports_off_thread_and_flushes(self):
+        tracer = AgentTracer(enabled=True, batch_size=8)
+        exporter = _RecordingExporter()
+        legacy = _LegacyExporter()
+        tracer.add_exporter(exporter)
+        tracer.add_exporter(legacy)
+
+        _run_traces(tracer, 20)
+        assert tracer.flush(timeout=5)
+
+        exported = [sid for batch in exporter.batches for sid in batch]
+        assert exported == [f"s{i}" for i in range(20)]
+        assert legacy.ids == exported
+        assert all(len(b) <= 8 for b in exporter.batches)
+        stats = tracer.get_export_stats()
+        assert stats["enqueued"] == 20
+        assert stats["exported"] == 20
+        assert stats["dropped"] == 0
+
+        tracer.shutdown()
+        assert exporter.shutdown_called
+
+    def test_drops_when_queue_full(self):
+        gate = threading.Event()
+        tracer = AgentTracer(enabled=True, queue_size=2, batch_size=1)
+        exporter = _RecordingExporter(gate)
+        tracer.add_exporter(exporter)
+
+        _run_traces(tracer, 10)
+        stats = tracer.get_export_stats()
+        assert stats["dropped"] > 0
+        assert stats["enqueued"] + stats["dropped"] == 10
+
+        gate.set()
+        tracer.shutdown()
+        exported = sum(len(b) for b in exporter.batches)
+        assert exported == stats["enqueued"]
+
+    def test_synchronous_mode(self):
+        tracer = AgentTracer(enabled=True, background_export=False)
+        exporter = _RecordingExporter()
+        tracer.add_exporter(exporter)
+        _run_traces(tracer, 3)
+        assert len(exporter.batches) == 3
+        assert tracer.get_export_stats()["queue_depth"] == 0
+
+    def test_export_after_shutdown_is_synchronous(self):
+        tracer = AgentTracer(enabled=True)
+        exporter = _RecordingExporter()
+        tracer.add_exporter(exporter)
+        tracer.shutdown()
+        _run_traces(tracer, 1)
+        assert exporter.batches == [["s0"]]
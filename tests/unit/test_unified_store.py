@@ -77,6 +77,58 @@ class TestSemanticMemoryCRUD:
         assert store.count_memories() == 1
 
 
+class TestBatchedAccess:
+    def _save(self, store, n):
+        mems = [SemanticMemory(content=f"memory {i}") for i in range(n)]
+        for m in mems:
+            store.save_semantic(m)
+        return mems
+
+    def test_get_memories_batch(self, store):
+        mems = self._save(store, 3)
+        rows = store.db.get_memories([mems[2].id, "missing", mems[0].id])
+        assert set(rows) == {mems[0].id, mems[2].id}
+
+    def test_bump_access_many_single_statement(self, store):
+        mems = self._save(store, 20)
+        statements = []
+        store.db._conn.set_trace_callback(statements.append)
+        touched = store.db.bump_access_many([m.id for m in mems])
+        store.db._conn.set_trace_callback(None)
+
+        assert touched == 20
+        # 触发器执行时 trace 会重复回显父语句, 按不同语句计数
+        assert len({s for s in statements if s.startswith("UPDATE memories SET access_count")}) == 1
+        assert all(r["access_count"] == 1 for r in store.db.get_memories([m.id for m in mems]).values())
+
+    def test_get_semantic_defers_access_writes(self, store):
+        mem = self._save(store, 1)[0]
+        store.get_semantic(mem.id)
+        second = store.get_semantic(mem.id)
+
+        assert second.access_count == 1  # 读取时已计入未写回的访问
+        assert store.db.get_memory(mem.id)["access_count"] == 0
+        assert store.flush_access() == 1
+        assert store.db.get_memory(mem.id)["access_count"] == 2
+
+    def test_pending_access_flushed_by_threshold(self, store):
+        mems = self._save(store, UnifiedStore._ACCESS_FLUSH_EVERY)
+        store.get_semantic_many([m.id for m in mems])
+        assert store._pending_access == {}
+        assert store.db.get_memory(mems[0].id)["access_count"] == 1
+
+    def test_search_hydrates_in_one_query(self, store):
+        self._save(store, 5)
+        store.db._read_pool_size = 0  # 读走写连接, 方便统计语句
+        statements = []
+        store.db._conn.set_trace_callback(statements.append)
+        results = store.search_semantic("memory", limit=5)
+        store.db._conn.set_trace_callback(None)
+
+        assert results
+        assert sum(1 for s in statements if "WHERE id IN" in s) == 1
+
+
 class TestEpisodeCRUD:
     def test_save_and_get(self, store):
         ep = Episode(session_id="s1", summary="test episode", goal="testing")